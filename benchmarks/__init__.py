@@ -0,0 +1 @@
+"""Benchmarks for the match list change detector."""
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the centralized FOGIS API client service.
+
+Serves the two endpoints the detector uses through
+``CentralizedFogisApiClient``:
+
+- ``/health``: 200 when the service is up
+- ``/matches``: a JSON list of synthetic matches
+
+Successive ``/matches`` responses alternate between two versions of the same
+generated list, so every fetch after the first sees the configured share of
+new, removed and changed matches. Both versions are encoded (and optionally
+gzip-compressed) up front, so serving a response costs only the configured
+latency and the write. A seeded share of ``/matches`` requests can fail with
+503 to exercise the error path.
+
+Usage:
+    python -m benchmarks.api_stub [--port N] [--matches N] [--latency SECONDS]
+        [--compress] [--error-rate RATE]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from benchmarks.generator import ChangeRates, generate_match_list, next_version
+
+
+class StubApiSettings(NamedTuple):
+    """Behaviour of the stub API."""
+
+    matches: int = 1000
+    latency: float = 0.0
+    compress: bool = False
+    error_rate: float = 0.0
+    rates: ChangeRates = ChangeRates()
+    seed: int = 0
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    """Request handler serving the stub endpoints."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_StubHTTPServer"
+
+    def do_GET(self) -> None:  # noqa: N802 - name required by BaseHTTPRequestHandler
+        """Serve /health and /matches."""
+        stub = self.server.stub
+        path = self.path.split("?", 1)[0]
+        if stub.settings.latency:
+            time.sleep(stub.settings.latency)
+
+        if path == "/health":
+            self._send(HTTPStatus.OK, b'{"status":"healthy"}', gzipped=False)
+        elif path == "/matches":
+            gzip_ok = "gzip" in self.headers.get("Accept-Encoding", "")
+            status, body, gzipped = stub.next_response(gzip_ok)
+            self._send(status, body, gzipped)
+        else:
+            self._send(HTTPStatus.NOT_FOUND, b'{"error":"not found"}', gzipped=False)
+
+    def _send(self, status: int, body: bytes, gzipped: bool) -> None:
+        """Send a JSON response."""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stub.record_sent(len(body))
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        """Keep request lines out of the benchmark output."""
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    """Threaded server carrying a reference to its stub."""
+
+    daemon_threads = True
+    request_queue_size = 128
+    stub: "StubApiServer"
+
+
+class StubApiServer:
+    """Run the stub API on a local port."""
+
+    def __init__(
+        self, settings: StubApiSettings = StubApiSettings(), host: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        """
+        Generate and encode the match list versions.
+
+        Args:
+            settings: Stub behaviour
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free port
+        """
+        self.settings = settings
+        self.host = host
+        self.port = port
+
+        previous = generate_match_list(settings.matches, seed=settings.seed)
+        current, self.expected_changes = next_version(previous, settings.rates, settings.seed + 1)
+        self._bodies: List[bytes] = [
+            json.dumps(version, separators=(",", ":")).encode() for version in (previous, current)
+        ]
+        self._gzipped: List[bytes] = (
+            [gzip.compress(body, compresslevel=6) for body in self._bodies]
+            if settings.compress
+            else []
+        )
+
+        self._rng = random.Random(settings.seed)
+        self._lock = threading.Lock()
+        self._fetches = 0
+        self.stats: Dict[str, int] = {"requests": 0, "errors": 0, "bytes_sent": 0}
+        self._server: Optional[_StubHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running stub."""
+        return f"http://{self.host}:{self.port}"
+
+    def next_response(self, gzip_ok: bool) -> Tuple[int, bytes, bool]:
+        """
+        Pick the response for the next /matches request.
+
+        Args:
+            gzip_ok: Whether the client accepts gzip
+
+        Returns:
+            Status code, body and whether the body is gzip-compressed
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            if self._rng.random() < self.settings.error_rate:
+                self.stats["errors"] += 1
+                return HTTPStatus.SERVICE_UNAVAILABLE, b'{"error":"injected failure"}', False
+            version = self._fetches % 2
+            self._fetches += 1
+        if self._gzipped and gzip_ok:
+            return HTTPStatus.OK, self._gzipped[version], True
+        return HTTPStatus.OK, self._bodies[version], False
+
+    def record_sent(self, size: int) -> None:
+        """Count bytes written in response bodies."""
+        with self._lock:
+            self.stats["bytes_sent"] += size
+
+    def start(self) -> None:
+        """Start serving in a background thread."""
+        self._server = _StubHTTPServer((self.host, self.port), _StubRequestHandler)
+        self._server.stub = self
+        self.port = int(self._server.server_address[1])
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.1}, daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StubApiServer":
+        """Start the stub for the duration of a with block."""
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop the stub."""
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the stub API in the foreground."""
+    defaults = StubApiSettings()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--matches", type=int, default=defaults.matches)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per response")
+    parser.add_argument("--compress", action="store_true", help="gzip /matches responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of failing fetches")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    settings = StubApiSettings(
+        matches=args.matches,
+        latency=args.latency,
+        compress=args.compress,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    with StubApiServer(settings, host=args.host, port=args.port) as stub:
+        print(f"Serving {args.matches} matches at {stub.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
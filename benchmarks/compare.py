@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate for the diff benchmark.
+
+Compares diff benchmark results (``benchmarks.diff``) against a committed
+baseline and fails when a metric got worse by more than its tolerance:
+
+- ``wall_seconds``: best wall time of each operation
+- ``peak_bytes``: peak traced memory of each operation
+- ``allocated_blocks``: memory blocks still allocated after each operation
+- ``max_rss_kb``: peak resident set size per list size
+
+Tolerances are relative increases over the baseline. Defaults can be
+overridden in the baseline file under ``"tolerances"`` and on the command
+line. An increase also has to exceed a small absolute floor per metric, so
+sub-millisecond jitter does not fail the gate. Without ``--current`` the
+benchmark is run with the sizes, rates, seed and repeat count recorded in
+the baseline, and a second run confirms any regression before the gate
+fails, keeping the better value of each metric.
+
+Wall times and RSS depend on the machine, so the baseline has to be
+recorded on the machine that runs the gate (``--update``).
+
+Usage:
+    python -m benchmarks.compare [--baseline benchmarks/baselines/diff.json]
+        [--current results.json] [--tolerance METRIC=RATIO ...] [--update]
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, cast
+
+from benchmarks.generator import ChangeRates
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "diff.json"
+
+# List sizes of a new baseline; 100k matches takes too long for a local gate
+BASELINE_SIZES = (1_000, 10_000)
+
+# Allowed relative increase per metric
+DEFAULT_TOLERANCES = {
+    "wall_seconds": 0.5,
+    "peak_bytes": 0.1,
+    "allocated_blocks": 0.1,
+    "max_rss_kb": 0.15,
+}
+
+# Increases at or below these absolute amounts never count as regressions
+ABSOLUTE_FLOORS = {
+    "wall_seconds": 0.002,
+    "peak_bytes": 64 * 1024,
+    "allocated_blocks": 100,
+    "max_rss_kb": 4 * 1024,
+}
+
+OK = "ok"
+IMPROVED = "improved"
+REGRESSION = "REGRESSION"
+MISSING = "MISSING"
+NEW = "new"
+
+
+class Comparison(NamedTuple):
+    """Comparison of one metric against the baseline."""
+
+    name: str
+    metric: str
+    baseline: Optional[float]
+    current: Optional[float]
+    tolerance: float
+    status: str
+
+    @property
+    def change(self) -> Optional[float]:
+        """Relative change from the baseline, if both values are known and nonzero."""
+        if self.baseline is None or self.current is None or not self.baseline:
+            return None
+        return (self.current - self.baseline) / abs(self.baseline)
+
+
+def flatten_results(results: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Flatten diff benchmark results into named metric values.
+
+    Args:
+        results: Output of benchmarks.diff.run
+
+    Returns:
+        Values keyed by "<size>/<operation>/<metric>" and "<size>/max_rss_kb"
+    """
+    values: Dict[str, float] = {}
+    for result in results["results"]:
+        size = result["size"]
+        for operation, metrics in result["operations"].items():
+            for metric, value in metrics.items():
+                values[f"{size}/{operation}/{metric}"] = value
+        if result.get("max_rss_kb") is not None:
+            values[f"{size}/max_rss_kb"] = result["max_rss_kb"]
+    return values
+
+
+def compare_values(
+    name: str, baseline: Optional[float], current: Optional[float], tolerance: float
+) -> Comparison:
+    """Classify one metric value against its baseline."""
+    metric = name.rsplit("/", 1)[-1]
+    if current is None:
+        status = MISSING
+    elif baseline is None:
+        status = NEW
+    else:
+        increase = current - baseline
+        if increase > baseline * tolerance and increase > ABSOLUTE_FLOORS.get(metric, 0):
+            status = REGRESSION
+        elif -increase > baseline * tolerance and -increase > ABSOLUTE_FLOORS.get(metric, 0):
+            status = IMPROVED
+        else:
+            status = OK
+    return Comparison(name, metric, baseline, current, tolerance, status)
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    tolerances: Optional[Dict[str, float]] = None,
+) -> List[Comparison]:
+    """
+    Compare benchmark results against a baseline.
+
+    Args:
+        baseline: Baseline results, optionally with a "tolerances" mapping
+        current: Current results
+        tolerances: Tolerance overrides per metric
+
+    Returns:
+        One comparison per metric in either result set, in baseline order
+    """
+    limits = {**DEFAULT_TOLERANCES, **baseline.get("tolerances", {}), **(tolerances or {})}
+    baseline_values = flatten_results(baseline)
+    current_values = flatten_results(current)
+
+    names = list(baseline_values) + [name for name in current_values if name not in baseline_values]
+    return [
+        compare_values(
+            name,
+            baseline_values.get(name),
+            current_values.get(name),
+            limits.get(name.rsplit("/", 1)[-1], 0.0),
+        )
+        for name in names
+    ]
+
+
+def has_regressions(comparisons: Sequence[Comparison]) -> bool:
+    """Whether any metric regressed or is missing from the current results."""
+    return any(comparison.status in (REGRESSION, MISSING) for comparison in comparisons)
+
+
+def _format_value(metric: str, value: Optional[float]) -> str:
+    """Format a metric value for the comparison table."""
+    if value is None:
+        return "-"
+    if metric == "wall_seconds":
+        return f"{value * 1000:.2f} ms"
+    if metric == "peak_bytes":
+        return f"{value / 1e6:.2f} MB"
+    if metric == "max_rss_kb":
+        return f"{value / 1024:.1f} MB"
+    return f"{value:.0f}"
+
+
+def format_table(comparisons: Sequence[Comparison]) -> str:
+    """
+    Format comparisons as a readable table.
+
+    Returns:
+        Table with one row per metric and the relative change and tolerance
+    """
+    rows = [("metric", "baseline", "current", "change", "limit", "status")]
+    for comparison in comparisons:
+        change = comparison.change
+        rows.append(
+            (
+                comparison.name,
+                _format_value(comparison.metric, comparison.baseline),
+                _format_value(comparison.metric, comparison.current),
+                f"{change:+.1%}" if change is not None else "-",
+                f"+{comparison.tolerance:.0%}",
+                comparison.status,
+            )
+        )
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    lines = [
+        "  ".join(
+            cell.ljust(width) if column == 0 else cell.rjust(width)
+            for column, (cell, width) in enumerate(zip(row, widths))
+        )
+        for row in rows
+    ]
+    lines.insert(1, "-" * len(lines[0]))
+    return "\n".join(lines)
+
+
+def parse_tolerances(values: Sequence[str]) -> Dict[str, float]:
+    """
+    Parse METRIC=RATIO tolerance overrides.
+
+    Raises:
+        ValueError: If an override is malformed or names an unknown metric
+    """
+    tolerances = {}
+    for value in values:
+        metric, separator, ratio = value.partition("=")
+        if not separator or metric not in DEFAULT_TOLERANCES:
+            raise ValueError(
+                f"Invalid tolerance {value!r}; expected METRIC=RATIO with METRIC one of "
+                f"{', '.join(DEFAULT_TOLERANCES)}"
+            )
+        tolerances[metric] = float(ratio)
+    return tolerances
+
+
+def merge_best(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combine two runs of the same benchmark, keeping the lower value of each metric.
+
+    Returns:
+        The first run with its operation metrics and peak RSS lowered to the
+        second's where smaller
+    """
+    merged = cast(Dict[str, Any], json.loads(json.dumps(first)))
+    second_results = {result["size"]: result for result in second["results"]}
+    for result in merged["results"]:
+        other = second_results.get(result["size"])
+        if other is None:
+            continue
+        for operation, metrics in result["operations"].items():
+            for metric, value in metrics.items():
+                other_value = other["operations"].get(operation, {}).get(metric)
+                if other_value is not None:
+                    metrics[metric] = min(value, other_value)
+        if result.get("max_rss_kb") is not None and other.get("max_rss_kb") is not None:
+            result["max_rss_kb"] = min(result["max_rss_kb"], other["max_rss_kb"])
+    return merged
+
+
+def run_like(baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Run the diff benchmark with the settings recorded in a baseline."""
+    from benchmarks.diff import run
+
+    return run(
+        sizes=[result["size"] for result in baseline["results"]],
+        rates=ChangeRates(**baseline["rates"]),
+        seed=baseline["seed"],
+        repeat=baseline["repeat"],
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the regression gate from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="baseline JSON file")
+    parser.add_argument("--current", help="results JSON to check instead of running the benchmark")
+    parser.add_argument(
+        "--tolerance",
+        action="append",
+        default=[],
+        metavar="METRIC=RATIO",
+        help="allowed relative increase, e.g. wall_seconds=0.3",
+    )
+    parser.add_argument("--update", action="store_true", help="replace the baseline and exit")
+    args = parser.parse_args(argv)
+
+    try:
+        tolerances = parse_tolerances(args.tolerance)
+    except ValueError as e:
+        parser.error(str(e))
+
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+    elif args.update:
+        baseline = {"results": [{"size": size} for size in BASELINE_SIZES]}
+        baseline.update(seed=0, repeat=5, rates=ChangeRates()._asdict())
+    else:
+        parser.error(f"Baseline not found: {baseline_path} (create it with --update)")
+
+    if args.current:
+        current = json.loads(Path(args.current).read_text())
+    else:
+        current = run_like(baseline)
+
+    if args.update:
+        if "tolerances" in baseline:
+            current["tolerances"] = baseline["tolerances"]
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Baseline updated: {baseline_path}")
+        return 0
+
+    comparisons = compare_results(baseline, current, tolerances)
+    if has_regressions(comparisons) and not args.current:
+        # Confirm with a second run so one noisy measurement does not fail the gate
+        print("Possible regression, running the benchmark again to confirm")
+        current = merge_best(current, run_like(baseline))
+        comparisons = compare_results(baseline, current, tolerances)
+
+    print(f"Baseline {baseline_path} (commit {baseline.get('commit')}, {baseline.get('created')})")
+    print(f"Current  commit {current.get('commit')}, {current.get('created')}")
+    print()
+    print(format_table(comparisons))
+    print()
+
+    if has_regressions(comparisons):
+        failed = [c for c in comparisons if c.status in (REGRESSION, MISSING)]
+        print(f"{len(failed)} metric(s) regressed beyond their tolerance")
+        return 1
+    print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
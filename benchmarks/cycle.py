@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+End-to-end detection cycle benchmark against a local stub API.
+
+Runs ``MatchListChangeDetector.run`` against the stub of the centralized FOGIS
+API client service in ``benchmarks.api_stub``, with a fake ``docker-compose``
+on the PATH so the orchestrator trigger runs a real subprocess without
+starting any containers. Snapshot, changes and history files are written to a
+temporary directory.
+
+After an untimed first cycle that stores the initial snapshot, every cycle
+sees the configured share of changes. Reports cycle throughput, cycle and
+per-stage latency percentiles, the stub's request and error counts, the peak
+traced memory of one extra cycle run under tracemalloc and the process's peak
+resident set size.
+
+Usage:
+    python -m benchmarks.cycle [--matches N] [--cycles N] [--latency SECONDS]
+        [--compress] [--error-rate RATE] [--rate-limit N] [--trigger-delay SECONDS]
+        [--new RATE] [--removed RATE] [--changed RATE] [--seed N] [--output results.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import stat
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from benchmarks.api_stub import StubApiServer, StubApiSettings
+from benchmarks.diff import max_rss_kb
+from benchmarks.generator import ChangeRates
+from benchmarks.http_throughput import summarize_latencies
+
+# Make the application modules importable when run from a checkout
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+FAKE_DOCKER_COMPOSE = """#!/bin/sh
+# Stand-in for docker-compose used by the cycle benchmark
+sleep {delay}
+echo "fake docker-compose $*"
+"""
+
+
+@contextmanager
+def fake_orchestrator(work_dir: Path, delay: float = 0.0) -> Iterator[Path]:
+    """
+    Put a fake docker-compose on the PATH for the duration of the context.
+
+    Args:
+        work_dir: Directory for the fake executable and compose file
+        delay: Seconds the fake docker-compose takes to return
+
+    Yields:
+        Path of the compose file to trigger
+    """
+    bin_dir = work_dir / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    executable = bin_dir / "docker-compose"
+    executable.write_text(FAKE_DOCKER_COMPOSE.format(delay=delay))
+    executable.chmod(executable.stat().st_mode | stat.S_IXUSR)
+    compose_file = work_dir / "orchestrator-docker-compose.yml"
+    compose_file.write_text("services: {}\n")
+
+    original_path = os.environ.get("PATH", "")
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{original_path}"
+    try:
+        yield compose_file
+    finally:
+        os.environ["PATH"] = original_path
+
+
+def run_cycles(
+    stub: StubApiServer, cycles: int, rate_limit: Optional[int], trace_memory: bool = True
+) -> Dict[str, Any]:
+    """
+    Time detection cycles against a running stub.
+
+    Args:
+        stub: Running stub API
+        cycles: Number of timed cycles
+        rate_limit: Detector API requests per minute, or None for no limit
+        trace_memory: Whether to run one extra cycle under tracemalloc
+
+    Returns:
+        Throughput, cycle and stage latency summaries and memory use
+    """
+    from centralized_api_client import CentralizedFogisApiClient
+    from match_list_change_detector import MatchListChangeDetector, RateLimiter
+
+    # One rate limiter shared by all cycles, as in the persistent service
+    rate_limiter = RateLimiter(max_requests=rate_limit if rate_limit else 10**9)
+
+    def cycle() -> Tuple[bool, MatchListChangeDetector]:
+        detector = MatchListChangeDetector("benchmark", "benchmark")
+        detector.api_client = CentralizedFogisApiClient(api_client_url=stub.url)
+        detector.rate_limiter = rate_limiter
+        return detector.run(), detector
+
+    # Store the initial snapshot so timed cycles diff against a previous list
+    cycle()
+
+    timings: List[float] = []
+    stages: Dict[str, List[float]] = defaultdict(list)
+    failures = 0
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(cycles):
+        cycle_start = time.perf_counter()
+        succeeded, detector = cycle()
+        timings.append(time.perf_counter() - cycle_start)
+        failures += not succeeded
+        for stage, seconds in detector.stage_timings.items():
+            stages[stage].append(seconds)
+    elapsed = time.perf_counter() - start
+
+    peak_bytes = None
+    if trace_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            cycle()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "cycles": cycles,
+        "failures": failures,
+        "cycles_per_second": cycles / elapsed if elapsed else 0.0,
+        "cycle_ms": summarize_latencies(sorted(timings)),
+        "stage_ms": {
+            stage: summarize_latencies(sorted(values)) for stage, values in stages.items()
+        },
+        "peak_traced_bytes": peak_bytes,
+        "max_rss_kb": max_rss_kb(),
+    }
+
+
+def run(
+    settings: StubApiSettings = StubApiSettings(),
+    cycles: int = 10,
+    rate_limit: Optional[int] = None,
+    trigger_delay: float = 0.0,
+    trace_memory: bool = True,
+) -> Dict[str, Any]:
+    """
+    Run the end-to-end cycle benchmark.
+
+    Args:
+        settings: Stub API behaviour, list size and change rates
+        cycles: Number of timed cycles
+        rate_limit: Detector API requests per minute, or None for no limit
+        trigger_delay: Seconds the fake docker-compose takes to return
+        trace_memory: Whether to run one extra cycle under tracemalloc
+
+    Returns:
+        Settings, cycle results and stub request counts
+    """
+    import match_list_change_detector as detector_module
+    from logging_config import configure_logging
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir)
+        configure_logging(
+            "match_list_change_detector",
+            log_level="WARNING",
+            log_dir=temp_dir,
+            console_output=False,
+        )
+        detector_module.PREVIOUS_MATCHES_FILE = str(work_dir / "previous_matches.json")
+        detector_module.CHANGES_FILE = str(work_dir / "match_changes.json")
+        detector_module.CHANGE_HISTORY_FILE = str(work_dir / "change_history.db")
+
+        with fake_orchestrator(work_dir, trigger_delay) as compose_file:
+            detector_module.DOCKER_COMPOSE_FILE = str(compose_file)
+            with StubApiServer(settings) as stub:
+                results = run_cycles(stub, cycles, rate_limit, trace_memory)
+                stub_stats = dict(stub.stats)
+
+    return {
+        "benchmark": "cycle",
+        "python": sys.version.split()[0],
+        "settings": {
+            "matches": settings.matches,
+            "latency": settings.latency,
+            "compress": settings.compress,
+            "error_rate": settings.error_rate,
+            "rates": settings.rates._asdict(),
+            "seed": settings.seed,
+            "rate_limit": rate_limit,
+            "trigger_delay": trigger_delay,
+        },
+        "results": results,
+        "stub": stub_stats,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line."""
+    defaults = StubApiSettings()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--matches", type=int, default=defaults.matches)
+    parser.add_argument("--cycles", type=int, default=10, help="timed detection cycles")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub seconds per response")
+    parser.add_argument("--compress", action="store_true", help="gzip /matches responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of failing fetches")
+    parser.add_argument("--rate-limit", type=int, help="API requests per minute (default: none)")
+    parser.add_argument("--trigger-delay", type=float, default=0.0, help="fake docker-compose s")
+    parser.add_argument("--new", type=float, default=defaults.rates.new)
+    parser.add_argument("--removed", type=float, default=defaults.rates.removed)
+    parser.add_argument("--changed", type=float, default=defaults.rates.changed)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-trace", action="store_true", help="skip the tracemalloc cycle")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    settings = StubApiSettings(
+        matches=args.matches,
+        latency=args.latency,
+        compress=args.compress,
+        error_rate=args.error_rate,
+        rates=ChangeRates(new=args.new, removed=args.removed, changed=args.changed),
+        seed=args.seed,
+    )
+    results = run(settings, args.cycles, args.rate_limit, args.trigger_delay, not args.no_trace)
+
+    result = results["results"]
+    cycle_ms = result["cycle_ms"]
+    print(
+        f"{result['cycles']} cycles  {result['cycles_per_second']:7.2f} cycles/s  "
+        f"p50 {cycle_ms['p50']:8.2f} ms  p99 {cycle_ms['p99']:8.2f} ms  "
+        f"failures {result['failures']}"
+    )
+    for stage, latency in result["stage_ms"].items():
+        print(f"  {stage:<14} p50 {latency['p50']:8.2f} ms  p99 {latency['p99']:8.2f} ms")
+    stub = results["stub"]
+    print(
+        f"stub: {stub['requests']} fetches, {stub['errors']} injected errors, "
+        f"{stub['bytes_sent'] / 1e6:.1f} MB sent"
+    )
+    if result["peak_traced_bytes"] is not None:
+        print(f"peak traced memory {result['peak_traced_bytes'] / 1e6:.1f} MB")
+    print(f"max RSS {result['max_rss_kb']} kB")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
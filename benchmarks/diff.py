@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the change detection hot path.
+
+For each list size, generates a synthetic match list and its next version
+with controlled change rates, then measures:
+
+- ``detect_changes``: diffing the two versions
+- ``save_current_matches``: writing the snapshot file
+- ``load_previous_matches``: reading the snapshot file back
+
+Each operation reports its best wall time over the repeats, and from a
+separate traced run its peak traced memory (tracemalloc) and the number of
+memory blocks still allocated afterwards. The process's peak resident set
+size is reported per list size. Results can be written to JSON for
+regression comparison.
+
+Usage:
+    python -m benchmarks.diff [--sizes 1000 10000 100000] [--repeat N]
+        [--new RATE] [--removed RATE] [--changed RATE] [--seed N]
+        [--output results.json]
+"""
+
+import argparse
+import gc
+import json
+import platform
+import subprocess  # nosec B404
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from benchmarks.generator import DEFAULT_SIZES, ChangeRates, generate_match_list, next_version
+
+try:
+    import resource
+
+    RESOURCE_AVAILABLE = True
+except ImportError:  # pragma: no cover - not available on Windows
+    RESOURCE_AVAILABLE = False
+
+# Make the application modules importable when run from a checkout
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+OPERATIONS = ("detect_changes", "save_current_matches", "load_previous_matches")
+
+
+def measure(operation: Callable[[], Any], repeat: int = 3) -> Dict[str, float]:
+    """
+    Measure the wall time and memory use of an operation.
+
+    Args:
+        operation: Callable to measure; it must be safe to call repeat + 1 times
+        repeat: Number of timed runs; the fastest is reported
+
+    Returns:
+        Wall time in seconds, peak traced memory in bytes and the number of
+        memory blocks still allocated after the operation
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+
+    # Traced separately so tracing overhead does not distort the wall time
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        result = operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    allocated_blocks = sys.getallocatedblocks() - blocks_before
+    del result
+
+    return {
+        "wall_seconds": min(timings),
+        "peak_bytes": peak - baseline,
+        "allocated_blocks": allocated_blocks,
+    }
+
+
+def max_rss_kb() -> Optional[int]:
+    """Peak resident set size of this process in kilobytes, where available."""
+    if not RESOURCE_AVAILABLE:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return int(usage // 1024 if sys.platform == "darwin" else usage)
+
+
+def git_commit() -> Optional[str]:
+    """Commit of the checkout being benchmarked, if it is a git repository."""
+    try:
+        result = subprocess.run(  # nosec B603 B607
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def benchmark_size(
+    size: int, rates: ChangeRates, seed: int, repeat: int, work_dir: Path
+) -> Dict[str, Any]:
+    """
+    Benchmark the detector operations for one list size.
+
+    Raises:
+        AssertionError: If detect_changes reports different counts than generated
+    """
+    import match_list_change_detector as detector_module
+    from match_list_change_detector import MatchListChangeDetector
+
+    previous = generate_match_list(size, seed=seed)
+    current, expected = next_version(previous, rates, seed=seed + 1)
+
+    detector_module.PREVIOUS_MATCHES_FILE = str(work_dir / f"previous_matches_{size}.json")
+    detector = MatchListChangeDetector("benchmark", "benchmark")
+    detector.previous_matches = previous
+    detector.current_matches = current
+
+    _, changes = detector.detect_changes()
+    reported = (changes["new_matches"], changes["removed_matches"], changes["changed_matches"])
+    if reported != tuple(expected):
+        raise AssertionError(f"detect_changes reported {reported}, expected {tuple(expected)}")
+
+    operations = {
+        "detect_changes": measure(detector.detect_changes, repeat),
+        "save_current_matches": measure(detector.save_current_matches, repeat),
+        "load_previous_matches": measure(detector.load_previous_matches, repeat),
+    }
+    return {
+        "size": size,
+        "expected_changes": expected._asdict(),
+        "snapshot_bytes": Path(detector_module.PREVIOUS_MATCHES_FILE).stat().st_size,
+        "operations": operations,
+        "max_rss_kb": max_rss_kb(),
+    }
+
+
+def run(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    rates: ChangeRates = ChangeRates(),
+    seed: int = 0,
+    repeat: int = 3,
+) -> Dict[str, Any]:
+    """
+    Run the benchmark suite.
+
+    Sizes are run in ascending order, so each peak resident set size reading
+    reflects the largest list benchmarked so far.
+
+    Returns:
+        Environment details and results per list size
+    """
+    from logging_config import configure_logging
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Keep per-operation log lines out of the measurements and the console
+        configure_logging(
+            "match_list_change_detector",
+            log_level="WARNING",
+            log_dir=work_dir,
+            console_output=False,
+        )
+        results = [
+            benchmark_size(size, rates, seed, repeat, Path(work_dir)) for size in sorted(sizes)
+        ]
+
+    return {
+        "benchmark": "diff",
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "seed": seed,
+        "rates": rates._asdict(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark suite from the command line."""
+    defaults = ChangeRates()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per operation")
+    parser.add_argument("--new", type=float, default=defaults.new, help="share of new matches")
+    parser.add_argument("--removed", type=float, default=defaults.removed)
+    parser.add_argument("--changed", type=float, default=defaults.changed)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    rates = ChangeRates(new=args.new, removed=args.removed, changed=args.changed)
+    results = run(args.sizes, rates, args.seed, args.repeat)
+
+    for result in results["results"]:
+        for name in OPERATIONS:
+            operation = result["operations"][name]
+            print(
+                f"{result['size']:>7} {name:<22} {operation['wall_seconds'] * 1000:10.2f} ms  "
+                f"peak {operation['peak_bytes'] / 1e6:8.2f} MB  "
+                f"blocks {operation['allocated_blocks']:>9}"
+            )
+        print(f"{result['size']:>7} max RSS {result['max_rss_kb']} kB")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
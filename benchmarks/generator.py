@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Synthetic FOGIS match list generator for benchmarks and tests.
+
+Generates match lists shaped like the FOGIS API response (tracked fields such
+as ``speldatum``, ``avsparkstid``, ``lag1lagid`` and ``domaruppdraglista`` plus
+the untracked competition, team and venue fields that make up most of a real
+payload), and derives a next version of a list with a controlled share of new,
+removed and changed matches. Generation is deterministic for a given seed.
+"""
+
+import copy
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+# Scales used by the benchmark suite
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+
+# Tracked-field mutations applied to changed matches
+MUTATIONS = ("kickoff", "date", "venue", "status", "referee", "team")
+
+_FIRST_NAMES = ("Anna", "Erik", "Lars", "Maria", "Johan", "Sara", "Karl", "Emma", "Nils", "Ida")
+_LAST_NAMES = ("Andersson", "Johansson", "Karlsson", "Nilsson", "Eriksson", "Larsson", "Olsson")
+_CLUB_SUFFIXES = ("IF", "IK", "FF", "BK", "AIF", "FK", "SK")
+_TOWNS = ("Kungälv", "Motala", "Lerum", "Ale", "Borås", "Alingsås", "Mölndal", "Partille")
+_COMPETITIONS = ("Division 2", "Division 3", "Division 4", "P17", "F19", "Svenska Cupen")
+_REFEREE_ROLES = (("Huvuddomare", "Dom"), ("Assisterande 1", "AD1"), ("Assisterande 2", "AD2"))
+_KICKOFF_TIMES = ("11:00", "13:00", "14:00", "15:00", "16:00", "18:00", "19:00", "19:30")
+
+# First generated match ID; new matches continue after the highest existing ID
+_FIRST_MATCH_ID = 6_000_000
+_SEASON_START = date(2025, 4, 1)
+
+
+class ChangeRates(NamedTuple):
+    """Share of the previous list that is added, removed and changed in the next version."""
+
+    new: float = 0.01
+    removed: float = 0.01
+    changed: float = 0.02
+
+
+class ExpectedChanges(NamedTuple):
+    """Change counts a correct diff must report for a generated list pair."""
+
+    new: int
+    removed: int
+    changed: int
+
+
+def _referee(rng: random.Random, role: int) -> Dict[str, Any]:
+    """Generate one referee assignment."""
+    referee_id = rng.randint(1_000, 99_999)
+    first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+    role_name, role_short = _REFEREE_ROLES[role]
+    return {
+        "domaruppdragid": rng.randint(1_000_000, 9_999_999),
+        "domareid": referee_id,
+        "personnamn": f"{first} {last}",
+        "domarrollnamn": role_name,
+        "domarrollkortnamn": role_short,
+        "epostadress": f"{first}.{last}{referee_id}@example.com".lower(),
+        "mobiltelefon": f"07{rng.randint(0, 99_999_999):08d}",
+        "adress": f"{rng.choice(_TOWNS)}vägen {rng.randint(1, 99)}",
+    }
+
+
+def generate_match(rng: random.Random, match_id: int) -> Dict[str, Any]:
+    """
+    Generate one FOGIS-shaped match.
+
+    Args:
+        rng: Random source
+        match_id: Match ID to use
+
+    Returns:
+        Match dictionary
+    """
+    home_id, away_id = rng.sample(range(20_000, 40_000), 2)
+    home_town, away_town = rng.choice(_TOWNS), rng.choice(_TOWNS)
+    match_date = _SEASON_START + timedelta(days=rng.randint(0, 210))
+    kickoff = rng.choice(_KICKOFF_TIMES)
+    venue_id = rng.randint(1_000, 9_999)
+    return {
+        "matchid": match_id,
+        "matchnr": f"{rng.randint(0, 999_999_999):09d}",
+        "tavlingid": rng.randint(100_000, 200_000),
+        "tavlingnamn": rng.choice(_COMPETITIONS),
+        "tavlingkategorinamn": "Herrar" if rng.random() < 0.6 else "Damer",
+        "speldatum": match_date.isoformat(),
+        "avsparkstid": kickoff,
+        "tid": f"{match_date.isoformat()}T{kickoff}:00",
+        "lag1lagid": home_id,
+        "lag1namn": f"{home_town} {rng.choice(_CLUB_SUFFIXES)}",
+        "lag1foreningid": home_id // 10,
+        "lag2lagid": away_id,
+        "lag2namn": f"{away_town} {rng.choice(_CLUB_SUFFIXES)}",
+        "lag2foreningid": away_id // 10,
+        "anlaggningid": venue_id,
+        "anlaggningnamn": f"{home_town} IP {venue_id % 4 + 1}",
+        "anlaggninglatitud": round(57.0 + rng.random() * 2, 6),
+        "anlaggninglongitud": round(11.5 + rng.random() * 4, 6),
+        "installd": False,
+        "avbruten": False,
+        "uppskjuten": False,
+        "domaruppdraglista": [_referee(rng, role) for role in range(rng.choice((1, 3, 3, 3)))],
+    }
+
+
+def generate_match_list(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate a match list.
+
+    Args:
+        count: Number of matches
+        seed: Random seed
+
+    Returns:
+        List of matches with unique, increasing match IDs
+    """
+    rng = random.Random(seed)
+    return [generate_match(rng, _FIRST_MATCH_ID + i) for i in range(count)]
+
+
+def mutate_match(rng: random.Random, match: Dict[str, Any], mutation: str) -> Dict[str, Any]:
+    """
+    Return a copy of a match with one tracked field changed.
+
+    Args:
+        rng: Random source
+        match: Match to change
+        mutation: One of MUTATIONS
+
+    Returns:
+        Changed copy of the match
+    """
+    changed = copy.deepcopy(match)
+    if mutation == "kickoff":
+        times = [t for t in _KICKOFF_TIMES if t != match["avsparkstid"]]
+        changed["avsparkstid"] = rng.choice(times)
+    elif mutation == "date":
+        match_date = date.fromisoformat(match["speldatum"])
+        changed["speldatum"] = (match_date + timedelta(days=rng.choice((-7, -1, 1, 7)))).isoformat()
+    elif mutation == "venue":
+        changed["anlaggningnamn"] = match["anlaggningnamn"] + " Konstgräs"
+    elif mutation == "status":
+        flag = rng.choice(("installd", "avbruten", "uppskjuten"))
+        changed[flag] = not match[flag]
+    elif mutation == "referee":
+        referees = changed["domaruppdraglista"]
+        replacement = _referee(rng, 0)
+        replacement["domareid"] = max((r["domareid"] for r in referees), default=0) + 1
+        if referees:
+            referees[rng.randrange(len(referees))] = replacement
+        else:
+            referees.append(replacement)
+    elif mutation == "team":
+        changed["lag2lagid"] = match["lag2lagid"] + 1
+    else:
+        raise ValueError(f"Unknown mutation: {mutation}")
+    return changed
+
+
+def next_version(
+    matches: List[Dict[str, Any]], rates: ChangeRates = ChangeRates(), seed: int = 1
+) -> Tuple[List[Dict[str, Any]], ExpectedChanges]:
+    """
+    Derive the next version of a match list with a controlled amount of change.
+
+    Counts are rounded from the rates and the size of the input list. Removed and
+    changed matches are disjoint, every changed match has a tracked field
+    changed, and new matches get IDs above the current maximum.
+
+    Args:
+        matches: Previous version of the list
+        rates: Shares of the list to add, remove and change
+        seed: Random seed
+
+    Returns:
+        Next version of the list and the changes a diff must report
+    """
+    rng = random.Random(seed)
+    count = len(matches)
+    removed = min(count, round(count * rates.removed))
+    changed = min(count - removed, round(count * rates.changed))
+    new = round(count * rates.new)
+
+    picked = rng.sample(range(count), removed + changed)
+    removed_indexes = set(picked[:removed])
+    changed_indexes = set(picked[removed:])
+
+    result = []
+    for index, match in enumerate(matches):
+        if index in removed_indexes:
+            continue
+        if index in changed_indexes:
+            match = mutate_match(rng, match, rng.choice(MUTATIONS))
+        result.append(match)
+
+    next_id = max((m["matchid"] for m in matches), default=_FIRST_MATCH_ID - 1) + 1
+    result.extend(generate_match(rng, next_id + i) for i in range(new))
+    return result, ExpectedChanges(new=new, removed=removed, changed=changed)
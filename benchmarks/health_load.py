@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Load test for the oneshot health server.
+
+Probes /health at several concurrency levels while other clients hold
+connections open with an unfinished request, the way a stalled client or a
+slow TLS handshake would. Latency should stay flat across the grid.
+
+``--legacy`` runs the same grid against the previous single-threaded wsgiref
+server for comparison; there, every probe waits behind the stalled clients.
+
+Usage:
+    python -m benchmarks.health_load [--concurrency 1 8 32] [--stalled 0 16]
+        [--duration SECONDS] [--legacy] [--output results.json]
+"""
+
+import argparse
+import json
+import socket
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, cast
+
+from benchmarks.http_throughput import free_port, measure_throughput, wait_for_port
+
+# Sent by stalled clients: a request whose headers never finish
+PARTIAL_REQUEST = b"GET /health HTTP/1.1\r\nHost: localhost\r\n"
+
+
+@contextmanager
+def health_server(legacy: bool = False) -> Iterator[int]:
+    """
+    Run a health server for the duration of the context.
+
+    Args:
+        legacy: Run the previous single-threaded wsgiref server instead
+
+    Yields:
+        Port the server listens on
+    """
+    port = free_port()
+    if legacy:
+        from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+        from health_server import health_check_handler
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        # The health server types start_response with its own protocol
+        app = cast(Callable[[Dict[str, Any], Any], Iterable[bytes]], health_check_handler)
+        legacy_server = make_server("127.0.0.1", port, app, handler_class=QuietHandler)
+        thread = threading.Thread(target=legacy_server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield port
+        finally:
+            legacy_server.shutdown()
+            legacy_server.server_close()
+    else:
+        from health_server import HealthServer
+
+        server = HealthServer(port=port)
+        server.start()
+        try:
+            wait_for_port(port)
+            yield port
+        finally:
+            server.stop()
+
+
+@contextmanager
+def stalled_connections(port: int, count: int) -> Iterator[List[socket.socket]]:
+    """Hold connections open that never complete their request."""
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.create_connection(("127.0.0.1", port))
+            sock.sendall(PARTIAL_REQUEST)
+            sockets.append(sock)
+        yield sockets
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def run(
+    concurrency_levels: Sequence[int] = (1, 8, 32),
+    stalled_clients: Sequence[int] = (0, 16),
+    duration: float = 2.0,
+    legacy: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run the load test grid.
+
+    Args:
+        concurrency_levels: Numbers of concurrent probing clients
+        stalled_clients: Numbers of stalled connections held open while probing
+        duration: Seconds to probe per grid cell
+        legacy: Test the previous single-threaded wsgiref server
+
+    Returns:
+        Latency and throughput per grid cell
+    """
+    results = []
+    with health_server(legacy) as port:
+        for stalled in stalled_clients:
+            for concurrency in concurrency_levels:
+                with stalled_connections(port, stalled):
+                    result = measure_throughput(
+                        port, "/health", concurrency, duration, timeout=duration
+                    )
+                result["stalled_clients"] = stalled
+                results.append(result)
+    return {
+        "benchmark": "health_load",
+        "server": "wsgiref" if legacy else "threaded",
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the load test from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--stalled", type=int, nargs="+", default=[0, 16])
+    parser.add_argument("--duration", type=float, default=2.0, help="seconds per grid cell")
+    parser.add_argument("--legacy", action="store_true", help="test the wsgiref server")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.concurrency, args.stalled, args.duration, args.legacy)
+
+    print(f"server: {results['server']}")
+    for result in results["results"]:
+        latency = result["latency_ms"]
+        print(
+            f"stalled {result['stalled_clients']:>3}  concurrency {result['concurrency']:>3}  "
+            f"{result['requests_per_second']:9.1f} req/s  "
+            f"p50 {latency['p50']:7.2f} ms  p99 {latency['p99']:7.2f} ms  "
+            f"errors {result['errors']}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+HTTP throughput benchmark for the health and metrics endpoints.
+
+Starts the server of the chosen entry point on a free local port and probes
+the given paths from concurrent keep-alive clients:
+
+- ``service``: the persistent service FastAPI app under uvicorn
+- ``oneshot``: the standalone health server started by oneshot runs
+
+Usage:
+    python -m benchmarks.http_throughput [--target service|oneshot]
+        [--paths /health /metrics] [--concurrency N] [--duration SECONDS]
+        [--output results.json]
+"""
+
+import argparse
+import http.client
+import json
+import socket
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# Make the application modules importable when run from a checkout
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+TARGETS = ("service", "oneshot")
+
+
+def free_port() -> int:
+    """Get a free local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+def wait_for_port(port: int, timeout: float = 10.0) -> None:
+    """
+    Wait until a local port accepts connections.
+
+    Raises:
+        TimeoutError: If the port is not accepting connections in time
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Server on port {port} did not start within {timeout}s")
+
+
+@contextmanager
+def running_server(target: str) -> Iterator[int]:
+    """
+    Run the HTTP server of an entry point for the duration of the context.
+
+    Args:
+        target: "service" or "oneshot"
+
+    Yields:
+        Port the server listens on
+    """
+    port = free_port()
+    if target == "service":
+        from persistent_service import PersistentMatchListChangeDetectorService
+
+        service = PersistentMatchListChangeDetectorService()
+        service.health_server_host = "127.0.0.1"
+        service.health_server_port = port
+        service._start_http_server()
+        try:
+            wait_for_port(port)
+            yield port
+        finally:
+            service.shutdown()
+    elif target == "oneshot":
+        from health_server import HealthServer
+        from metrics import metrics
+
+        server = HealthServer(port=port, metrics_handler=metrics.render)
+        server.start()
+        try:
+            wait_for_port(port)
+            yield port
+        finally:
+            server.stop()
+    else:
+        raise ValueError(f"Unknown target: {target}")
+
+
+def measure_throughput(
+    port: int, path: str, concurrency: int = 8, duration: float = 3.0, timeout: float = 10.0
+) -> Dict[str, Any]:
+    """
+    Probe a path from concurrent keep-alive clients for a fixed duration.
+
+    Args:
+        port: Local port of the server
+        path: Request path
+        concurrency: Number of concurrent clients
+        duration: Seconds to probe for
+        timeout: Seconds before a request counts as failed
+
+    Returns:
+        Request count, errors, requests per second and latency percentiles (ms)
+    """
+    latencies: List[List[float]] = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    stop_at = time.perf_counter() + duration
+
+    def client(index: int) -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+        try:
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                try:
+                    connection.request("GET", path)
+                    response = connection.getresponse()
+                    response.read()
+                except (OSError, http.client.HTTPException):
+                    errors[index] += 1
+                    connection.close()
+                    continue
+                if response.status != 200:
+                    errors[index] += 1
+                latencies[index].append(time.perf_counter() - start)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    samples = sorted(latency for client_latencies in latencies for latency in client_latencies)
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": sum(errors),
+        "requests_per_second": len(samples) / elapsed if elapsed else 0.0,
+        "latency_ms": summarize_latencies(samples),
+    }
+
+
+def summarize_latencies(samples: Sequence[float]) -> Dict[str, float]:
+    """
+    Summarize latency samples in milliseconds.
+
+    Args:
+        samples: Latencies in seconds, sorted ascending
+
+    Returns:
+        Median, 99th percentile and maximum latency in milliseconds
+    """
+    if not samples:
+        return {"p50": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "p50": statistics.median(samples) * 1000,
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000,
+        "max": samples[-1] * 1000,
+    }
+
+
+def run(
+    target: str = "service",
+    paths: Sequence[str] = ("/health", "/metrics"),
+    concurrency: int = 8,
+    duration: float = 3.0,
+) -> Dict[str, Any]:
+    """
+    Run the throughput benchmark against one entry point.
+
+    Returns:
+        Benchmark results per path
+    """
+    with running_server(target) as port:
+        results = [measure_throughput(port, path, concurrency, duration) for path in paths]
+    return {
+        "benchmark": "http_throughput",
+        "target": target,
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", choices=TARGETS, default="service")
+    parser.add_argument("--paths", nargs="+", default=["/health", "/metrics"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per path")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.target, args.paths, args.concurrency, args.duration)
+
+    for result in results["results"]:
+        latency = result["latency_ms"]
+        print(
+            f"{results['target']:<8} {result['path']:<10} "
+            f"{result['requests_per_second']:9.1f} req/s  "
+            f"p50 {latency['p50']:7.2f} ms  p99 {latency['p99']:7.2f} ms  "
+            f"errors {result['errors']}"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
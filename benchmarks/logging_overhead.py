@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Logging overhead benchmark.
+
+Measures, with logging written to a file in a temporary directory:
+
+- the caller-side cost of a log record with synchronous handlers and with the
+  queue-based mode (``LOG_ASYNC``), where a background thread does the I/O,
+  in both the text and the JSON (``LOG_JSON``) output format
+- the cost of a disabled debug message carrying a full API response, built
+  eagerly with an f-string versus lazily with ``%s`` arguments
+- the wall time of a detection cycle on a synthetic match list with either
+  logging mode, with the API client replaced by an in-process stub
+
+Usage:
+    python -m benchmarks.logging_overhead [--records N] [--matches N] [--cycles N]
+        [--output results.json]
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.generator import ChangeRates, generate_match_list, next_version
+
+# Make the application modules importable when run from a checkout
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+MODES = {"sync": False, "async": True}
+
+
+def measure_record_cost(
+    log_dir: str, async_logging: bool, records: int, json_output: bool = False
+) -> Dict[str, float]:
+    """
+    Time emitting log records from the calling thread.
+
+    Records are logged inside a cycle and stage context with structured extras,
+    as the detector does.
+
+    Returns:
+        Caller-side microseconds per record, and the total seconds including
+        writing out queued records
+    """
+    from logging_config import configure_logging, log_context, new_cycle_id, shutdown_logging
+
+    name = f"benchmark.logging.{'async' if async_logging else 'sync'}"
+    name += ".json" if json_output else ".text"
+    logger = configure_logging(
+        name,
+        log_level="INFO",
+        log_dir=log_dir,
+        log_file=f"{name}.log",
+        console_output=False,
+        async_logging=async_logging,
+        json_output=json_output,
+    )
+
+    start = time.perf_counter()
+    with log_context(cycle_id=new_cycle_id(), stage="diff"):
+        for i in range(records):
+            logger.info("Processed match %s of %s", i, records, extra={"matches": i})
+    emitted = time.perf_counter() - start
+    shutdown_logging()
+    drained = time.perf_counter() - start
+
+    logger.handlers = []
+    return {"us_per_record": emitted / records * 1e6, "total_seconds": drained}
+
+
+def measure_disabled_debug(payload: List[Dict[str, Any]], calls: int) -> Dict[str, float]:
+    """
+    Time debug messages with a large payload while debug logging is disabled.
+
+    Returns:
+        Microseconds per call for eager f-string and lazy %-style messages
+    """
+    logger = logging.getLogger("benchmark.logging.disabled")
+    logger.setLevel(logging.INFO)
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        logger.debug(f"Response content: {payload}")
+    eager = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        logger.debug("Response content: %s", payload)
+    lazy = time.perf_counter() - start
+
+    return {"eager_us_per_call": eager / calls * 1e6, "lazy_us_per_call": lazy / calls * 1e6}
+
+
+class StubApiClient:
+    """In-process API client returning alternating versions of a match list."""
+
+    def __init__(self, matches: int) -> None:
+        """Prepare the match list versions."""
+        previous = generate_match_list(matches)
+        current, _ = next_version(previous, ChangeRates(new=0.0, removed=0.0, changed=0.1))
+        self.versions = [previous, current]
+        self.calls = 0
+
+    def login(self) -> bool:
+        """Pretend to log in."""
+        return True
+
+    def fetch_matches_list_json(self, filter_params: Optional[Dict[str, Any]] = None) -> Any:
+        """Return the next version of the match list."""
+        self.calls += 1
+        return {"matches": self.versions[self.calls % 2]}
+
+
+def measure_cycles(
+    log_dir: str, async_logging: bool, matches: int, cycles: int
+) -> Dict[str, float]:
+    """
+    Time detection cycles with logging enabled.
+
+    Every other cycle detects changes, so the cycle logs and writes the
+    changes file as it would in production; the orchestrator trigger is skipped.
+
+    Returns:
+        Mean and median cycle wall time in milliseconds
+    """
+    import match_list_change_detector as detector_module
+    from logging_config import configure_logging, shutdown_logging
+    from match_list_change_detector import MatchListChangeDetector, RateLimiter
+
+    configure_logging(
+        "match_list_change_detector",
+        log_level="INFO",
+        log_dir=log_dir,
+        console_output=False,
+        async_logging=async_logging,
+    )
+    detector_module.PREVIOUS_MATCHES_FILE = str(Path(log_dir) / "previous_matches.json")
+    detector_module.CHANGES_FILE = str(Path(log_dir) / "match_changes.json")
+    detector_module.CHANGE_HISTORY_FILE = ""
+    detector_module.DOCKER_COMPOSE_FILE = ""
+
+    stub = StubApiClient(matches)
+    timings = []
+    for _ in range(cycles):
+        detector = MatchListChangeDetector("benchmark", "benchmark")
+        detector.api_client = stub  # type: ignore[assignment]
+        detector.rate_limiter = RateLimiter(max_requests=10**9)
+        start = time.perf_counter()
+        detector.run()
+        timings.append(time.perf_counter() - start)
+    shutdown_logging()
+
+    return {
+        "mean_ms": statistics.mean(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+    }
+
+
+def run(records: int = 20000, matches: int = 2000, cycles: int = 10) -> Dict[str, Any]:
+    """
+    Run the logging benchmark.
+
+    Returns:
+        Per-record, disabled debug and cycle timings for each logging mode
+    """
+    results: Dict[str, Any] = {"benchmark": "logging_overhead", "python": sys.version.split()[0]}
+    with tempfile.TemporaryDirectory() as log_dir:
+        results["records"] = {
+            f"{mode}-{output}": measure_record_cost(
+                log_dir, async_logging, records, json_output=output == "json"
+            )
+            for mode, async_logging in MODES.items()
+            for output in ("text", "json")
+        }
+        results["disabled_debug"] = measure_disabled_debug(generate_match_list(matches), 200)
+        results["cycles"] = {
+            mode: measure_cycles(str(Path(log_dir) / mode), async_logging, matches, cycles)
+            for mode, async_logging in MODES.items()
+        }
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000, help="log records per mode")
+    parser.add_argument("--matches", type=int, default=2000, help="matches in the list")
+    parser.add_argument("--cycles", type=int, default=10, help="detection cycles per mode")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.records, args.matches, args.cycles)
+
+    for mode, result in results["records"].items():
+        print(
+            f"record  {mode:<10} {result['us_per_record']:8.2f} us/record on the caller  "
+            f"(all written after {result['total_seconds']:.3f} s)"
+        )
+    debug = results["disabled_debug"]
+    print(
+        f"disabled debug            eager {debug['eager_us_per_call']:9.2f} us  "
+        f"lazy {debug['lazy_us_per_call']:6.2f} us"
+    )
+    for mode, result in results["cycles"].items():
+        print(
+            f"cycle   {mode:<10} mean {result['mean_ms']:8.2f} ms  "
+            f"median {result['median_ms']:8.2f} ms"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the process-parallel diff.
+
+For each list size, diffs a synthetic match list against its next version
+with the serial ``iter_match_changes`` and with ``parallel_iter_match_changes``
+at each worker count, checking that every run yields the same changes.
+Reports the best wall time of each run and its speedup over the serial diff.
+Speedups depend on the free cores of the machine; with fewer cores than
+workers the extra processes only add their start-up cost.
+
+Usage:
+    python -m benchmarks.parallel_diff [--sizes 100000] [--workers 2 4 8]
+        [--repeat N] [--new RATE] [--removed RATE] [--changed RATE] [--seed N]
+        [--output results.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks.diff import git_commit
+from benchmarks.generator import ChangeRates, generate_match_list, next_version
+
+# Make the application modules importable when run from a checkout
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+DEFAULT_SIZES = (100_000,)
+
+
+def default_workers() -> List[int]:
+    """Powers of two up to the CPU count, and at least two workers."""
+    cpus = os.cpu_count() or 1
+    workers = [2]
+    while workers[-1] * 2 <= cpus:
+        workers.append(workers[-1] * 2)
+    if workers[-1] < cpus:
+        workers.append(cpus)
+    return workers
+
+
+def best_time(diff: Any, repeat: int) -> Dict[str, Any]:
+    """
+    Time a diff, consuming every change it yields.
+
+    Returns:
+        Best wall time in seconds and the changes of the last run
+    """
+    timings = []
+    changes: List[Any] = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        changes = list(diff())
+        timings.append(time.perf_counter() - start)
+    return {"wall_seconds": min(timings), "changes": changes}
+
+
+def benchmark_size(
+    size: int, workers: Sequence[int], rates: ChangeRates, seed: int, repeat: int
+) -> Dict[str, Any]:
+    """
+    Benchmark the serial and parallel diff for one list size.
+
+    Raises:
+        AssertionError: If a parallel diff yields different changes than the serial diff
+    """
+    from match_list_change_detector import iter_match_changes
+    from parallel_diff import parallel_iter_match_changes
+
+    previous = generate_match_list(size, seed=seed)
+    current, expected = next_version(previous, rates, seed=seed + 1)
+
+    serial = best_time(lambda: iter_match_changes(previous, current), repeat)
+    runs = [{"workers": 1, "wall_seconds": serial["wall_seconds"], "speedup": 1.0}]
+    for count in workers:
+        parallel = best_time(
+            lambda: parallel_iter_match_changes(previous, current, count), repeat  # noqa: B023
+        )
+        if parallel["changes"] != serial["changes"]:
+            raise AssertionError(f"Parallel diff with {count} workers differs from the serial diff")
+        runs.append(
+            {
+                "workers": count,
+                "wall_seconds": parallel["wall_seconds"],
+                "speedup": serial["wall_seconds"] / parallel["wall_seconds"],
+            }
+        )
+    return {"size": size, "expected_changes": expected._asdict(), "runs": runs}
+
+
+def run(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    workers: Optional[Sequence[int]] = None,
+    rates: ChangeRates = ChangeRates(),
+    seed: int = 0,
+    repeat: int = 3,
+) -> Dict[str, Any]:
+    """
+    Run the scaling benchmark.
+
+    Returns:
+        Environment details and results per list size
+    """
+    workers = list(workers or default_workers())
+    return {
+        "benchmark": "parallel_diff",
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "seed": seed,
+        "rates": rates._asdict(),
+        "repeat": repeat,
+        "results": [benchmark_size(size, workers, rates, seed, repeat) for size in sorted(sizes)],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line."""
+    defaults = ChangeRates()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--workers", type=int, nargs="+", help="worker counts (default: 2..cpus)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per worker count")
+    parser.add_argument("--new", type=float, default=defaults.new)
+    parser.add_argument("--removed", type=float, default=defaults.removed)
+    parser.add_argument("--changed", type=float, default=defaults.changed)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    rates = ChangeRates(new=args.new, removed=args.removed, changed=args.changed)
+    results = run(args.sizes, args.workers, rates, args.seed, args.repeat)
+
+    print(f"{results['cpus']} CPUs")
+    for result in results["results"]:
+        print(f"{result['size']:>8} matches")
+        for entry in result["runs"]:
+            print(
+                f"  {entry['workers']:>3} workers  {entry['wall_seconds'] * 1000:9.1f} ms  "
+                f"x{entry['speedup']:.2f}"
+            )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the match list change detector.
+
+Measures, in fresh interpreter processes:
+
+- the cumulative import time of the main modules, using ``python -X importtime``
+- the cold-start time of a oneshot run until the first FOGIS API request
+
+The run is stopped right before the first request leaves the process, so no
+network access or credentials are needed.
+
+Usage:
+    python -m benchmarks.startup [--repeat N] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess  # nosec B404
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Repository root, used as working directory for the measured processes
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# Modules whose import time is tracked
+MODULES = (
+    "config",
+    "logging_config",
+    "metrics",
+    "match_list_change_detector",
+    "persistent_service",
+)
+
+# Printed by the probe process when the first API request is about to be made
+FIRST_FETCH_MARKER = "FIRST_FETCH"
+
+# Runs a oneshot detection and exits as soon as the first API login is attempted
+_FIRST_FETCH_PROBE = f"""
+import os
+import centralized_api_client
+
+def _first_fetch(self):
+    print("{FIRST_FETCH_MARKER}", flush=True)
+    os._exit(0)
+
+centralized_api_client.CentralizedFogisApiClient.login = _first_fetch
+
+import match_list_change_detector
+
+match_list_change_detector.main()
+os._exit(1)
+"""
+
+
+def _probe_env(work_dir: str) -> Dict[str, str]:
+    """Build the environment of a measured process, keeping its files out of the tree."""
+    env = dict(os.environ)
+    env.update(
+        {
+            "FOGIS_USERNAME": "benchmark",
+            "FOGIS_PASSWORD": "benchmark",  # nosec B105
+            "FOGIS_API_CLIENT_URL": "",
+            "LOG_DIR": work_dir,
+            "PREVIOUS_MATCHES_FILE": os.path.join(work_dir, "previous_matches.json"),
+            "CHANGE_HISTORY_FILE": "",
+        }
+    )
+    return env
+
+
+def parse_importtime(output: str) -> List[Tuple[int, str, int]]:
+    """
+    Parse ``-X importtime`` output.
+
+    Args:
+        output: Standard error of a ``python -X importtime`` run
+
+    Returns:
+        (nesting depth, module name, cumulative microseconds) per import, in the
+        order printed, which lists nested imports before the module importing them
+    """
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(fields[1])))
+    return entries
+
+
+def measure_import_time(module: str, work_dir: str) -> Dict[str, Any]:
+    """
+    Measure the cumulative import time of a module in a fresh interpreter.
+
+    Args:
+        module: Module to import
+        work_dir: Directory for files created by the measured process
+
+    Returns:
+        Cumulative import time of the module and its five slowest direct imports
+    """
+    result = subprocess.run(  # nosec B603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        env=_probe_env(work_dir),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = 0
+    children: Dict[str, int] = {}
+    for depth, name, microseconds in parse_importtime(result.stderr):
+        if depth == 0 and name != module:
+            # Imported by interpreter startup, not by the module
+            children.clear()
+        elif depth == 0:
+            cumulative = microseconds
+            break
+        elif depth == 1:
+            children[name] = microseconds
+
+    slowest = sorted(children.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {"cumulative_us": cumulative, "slowest_imports_us": dict(slowest)}
+
+
+def measure_first_fetch(work_dir: str) -> float:
+    """
+    Measure the cold-start time of a oneshot run until the first API request.
+
+    Args:
+        work_dir: Directory for files created by the measured process
+
+    Returns:
+        Seconds from process spawn until the first API login is attempted
+
+    Raises:
+        RuntimeError: If the run finished without reaching the API
+    """
+    start = time.perf_counter()
+    result = subprocess.run(  # nosec B603
+        [sys.executable, "-c", _FIRST_FETCH_PROBE],
+        cwd=ROOT_DIR,
+        env=_probe_env(work_dir),
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if FIRST_FETCH_MARKER not in result.stdout:
+        raise RuntimeError(f"Detection run did not reach the first fetch: {result.stderr[-500:]}")
+    return elapsed
+
+
+def run(repeat: int = 5) -> Dict[str, Any]:
+    """
+    Run the startup benchmark.
+
+    Args:
+        repeat: Number of measurements per metric; medians are reported
+
+    Returns:
+        Benchmark results
+    """
+    imports: Dict[str, Any] = {}
+    first_fetch: List[float] = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for module in MODULES:
+            samples = [measure_import_time(module, work_dir) for _ in range(repeat)]
+            imports[module] = {
+                "cumulative_us": int(statistics.median(s["cumulative_us"] for s in samples)),
+                "slowest_imports_us": samples[-1]["slowest_imports_us"],
+            }
+        for _ in range(repeat):
+            first_fetch.append(measure_first_fetch(work_dir))
+
+    return {
+        "benchmark": "startup",
+        "python": sys.version.split()[0],
+        "repeat": repeat,
+        "imports": imports,
+        "time_to_first_fetch_seconds": {
+            "median": statistics.median(first_fetch),
+            "min": min(first_fetch),
+            "max": max(first_fetch),
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="measurements per metric")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(repeat=args.repeat)
+
+    for module, data in results["imports"].items():
+        print(f"{'import ' + module:<36} {data['cumulative_us'] / 1000:8.1f} ms")
+    fetch = results["time_to_first_fetch_seconds"]
+    print(f"{'time to first fetch':<36} {fetch['median'] * 1000:8.1f} ms (median)")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for rendering the service's /health and /status responses.
+
+Compares building each response the way the handlers did before the status
+snapshot (assembling the dict, formatting timestamps and JSON-encoding it on
+every probe) with rendering it from the cached, pre-serialised snapshot.
+Both run in-process, without HTTP, so the numbers isolate the handler cost.
+
+Usage:
+    python -m benchmarks.status_probe [--number N] [--repeat N] [--output results.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+
+def rebuilt_health(service: Any) -> JSONResponse:
+    """Build the /health response from scratch, as the handler did before the snapshot."""
+    status = "healthy" if service.running else "unhealthy"
+    health_data = {
+        "service_name": "match-list-change-detector",
+        "status": status,
+        "run_mode": service.run_mode,
+        "cron_schedule": service.cron_schedule,
+        "last_execution": service.last_execution.isoformat() if service.last_execution else None,
+        "next_execution": service.next_execution.isoformat() if service.next_execution else None,
+        "execution_count": service.execution_count,
+        "uptime_seconds": time.time() - service.start_time,
+        "timestamp": datetime.now().isoformat(),
+    }
+    status_code = 200 if status == "healthy" else 503
+    return JSONResponse(status_code=status_code, content=health_data)
+
+
+def rebuilt_status(service: Any) -> JSONResponse:
+    """Build the /status response from scratch, as the handler did before the snapshot."""
+    return JSONResponse(
+        content={
+            "service_name": "match-list-change-detector",
+            "run_mode": service.run_mode,
+            "running": service.running,
+            "cron_schedule": service.cron_schedule,
+            "last_execution": (
+                service.last_execution.isoformat() if service.last_execution else None
+            ),
+            "next_execution": (
+                service.next_execution.isoformat() if service.next_execution else None
+            ),
+            "execution_count": service.execution_count,
+            "uptime_seconds": time.time() - service.start_time,
+            "configuration": {
+                "health_server_port": service.health_server_port,
+                "health_server_host": service.health_server_host,
+                "fogis_username": service.config.get("FOGIS_USERNAME", "NOT_SET"),
+                "fogis_password_set": bool(service.config.get("FOGIS_PASSWORD")),
+            },
+        }
+    )
+
+
+def cached_health(service: Any) -> Response:
+    """Render the /health response from the status snapshot."""
+    return Response(
+        content=service._render_health(),
+        status_code=service.status_snapshot.health_status_code,
+        media_type="application/json",
+    )
+
+
+def cached_status(service: Any) -> Response:
+    """Render the /status response from the status snapshot."""
+    return Response(content=service._render_status(), media_type="application/json")
+
+
+def time_probe(render: Callable[[], Any], number: int, repeat: int) -> Dict[str, float]:
+    """
+    Time a response renderer.
+
+    Args:
+        render: Builds one response
+        number: Calls per timing run
+        repeat: Timing runs; the fastest is reported
+
+    Returns:
+        Microseconds per probe and probes per second
+    """
+    best = min(timeit.repeat(render, number=number, repeat=repeat)) / number
+    return {"us_per_probe": best * 1e6, "probes_per_second": 1 / best}
+
+
+def run(number: int = 20000, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Run the microbenchmark against a service instance.
+
+    Returns:
+        Timings per endpoint for the rebuilt and cached responses
+    """
+    from persistent_service import PersistentMatchListChangeDetectorService
+
+    service = PersistentMatchListChangeDetectorService()
+    service.last_execution = datetime.now()
+    service.execution_count = 42
+    service._refresh_status_snapshot()
+
+    results = []
+    for path, rebuilt, cached in (
+        ("/health", rebuilt_health, cached_health),
+        ("/status", rebuilt_status, cached_status),
+    ):
+        before = time_probe(lambda: rebuilt(service), number, repeat)
+        after = time_probe(lambda: cached(service), number, repeat)
+        results.append(
+            {
+                "path": path,
+                "rebuilt": before,
+                "cached": after,
+                "speedup": before["us_per_probe"] / after["us_per_probe"],
+            }
+        )
+    return {
+        "benchmark": "status_probe",
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the microbenchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000, help="probes per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per renderer")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.number, args.repeat)
+
+    for result in results["results"]:
+        print(
+            f"{result['path']:<8} rebuilt {result['rebuilt']['us_per_probe']:7.2f} us  "
+            f"cached {result['cached']['us_per_probe']:7.2f} us  "
+            f"({result['speedup']:.1f}x, {result['cached']['probes_per_second']:,.0f} probes/s)"
+        )
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
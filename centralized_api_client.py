@@ -7,14 +7,55 @@ allowing services to use either the centralized service or direct API access.
 """
 
 import logging
-from typing import Any, Dict, Optional
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 import requests
-from fogis_api_client import FogisApiClient
+
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from response_recorder import ResponseRecorder, is_error_response
+
+if TYPE_CHECKING:
+    from fogis_api_client import FogisApiClient
 
 logger = logging.getLogger(__name__)
 
 
+def is_transient_http_error(error: BaseException) -> bool:
+    """Whether a centralized service request error is worth retrying.
+
+    Connection errors, timeouts, 5xx and 429 responses are transient; other
+    client errors are not.
+    """
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return isinstance(error, requests.RequestException)
+
+
+def is_transient_direct_error(error: BaseException) -> bool:
+    """Whether a direct FOGIS API error is worth retrying.
+
+    The FOGIS client wraps request errors in its own exceptions, so the error
+    and the errors it was raised from are checked. Outages of the FOGIS login
+    service and transient request errors are retried; invalid credentials,
+    rejected requests and malformed data fail at once.
+    """
+    # Imported on first use; only direct mode raises these errors
+    from fogis_api_client import FogisAuthServiceUnavailableError
+
+    cause: Optional[BaseException] = error
+    while cause is not None:
+        if isinstance(cause, FogisAuthServiceUnavailableError):
+            return True
+        if isinstance(cause, requests.RequestException):
+            return is_transient_http_error(cause)
+        if isinstance(cause, (ConnectionError, TimeoutError)):
+            return True
+        cause = cause.__cause__ or cause.__context__
+    return False
+
+
 class CentralizedFogisApiClient:
     """Centralized FOGIS API client.
 
@@ -26,6 +67,12 @@ class CentralizedFogisApiClient:
         api_client_url: Optional[str] = None,
         username: str = "",
         password: str = "",  # nosec B107
+        session: Optional[requests.Session] = None,
+        recorder: Optional[ResponseRecorder] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        retry: Optional[RetryPolicy] = None,
+        login_timeout: float = 10.0,
+        fetch_timeout: float = 30.0,
     ):
         """
         Initialize the centralized API client.
@@ -34,11 +81,26 @@ class CentralizedFogisApiClient:
             api_client_url: URL of the centralized FOGIS API client service
             username: FOGIS username (used for direct API access)
             password: FOGIS password (used for direct API access)
+            session: HTTP session whose connection pool is used for requests to the
+                centralized service, e.g. one shared by several clients
+            recorder: Recorder keeping the fetched responses; its last successful
+                response is served, marked stale, when a fetch fails
+            breaker: Circuit breaker skipping upstream calls while the upstream fails
+            retry: Retry policy for transient failures of login and fetch (defaults
+                to a single attempt)
+            login_timeout: Timeout in seconds of the centralized service health check
+            fetch_timeout: Timeout in seconds of the match list request
         """
         self.api_client_url = api_client_url
         self.username = username
         self.password = password
-        self._direct_client: Optional[FogisApiClient] = None
+        self._http: Any = session if session is not None else requests
+        self._direct_client: Optional["FogisApiClient"] = None
+        self.recorder = recorder
+        self.breaker = breaker
+        self.retry = retry if retry is not None else RetryPolicy(attempts=1)
+        self.login_timeout = login_timeout
+        self.fetch_timeout = fetch_timeout
 
         # Determine which mode to use
         self.use_centralized = bool(api_client_url and api_client_url.strip())
@@ -48,7 +110,10 @@ class CentralizedFogisApiClient:
         else:
             logger.info("Using direct FOGIS API client")
             if username and password:
-                self._direct_client = FogisApiClient(username, password)
+                # Imported on first use to keep module import cheap
+                import fogis_api_client
+
+                self._direct_client = fogis_api_client.FogisApiClient(username, password)
             else:
                 logger.warning("No username/password provided for direct API access")
 
@@ -62,20 +127,32 @@ class CentralizedFogisApiClient:
         if self.use_centralized:
             # For centralized service, login is handled by the service itself
             try:
-                response = requests.get(f"{self.api_client_url}/health", timeout=10)
+                response = self.retry.call(
+                    self._check_centralized_health, self.breaker, is_transient_http_error
+                )
                 return response.status_code == 200
-            except requests.RequestException as e:
+            except (requests.RequestException, CircuitOpenError) as e:
                 logger.error(f"Failed to connect to centralized API client: {e}")
                 return False
         else:
-            if self._direct_client:
+            direct_client = self._direct_client
+            if direct_client:
                 try:
-                    return self._direct_client.login()
+                    return self.retry.call(
+                        direct_client.login, self.breaker, is_transient_direct_error
+                    )
                 except Exception as e:
                     logger.error(f"Direct API login failed: {e}")
                     return False
             return False
 
+    def _check_centralized_health(self) -> requests.Response:
+        """Request the health of the centralized service, raising on error statuses."""
+        url = f"{self.api_client_url}/health"
+        response: requests.Response = self._http.get(url, timeout=self.login_timeout)
+        response.raise_for_status()
+        return response
+
     def fetch_matches_list_json(
         self, filter_params: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
@@ -86,12 +163,53 @@ class CentralizedFogisApiClient:
             filter_params: Filter parameters for the matches
 
         Returns:
-            JSON response containing matches data
+            JSON response containing matches data. When the fetch fails and the
+            recorder holds a successful response, that response with "stale" set
+            to True, "status" "stale" and "recorded_at" its recording time
         """
+        start = time.perf_counter()
         if self.use_centralized:
-            return self._fetch_from_centralized_service(filter_params)
+            response = self._fetch_from_centralized_service(filter_params)
         else:
-            return self._fetch_from_direct_api(filter_params)
+            response = self._fetch_from_direct_api(filter_params)
+        if self.recorder is None:
+            return response
+        return self._record_response(
+            self.recorder, response, filter_params, time.perf_counter() - start
+        )
+
+    def _record_response(
+        self,
+        recorder: ResponseRecorder,
+        response: Dict[str, Any],
+        filter_params: Optional[Dict[str, Any]],
+        elapsed_seconds: float,
+    ) -> Dict[str, Any]:
+        """Record a response and fall back to the last good one if it is an error."""
+        source = f"{self.api_client_url}/matches" if self.use_centralized else "direct"
+        try:
+            recorder.record(response, source, filter_params, elapsed_seconds)
+            last_good = recorder.last_good() if is_error_response(response) else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to record API response: {e}")
+            return response
+        if last_good is None:
+            return response
+
+        stale = last_good["response"]
+        if not isinstance(stale, dict):
+            stale = {"matches": stale}
+        logger.warning(
+            "Fetch failed, serving the match list recorded at "
+            f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_good['recorded_at']))}"
+        )
+        return {
+            **stale,
+            "status": "stale",
+            "stale": True,
+            "recorded_at": last_good["recorded_at"],
+            "error": response.get("error"),
+        }
 
     def _fetch_from_centralized_service(
         self, filter_params: Optional[Dict[str, Any]] = None
@@ -120,10 +238,12 @@ class CentralizedFogisApiClient:
             if params:
                 logger.info(f"Using filter parameters: {params}")
 
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
+            def request() -> Any:
+                response = self._http.get(url, params=params, timeout=self.fetch_timeout)
+                response.raise_for_status()
+                return response.json()
 
-            matches_data = response.json()
+            matches_data = self.retry.call(request, self.breaker, is_transient_http_error)
             logger.info(
                 f"Successfully fetched {len(matches_data)} matches from centralized service"
             )
@@ -131,7 +251,7 @@ class CentralizedFogisApiClient:
             # Return in the expected format
             return {"matches": matches_data, "total": len(matches_data), "status": "success"}
 
-        except requests.RequestException as e:
+        except (requests.RequestException, CircuitOpenError) as e:
             logger.error(f"Failed to fetch matches from centralized service: {e}")
             return {"matches": [], "total": 0, "status": "error", "error": str(e)}
 
@@ -147,7 +267,8 @@ class CentralizedFogisApiClient:
         Returns:
             JSON response containing matches data
         """
-        if not self._direct_client:
+        direct_client = self._direct_client
+        if not direct_client:
             logger.error("Direct API client not initialized")
             return {
                 "matches": [],
@@ -158,7 +279,11 @@ class CentralizedFogisApiClient:
 
         try:
             logger.info("Fetching matches from direct FOGIS API")
-            return self._direct_client.fetch_matches_list_json(filter_params=filter_params)
+            return self.retry.call(
+                lambda: direct_client.fetch_matches_list_json(filter_params=filter_params),
+                self.breaker,
+                is_transient_direct_error,
+            )
 
         except Exception as e:
             logger.error(f"Failed to fetch matches from direct API: {e}")
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Change feed output for the match list change detector.
+
+Provides a newline-delimited JSON (NDJSON) writer that emits one line per
+new, removed or changed match followed by a trailing summary line, so that
+downstream consumers can process change sets with constant memory, and a
+broadcaster that pushes change sets to live subscribers.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Deque, Dict, List, Mapping, Optional, Set
+
+# Record types written to the change feed
+CHANGE_TYPE_NEW = "new"
+CHANGE_TYPE_REMOVED = "removed"
+CHANGE_TYPE_CHANGED = "changed"
+CHANGE_TYPE_SUMMARY = "summary"
+
+# Compact separators keep each line small and cheap to produce
+_SEPARATORS = (",", ":")
+
+
+def build_change_line(change_type: str, item: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Build a single change feed record.
+
+    New and removed matches are wrapped under a ``match`` key, while changed
+    match records are flattened into the line.
+
+    Args:
+        change_type: One of "new", "removed" or "changed"
+        item: Raw match (new/removed) or match change record (changed)
+
+    Returns:
+        Dictionary ready to be serialised as one NDJSON line
+    """
+    if change_type == CHANGE_TYPE_CHANGED:
+        line: Dict[str, Any] = {"type": change_type}
+        line.update(item)
+        return line
+    return {"type": change_type, "match_id": item.get("matchid"), "match": item}
+
+
+def build_summary_line(changes: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Build the trailing summary record for a change set.
+
+    Args:
+        changes: Changes summary as returned by detect_changes
+
+    Returns:
+        Summary dictionary with counts and generation timestamp
+    """
+    summary: Dict[str, Any] = {
+        "type": CHANGE_TYPE_SUMMARY,
+        "new_matches": changes.get("new_matches", 0),
+        "removed_matches": changes.get("removed_matches", 0),
+        "changed_matches": changes.get("changed_matches", 0),
+        "generated_at": datetime.now().isoformat(),
+    }
+    if "message" in changes:
+        summary["message"] = changes["message"]
+    return summary
+
+
+class NdjsonChangeWriter:
+    """Stream change records to an NDJSON file.
+
+    Records are written to a temporary file as they are produced and the file
+    is atomically moved into place on commit, so consumers never observe a
+    partially written change set.
+    """
+
+    path: Path
+    tmp_path: Path
+    records_written: int
+    _file: Optional[IO[str]]
+
+    def __init__(self, path: Path) -> None:
+        """
+        Initialize the writer.
+
+        Args:
+            path: Final location of the NDJSON change feed
+        """
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        self.records_written = 0
+        self._file = None
+
+    def open(self) -> "NdjsonChangeWriter":
+        """Open the temporary output file."""
+        self._ensure_open()
+        return self
+
+    def _ensure_open(self) -> IO[str]:
+        """Return the temporary output file, opening it on first use."""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.tmp_path, "w", encoding="utf-8")
+        return self._file
+
+    def write(self, change_type: str, item: Mapping[str, Any]) -> None:
+        """
+        Write one change record.
+
+        Args:
+            change_type: One of "new", "removed" or "changed"
+            item: Raw match or match change record
+        """
+        output = self._ensure_open()
+        output.write(json.dumps(build_change_line(change_type, item), separators=_SEPARATORS))
+        output.write("\n")
+        self.records_written += 1
+
+    def commit(self, changes: Mapping[str, Any]) -> Path:
+        """
+        Write the summary line and move the feed into place.
+
+        Args:
+            changes: Changes summary used to build the trailing summary line
+
+        Returns:
+            Path of the committed change feed
+        """
+        output = self._ensure_open()
+        output.write(json.dumps(build_summary_line(changes), separators=_SEPARATORS))
+        output.write("\n")
+        output.close()
+        self._file = None
+        os.replace(self.tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """Discard any records written so far."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            self.tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "NdjsonChangeWriter":
+        """Open the writer."""
+        return self.open()
+
+    def __exit__(self, exc_type: Optional[type], exc_val: Optional[Exception], exc_tb: Any) -> None:
+        """Discard the feed if it was not committed."""
+        if self._file is not None:
+            self.abort()
+
+
+def write_ndjson_changes(changes: Mapping[str, Any], path: Path) -> Path:
+    """
+    Write an already computed changes summary as an NDJSON change feed.
+
+    Args:
+        changes: Changes summary as returned by detect_changes
+        path: Destination file
+
+    Returns:
+        Path of the written change feed
+    """
+    with NdjsonChangeWriter(path) as writer:
+        for match in changes.get("new_match_details", []):
+            writer.write(CHANGE_TYPE_NEW, match)
+        for match in changes.get("removed_match_details", []):
+            writer.write(CHANGE_TYPE_REMOVED, match)
+        for record in changes.get("changed_match_details", []):
+            writer.write(CHANGE_TYPE_CHANGED, record)
+        return writer.commit(changes)
+
+
+class ChangeSubscription:
+    """A single subscriber to the change broadcaster.
+
+    Events are buffered in a bounded queue owned by the subscriber's event loop.
+    When the queue is full the oldest event is dropped, so a slow client never
+    holds up the detector or the other subscribers.
+    """
+
+    loop: asyncio.AbstractEventLoop
+    dropped: int
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_queue: int) -> None:
+        """
+        Initialize the subscription.
+
+        Args:
+            loop: Event loop the subscriber consumes events on
+            max_queue: Maximum number of buffered events
+        """
+        self.loop = loop
+        self.dropped = 0
+        self._queue: Deque[str] = deque(maxlen=max(1, max_queue))
+        self._event = asyncio.Event()
+
+    def push(self, frame: str) -> None:
+        """
+        Buffer an event, dropping the oldest one if the queue is full.
+
+        Must be called on the subscriber's event loop.
+
+        Args:
+            frame: Pre-encoded event
+        """
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(frame)
+        self._event.set()
+
+    async def next_event(self, timeout: float) -> Optional[str]:
+        """
+        Wait for the next buffered event.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            The next event, or None if no event arrived before the timeout
+        """
+        if not self._queue:
+            self._event.clear()
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._queue.popleft() if self._queue else None
+
+
+class ChangeBroadcaster:
+    """Fan out change sets to connected subscribers.
+
+    Each change set is encoded once as a Server-Sent Events frame and handed to
+    every subscriber's bounded queue. Publishing is safe from any thread and
+    never blocks on subscribers.
+    """
+
+    max_queue: int
+    max_subscribers: int
+
+    def __init__(self, max_queue: int = 16, max_subscribers: int = 1000) -> None:
+        """
+        Initialize the broadcaster.
+
+        Args:
+            max_queue: Maximum number of buffered events per subscriber
+            max_subscribers: Maximum number of concurrent subscribers
+        """
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self._subscribers: Set[ChangeSubscription] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        """Get the number of connected subscribers."""
+        return len(self._subscribers)
+
+    def subscribe(self) -> Optional[ChangeSubscription]:
+        """
+        Register a subscriber on the running event loop.
+
+        Returns:
+            The new subscription, or None if the subscriber limit is reached
+        """
+        subscription = ChangeSubscription(asyncio.get_running_loop(), self.max_queue)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ChangeSubscription) -> None:
+        """
+        Remove a subscriber.
+
+        Args:
+            subscription: Subscription returned by subscribe
+        """
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, changes: Mapping[str, Any], seq: Optional[int] = None) -> int:
+        """
+        Publish a change set to all subscribers.
+
+        Args:
+            changes: Changes summary as returned by detect_changes
+            seq: Sequence number of the change set in the change history, if recorded
+
+        Returns:
+            Number of subscribers the change set was handed to
+        """
+        payload: Dict[str, Any] = {"seq": seq, "published_at": datetime.now().isoformat()}
+        payload.update(changes)
+        frame = encode_sse_event("changes", payload, event_id=seq)
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        # Group subscribers by event loop so each loop is woken up only once
+        by_loop: Dict[asyncio.AbstractEventLoop, List[ChangeSubscription]] = {}
+        for subscription in subscribers:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+
+        try:
+            current_loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+
+        for loop, loop_subscribers in by_loop.items():
+            if loop is current_loop:
+                _fan_out(loop_subscribers, frame)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(_fan_out, loop_subscribers, frame)
+        return len(subscribers)
+
+
+def _fan_out(subscribers: List[ChangeSubscription], frame: str) -> None:
+    """Hand an encoded event to a group of subscribers on their event loop."""
+    for subscription in subscribers:
+        subscription.push(frame)
+
+
+def encode_sse_event(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """
+    Encode a Server-Sent Events frame.
+
+    Args:
+        event: Event name
+        data: JSON serialisable event payload
+        event_id: Optional event ID, used by clients to resume with Last-Event-ID
+
+    Returns:
+        Encoded event frame
+    """
+    frame = f"event: {event}\n"
+    if event_id is not None:
+        frame = f"id: {event_id}\n{frame}"
+    return f"{frame}data: {json.dumps(data, separators=_SEPARATORS)}\n\n"
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Change history store for the match list change detector.
+
+Keeps an append-only, indexed history of detected change sets in a local
+SQLite database so that consumers can pull the changes since their last
+cursor instead of reloading the full match list.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+from logging_config import get_logger
+
+logger = get_logger("change_history")
+
+# Default retention limits
+DEFAULT_MAX_CHANGE_SETS = 1000
+DEFAULT_MAX_AGE_DAYS = 30
+
+# Maximum number of change sets returned by a single query
+MAX_QUERY_LIMIT = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS change_sets (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    new_matches INTEGER NOT NULL,
+    removed_matches INTEGER NOT NULL,
+    changed_matches INTEGER NOT NULL,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_change_sets_created_at ON change_sets (created_at);
+CREATE TABLE IF NOT EXISTS change_records (
+    seq INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    change_type TEXT NOT NULL,
+    match_id TEXT,
+    record TEXT NOT NULL,
+    PRIMARY KEY (seq, position)
+);
+"""
+
+# Compact separators keep stored records small
+_SEPARATORS = (",", ":")
+
+
+class ChangeHistoryStore:
+    """Append-only history of change sets with cursor-based reads.
+
+    Every change set gets a monotonically increasing sequence number. Sequence
+    numbers are never reused, even after old change sets have been removed by
+    the retention policy, so a consumer cursor always remains meaningful.
+    """
+
+    db_path: Path
+    max_change_sets: int
+    max_age_seconds: float
+
+    def __init__(
+        self,
+        db_path: str,
+        max_change_sets: int = DEFAULT_MAX_CHANGE_SETS,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+    ) -> None:
+        """
+        Initialize the change history store.
+
+        The database file is only created when the first change set is appended.
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_change_sets: Maximum number of change sets to keep (0 disables the limit)
+            max_age_days: Maximum age of kept change sets in days (0 disables the limit)
+        """
+        self.db_path = Path(db_path)
+        self.max_change_sets = max_change_sets
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection to the history database."""
+        connection = sqlite3.connect(str(self.db_path), timeout=10)
+        try:
+            if not self._initialized:
+                with self._lock:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.executescript(_SCHEMA)
+                    self._initialized = True
+            yield connection
+        finally:
+            connection.close()
+
+    def append(self, changes: Mapping[str, Any], created_at: Optional[float] = None) -> int:
+        """
+        Append a change set to the history.
+
+        Args:
+            changes: Changes summary as returned by detect_changes
+            created_at: Timestamp of the change set (defaults to now)
+
+        Returns:
+            Sequence number assigned to the change set
+        """
+        created_at = time.time() if created_at is None else created_at
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        records = []
+        for change_type, key in (
+            ("new", "new_match_details"),
+            ("removed", "removed_match_details"),
+            ("changed", "changed_match_details"),
+        ):
+            for item in changes.get(key, []):
+                match_id = item.get("match_id") if change_type == "changed" else item.get("matchid")
+                records.append((change_type, match_id, item))
+
+        with self._connect() as connection:
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO change_sets "
+                    "(created_at, new_matches, removed_matches, changed_matches, message) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        created_at,
+                        changes.get("new_matches", 0),
+                        changes.get("removed_matches", 0),
+                        changes.get("changed_matches", 0),
+                        changes.get("message"),
+                    ),
+                )
+                seq = int(cursor.lastrowid or 0)
+                connection.executemany(
+                    "INSERT INTO change_records (seq, position, change_type, match_id, record) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (
+                            seq,
+                            position,
+                            change_type,
+                            None if match_id is None else str(match_id),
+                            json.dumps(item, separators=_SEPARATORS),
+                        )
+                        for position, (change_type, match_id, item) in enumerate(records)
+                    ),
+                )
+                self._apply_retention(connection, seq, created_at)
+
+        logger.info(f"Recorded change set #{seq} with {len(records)} change records")
+        return seq
+
+    def _apply_retention(self, connection: sqlite3.Connection, latest_seq: int, now: float) -> None:
+        """Remove change sets that fall outside the retention limits."""
+        conditions = []
+        params: List[Any] = []
+        if self.max_change_sets > 0:
+            conditions.append("seq <= ?")
+            params.append(latest_seq - self.max_change_sets)
+        if self.max_age_seconds > 0:
+            conditions.append("created_at < ?")
+            params.append(now - self.max_age_seconds)
+        if not conditions:
+            return
+
+        row = connection.execute(
+            f"SELECT MAX(seq) FROM change_sets WHERE {' OR '.join(conditions)}",  # nosec B608
+            params,
+        ).fetchone()
+        if row is None or row[0] is None:
+            return
+
+        # Change sets are appended in order, so everything up to the newest expired
+        # sequence number can be dropped
+        cutoff = min(int(row[0]), latest_seq - 1)
+        connection.execute("DELETE FROM change_records WHERE seq <= ?", (cutoff,))
+        connection.execute("DELETE FROM change_sets WHERE seq <= ?", (cutoff,))
+
+    def changes_since(self, since: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """
+        Get the change sets recorded after a cursor.
+
+        Args:
+            since: Sequence number of the last change set seen by the consumer
+            limit: Maximum number of change sets to return
+
+        Returns:
+            Dictionary with the change sets, the next cursor and a "reset_required"
+            flag that is set when change sets after the cursor have already been
+            removed by retention and the consumer must reload the full match list
+        """
+        limit = max(1, min(limit, MAX_QUERY_LIMIT))
+        result: Dict[str, Any] = {
+            "changes": [],
+            "next_cursor": since,
+            "latest_seq": 0,
+            "oldest_seq": 0,
+            "reset_required": False,
+        }
+        if not self.db_path.exists():
+            return result
+
+        with self._connect() as connection:
+            bounds = connection.execute("SELECT MIN(seq), MAX(seq) FROM change_sets").fetchone()
+            oldest_seq, latest_seq = int(bounds[0] or 0), int(bounds[1] or 0)
+            change_sets = connection.execute(
+                "SELECT seq, created_at, new_matches, removed_matches, changed_matches, message "
+                "FROM change_sets WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, limit),
+            ).fetchall()
+
+            records: Dict[int, List[Dict[str, Any]]] = {row[0]: [] for row in change_sets}
+            if change_sets:
+                for seq, change_type, match_id, record in connection.execute(
+                    "SELECT seq, change_type, match_id, record FROM change_records "
+                    "WHERE seq BETWEEN ? AND ? ORDER BY seq, position",
+                    (change_sets[0][0], change_sets[-1][0]),
+                ):
+                    records[seq].append(
+                        {"type": change_type, "match_id": match_id, "record": json.loads(record)}
+                    )
+
+        result["latest_seq"] = latest_seq
+        result["oldest_seq"] = oldest_seq
+        result["reset_required"] = bool(oldest_seq) and since < oldest_seq - 1
+        result["changes"] = [
+            {
+                "seq": seq,
+                "timestamp": datetime.fromtimestamp(created_at).isoformat(),
+                "new_matches": new_matches,
+                "removed_matches": removed_matches,
+                "changed_matches": changed_matches,
+                "message": message,
+                "records": records[seq],
+            }
+            for seq, created_at, new_matches, removed_matches, changed_matches, message in (
+                change_sets
+            )
+        ]
+        if change_sets:
+            result["next_cursor"] = change_sets[-1][0]
+        return result
@@ -19,6 +19,56 @@ DEFAULT_CONFIG = {
     # File paths
     "PREVIOUS_MATCHES_FILE": "previous_matches.json",
     "DOCKER_COMPOSE_FILE": "../MatchListProcessor/docker-compose.yml",
+    "CHANGES_FILE": "match_changes.json",
+    # Snapshot storage: "json" file, "sqlite" database or "mmap" indexed file
+    # (empty paths use the previous matches file with a .db or .snap suffix),
+    # optionally exporting the snapshot to the JSON file after each save
+    "SNAPSHOT_BACKEND": "json",
+    "SNAPSHOT_DB_FILE": "",
+    "SNAPSHOT_MMAP_FILE": "",
+    "SNAPSHOT_JSON_EXPORT": False,
+    # Response recorder: directory keeping the last raw API responses, also
+    # serving the last good one when a fetch fails (empty disables it)
+    "RESPONSE_RECORDER_DIR": "",
+    "RESPONSE_RECORDER_MAX_ENTRIES": 48,
+    "RESPONSE_RECORDER_MAX_MB": 100,
+    # Mass-removal guard: change sets removing more than this share of the
+    # previous matches (0 disables the guard; smaller previous lists are never
+    # checked) are quarantined and only committed once a refetch returns the
+    # same matches, retrying up to QUARANTINE_RETRIES times
+    "MASS_REMOVAL_THRESHOLD": 0.5,
+    "MASS_REMOVAL_MIN_MATCHES": 10,
+    "QUARANTINE_RETRIES": 2,
+    "QUARANTINE_RETRY_DELAY": 10.0,
+    # Upstream API resilience: request timeouts in seconds, attempts per call
+    # with full-jitter exponential backoff between them, and a circuit breaker
+    # skipping calls for CIRCUIT_BREAKER_RESET_TIMEOUT seconds after this many
+    # consecutive failures (0 disables the breaker)
+    "API_LOGIN_TIMEOUT": 10.0,
+    "API_FETCH_TIMEOUT": 30.0,
+    "API_RETRY_ATTEMPTS": 3,
+    "API_RETRY_BASE_DELAY": 0.5,
+    "API_RETRY_MAX_DELAY": 8.0,
+    "CIRCUIT_BREAKER_FAILURE_THRESHOLD": 5,
+    "CIRCUIT_BREAKER_RESET_TIMEOUT": 60.0,
+    # Change output configuration ("json" document or streaming "ndjson")
+    "CHANGES_OUTPUT_FORMAT": "json",
+    # Change history configuration (empty file path disables the history)
+    "CHANGE_HISTORY_FILE": "",
+    "CHANGE_HISTORY_MAX_SETS": 1000,
+    "CHANGE_HISTORY_MAX_AGE_DAYS": 30,
+    # Snapshot history configuration (empty file path disables the history)
+    "SNAPSHOT_HISTORY_FILE": "",
+    "SNAPSHOT_HISTORY_MAX_SNAPSHOTS": 720,
+    "SNAPSHOT_HISTORY_MAX_AGE_DAYS": 30,
+    # Live change stream (Server-Sent Events) configuration
+    "CHANGE_STREAM_QUEUE_SIZE": 16,
+    "CHANGE_STREAM_MAX_SUBSCRIBERS": 1000,
+    "CHANGE_STREAM_KEEPALIVE_SECONDS": 15,
+    # Parallel diff: worker processes for large match lists (0 or 1 diffs
+    # serially) and the list size from which the worker processes are used
+    "DIFF_WORKERS": 0,
+    "DIFF_PARALLEL_MIN_MATCHES": 50000,
     # Logging configuration
     "LOG_LEVEL": "INFO",
     "LOG_DIR": "logs",
@@ -33,13 +83,33 @@ DEFAULT_CONFIG = {
     "SSL_KEY_FILE": "certs/server.key",
     "HEALTH_SERVER_PORT": 8000,
     "HEALTH_SERVER_HOST": "0.0.0.0",  # nosec B104
+    # Oneshot health server connection handling
+    "HEALTH_SERVER_TIMEOUT": 5.0,
+    "HEALTH_SERVER_MAX_CONNECTIONS": 64,
     "METRICS_SERVER_PORT": 8001,
+    # Comma-separated stage duration histogram buckets in seconds (empty uses defaults)
+    "METRICS_STAGE_BUCKETS": "",
     # Rate limiting
     "API_RATE_LIMIT": 10,  # Maximum number of API requests per minute
     # Persistent service mode configuration
     "RUN_MODE": "oneshot",
     "CRON_SCHEDULE": "0 * * * *",
     "WEBHOOK_URL": "",
+    # Multi-tenant mode: JSON file listing the accounts to watch (empty watches
+    # FOGIS_USERNAME only), the root of the per-tenant data directories and the
+    # maximum number of tenant cycles running at once
+    "TENANTS_FILE": "",
+    "TENANT_DATA_DIR": "data/tenants",
+    "TENANT_MAX_CONCURRENCY": 4,
+    # Readiness (/ready) thresholds
+    "READINESS_STALENESS_FACTOR": 2.0,
+    "READINESS_MAX_CONSECUTIVE_FAILURES": 3,
+    "READINESS_MAX_TRIGGER_BACKLOG": 3,
+    # On-demand profiling (disabled unless a token is set)
+    "PROFILING_TOKEN": "",
+    "PROFILING_MAX_CAPTURES": 5,
+    "PROFILING_SAMPLE_INTERVAL": 0.005,
+    "PROFILING_TRACEMALLOC_TOP": 25,
 }
 
 
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Validation of fetched match lists.
+
+A failed or truncated fetch must not be mistaken for matches disappearing:
+diffed against the previous snapshot it reports every missing match as
+removed and triggers the whole orchestrator pipeline. The detector therefore
+rejects responses that report an error or do not hold a list of matches,
+and quarantines change sets removing more than a configured share of the
+previous matches until a fresh fetch confirms them.
+"""
+
+from typing import Any, Dict, List, cast
+
+from response_recorder import is_error_response
+
+
+class InvalidResponseError(ValueError):
+    """A match list response that cannot be diffed."""
+
+
+def extract_matches(api_response: Any) -> List[Dict[str, Any]]:
+    """
+    Get the match list from an API client response.
+
+    Args:
+        api_response: Match list, or an object with the match list under "matches"
+
+    Returns:
+        The matches
+
+    Raises:
+        InvalidResponseError: If the response reports an error or is not a list
+            of matches with match IDs
+    """
+    if is_error_response(api_response):
+        raise InvalidResponseError(f"API reported an error: {api_response.get('error')}")
+    if isinstance(api_response, dict):
+        if "matches" not in api_response:
+            raise InvalidResponseError("Response has no matches")
+        matches = api_response["matches"]
+    else:
+        matches = api_response
+    if not isinstance(matches, list):
+        raise InvalidResponseError(f"Unexpected API response structure: {type(matches)}")
+    for index, match in enumerate(matches):
+        if not isinstance(match, dict) or "matchid" not in match:
+            raise InvalidResponseError(f"Match #{index + 1} has no matchid")
+    return cast(List[Dict[str, Any]], matches)
+
+
+def is_mass_removal(
+    previous_count: int, removed_count: int, threshold: float, min_matches: int = 0
+) -> bool:
+    """
+    Whether a change set removes a suspicious share of the previous matches.
+
+    Args:
+        previous_count: Number of previous matches
+        removed_count: Number of removed matches
+        threshold: Share of the previous matches (0-1) above which a removal is
+            suspicious; 0 or less disables the check
+        min_matches: Previous match lists smaller than this are never suspicious
+
+    Returns:
+        True if the removal should be confirmed before it is committed
+    """
+    if threshold <= 0 or previous_count == 0 or previous_count < min_matches:
+        return False
+    return removed_count / previous_count > threshold
@@ -3,19 +3,23 @@
 Simple health check server for the match list change detector.
 
 Provides a basic HTTP/HTTPS server that responds to health check requests.
+Each connection is handled on its own thread with a socket timeout, so a slow
+or stalled client (or TLS handshake) cannot block other probes, and HTTP/1.1
+keep-alive lets probes reuse their connection.
 """
 
 # Apply Python 3.13+ compatibility fixes first
-from python_compat import fix_python_313_imports
+from python_compat import apply_compat_fixes
 
-fix_python_313_imports()
+apply_compat_fixes()
 
 import logging
+import socket
 import ssl
 import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Tuple, cast
-from wsgiref.simple_server import make_server
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Tuple
 
 
 # Define StartResponse type for WSGI
@@ -45,6 +49,20 @@ SECURITY_HEADERS = [
     ("Pragma", "no-cache"),
 ]
 
+HEALTH_RESPONSE_BODY = b'{"status":"ok"}'
+
+# Seconds a connection may stay idle or take to send a request or finish a TLS handshake
+DEFAULT_REQUEST_TIMEOUT = 5.0
+
+# Maximum number of connections handled at the same time
+DEFAULT_MAX_CONNECTIONS = 64
+
+# Seconds between checks for a shutdown request in the serving thread
+SHUTDOWN_POLL_INTERVAL = 0.1
+
+# Renders the metrics to serve on /metrics as (body, content type)
+MetricsHandler = Callable[[], Tuple[bytes, str]]
+
 
 # Health check endpoint handler
 def health_check_handler(environ: Dict[str, Any], start_response: StartResponse) -> Iterable[bytes]:
@@ -61,17 +79,133 @@ def health_check_handler(environ: Dict[str, Any], start_response: StartResponse)
     """
     status = "200 OK"
     start_response(status, SECURITY_HEADERS)
-    return [b'{"status":"ok"}']
+    return [HEALTH_RESPONSE_BODY]
+
+
+def build_response(
+    path: str, metrics_handler: Optional[MetricsHandler] = None
+) -> Tuple[int, List[Tuple[str, str]], bytes]:
+    """
+    Build the response for a request path.
+
+    Args:
+        path: Request path, optionally with a query string
+        metrics_handler: Renders the Prometheus metrics served on /metrics
+
+    Returns:
+        Status code, headers and body
+    """
+    if metrics_handler is not None and path.split("?", 1)[0] == "/metrics":
+        body, content_type = metrics_handler()
+        return 200, [("Content-Type", content_type)] + SECURITY_HEADERS[1:], body
+    return 200, SECURITY_HEADERS, HEALTH_RESPONSE_BODY
+
+
+class _HealthRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 request handler serving health checks and metrics."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, Nagle's algorithm and
+    # delayed ACKs add ~40ms to every response on a keep-alive connection
+    disable_nagle_algorithm = True
+    server: "_HealthHTTPServer"
+
+    def setup(self) -> None:
+        """Apply the connection timeout and finish the TLS handshake on this thread."""
+        self.request.settimeout(self.server.request_timeout)
+        if isinstance(self.request, ssl.SSLSocket):
+            self.request.do_handshake()
+        super().setup()
+
+    def do_GET(self) -> None:  # noqa: N802
+        """Handle GET requests."""
+        self._respond(send_body=True)
+
+    def do_HEAD(self) -> None:  # noqa: N802
+        """Handle HEAD requests."""
+        self._respond(send_body=False)
+
+    def _respond(self, send_body: bool) -> None:
+        """Write the response for the requested path."""
+        status, headers, body = build_response(self.path, self.server.metrics_handler)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Log requests at debug level instead of writing them to stderr."""
+        logger.debug("%s - " + format, self.address_string(), *args)
+
+
+class _HealthHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a bounded number of concurrent connections."""
+
+    daemon_threads = True
+    # Listen backlog; the socketserver default of 5 makes bursts of probes wait for SYN retries
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int],
+        metrics_handler: Optional[MetricsHandler] = None,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    ) -> None:
+        self.metrics_handler = metrics_handler
+        self.ssl_context = ssl_context
+        self.request_timeout = request_timeout
+        self._connection_slots = threading.BoundedSemaphore(max_connections)
+        super().__init__(server_address, _HealthRequestHandler)
+
+    def get_request(self) -> Tuple[socket.socket, Any]:
+        """Accept a connection, deferring the TLS handshake to the handler thread."""
+        connection, address = super().get_request()
+        if self.ssl_context is not None:
+            connection = self.ssl_context.wrap_socket(
+                connection, server_side=True, do_handshake_on_connect=False
+            )
+        return connection, address
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        """Handle the connection on a new thread, or drop it when at capacity."""
+        if not self._connection_slots.acquire(blocking=False):
+            logger.warning(f"Health server at capacity, dropping connection from {client_address}")
+            self.shutdown_request(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._connection_slots.release()
+            raise
+
+    def process_request_thread(self, request: Any, client_address: Any) -> None:
+        """Handle the connection and free its slot."""
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._connection_slots.release()
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        """Log failed connections (timeouts, TLS errors) without a traceback on stderr."""
+        logger.debug("Health server connection from %s failed", client_address, exc_info=True)
 
 
 class HealthServer:
-    """Simple HTTP/HTTPS server for health checks."""
+    """Simple HTTP/HTTPS server for health checks and metrics."""
 
     port: int
     use_https: bool
     cert_file: Optional[str]
     key_file: Optional[str]
-    server: Optional[Any]
+    metrics_handler: Optional[MetricsHandler]
+    request_timeout: float
+    max_connections: int
+    server: Optional[_HealthHTTPServer]
     server_thread: Optional[threading.Thread]
 
     def __init__(
@@ -80,20 +214,31 @@ class HealthServer:
         use_https: bool = False,
         cert_file: Optional[str] = None,
         key_file: Optional[str] = None,
+        metrics_handler: Optional[MetricsHandler] = None,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
     ) -> None:
         """
         Initialize the health server.
 
         Args:
-            port: Port to listen on
+            port: Port to listen on (0 picks a free port)
             use_https: Whether to use HTTPS
             cert_file: Path to SSL certificate file (required if use_https is True)
             key_file: Path to SSL key file (required if use_https is True)
+            metrics_handler: Renders the Prometheus metrics served on /metrics, so
+                that no separate metrics server is needed
+            request_timeout: Seconds a connection may stay idle, take to send a
+                request or take to complete the TLS handshake
+            max_connections: Maximum number of connections handled concurrently
         """
         self.port = port
         self.use_https = use_https
         self.cert_file = cert_file
         self.key_file = key_file
+        self.metrics_handler = metrics_handler
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
         self.server = None
         self.server_thread = None
 
@@ -112,53 +257,68 @@ class HealthServer:
                     logger.warning(f"SSL certificate or key file not found. Falling back to HTTP.")
                     self.use_https = False
 
+    def _create_ssl_context(self) -> Optional[ssl.SSLContext]:
+        """Create the TLS context, or None to serve plain HTTP."""
+        if not (self.use_https and self.cert_file and self.key_file):
+            return None
+        try:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            # Set minimum TLS version to TLS 1.2
+            context.minimum_version = ssl.TLSVersion.TLSv1_2
+            # Set recommended cipher suites
+            context.set_ciphers(
+                "ECDHE-ECDSA-AES128-GCM-SHA256:ECDHE-RSA-AES128-GCM-SHA256:"
+                "ECDHE-ECDSA-AES256-GCM-SHA384:ECDHE-RSA-AES256-GCM-SHA384:"
+                "ECDHE-ECDSA-CHACHA20-POLY1305:ECDHE-RSA-CHACHA20-POLY1305"
+            )
+            context.load_cert_chain(self.cert_file, self.key_file)
+            return context
+        except Exception as e:
+            logger.error(f"Failed to configure HTTPS: {e}. Falling back to HTTP.")
+            return None
+
     def start(self) -> None:
-        """Start the health server in a separate thread."""
+        """Start the health server in a separate thread.
+
+        A port that cannot be bound is logged rather than raised, so it never
+        stops the detection run the server reports on.
+        """
         if self.server_thread is not None:
             return
 
-        def run_server() -> None:
-            # Use cast to satisfy mypy's type checking for the WSGI handler
-            handler: Any = health_check_handler
-            self.server = make_server(
-                "", self.port, cast(Callable[[Dict[str, Any], Any], Iterable[bytes]], handler)
+        ssl_context = self._create_ssl_context()
+        try:
+            self.server = _HealthHTTPServer(
+                ("", self.port),
+                metrics_handler=self.metrics_handler,
+                ssl_context=ssl_context,
+                request_timeout=self.request_timeout,
+                max_connections=self.max_connections,
             )
+        except OSError as e:
+            logger.error(f"Failed to start health server on port {self.port}: {e}")
+            self.server = None
+            return
+        self.port = self.server.server_address[1]
+        logger.info(
+            f"Health server started with {'HTTPS' if ssl_context else 'HTTP'} on port {self.port}"
+        )
 
-            # Configure SSL if HTTPS is enabled
-            if self.use_https and self.cert_file and self.key_file:
-                try:
-                    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
-                    # Set minimum TLS version to TLS 1.2
-                    context.minimum_version = ssl.TLSVersion.TLSv1_2
-                    # Set recommended cipher suites
-                    context.set_ciphers(
-                        "ECDHE-ECDSA-AES128-GCM-SHA256:ECDHE-RSA-AES128-GCM-SHA256:"
-                        "ECDHE-ECDSA-AES256-GCM-SHA384:ECDHE-RSA-AES256-GCM-SHA384:"
-                        "ECDHE-ECDSA-CHACHA20-POLY1305:ECDHE-RSA-CHACHA20-POLY1305"
-                    )
-                    context.load_cert_chain(self.cert_file, self.key_file)
-                    if self.server and self.server.socket:
-                        self.server.socket = context.wrap_socket(
-                            self.server.socket, server_side=True
-                        )
-                        logger.info(f"Health server started with HTTPS on port {self.port}")
-                except Exception as e:
-                    logger.error(f"Failed to configure HTTPS: {e}. Falling back to HTTP.")
-            else:
-                logger.info(f"Health server started with HTTP on port {self.port}")
-
-            if self.server:
-                self.server.serve_forever()
-
-        self.server_thread = threading.Thread(target=run_server)
-        self.server_thread.daemon = True
+        self.server_thread = threading.Thread(
+            target=self.server.serve_forever,
+            kwargs={"poll_interval": SHUTDOWN_POLL_INTERVAL},
+            name="health-server",
+            daemon=True,
+        )
         self.server_thread.start()
 
     def stop(self) -> None:
         """Stop the health server."""
         if self.server is not None:
             self.server.shutdown()
+            self.server.server_close()
             self.server = None
 
         if self.server_thread is not None:
+            self.server_thread.join(timeout=5)
             self.server_thread = None
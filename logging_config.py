@@ -2,17 +2,27 @@
 """
 Logging configuration for the match list change detector.
 
-Provides functions to configure and access loggers.
+Provides functions to configure and access loggers, and an optional JSON
+output in which every record carries the detection cycle and stage it was
+logged from, so log pipelines can filter by field instead of parsing text.
 """
 
 # Apply Python 3.13+ compatibility fixes first
-from python_compat import fix_python_313_imports
+from python_compat import apply_compat_fixes
 
-fix_python_313_imports()
+apply_compat_fixes()
 
+import atexit
+import json
 import logging
 import os
-from typing import Optional
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 # Conditional import for logging.handlers to handle CI environment issues
 try:
@@ -32,6 +42,29 @@ DEFAULT_LOG_FILE = "match_list_change_detector.log"
 DEFAULT_MAX_BYTES = 10 * 1024 * 1024  # 10 MB
 DEFAULT_BACKUP_COUNT = 5
 
+# Extra record attributes included in JSON output when present, e.g.
+# logger.info("...", extra={"duration_seconds": 1.2, "matches": 250})
+STRUCTURED_FIELDS = (
+    "duration_seconds",
+    "matches",
+    "new_matches",
+    "removed_matches",
+    "changed_matches",
+    "stage_timings",
+)
+
+# Detection cycle, stage and tenant of the code currently logging, stamped onto each record
+_cycle_id: ContextVar[Optional[str]] = ContextVar("log_cycle_id", default=None)
+_stage: ContextVar[Optional[str]] = ContextVar("log_stage", default=None)
+_tenant: ContextVar[Optional[str]] = ContextVar("log_tenant", default=None)
+
+# Queue-mode loggers writing to the same destination share one queue and listener,
+# keyed by (log path, console output, log format)
+_QueueKey = Tuple[str, bool, str]
+_queue_handlers: Dict[_QueueKey, logging.Handler] = {}
+_queue_listeners: List["logging.handlers.QueueListener"] = []
+_queue_lock = threading.Lock()
+
 
 def get_log_level(level_name: Optional[str] = None) -> int:
     """Convert a log level name to a logging level value."""
@@ -55,6 +88,177 @@ def get_log_level(level_name: Optional[str] = None) -> int:
     return level_map.get(level_name_str, logging.INFO)
 
 
+def new_cycle_id() -> str:
+    """Generate a short random ID correlating the log records of one detection cycle."""
+    return uuid.uuid4().hex[:12]
+
+
+def current_cycle_id() -> Optional[str]:
+    """Get the cycle ID set by the enclosing log_context, if any."""
+    return _cycle_id.get()
+
+
+@contextmanager
+def log_context(
+    cycle_id: Optional[str] = None, stage: Optional[str] = None, tenant: Optional[str] = None
+) -> Iterator[None]:
+    """
+    Tag records logged within the context with a cycle ID, stage and/or tenant.
+
+    Context variables do not follow work handed to other threads, so the context
+    has to be entered on the thread doing the logging.
+
+    Args:
+        cycle_id: Detection cycle ID, see new_cycle_id
+        stage: Detection stage name (snapshot_load, fetch, diff, ...)
+        tenant: Name of the account the cycle runs for in a multi-tenant service
+    """
+    tenant_token = _tenant.set(tenant) if tenant is not None else None
+    cycle_token = _cycle_id.set(cycle_id) if cycle_id is not None else None
+    stage_token = _stage.set(stage) if stage is not None else None
+    try:
+        yield
+    finally:
+        if stage_token is not None:
+            _stage.reset(stage_token)
+        if cycle_token is not None:
+            _cycle_id.reset(cycle_token)
+        if tenant_token is not None:
+            _tenant.reset(tenant_token)
+
+
+class ContextFilter(logging.Filter):
+    """Stamp the current cycle ID, stage and tenant onto records.
+
+    Attached to loggers so it runs on the thread that logs, before a record
+    is handed to a queue-mode listener thread.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Add the cycle_id, stage and tenant attributes unless already given as extras."""
+        if getattr(record, "cycle_id", None) is None:
+            record.cycle_id = _cycle_id.get()
+        if getattr(record, "stage", None) is None:
+            record.stage = _stage.get()
+        if getattr(record, "tenant", None) is None:
+            record.tenant = _tenant.get()
+        return True
+
+
+_context_filter = ContextFilter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects.
+
+    Each line has the timestamp, level, logger and message, plus the cycle ID,
+    stage, tenant and any STRUCTURED_FIELDS set on the record. Fields without a value
+    are left out to keep lines short.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialise a record as JSON."""
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        attributes = record.__dict__
+        for field in ("cycle_id", "stage", "tenant") + STRUCTURED_FIELDS:
+            value = attributes.get(field)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+def use_json_logging(json_output: Optional[bool] = None) -> bool:
+    """Whether records should be written as JSON lines (LOG_JSON)."""
+    if json_output is not None:
+        return json_output
+    return os.environ.get("LOG_JSON", "false").lower() in ("true", "yes", "1")
+
+
+def use_async_logging(async_logging: Optional[bool] = None) -> bool:
+    """Whether records should be written by a background thread (LOG_ASYNC)."""
+    if async_logging is not None:
+        return async_logging
+    return os.environ.get("LOG_ASYNC", "false").lower() in ("true", "yes", "1")
+
+
+def _create_handlers(
+    formatter: logging.Formatter, log_path: str, console_output: bool
+) -> List[logging.Handler]:
+    """Create the handlers that write records to the log file and console."""
+    handlers: List[logging.Handler] = []
+
+    # Use a rotating file handler to prevent logs from growing too large
+    if LOGGING_HANDLERS_AVAILABLE:
+        handlers.append(
+            logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=DEFAULT_MAX_BYTES, backupCount=DEFAULT_BACKUP_COUNT
+            )
+        )
+    else:
+        # Fallback to basic FileHandler if RotatingFileHandler is not available
+        handlers.append(logging.FileHandler(log_path))
+
+    # Add console handler if requested
+    if console_output:
+        handlers.append(logging.StreamHandler())
+
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def _get_queue_handler(
+    formatter: logging.Formatter, format_key: str, log_path: str, console_output: bool
+) -> logging.Handler:
+    """
+    Get the queue handler for a log destination, starting its listener on first use.
+
+    The calling thread only enqueues the record; the file and console handlers
+    run on the listener's background thread.
+    """
+    key = (os.path.abspath(log_path), console_output, format_key)
+    with _queue_lock:
+        handler = _queue_handlers.get(key)
+        if handler is None:
+            record_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(
+                record_queue,
+                *_create_handlers(formatter, log_path, console_output),
+                respect_handler_level=True,
+            )
+            listener.start()
+            if not _queue_listeners:
+                atexit.register(shutdown_logging)
+            _queue_listeners.append(listener)
+            handler = logging.handlers.QueueHandler(record_queue)
+            _queue_handlers[key] = handler
+        return handler
+
+
+def shutdown_logging() -> None:
+    """Write out queued log records and stop the background logging threads."""
+    with _queue_lock:
+        listeners = list(_queue_listeners)
+        _queue_listeners.clear()
+        _queue_handlers.clear()
+    for listener in listeners:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
 def configure_logging(
     logger_name: str = "match_list_change_detector",
     log_level: Optional[str] = None,
@@ -62,6 +266,8 @@ def configure_logging(
     log_dir: Optional[str] = None,
     log_file: Optional[str] = None,
     console_output: bool = True,
+    async_logging: Optional[bool] = None,
+    json_output: Optional[bool] = None,
 ) -> logging.Logger:
     """
     Configure logging for the application.
@@ -73,6 +279,10 @@ def configure_logging(
         log_dir: Directory to store log files
         log_file: Log file name
         console_output: Whether to output logs to console
+        async_logging: Whether to hand records to a background thread for writing
+            instead of writing them on the calling thread (defaults to LOG_ASYNC)
+        json_output: Whether to write records as JSON lines instead of log_format
+            (defaults to LOG_JSON)
 
     Returns:
         Configured logger
@@ -83,11 +293,9 @@ def configure_logging(
 
     # Clear existing handlers
     logger.handlers = []
+    logger.addFilter(_context_filter)
 
-    # Create formatter
-    formatter = logging.Formatter(log_format or DEFAULT_LOG_FORMAT)
-
-    # Create file handler
+    # Resolve the log file path
     log_dir_str = DEFAULT_LOG_DIR
     if log_dir is not None:
         log_dir_str = log_dir
@@ -109,24 +317,18 @@ def configure_logging(
 
     log_path = os.path.join(log_dir_str, log_file_str)
 
-    # Use a rotating file handler to prevent logs from growing too large
-    if LOGGING_HANDLERS_AVAILABLE:
-        file_handler = logging.handlers.RotatingFileHandler(
-            log_path, maxBytes=DEFAULT_MAX_BYTES, backupCount=DEFAULT_BACKUP_COUNT
-        )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    formatter: logging.Formatter
+    if use_json_logging(json_output):
+        formatter, format_key = JsonFormatter(), "json"
     else:
-        # Fallback to basic FileHandler if RotatingFileHandler is not available
-        file_handler = logging.FileHandler(log_path)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        format_key = log_format or DEFAULT_LOG_FORMAT
+        formatter = logging.Formatter(format_key)
 
-    # Add console handler if requested
-    if console_output:
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+    if use_async_logging(async_logging) and LOGGING_HANDLERS_AVAILABLE:
+        logger.addHandler(_get_queue_handler(formatter, format_key, log_path, console_output))
+    else:
+        for handler in _create_handlers(formatter, log_path, console_output):
+            logger.addHandler(handler)
 
     logger.info(f"Logging configured with level {log_level or DEFAULT_LOG_LEVEL}")
 
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped match snapshots with on-demand decoding.
+
+Loading a JSON snapshot decodes every previous match, even when only a few
+of them changed. A mapped snapshot instead stores each match as its own JSON
+record followed by a fixed-size index entry per match::
+
+    header   magic, format version, match count, index offset, ID table offset
+    records  compact JSON of each match, in list order
+    index    per match: tracked fields fingerprint, record offset, record length
+    IDs      JSON array of the match IDs, in list order
+
+Opening the snapshot maps the file and reads only the index and the IDs. The diff
+compares the fingerprint of each current match with the indexed one and
+decodes a previous record only for matches whose tracked fields may differ
+and for removed matches, so after the first cycle the cost of reading the
+snapshot follows the number of changes rather than the number of matches.
+
+Fingerprints are 128-bit BLAKE2b digests of the tracked values. A differing
+fingerprint only marks a match for the exact comparison of the serial diff;
+tracked values that do not equal themselves (NaN) are always compared.
+"""
+
+import json
+import mmap
+import os
+import struct
+from hashlib import blake2b
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
+
+from snapshot_store import SnapshotSaveStats
+
+MAGIC = b"MLCDSNAP"
+FORMAT_VERSION = 1
+
+# Magic, format version, match count, index offset, ID table offset
+_HEADER = struct.Struct("<8sIIQQ")
+# Fingerprint, record offset, record length
+_ENTRY = struct.Struct("<16sQI")
+
+# Fields compared by compare_matches for basic changes
+BASIC_FIELDS = (
+    "speldatum",
+    "avsparkstid",
+    "anlaggningnamn",
+    "installd",
+    "avbruten",
+    "uppskjuten",
+    "lag1lagid",
+    "lag2lagid",
+)
+
+REFEREES = "domaruppdraglista"
+
+# Fingerprint of tracked fields that cannot be fingerprinted; never matches
+UNCOMPARABLE = bytes(16)
+
+# Compact separators keep stored records small
+_SEPARATORS = (",", ":")
+
+_basic_values = itemgetter(*BASIC_FIELDS)
+
+
+def fingerprint(match: Dict[str, Any]) -> bytes:
+    """Digest of the fields compared by compare_matches, or UNCOMPARABLE."""
+    try:
+        values = _basic_values(match)
+    except KeyError:
+        values = tuple(match.get(field) for field in BASIC_FIELDS)
+    try:
+        referee_ids = {referee.get("domareid") for referee in match.get(REFEREES, [])}
+    except TypeError:
+        return UNCOMPARABLE
+    # NaN has one repr but never equals itself
+    if any(isinstance(value, float) and value != value for value in (*values, *referee_ids)):
+        return UNCOMPARABLE
+    # repr tells apart values that compare equal, such as 1 and 1.0, which only
+    # sends them to the exact comparison
+    data = repr((values, sorted(map(repr, referee_ids))))
+    return blake2b(data.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class MappedSnapshot:
+    """Read-only match list backed by a mapped snapshot file.
+
+    Indexing and iterating decode matches from the mapping on each access;
+    iter_match_changes diffs against the index without decoding unchanged
+    matches.
+    """
+
+    path: Path
+    index_bytes: int
+
+    def __init__(self, path: str) -> None:
+        """
+        Map a snapshot file and read its index.
+
+        Args:
+            path: Snapshot file written by MappedSnapshotStore
+
+        Raises:
+            ValueError: If the file is not a snapshot of a supported version
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"Truncated match snapshot: {self.path}")
+        magic, version, count, index_offset, ids_offset = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Not a version {FORMAT_VERSION} match snapshot: {self.path}")
+        if index_offset + count * _ENTRY.size != ids_offset or ids_offset > len(self._map):
+            raise ValueError(f"Truncated match snapshot: {self.path}")
+
+        entries = list(_ENTRY.iter_unpack(self._map[index_offset:ids_offset]))
+        self._fingerprints: List[bytes] = [entry[0] for entry in entries]
+        self._records: List[Tuple[int, int]] = [(entry[1], entry[2]) for entry in entries]
+        match_ids = json.loads(self._map[ids_offset:])
+        if len(match_ids) != count:
+            raise ValueError(f"Corrupt match snapshot: {self.path}")
+        self._rows: Dict[Any, int] = {match_id: row for row, match_id in enumerate(match_ids)}
+        self.index_bytes = len(self._map) - index_offset + _HEADER.size
+
+    def __len__(self) -> int:
+        """Number of matches in the snapshot."""
+        return len(self._records)
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        """Decode the match at a position."""
+        offset, length = self._records[row]
+        return cast(Dict[str, Any], json.loads(self._map[offset : offset + length]))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Decode every match in list order."""
+        for row in range(len(self)):
+            yield self[row]
+
+    def record(self, match_id: Any) -> Optional[bytes]:
+        """Encoded record of a match, or None if the snapshot does not contain it."""
+        row = self._rows.get(match_id)
+        if row is None:
+            return None
+        offset, length = self._records[row]
+        return self._map[offset : offset + length]
+
+    def close(self) -> None:
+        """Unmap the snapshot file."""
+        self._map.close()
+
+    def iter_match_changes(
+        self, current_matches: List[Dict[str, Any]]
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield the differences between the snapshot and a current match list.
+
+        Yields the same changes in the same order as iter_match_changes,
+        decoding only removed matches and matches whose fingerprint differs.
+
+        Args:
+            current_matches: Freshly fetched match list
+
+        Yields:
+            Tuples of (change_type, item) where change_type is "new", "removed" or
+            "changed" and item is the raw match or a match change record
+        """
+        from match_list_change_detector import build_change_record, compare_matches
+
+        current: Dict[Any, Dict[str, Any]] = {}
+        for match in current_matches:
+            current[match["matchid"]] = match
+
+        present = bytearray(len(self))
+        common: List[Tuple[Any, Dict[str, Any], int]] = []
+        for match_id, match in current.items():
+            row = self._rows.get(match_id)
+            if row is None:
+                yield "new", match
+            else:
+                present[row] = 1
+                common.append((match_id, match, row))
+
+        for row, seen in enumerate(present):
+            if not seen:
+                yield "removed", self[row]
+
+        for match_id, match, row in common:
+            previous_fingerprint = self._fingerprints[row]
+            if previous_fingerprint != UNCOMPARABLE and previous_fingerprint == fingerprint(match):
+                continue
+            previous = self[row]
+            basic_changes, referee_changes = compare_matches(previous, match)
+            if basic_changes or referee_changes:
+                yield "changed", cast(
+                    Dict[str, Any],
+                    build_change_record(match_id, previous, match, basic_changes, referee_changes),
+                )
+
+
+class MappedSnapshotStore:
+    """Previous match list stored as a mapped snapshot file.
+
+    A match ID identifies one record; when a list repeats an ID, the record
+    keeps the last match at the position of the first, like the dicts the
+    diff builds. Saves write a new file and replace the old one, so an open
+    snapshot keeps reading the version it mapped.
+    """
+
+    path: Path
+    bytes_read: int
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the snapshot store.
+
+        Args:
+            path: Path to the snapshot file
+        """
+        self.path = Path(path)
+        self.bytes_read = 0
+
+    def load(self) -> Optional[MappedSnapshot]:
+        """
+        Map the stored snapshot.
+
+        Returns:
+            Snapshot decoding matches on demand, or None if no snapshot has been saved
+        """
+        self.bytes_read = 0
+        if not self.path.exists():
+            return None
+        snapshot = MappedSnapshot(str(self.path))
+        self.bytes_read = snapshot.index_bytes
+        return snapshot
+
+    def save(self, matches: List[Dict[str, Any]]) -> SnapshotSaveStats:
+        """
+        Replace the stored snapshot.
+
+        Args:
+            matches: Current match list
+
+        Returns:
+            Number of inserted, updated, deleted and unchanged matches and bytes written
+        """
+        current: Dict[Any, Dict[str, Any]] = {}
+        for match in matches:
+            current[match["matchid"]] = match
+
+        previous = self.load() if self.path.exists() else None
+        inserted = updated = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(bytes(_HEADER.size))
+                offset = _HEADER.size
+                index = bytearray()
+                for match_id, match in current.items():
+                    record = json.dumps(match, separators=_SEPARATORS).encode()
+                    f.write(record)
+                    index += _ENTRY.pack(fingerprint(match), offset, len(record))
+                    offset += len(record)
+
+                    previous_record = None if previous is None else previous.record(match_id)
+                    if previous_record is None:
+                        inserted += 1
+                    elif previous_record != record:
+                        updated += 1
+                match_ids = json.dumps(list(current), separators=_SEPARATORS).encode()
+                f.write(index)
+                f.write(match_ids)
+                f.seek(0)
+                f.write(
+                    _HEADER.pack(MAGIC, FORMAT_VERSION, len(current), offset, offset + len(index))
+                )
+            os.replace(temp_path, self.path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+            if previous is not None:
+                previous.close()
+
+        return SnapshotSaveStats(
+            inserted=inserted,
+            updated=updated,
+            deleted=(0 if previous is None else len(previous)) - (len(current) - inserted),
+            unchanged=len(current) - inserted - updated,
+            bytes_written=offset + len(index) + len(match_ids),
+        )
+
+    def export_json(self, path: str) -> int:
+        """
+        Write the stored match list as a JSON snapshot file.
+
+        Args:
+            path: Output file, in the format of PREVIOUS_MATCHES_FILE
+
+        Returns:
+            Number of exported matches
+
+        Raises:
+            FileNotFoundError: If no snapshot has been saved
+        """
+        snapshot = self.load()
+        if snapshot is None:
+            raise FileNotFoundError(f"No snapshot saved at {self.path}")
+        output = Path(path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(output, "w") as f:
+                json.dump(list(snapshot), f, indent=2)
+        finally:
+            snapshot.close()
+        return len(snapshot)
@@ -7,17 +7,39 @@ Detects changes in match lists and triggers actions when changes are found.
 
 import json
 import shutil
+import sqlite3
 import subprocess  # nosec B404
 import time
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, TypedDict, Union
-
-from fogis_api_client import MatchListFilter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from centralized_api_client import CentralizedFogisApiClient
+from change_feed import NdjsonChangeWriter, write_ndjson_changes
+from change_history import ChangeHistoryStore
 from config import get_config
-from logging_config import get_logger
+from fetch_guard import InvalidResponseError, extract_matches, is_mass_removal
+from logging_config import current_cycle_id, get_logger, log_context, new_cycle_id
+from mapped_snapshot import MappedSnapshot, MappedSnapshotStore
+from parallel_diff import parallel_iter_match_changes
+from profiling import profiler
+from resilience import RetryPolicy, get_circuit_breaker
+from response_recorder import ResponseRecorder
+from snapshot_history import SnapshotHistoryStore
+from snapshot_store import SqliteSnapshotStore
 
 # Conditional import for health_server to handle CI environment issues
 try:
@@ -64,6 +86,9 @@ except (ImportError, KeyError) as e:
 
         def __getattr__(self, name):
             """Return a mock object that does nothing for any attribute access."""
+            # Timers must still work as context managers
+            if name.startswith("time_"):
+                return lambda *args, **kwargs: nullcontext()
             # Return a mock object that does nothing
             return lambda *args, **kwargs: None
 
@@ -75,7 +100,7 @@ class MatchChangeRecord(TypedDict):
     """Type definition for a match change record."""
 
     match_id: str
-    match_nr: str
+    match_nr: Optional[str]
     previous: Dict[str, Any]
     current: Dict[str, Any]
     changes: Dict[str, bool]
@@ -92,25 +117,23 @@ class ChangesSummary(TypedDict):
     changed_match_details: List[MatchChangeRecord]
 
 
+T = TypeVar("T")
+
+# Callback invoked with (change_type, item) for each change produced by the diff
+ChangeCallback = Callable[[str, Dict[str, Any]], None]
+
+# Callback invoked with (changes, change_history_seq) once a change set is detected
+ChangeSetListener = Callable[[Dict[str, Any], Optional[int]], None]
+
+
 # Get configuration
 config = get_config()
 
 # Get logger
 logger = get_logger("match_list_change_detector")
 
-# Start health server with HTTPS if configured
-use_https = config.get("USE_HTTPS", False)
-health_server_port = config.get("HEALTH_SERVER_PORT", 8000)
-ssl_cert_file = config.get("SSL_CERT_FILE") if use_https else None
-ssl_key_file = config.get("SSL_KEY_FILE") if use_https else None
-
-health_server = HealthServer(
-    port=health_server_port, use_https=use_https, cert_file=ssl_cert_file, key_file=ssl_key_file
-)
-health_server.start()
-
-if not HEALTH_SERVER_AVAILABLE:
-    logger.warning("Health server functionality not available in this environment")
+# Health server for oneshot runs, created by start_servers()
+health_server: Optional[Any] = None
 
 # Constants
 PREVIOUS_MATCHES_FILE = config.get("PREVIOUS_MATCHES_FILE")
@@ -119,6 +142,104 @@ FOGIS_USERNAME = config.get("FOGIS_USERNAME")
 FOGIS_PASSWORD = config.get("FOGIS_PASSWORD")
 DAYS_BACK = config.get("DAYS_BACK")
 DAYS_AHEAD = config.get("DAYS_AHEAD")
+CHANGES_FILE = config.get("CHANGES_FILE", "match_changes.json")
+CHANGES_OUTPUT_FORMAT = str(config.get("CHANGES_OUTPUT_FORMAT", "json")).lower()
+CHANGE_HISTORY_FILE = config.get("CHANGE_HISTORY_FILE", "")
+CHANGE_HISTORY_MAX_SETS = config.get("CHANGE_HISTORY_MAX_SETS", 1000)
+CHANGE_HISTORY_MAX_AGE_DAYS = config.get("CHANGE_HISTORY_MAX_AGE_DAYS", 30)
+SNAPSHOT_HISTORY_FILE = config.get("SNAPSHOT_HISTORY_FILE", "")
+SNAPSHOT_HISTORY_MAX_SNAPSHOTS = config.get("SNAPSHOT_HISTORY_MAX_SNAPSHOTS", 720)
+SNAPSHOT_HISTORY_MAX_AGE_DAYS = config.get("SNAPSHOT_HISTORY_MAX_AGE_DAYS", 30)
+DIFF_WORKERS = config.get("DIFF_WORKERS", 0)
+DIFF_PARALLEL_MIN_MATCHES = config.get("DIFF_PARALLEL_MIN_MATCHES", 50000)
+SNAPSHOT_BACKEND = str(config.get("SNAPSHOT_BACKEND", "json")).lower()
+SNAPSHOT_DB_FILE = config.get("SNAPSHOT_DB_FILE", "")
+SNAPSHOT_MMAP_FILE = config.get("SNAPSHOT_MMAP_FILE", "")
+SNAPSHOT_JSON_EXPORT = config.get("SNAPSHOT_JSON_EXPORT", False)
+MASS_REMOVAL_THRESHOLD = float(config.get("MASS_REMOVAL_THRESHOLD", 0.5))
+MASS_REMOVAL_MIN_MATCHES = config.get("MASS_REMOVAL_MIN_MATCHES", 10)
+QUARANTINE_RETRIES = config.get("QUARANTINE_RETRIES", 2)
+QUARANTINE_RETRY_DELAY = float(config.get("QUARANTINE_RETRY_DELAY", 10.0))
+RESPONSE_RECORDER_DIR = config.get("RESPONSE_RECORDER_DIR", "")
+RESPONSE_RECORDER_MAX_ENTRIES = config.get("RESPONSE_RECORDER_MAX_ENTRIES", 48)
+RESPONSE_RECORDER_MAX_MB = config.get("RESPONSE_RECORDER_MAX_MB", 100)
+API_LOGIN_TIMEOUT = float(config.get("API_LOGIN_TIMEOUT", 10.0))
+API_FETCH_TIMEOUT = float(config.get("API_FETCH_TIMEOUT", 30.0))
+API_RETRY_ATTEMPTS = config.get("API_RETRY_ATTEMPTS", 3)
+API_RETRY_BASE_DELAY = float(config.get("API_RETRY_BASE_DELAY", 0.5))
+API_RETRY_MAX_DELAY = float(config.get("API_RETRY_MAX_DELAY", 8.0))
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = config.get("CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5)
+CIRCUIT_BREAKER_RESET_TIMEOUT = float(config.get("CIRCUIT_BREAKER_RESET_TIMEOUT", 60.0))
+
+
+def _or_default(value: Optional[T], default: T) -> T:
+    """Return value unless it is None, in which case return the configured default."""
+    return default if value is None else value
+
+
+def create_response_recorder(directory: str) -> Optional[ResponseRecorder]:
+    """Response recorder for a directory with the configured limits, or None if empty."""
+    if not directory:
+        return None
+    return ResponseRecorder(
+        directory,
+        max_entries=RESPONSE_RECORDER_MAX_ENTRIES,
+        max_bytes=int(RESPONSE_RECORDER_MAX_MB * 1024 * 1024),
+    )
+
+
+def create_api_client(
+    username: str,
+    password: str,
+    api_client_url: Optional[str] = None,
+    *,
+    session: Optional[Any] = None,
+    recorder_dir: str = "",
+    breaker_name: str = "api",
+) -> CentralizedFogisApiClient:
+    """
+    API client with the configured timeouts, retries and circuit breaker.
+
+    The circuit breaker of a name is shared for the life of the process, so
+    an open circuit carries over to clients created by later cycles.
+
+    Args:
+        username: FOGIS username
+        password: FOGIS password
+        api_client_url: Centralized API client URL; None uses the direct API
+        session: HTTP session to make the requests with
+        recorder_dir: Response recorder directory; empty disables it
+        breaker_name: Name of the circuit breaker in logs, metrics and /status
+
+    Returns:
+        The API client
+    """
+    breaker = None
+    if CIRCUIT_BREAKER_FAILURE_THRESHOLD > 0:
+        breaker = get_circuit_breaker(
+            breaker_name,
+            failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=CIRCUIT_BREAKER_RESET_TIMEOUT,
+            on_state_change=lambda name, state: metrics.record_circuit_state(name, state),
+            on_reject=lambda name: metrics.record_circuit_rejection(name),
+        )
+    retry = RetryPolicy(
+        attempts=API_RETRY_ATTEMPTS,
+        base_delay=API_RETRY_BASE_DELAY,
+        max_delay=API_RETRY_MAX_DELAY,
+        on_retry=lambda attempt, error, delay: metrics.record_api_retry(breaker_name),
+    )
+    return CentralizedFogisApiClient(
+        api_client_url=api_client_url,
+        username=username,
+        password=password,
+        session=session,
+        recorder=create_response_recorder(recorder_dir),
+        breaker=breaker,
+        retry=retry,
+        login_timeout=API_LOGIN_TIMEOUT,
+        fetch_timeout=API_FETCH_TIMEOUT,
+    )
 
 
 def get_executable_path(executable: str) -> Optional[str]:
@@ -236,6 +357,150 @@ def validate_file_path(
         return None
 
 
+def _referee_details(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Extract the referee details included in a match change record."""
+    return [
+        {
+            "id": referee.get("domareid"),
+            "name": referee.get("personnamn"),
+            "role": referee.get("domarrollnamn"),
+            "email": referee.get("epostadress"),
+            "phone": referee.get("mobiltelefon"),
+        }
+        for referee in match.get("domaruppdraglista", [])
+    ]
+
+
+def _match_summary(match: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the tracked fields of a match for a change record."""
+    return {
+        "date": match.get("speldatum"),
+        "time": match.get("avsparkstid"),
+        "home_team": {
+            "id": match.get("lag1lagid"),
+            "name": match.get("lag1namn"),
+        },
+        "away_team": {
+            "id": match.get("lag2lagid"),
+            "name": match.get("lag2namn"),
+        },
+        "venue": match.get("anlaggningnamn"),
+        "status": {
+            "cancelled": match.get("installd", False),
+            "interrupted": match.get("avbruten", False),
+            "postponed": match.get("uppskjuten", False),
+        },
+        "referees": _referee_details(match),
+    }
+
+
+def build_change_record(
+    match_id: Any,
+    prev_match: Dict[str, Any],
+    curr_match: Dict[str, Any],
+    basic_changes: bool,
+    referee_changes: bool,
+) -> MatchChangeRecord:
+    """Build a detailed change record for a match present in both lists.
+
+    Args:
+        match_id: ID of the changed match
+        prev_match: Previous version of the match
+        curr_match: Current version of the match
+        basic_changes: Whether date, time, venue, teams or status changed
+        referee_changes: Whether the referee assignments changed
+
+    Returns:
+        Match change record
+
+    """
+    return {
+        "match_id": match_id,
+        "match_nr": curr_match.get("matchnr"),
+        "previous": _match_summary(prev_match),
+        "current": _match_summary(curr_match),
+        "changes": {"basic": basic_changes, "referees": referee_changes},
+    }
+
+
+def compare_matches(prev_match: Dict[str, Any], curr_match: Dict[str, Any]) -> Tuple[bool, bool]:
+    """Compare the tracked fields of two versions of a match.
+
+    Args:
+        prev_match: Previous version of the match
+        curr_match: Current version of the match
+
+    Returns:
+        Tuple of (basic_changes, referee_changes)
+
+    """
+    # Check for important changes (date, time, venue, referees, teams, status)
+    # Compare basic match details
+    basic_changes = (
+        prev_match.get("speldatum") != curr_match.get("speldatum")
+        or prev_match.get("avsparkstid") != curr_match.get("avsparkstid")
+        or prev_match.get("anlaggningnamn") != curr_match.get("anlaggningnamn")
+        or prev_match.get("installd") != curr_match.get("installd")
+        or prev_match.get("avbruten") != curr_match.get("avbruten")
+        or prev_match.get("uppskjuten") != curr_match.get("uppskjuten")
+        or prev_match.get("lag1lagid") != curr_match.get("lag1lagid")
+        or prev_match.get("lag2lagid") != curr_match.get("lag2lagid")
+    )
+
+    # Compare referee assignments
+    prev_referee_ids = {
+        referee.get("domareid") for referee in prev_match.get("domaruppdraglista", [])
+    }
+    curr_referee_ids = {
+        referee.get("domareid") for referee in curr_match.get("domaruppdraglista", [])
+    }
+    referee_changes = prev_referee_ids != curr_referee_ids
+
+    return basic_changes, referee_changes
+
+
+def iter_match_changes(
+    previous_matches: List[Dict[str, Any]], current_matches: List[Dict[str, Any]]
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield the differences between two match lists one change at a time.
+
+    New matches are yielded first, then removed matches, then changed matches.
+
+    Args:
+        previous_matches: Previously saved match list
+        current_matches: Freshly fetched match list
+
+    Yields:
+        Tuples of (change_type, item) where change_type is "new", "removed" or
+        "changed" and item is the raw match or a match change record
+
+    """
+    # Create dictionaries for easier comparison, using match ID as key
+    prev_matches_dict = {match["matchid"]: match for match in previous_matches}
+    curr_matches_dict = {match["matchid"]: match for match in current_matches}
+
+    for match_id, curr_match in curr_matches_dict.items():
+        if match_id not in prev_matches_dict:
+            yield "new", curr_match
+
+    for match_id, prev_match in prev_matches_dict.items():
+        if match_id not in curr_matches_dict:
+            yield "removed", prev_match
+
+    for match_id, curr_match in curr_matches_dict.items():
+        if match_id not in prev_matches_dict:
+            continue
+        prev_match = prev_matches_dict[match_id]
+        basic_changes, referee_changes = compare_matches(prev_match, curr_match)
+        if basic_changes or referee_changes:
+            yield "changed", cast(
+                Dict[str, Any],
+                build_change_record(
+                    match_id, prev_match, curr_match, basic_changes, referee_changes
+                ),
+            )
+
+
 class MatchListChangeDetector:
     """Detects changes in the match list and triggers actions when changes are found."""
 
@@ -243,33 +508,164 @@ class MatchListChangeDetector:
     previous_matches: List[Dict[str, Any]]
     current_matches: List[Dict[str, Any]]
     rate_limiter: RateLimiter
+    last_change_seq: Optional[int]
+    stage_timings: Dict[str, float]
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        *,
+        api_client: Optional[CentralizedFogisApiClient] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        previous_matches_file: Optional[str] = None,
+        changes_file: Optional[str] = None,
+        change_history_file: Optional[str] = None,
+        snapshot_history_file: Optional[str] = None,
+        docker_compose_file: Optional[str] = None,
+        days_back: Optional[int] = None,
+        days_ahead: Optional[int] = None,
+        metrics_recorder: Optional[Any] = None,
+    ):
+        """Initialize the detector with API credentials.
+
+        The keyword arguments let one process run detectors for several accounts
+        side by side. Any left as None fall back to the module configuration.
 
-    def __init__(self, username: str, password: str):
-        """Initialize the detector with API credentials."""
+        Args:
+            username: FOGIS username
+            password: FOGIS password
+            api_client: API client to reuse across cycles instead of creating one
+            rate_limiter: Rate limiter to share across cycles
+            previous_matches_file: Snapshot file of the previous match list
+            changes_file: Changes file read by the orchestrator services
+            change_history_file: Change history database; empty disables it
+            snapshot_history_file: Snapshot history database; empty disables it
+            docker_compose_file: Orchestrator docker-compose file to trigger
+            days_back: Days before today to fetch matches for
+            days_ahead: Days after today to fetch matches for
+            metrics_recorder: Metrics to record into, e.g. a per-tenant view
+
+        """
         # Use centralized API client if URL is provided, otherwise use direct API
-        api_client_url = config.get("FOGIS_API_CLIENT_URL")
-        self.api_client = CentralizedFogisApiClient(
-            api_client_url=api_client_url, username=username, password=password
-        )
+        if api_client is None:
+            api_client = create_api_client(
+                username,
+                password,
+                config.get("FOGIS_API_CLIENT_URL"),
+                recorder_dir=RESPONSE_RECORDER_DIR,
+            )
+        self.api_client = api_client
         self.previous_matches = []
         self.current_matches = []
+        self.last_change_seq = None
+        self.stage_timings = {}
+        # Whether the last fetch was answered with a stale recorded response
+        self.fetch_was_stale = False
+
+        self.previous_matches_file = previous_matches_file
+        self.changes_file = changes_file
+        self.change_history_file = change_history_file
+        self.snapshot_history_file = snapshot_history_file
+        self.docker_compose_file = docker_compose_file
+        self.days_back = days_back
+        self.days_ahead = days_ahead
+        self.metrics_recorder = metrics_recorder
+        self._snapshot_store: Optional[Union[SqliteSnapshotStore, MappedSnapshotStore]] = None
+        self._snapshot_path: Optional[Path] = None
 
         # Initialize rate limiter
-        max_requests = config.get("API_RATE_LIMIT", 10)
-        self.rate_limiter = RateLimiter(max_requests=max_requests)
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(max_requests=config.get("API_RATE_LIMIT", 10))
+        self.rate_limiter = rate_limiter
+
+    @property
+    def metrics(self) -> Any:
+        """Metrics recorded by this detector."""
+        return metrics if self.metrics_recorder is None else self.metrics_recorder
+
+    @contextmanager
+    def time_stage(self, stage: str) -> Iterator[None]:
+        """Time a stage of the detection cycle.
+
+        The duration is observed in the stage duration histogram and kept in
+        stage_timings for the current cycle. Allocations are traced when the
+        cycle is being profiled with tracemalloc.
+
+        Args:
+            stage: Stage name (snapshot_load, login, fetch, parse, diff, trigger,
+                snapshot_save)
+
+        """
+        start = time.perf_counter()
+        try:
+            with self.metrics.time_stage(stage), profiler.trace_allocations(stage):
+                with log_context(stage=stage):
+                    yield
+        finally:
+            self.stage_timings[stage] = time.perf_counter() - start
+
+    def snapshot_store(self) -> Optional[Union[SqliteSnapshotStore, MappedSnapshotStore]]:
+        """Store of the previous matches, or None with the JSON snapshot backend.
+
+        The store is kept across cycles, so a SQLite save compares the current
+        matches with the snapshot it loaded instead of reading it back.
+        """
+        if SNAPSHOT_BACKEND not in ("sqlite", "mmap"):
+            return None
+        snapshot_file = _or_default(self.previous_matches_file, PREVIOUS_MATCHES_FILE)
+        if SNAPSHOT_BACKEND == "sqlite":
+            store_file = SNAPSHOT_DB_FILE or str(Path(snapshot_file).with_suffix(".db"))
+        else:
+            store_file = SNAPSHOT_MMAP_FILE or str(Path(snapshot_file).with_suffix(".snap"))
+        store_path = validate_file_path(store_file)
+        if not store_path:
+            raise ValueError(f"Invalid snapshot store path: {store_file}")
+        if self._snapshot_store is None or self._snapshot_path != store_path:
+            if SNAPSHOT_BACKEND == "sqlite":
+                self._snapshot_store = SqliteSnapshotStore(str(store_path))
+            else:
+                self._snapshot_store = MappedSnapshotStore(str(store_path))
+            self._snapshot_path = store_path
+        return self._snapshot_store
+
+    def close_previous_matches(self) -> None:
+        """Unmap the previous matches if they are a mapped snapshot."""
+        if isinstance(self.previous_matches, MappedSnapshot):
+            self.previous_matches.close()
+            self.previous_matches = []
 
     def load_previous_matches(self) -> bool:
         """Load the previously saved matches from file."""
+        self.close_previous_matches()
         try:
+            store = self.snapshot_store()
+            if store is not None:
+                matches = store.load()
+                if matches is not None:
+                    # A mapped snapshot decodes matches on demand
+                    self.previous_matches = cast(List[Dict[str, Any]], matches)
+                    self.metrics.record_snapshot_read(store.bytes_read)
+                    logger.info(
+                        f"Loaded {len(matches)} previous matches from {self._snapshot_path}"
+                    )
+                    return True
+                # A JSON snapshot from before the switch is migrated on the next save
+                logger.info(
+                    f"No snapshot in {self._snapshot_path}, trying the previous matches file"
+                )
+
             # Validate the file path
-            file_path = validate_file_path(PREVIOUS_MATCHES_FILE, must_exist=False)
+            snapshot_file = _or_default(self.previous_matches_file, PREVIOUS_MATCHES_FILE)
+            file_path = validate_file_path(snapshot_file, must_exist=False)
             if not file_path:
-                logger.error(f"Invalid previous matches file path: {PREVIOUS_MATCHES_FILE}")
+                logger.error(f"Invalid previous matches file path: {snapshot_file}")
                 return False
 
             if file_path.exists():
                 with open(file_path, "r") as f:
                     self.previous_matches = json.load(f)
+                    self.metrics.record_snapshot_read(f.tell())
                 logger.info(
                     f"Loaded {len(self.previous_matches)} previous matches from " f"{file_path}"
                 )
@@ -287,15 +683,29 @@ class MatchListChangeDetector:
     def save_current_matches(self) -> bool:
         """Save the current matches to file for future comparison."""
         try:
+            store = self.snapshot_store()
+            if store is not None:
+                stats = store.save(self.current_matches)
+                self.metrics.record_snapshot_write(stats.bytes_written)
+                logger.info(
+                    f"Saved {len(self.current_matches)} current matches to {self._snapshot_path} "
+                    f"({stats.inserted} inserted, {stats.updated} updated, "
+                    f"{stats.deleted} deleted)"
+                )
+                if not SNAPSHOT_JSON_EXPORT:
+                    return True
+
             # Validate the file path
-            file_path = validate_file_path(PREVIOUS_MATCHES_FILE, create_dir=True)
+            snapshot_file = _or_default(self.previous_matches_file, PREVIOUS_MATCHES_FILE)
+            file_path = validate_file_path(snapshot_file, create_dir=True)
             if not file_path:
-                logger.error(f"Invalid previous matches file path: {PREVIOUS_MATCHES_FILE}")
+                logger.error(f"Invalid previous matches file path: {snapshot_file}")
                 return False
 
             with open(file_path, "w") as f:
                 # noinspection PyTypeChecker
                 json.dump(self.current_matches, f, indent=2)
+                self.metrics.record_snapshot_write(f.tell())
             logger.info(f"Saved {len(self.current_matches)} current matches to {file_path}")
             return True
         except Exception as e:
@@ -304,19 +714,25 @@ class MatchListChangeDetector:
 
     def fetch_current_matches(self) -> bool:
         """Fetch the current list of matches from the API."""
+        # Imported on first use: the API client package is by far the slowest import
+        from fogis_api_client import MatchListFilter
+
+        self.fetch_was_stale = False
         try:
             # Apply rate limiting before login
             self.rate_limiter.wait_for_next_request()
 
             # Login to the API
-            with metrics.time_api_request():
+            with self.time_stage("login"), self.metrics.time_api_request():
                 self.api_client.login()
             logger.info("Successfully logged in to the API")
 
             # Create a filter for matches
             today = datetime.today()
-            start_date = (today - timedelta(days=DAYS_BACK)).strftime("%Y-%m-%d")
-            end_date = (today + timedelta(days=DAYS_AHEAD)).strftime("%Y-%m-%d")
+            days_back = _or_default(self.days_back, DAYS_BACK)
+            days_ahead = _or_default(self.days_ahead, DAYS_AHEAD)
+            start_date = (today - timedelta(days=days_back)).strftime("%Y-%m-%d")
+            end_date = (today + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
 
             match_filter = MatchListFilter().start_date(start_date).end_date(end_date)
 
@@ -324,29 +740,50 @@ class MatchListChangeDetector:
             self.rate_limiter.wait_for_next_request()
 
             # Fetch matches using direct API call (PyPI v0.5.3 compatibility)
-            with metrics.time_api_request():
+            with self.time_stage("fetch"), self.metrics.time_api_request():
                 payload = match_filter.build_payload()
                 api_response = self.api_client.fetch_matches_list_json(filter_params=payload)
 
-                # Handle different response structures from PyPI package
-                if isinstance(api_response, dict) and "matches" in api_response:
-                    self.current_matches = api_response["matches"]
-                elif isinstance(api_response, list):
-                    self.current_matches = api_response
-                else:
-                    logger.error(f"Unexpected API response structure: {type(api_response)}")
-                    logger.debug(f"Response content: {api_response}")
-                    self.current_matches = []
-            logger.info(f"Successfully fetched {len(self.current_matches)} current matches")
+            # Handle different response structures from PyPI package
+            with self.time_stage("parse"):
+                try:
+                    self.current_matches = extract_matches(api_response)
+                except InvalidResponseError as e:
+                    # Diffing an error or malformed response would report every
+                    # previous match as removed
+                    logger.error(f"Invalid match list response: {e}")
+                    logger.debug("Response content: %s", api_response)
+                    return False
+            if isinstance(api_response, dict) and api_response.get("stale"):
+                # The recorder answered a failed fetch with its last good response
+                age = max(0.0, time.time() - float(api_response.get("recorded_at") or 0))
+                logger.warning(
+                    f"Using a stale match list recorded {age:.0f} seconds ago: "
+                    f"{api_response.get('error')}"
+                )
+                self.metrics.record_fetch_staleness(age)
+                self.fetch_was_stale = True
+            else:
+                self.metrics.record_fetch_staleness(None)
+            logger.info(
+                f"Successfully fetched {len(self.current_matches)} current matches",
+                extra={"matches": len(self.current_matches)},
+            )
             return True
         except Exception as e:
             logger.error(f"Error fetching current matches: {e}")
             return False
 
-    def detect_changes(self) -> Tuple[bool, Union[ChangesSummary, Dict[str, Any]]]:
+    def detect_changes(
+        self, on_change: Optional[ChangeCallback] = None
+    ) -> Tuple[bool, Union[ChangesSummary, Dict[str, Any]]]:
         """
         Detect changes between previous and current match lists.
 
+        Args:
+            on_change: Optional callback invoked with (change_type, item) for every
+                new, removed or changed match as soon as the diff produces it
+
         Returns:
             Tuple containing:
             - Boolean indicating if changes were detected
@@ -359,161 +796,267 @@ class MatchListChangeDetector:
                 "message": "Initial match list fetch",
             }
 
-        # Create dictionaries for easier comparison, using match ID as key
-        prev_matches_dict = {match["matchid"]: match for match in self.previous_matches}
-        curr_matches_dict = {match["matchid"]: match for match in self.current_matches}
-
-        # Find new, removed, and changed matches
-        new_match_ids = set(curr_matches_dict.keys()) - set(prev_matches_dict.keys())
-        removed_match_ids = set(prev_matches_dict.keys()) - set(curr_matches_dict.keys())
-        common_match_ids = set(curr_matches_dict.keys()) & set(prev_matches_dict.keys())
-
-        # Check for changes in common matches
-        changed_matches = []
-        for match_id in common_match_ids:
-            prev_match = prev_matches_dict[match_id]
-            curr_match = curr_matches_dict[match_id]
-
-            # Check for important changes (date, time, venue, referees, teams, status)
-            # Compare basic match details
-            basic_changes = (
-                prev_match.get("speldatum") != curr_match.get("speldatum")
-                or prev_match.get("avsparkstid") != curr_match.get("avsparkstid")
-                or prev_match.get("anlaggningnamn") != curr_match.get("anlaggningnamn")
-                or prev_match.get("installd") != curr_match.get("installd")
-                or prev_match.get("avbruten") != curr_match.get("avbruten")
-                or prev_match.get("uppskjuten") != curr_match.get("uppskjuten")
-                or prev_match.get("lag1lagid") != curr_match.get("lag1lagid")
-                or prev_match.get("lag2lagid") != curr_match.get("lag2lagid")
+        new_match_details: List[Dict[str, Any]] = []
+        removed_match_details: List[Dict[str, Any]] = []
+        changed_matches: List[MatchChangeRecord] = []
+
+        if isinstance(self.previous_matches, MappedSnapshot):
+            # Diff against the snapshot index instead of decoding every match
+            match_changes = self.previous_matches.iter_match_changes(self.current_matches)
+        elif (
+            DIFF_WORKERS > 1
+            and max(len(self.previous_matches), len(self.current_matches))
+            >= DIFF_PARALLEL_MIN_MATCHES
+        ):
+            match_changes = parallel_iter_match_changes(
+                self.previous_matches, self.current_matches, DIFF_WORKERS
             )
+        else:
+            match_changes = iter_match_changes(self.previous_matches, self.current_matches)
 
-            # Compare referee assignments
-            prev_referee_ids = set()
-            curr_referee_ids = set()
-
-            # Extract referee IDs from previous match
-            if "domaruppdraglista" in prev_match:
-                for referee in prev_match["domaruppdraglista"]:
-                    prev_referee_ids.add(referee.get("domareid"))
-
-            # Extract referee IDs from current match
-            if "domaruppdraglista" in curr_match:
-                for referee in curr_match["domaruppdraglista"]:
-                    curr_referee_ids.add(referee.get("domareid"))
-
-            referee_changes = prev_referee_ids != curr_referee_ids
-
-            if basic_changes or referee_changes:
-                # Create a detailed change record
-                change_record = {
-                    "match_id": match_id,
-                    "match_nr": curr_match.get("matchnr"),
-                    "previous": {
-                        "date": prev_match.get("speldatum"),
-                        "time": prev_match.get("avsparkstid"),
-                        "home_team": {
-                            "id": prev_match.get("lag1lagid"),
-                            "name": prev_match.get("lag1namn"),
-                        },
-                        "away_team": {
-                            "id": prev_match.get("lag2lagid"),
-                            "name": prev_match.get("lag2namn"),
-                        },
-                        "venue": prev_match.get("anlaggningnamn"),
-                        "status": {
-                            "cancelled": prev_match.get("installd", False),
-                            "interrupted": prev_match.get("avbruten", False),
-                            "postponed": prev_match.get("uppskjuten", False),
-                        },
-                        "referees": [],
-                    },
-                    "current": {
-                        "date": curr_match.get("speldatum"),
-                        "time": curr_match.get("avsparkstid"),
-                        "home_team": {
-                            "id": curr_match.get("lag1lagid"),
-                            "name": curr_match.get("lag1namn"),
-                        },
-                        "away_team": {
-                            "id": curr_match.get("lag2lagid"),
-                            "name": curr_match.get("lag2namn"),
-                        },
-                        "venue": curr_match.get("anlaggningnamn"),
-                        "status": {
-                            "cancelled": curr_match.get("installd", False),
-                            "interrupted": curr_match.get("avbruten", False),
-                            "postponed": curr_match.get("uppskjuten", False),
-                        },
-                        "referees": [],
-                    },
-                    "changes": {"basic": basic_changes, "referees": referee_changes},
-                }
-
-                # Add referee details to previous match
-                if "domaruppdraglista" in prev_match:
-                    for referee in prev_match["domaruppdraglista"]:
-                        change_record["previous"]["referees"].append(
-                            {
-                                "id": referee.get("domareid"),
-                                "name": referee.get("personnamn"),
-                                "role": referee.get("domarrollnamn"),
-                                "email": referee.get("epostadress"),
-                                "phone": referee.get("mobiltelefon"),
-                            }
-                        )
-
-                # Add referee details to current match
-                if "domaruppdraglista" in curr_match:
-                    for referee in curr_match["domaruppdraglista"]:
-                        change_record["current"]["referees"].append(
-                            {
-                                "id": referee.get("domareid"),
-                                "name": referee.get("personnamn"),
-                                "role": referee.get("domarrollnamn"),
-                                "email": referee.get("epostadress"),
-                                "phone": referee.get("mobiltelefon"),
-                            }
-                        )
-
-                changed_matches.append(change_record)
+        for change_type, item in match_changes:
+            if change_type == "new":
+                new_match_details.append(item)
+            elif change_type == "removed":
+                removed_match_details.append(item)
+            else:
+                changed_matches.append(cast(MatchChangeRecord, item))
+            if on_change is not None:
+                on_change(change_type, item)
 
         # Prepare the changes summary
         changes = {
-            "new_matches": len(new_match_ids),
-            "removed_matches": len(removed_match_ids),
+            "new_matches": len(new_match_details),
+            "removed_matches": len(removed_match_details),
             "changed_matches": len(changed_matches),
-            "new_match_details": [curr_matches_dict[match_id] for match_id in new_match_ids],
-            "removed_match_details": [
-                prev_matches_dict[match_id] for match_id in removed_match_ids
-            ],
+            "new_match_details": new_match_details,
+            "removed_match_details": removed_match_details,
             "changed_match_details": changed_matches,
         }
 
         # Determine if there are any changes
         has_changes = (
-            len(new_match_ids) > 0 or len(removed_match_ids) > 0 or len(changed_matches) > 0
+            len(new_match_details) > 0 or len(removed_match_details) > 0 or len(changed_matches) > 0
         )
 
         if has_changes:
             logger.info(
-                f"Changes detected: {len(new_match_ids)} new, "
-                f"{len(removed_match_ids)} removed, {len(changed_matches)} changed"
+                f"Changes detected: {len(new_match_details)} new, "
+                f"{len(removed_match_details)} removed, {len(changed_matches)} changed",
+                extra={
+                    "new_matches": len(new_match_details),
+                    "removed_matches": len(removed_match_details),
+                    "changed_matches": len(changed_matches),
+                },
             )
         else:
             logger.info("No changes detected in match list")
 
         return has_changes, changes
 
+    def write_changes_file(self, changes: Union[ChangesSummary, Dict[str, Any]]) -> bool:
+        """Write the changes file read by the orchestrator services.
+
+        The file is a single JSON document, or one line per change followed by a
+        summary line when CHANGES_OUTPUT_FORMAT is "ndjson".
+        """
+        changes_file_path = validate_file_path(
+            _or_default(self.changes_file, CHANGES_FILE), create_dir=True
+        )
+        if not changes_file_path:
+            logger.error("Invalid changes file path")
+            return False
+
+        try:
+            if CHANGES_OUTPUT_FORMAT == "ndjson":
+                write_ndjson_changes(changes, changes_file_path)
+            else:
+                with open(changes_file_path, "w") as f:
+                    # noinspection PyTypeChecker
+                    json.dump(changes, f, indent=2)
+            return True
+        except OSError as e:
+            logger.error(f"Error writing changes file: {e}")
+            return False
+
+    def record_change_history(
+        self, changes: Union[ChangesSummary, Dict[str, Any]]
+    ) -> Optional[int]:
+        """Append a change set to the change history store.
+
+        Returns:
+            Sequence number of the recorded change set, or None if the history is
+            disabled or could not be written
+
+        """
+        change_history_file = _or_default(self.change_history_file, CHANGE_HISTORY_FILE)
+        if not change_history_file:
+            return None
+
+        try:
+            store = ChangeHistoryStore(
+                change_history_file,
+                max_change_sets=CHANGE_HISTORY_MAX_SETS,
+                max_age_days=CHANGE_HISTORY_MAX_AGE_DAYS,
+            )
+            return store.append(changes)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Error recording change history: {e}")
+            return None
+
+    def record_snapshot_history(self) -> Optional[int]:
+        """Record the current matches in the snapshot history store.
+
+        Returns:
+            Sequence number of the recorded snapshot, or None if the history is
+            disabled or could not be written
+
+        """
+        snapshot_history_file = _or_default(self.snapshot_history_file, SNAPSHOT_HISTORY_FILE)
+        if not snapshot_history_file:
+            return None
+
+        try:
+            store = SnapshotHistoryStore(
+                snapshot_history_file,
+                max_snapshots=SNAPSHOT_HISTORY_MAX_SNAPSHOTS,
+                max_age_days=SNAPSHOT_HISTORY_MAX_AGE_DAYS,
+            )
+            return store.record(self.current_matches)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Error recording snapshot history: {e}")
+            return None
+
+    def detect_and_stream_changes(
+        self, accept: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Tuple[bool, Union[ChangesSummary, Dict[str, Any]], bool]:
+        """Detect changes, streaming them to the NDJSON change feed as they are found.
+
+        Args:
+            accept: Optional check of the detected changes; when it returns False
+                the streamed change feed is discarded instead of committed
+
+        Returns:
+            Tuple containing:
+            - Boolean indicating if changes were detected
+            - Dictionary with details about the changes
+            - Boolean indicating if the change feed was committed to disk
+        """
+        changes_file_path = validate_file_path(
+            _or_default(self.changes_file, CHANGES_FILE), create_dir=True
+        )
+        if not changes_file_path:
+            logger.error("Invalid changes file path")
+            has_changes, changes = self.detect_changes()
+            return has_changes, changes, False
+
+        with NdjsonChangeWriter(changes_file_path) as writer:
+            has_changes, changes = self.detect_changes(on_change=writer.write)
+            if not has_changes or (
+                accept is not None and not accept(cast(Dict[str, Any], changes))
+            ):
+                return has_changes, changes, False
+            writer.commit(changes)
+        logger.info(f"Streamed {writer.records_written} change records to {changes_file_path}")
+        return has_changes, changes, True
+
+    def detect_cycle_changes(
+        self, accept: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Tuple[bool, Union[ChangesSummary, Dict[str, Any]], bool]:
+        """Detect changes in the configured output format.
+
+        Args:
+            accept: Optional check of the detected changes deciding whether a
+                streamed change feed is committed
+
+        Returns:
+            Tuple of whether changes were detected, the changes and whether the
+            change feed was committed to disk
+        """
+        if CHANGES_OUTPUT_FORMAT == "ndjson":
+            return self.detect_and_stream_changes(accept)
+        has_changes, changes = self.detect_changes()
+        return has_changes, changes, False
+
+    def is_mass_removal(self, changes: Union[ChangesSummary, Dict[str, Any]]) -> bool:
+        """Whether a change set removes more of the previous matches than the guard allows."""
+        return is_mass_removal(
+            len(self.previous_matches),
+            changes.get("removed_matches", 0),
+            MASS_REMOVAL_THRESHOLD,
+            MASS_REMOVAL_MIN_MATCHES,
+        )
+
+    def confirm_mass_removal(
+        self, changes: Union[ChangesSummary, Dict[str, Any]]
+    ) -> Optional[Tuple[bool, Union[ChangesSummary, Dict[str, Any]], bool]]:
+        """Refetch the match list to confirm a quarantined mass removal.
+
+        The removal is confirmed when a refetch returns the same match IDs as
+        the quarantined fetch. A refetch within the removal limit replaces the
+        quarantined fetch; one with another mass removal is quarantined in
+        turn, up to QUARANTINE_RETRIES refetches. A refetch answered with a
+        stale recorded response counts as failed: the recorder may hold the
+        quarantined fetch itself.
+
+        Args:
+            changes: Quarantined change set
+
+        Returns:
+            The detection result to commit (see detect_cycle_changes), or None if
+            the removal was not confirmed and the cycle must not be committed
+        """
+        quarantined_ids = {match["matchid"] for match in self.current_matches}
+        for attempt in range(1, QUARANTINE_RETRIES + 1):
+            logger.warning(
+                f"Quarantined a change set removing {changes.get('removed_matches', 0)} of "
+                f"{len(self.previous_matches)} matches, refetching to confirm "
+                f"({attempt}/{QUARANTINE_RETRIES})"
+            )
+            time.sleep(QUARANTINE_RETRY_DELAY)
+            if not self.fetch_current_matches() or self.fetch_was_stale:
+                logger.error("Refetch of a quarantined change set failed")
+                break
+
+            fetched_ids = {match["matchid"] for match in self.current_matches}
+            if fetched_ids == quarantined_ids:
+                logger.warning("Refetch returned the same matches, committing the removal")
+                self.metrics.record_quarantine("confirmed")
+                return self.detect_cycle_changes()
+
+            has_changes, changes, changes_written = self.detect_cycle_changes(
+                accept=lambda refetched: not self.is_mass_removal(refetched)
+            )
+            if not (has_changes and self.is_mass_removal(changes)):
+                logger.info("Refetch is within the removal limit, discarding the quarantined one")
+                self.metrics.record_quarantine("recovered")
+                return has_changes, changes, changes_written
+            quarantined_ids = fetched_ids
+
+        logger.error("Mass removal was not confirmed, keeping the previous snapshot")
+        self.metrics.record_quarantine("rejected")
+        return None
+
     # noinspection PyMethodMayBeStatic
-    def trigger_docker_compose(self, changes: Union[ChangesSummary, Dict[str, Any]]) -> bool:
-        """Trigger the docker-compose file with the changes as environment variables."""
+    def trigger_docker_compose(
+        self, changes: Union[ChangesSummary, Dict[str, Any]], write_changes: bool = True
+    ) -> bool:
+        """Trigger the docker-compose file with the changes as environment variables.
+
+        Args:
+            changes: Changes summary to hand over to the orchestrator
+            write_changes: Whether to write the changes file before triggering. Set
+                to False when the change feed was already streamed during detection.
+
+        """
         try:
             # Validate docker-compose file path
-            if not DOCKER_COMPOSE_FILE:
+            docker_compose_file = _or_default(self.docker_compose_file, DOCKER_COMPOSE_FILE)
+            if not docker_compose_file:
                 logger.error("DOCKER_COMPOSE_FILE is not set in configuration")
                 return False
 
-            compose_file_path = Path(DOCKER_COMPOSE_FILE)
+            compose_file_path = Path(docker_compose_file)
             if not compose_file_path.is_file():
                 logger.error(f"Docker compose file not found: {compose_file_path}")
                 return False
@@ -525,15 +1068,9 @@ class MatchListChangeDetector:
                 return False
 
             # Save changes to a file that can be read by the docker-compose services
-            changes_file_path = validate_file_path("match_changes.json", create_dir=True)
-            if not changes_file_path:
-                logger.error("Invalid changes file path")
+            if write_changes and not self.write_changes_file(changes):
                 return False
 
-            with open(changes_file_path, "w") as f:
-                # noinspection PyTypeChecker
-                json.dump(changes, f, indent=2)
-
             # Run docker-compose up with a timeout
             logger.info(f"Triggering docker-compose with file: {compose_file_path}")
             try:
@@ -555,7 +1092,7 @@ class MatchListChangeDetector:
 
             if result.returncode == 0:
                 logger.info("Successfully triggered docker-compose")
-                logger.debug(f"docker-compose output: {result.stdout}")
+                logger.debug("docker-compose output: %s", result.stdout)
                 return True
             else:
                 logger.error(f"Error triggering docker-compose: {result.stderr}")
@@ -565,57 +1102,113 @@ class MatchListChangeDetector:
             logger.error(f"Error triggering docker-compose: {e}")
             return False
 
-    def run(self) -> bool:
-        """Run the full change detection process."""
+    def run(self, on_changes: Optional[ChangeSetListener] = None) -> bool:
+        """Run the full change detection process.
+
+        Records logged during the run carry a cycle ID: the one set by the
+        caller's log_context, or a new one.
+
+        Args:
+            on_changes: Optional listener notified with each detected change set as
+                soon as detection finishes, before the orchestrator is triggered
+
+        """
+        with log_context(cycle_id=current_cycle_id() or new_cycle_id()):
+            return self._run_cycle(on_changes)
+
+    def _run_cycle(self, on_changes: Optional[ChangeSetListener]) -> bool:
+        """Run one detection cycle; see run."""
         start_time = time.time()
-        metrics.record_run()
+        self.metrics.record_run()
+        self.stage_timings = {}
 
         try:
             # Load previous matches
-            self.load_previous_matches()
+            with self.time_stage("snapshot_load"):
+                self.load_previous_matches()
 
             # Fetch current matches
             if not self.fetch_current_matches():
                 logger.error("Failed to fetch current matches, aborting")
-                metrics.record_fetch_failure()
-                metrics.record_error()
+                self.metrics.record_fetch_failure()
+                self.metrics.record_error()
                 return False
 
             # Record match count
-            metrics.record_matches(len(self.current_matches))
+            self.metrics.record_matches(len(self.current_matches))
 
-            # Detect changes
-            has_changes, changes = self.detect_changes()
+            # Detect changes, holding back a streamed change feed of a mass removal
+            with self.time_stage("diff"):
+                has_changes, changes, changes_written = self.detect_cycle_changes(
+                    accept=lambda detected: not self.is_mass_removal(detected)
+                )
+
+            # Quarantine a mass removal until a refetch confirms it
+            if has_changes and self.is_mass_removal(changes):
+                confirmed = self.confirm_mass_removal(changes)
+                if confirmed is None:
+                    self.metrics.record_error()
+                    return False
+                has_changes, changes, changes_written = confirmed
 
             # Record changes
             if has_changes:
-                metrics.record_changes(
+                self.last_change_seq = self.record_change_history(changes)
+                self.metrics.record_changes(
                     new=changes.get("new_matches", 0),
                     removed=changes.get("removed_matches", 0),
                     changed=changes.get("changed_matches", 0),
                 )
+                if on_changes is not None:
+                    try:
+                        on_changes(cast(Dict[str, Any], changes), self.last_change_seq)
+                    except Exception as e:
+                        logger.error(f"Error notifying change listener: {e}")
 
             # If changes detected, trigger docker-compose
             if has_changes:
                 logger.info("Changes detected, triggering docker-compose")
-                metrics.record_orchestrator_trigger()
-                if not self.trigger_docker_compose(changes):
-                    metrics.record_orchestrator_failure()
+                self.metrics.record_orchestrator_trigger()
+                with self.time_stage("trigger"):
+                    triggered = self.trigger_docker_compose(
+                        changes, write_changes=not changes_written
+                    )
+                if not triggered:
+                    self.metrics.record_orchestrator_failure()
 
             # Save current matches for next comparison
-            self.save_current_matches()
+            # A stale match list was already recorded when it was fetched
+            with self.time_stage("snapshot_save"):
+                self.save_current_matches()
+                if not self.fetch_was_stale:
+                    self.record_snapshot_history()
 
             # Record processing time
             processing_time = time.time() - start_time
-            metrics.record_processing_time(processing_time)
-            logger.info(f"Change detection completed in {processing_time: .2f} seconds")
+            self.metrics.record_processing_time(processing_time)
+            logger.info(
+                f"Change detection completed in {processing_time: .2f} seconds",
+                extra={
+                    "duration_seconds": round(processing_time, 6),
+                    "matches": len(self.current_matches),
+                    "new_matches": changes.get("new_matches", 0),
+                    "removed_matches": changes.get("removed_matches", 0),
+                    "changed_matches": changes.get("changed_matches", 0),
+                    "stage_timings": {
+                        stage: round(seconds, 6) for stage, seconds in self.stage_timings.items()
+                    },
+                },
+            )
 
             return True
 
         except Exception as e:
             logger.error(f"Error in change detection process: {e}")
-            metrics.record_error()
+            self.metrics.record_error()
             return False
+        finally:
+            # The saved list is mapped again on the next cycle
+            self.close_previous_matches()
 
 
 def mask_sensitive_data(data: str) -> str:
@@ -633,8 +1226,17 @@ def mask_sensitive_data(data: str) -> str:
     return "*" * 8  # Return fixed-length mask regardless of input length
 
 
-def main() -> bool:
-    """Run the match list change detection process."""
+def main(
+    on_changes: Optional[ChangeSetListener] = None, on_stale: Optional[Callable[[], None]] = None
+) -> bool:
+    """Run the match list change detection process.
+
+    Args:
+        on_changes: Optional listener notified with each detected change set
+        on_stale: Optional listener notified when the cycle ran on a stale
+            recorded response because the fetch failed
+
+    """
     try:
         # Check for required configuration
         username = config.get("FOGIS_USERNAME")
@@ -650,7 +1252,9 @@ def main() -> bool:
 
         # Create and run the detector
         detector = MatchListChangeDetector(username, password)
-        success = detector.run()
+        success = detector.run(on_changes=on_changes)
+        if detector.fetch_was_stale and on_stale is not None:
+            on_stale()
 
         if success:
             logger.info("Match list change detection completed successfully")
@@ -664,5 +1268,35 @@ def main() -> bool:
         return False
 
 
+def start_servers() -> None:
+    """Start the HTTP server for a standalone (oneshot) run.
+
+    A single listener on HEALTH_SERVER_PORT serves both /health and /metrics.
+    Nothing is started at import time, so importing this module stays cheap and
+    the persistent service can serve health and metrics itself.
+
+    """
+    global health_server
+    if health_server is not None:
+        return
+
+    # Start health server with HTTPS if configured
+    use_https = config.get("USE_HTTPS", False)
+    health_server = HealthServer(
+        port=int(config.get("HEALTH_SERVER_PORT", 8000)),
+        use_https=use_https,
+        cert_file=config.get("SSL_CERT_FILE") if use_https else None,
+        key_file=config.get("SSL_KEY_FILE") if use_https else None,
+        metrics_handler=metrics.render if METRICS_AVAILABLE else None,
+        request_timeout=float(config.get("HEALTH_SERVER_TIMEOUT", 5.0)),
+        max_connections=int(config.get("HEALTH_SERVER_MAX_CONNECTIONS", 64)),
+    )
+    health_server.start()
+
+    if not HEALTH_SERVER_AVAILABLE:
+        logger.warning("Health server functionality not available in this environment")
+
+
 if __name__ == "__main__":
+    start_servers()
     main()
@@ -7,9 +7,46 @@ Provides classes and functions to record and expose metrics.
 
 import threading
 import time
-from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
 
-from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+
+from config import get_config
+
+# Stages of a detection cycle timed by the stage duration histogram
+STAGES = ("snapshot_load", "login", "fetch", "parse", "diff", "trigger", "snapshot_save")
+
+# Default buckets for the stage duration histogram (seconds)
+DEFAULT_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def parse_buckets(value: Any, default: Sequence[float] = DEFAULT_STAGE_BUCKETS) -> List[float]:
+    """
+    Parse histogram buckets from a comma-separated string.
+
+    Args:
+        value: Comma-separated bucket upper bounds, a sequence of numbers or None
+        default: Buckets to use when value is empty or invalid
+
+    Returns:
+        Sorted list of bucket upper bounds
+    """
+    if not value:
+        return list(default)
+    try:
+        items = value.split(",") if isinstance(value, str) else value
+        buckets = sorted({float(item) for item in items if str(item).strip()})
+    except (TypeError, ValueError):
+        return list(default)
+    return buckets or list(default)
 
 
 # Define StartResponse type for WSGI
@@ -27,13 +64,20 @@ class StartResponse(Protocol):
 class Metrics:
     """Prometheus metrics for the Match List Change Detector."""
 
-    def __init__(self, port: int = 8000):
+    def __init__(self, port: int = 8000, stage_buckets: Optional[Sequence[float]] = None):
         """
         Initialize metrics.
 
+        Only registers the metrics. They are normally served by the application's
+        own HTTP server through render(); start_server() runs a dedicated server.
+
         Args:
             port: Port to expose metrics on
+            stage_buckets: Buckets for the stage duration histogram (seconds)
         """
+        self.port = port
+        self.server_thread: Optional[threading.Thread] = None
+
         # Counters
         self.matches_total = Counter(
             "match_list_change_detector_matches_total", "Total number of matches processed"
@@ -85,14 +129,149 @@ class Metrics:
             buckets=[0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0],
         )
 
-        # Start metrics server in a separate thread
-        self.server_thread = threading.Thread(target=self._start_server, args=(port,))
-        self.server_thread.daemon = True
-        self.server_thread.start()
+        self.stage_duration_seconds = Histogram(
+            "match_list_change_detector_stage_duration_seconds",
+            "Duration of each stage of the detection cycle in seconds",
+            ["stage"],  # snapshot_load, login, fetch, parse, diff, trigger, snapshot_save
+            buckets=list(stage_buckets or DEFAULT_STAGE_BUCKETS),
+        )
+
+        # Snapshot I/O
+        self.snapshot_bytes_read_total = Counter(
+            "match_list_change_detector_snapshot_bytes_read_total",
+            "Total number of bytes read when loading the previous matches snapshot",
+        )
+
+        self.snapshot_bytes_written_total = Counter(
+            "match_list_change_detector_snapshot_bytes_written_total",
+            "Total number of bytes written when saving the current matches snapshot",
+        )
+
+        # Stale fallback responses served by the response recorder
+        self.stale_responses_total = Counter(
+            "match_list_change_detector_stale_responses_total",
+            "Total number of failed fetches answered with the last recorded good response",
+        )
+
+        self.stale_data = Gauge(
+            "match_list_change_detector_stale_data",
+            "Whether the last fetched match list was a stale recorded response (1) or not (0)",
+        )
+
+        self.stale_data_age_seconds = Gauge(
+            "match_list_change_detector_stale_data_age_seconds",
+            "Age of the stale recorded response served by the last fetch (0 when fresh)",
+        )
+
+        # Mass removals quarantined until a refetch confirms them
+        self.quarantined_cycles_total = Counter(
+            "match_list_change_detector_quarantined_cycles_total",
+            "Total number of cycles whose mass removal was quarantined, by outcome",
+            ["outcome"],  # confirmed, recovered, rejected
+        )
+
+        # Circuit breakers and retries around the upstream API calls, labelled
+        # by breaker name ("api", or "api:<tenant>" in multi-tenant mode)
+        self.circuit_breaker_state = Gauge(
+            "match_list_change_detector_circuit_breaker_state",
+            "State of each circuit breaker (0 closed, 1 half-open, 2 open)",
+            ["breaker"],
+        )
+
+        self.circuit_breaker_rejected_calls_total = Counter(
+            "match_list_change_detector_circuit_breaker_rejected_calls_total",
+            "Total number of upstream calls skipped because their circuit breaker was open",
+            ["breaker"],
+        )
+
+        self.api_retries_total = Counter(
+            "match_list_change_detector_api_retries_total",
+            "Total number of upstream API calls retried after a transient failure",
+            ["breaker"],
+        )
+
+        # Per-tenant series, recorded alongside the totals above when the
+        # persistent service watches several accounts (see TenantMetrics)
+        self.tenant_matches_total = Counter(
+            "match_list_change_detector_tenant_matches_total",
+            "Total number of matches processed per tenant",
+            ["tenant"],
+        )
+
+        self.tenant_changes_total = Counter(
+            "match_list_change_detector_tenant_changes_total",
+            "Total number of changes detected per tenant",
+            ["tenant", "type"],
+        )
+
+        self.tenant_errors_total = Counter(
+            "match_list_change_detector_tenant_errors_total",
+            "Total number of errors per tenant",
+            ["tenant"],
+        )
+
+        self.tenant_fetch_failures_total = Counter(
+            "match_list_change_detector_tenant_fetch_failures_total",
+            "Total number of match list fetch failures per tenant",
+            ["tenant"],
+        )
+
+        self.tenant_orchestrator_triggers_total = Counter(
+            "match_list_change_detector_tenant_orchestrator_triggers_total",
+            "Total number of orchestrator triggers per tenant",
+            ["tenant"],
+        )
+
+        self.tenant_orchestrator_failures_total = Counter(
+            "match_list_change_detector_tenant_orchestrator_failures_total",
+            "Total number of orchestrator trigger failures per tenant",
+            ["tenant"],
+        )
+
+        self.tenant_quarantined_cycles_total = Counter(
+            "match_list_change_detector_tenant_quarantined_cycles_total",
+            "Total number of cycles whose mass removal was quarantined per tenant, by outcome",
+            ["tenant", "outcome"],
+        )
+
+        self.tenant_stale_data = Gauge(
+            "match_list_change_detector_tenant_stale_data",
+            "Whether the last fetched match list of each tenant was a stale recorded response",
+            ["tenant"],
+        )
+
+        self.tenant_processing_time_seconds = Gauge(
+            "match_list_change_detector_tenant_processing_time_seconds",
+            "Time taken to process the match list of each tenant",
+            ["tenant"],
+        )
+
+        self.tenant_last_run_timestamp = Gauge(
+            "match_list_change_detector_tenant_last_run_timestamp",
+            "Timestamp of the last run of each tenant",
+            ["tenant"],
+        )
 
         # Set up as running
         self.up.set(1)
 
+    def start_server(self, port: Optional[int] = None) -> None:
+        """
+        Start the metrics server in a separate thread.
+
+        Calling this again after the server has been started does nothing.
+
+        Args:
+            port: Port to expose metrics on (defaults to the port given at construction)
+        """
+        if self.server_thread is not None:
+            return
+
+        self.port = self.port if port is None else port
+        self.server_thread = threading.Thread(target=self._start_server, args=(self.port,))
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
     def _start_server(self, port: int) -> None:
         """
         Start the metrics server.
@@ -102,6 +281,15 @@ class Metrics:
         """
         start_http_server(port)
 
+    def render(self) -> Tuple[bytes, str]:
+        """
+        Render all registered metrics for serving from an existing HTTP server.
+
+        Returns:
+            Metrics in the Prometheus text exposition format and their content type
+        """
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
     def record_matches(self, count: int) -> None:
         """
         Record the number of matches processed.
@@ -153,6 +341,93 @@ class Metrics:
         """Record a run of the Match List Change Detector."""
         self.last_run_timestamp.set(time.time())
 
+    def record_snapshot_read(self, num_bytes: int) -> None:
+        """
+        Record the size of a loaded snapshot.
+
+        Args:
+            num_bytes: Number of bytes read
+        """
+        self.snapshot_bytes_read_total.inc(num_bytes)
+
+    def record_snapshot_write(self, num_bytes: int) -> None:
+        """
+        Record the size of a saved snapshot.
+
+        Args:
+            num_bytes: Number of bytes written
+        """
+        self.snapshot_bytes_written_total.inc(num_bytes)
+
+    def record_fetch_staleness(self, age_seconds: Optional[float]) -> None:
+        """
+        Record whether the fetched match list was fresh or a stale recorded response.
+
+        Args:
+            age_seconds: Age of the stale response served, or None for a fresh fetch
+        """
+        if age_seconds is None:
+            self.stale_data.set(0)
+            self.stale_data_age_seconds.set(0)
+        else:
+            self.stale_responses_total.inc()
+            self.stale_data.set(1)
+            self.stale_data_age_seconds.set(age_seconds)
+
+    def record_circuit_state(self, breaker: str, state: str) -> None:
+        """
+        Record the state of a circuit breaker.
+
+        Args:
+            breaker: Breaker name
+            state: "closed", "half_open" or "open"
+        """
+        value = {"closed": 0, "half_open": 1, "open": 2}.get(state, 0)
+        self.circuit_breaker_state.labels(breaker=breaker).set(value)
+
+    def record_circuit_rejection(self, breaker: str) -> None:
+        """Record an upstream call skipped by an open circuit breaker."""
+        self.circuit_breaker_rejected_calls_total.labels(breaker=breaker).inc()
+
+    def record_api_retry(self, breaker: str) -> None:
+        """Record an upstream API call retried after a transient failure."""
+        self.api_retries_total.labels(breaker=breaker).inc()
+
+    def record_quarantine(self, outcome: str) -> None:
+        """
+        Record the outcome of a quarantined mass removal.
+
+        Args:
+            outcome: "confirmed" when a refetch confirmed the removal, "recovered"
+                when a refetch was within the removal limit, "rejected" when the
+                cycle was abandoned
+        """
+        self.quarantined_cycles_total.labels(outcome=outcome).inc()
+
+    def for_tenant(self, tenant: str) -> "TenantMetrics":
+        """
+        Get a view recording into both the totals and the series of one tenant.
+
+        Args:
+            tenant: Tenant name used as the metric label
+
+        Returns:
+            Metrics view for the tenant
+        """
+        return TenantMetrics(self, tenant)
+
+    def time_stage(self, stage: str) -> "ApiRequestTimer":
+        """
+        Time a stage of the detection cycle.
+
+        Args:
+            stage: Stage name, one of STAGES
+
+        Returns:
+            Context manager for timing the stage
+        """
+        return ApiRequestTimer(self.stage_duration_seconds.labels(stage=stage))
+
     def time_api_request(self) -> "ApiRequestTimer":
         """
         Time an API request.
@@ -163,8 +438,110 @@ class Metrics:
         return ApiRequestTimer(self.api_response_time_seconds)
 
 
+class TenantMetrics:
+    """Metrics of one tenant of a multi-account service.
+
+    Offers the recording methods of Metrics. Each call updates the service-wide
+    totals and the tenant-labelled series; stage and API timings and snapshot
+    sizes are only recorded service-wide to keep the number of series small.
+    """
+
+    def __init__(self, metrics: Metrics, tenant: str) -> None:
+        """
+        Initialize the tenant view.
+
+        Args:
+            metrics: Service-wide metrics
+            tenant: Tenant name used as the metric label
+        """
+        self._metrics = metrics
+        self.tenant = tenant
+        self._matches = metrics.tenant_matches_total.labels(tenant=tenant)
+        self._changes = {
+            change_type: metrics.tenant_changes_total.labels(tenant=tenant, type=change_type)
+            for change_type in ("new", "removed", "changed")
+        }
+        self._errors = metrics.tenant_errors_total.labels(tenant=tenant)
+        self._fetch_failures = metrics.tenant_fetch_failures_total.labels(tenant=tenant)
+        self._triggers = metrics.tenant_orchestrator_triggers_total.labels(tenant=tenant)
+        self._trigger_failures = metrics.tenant_orchestrator_failures_total.labels(tenant=tenant)
+        self._stale_data = metrics.tenant_stale_data.labels(tenant=tenant)
+        self._processing_time = metrics.tenant_processing_time_seconds.labels(tenant=tenant)
+        self._last_run = metrics.tenant_last_run_timestamp.labels(tenant=tenant)
+
+    def record_matches(self, count: int) -> None:
+        """Record the number of matches processed."""
+        self._metrics.record_matches(count)
+        self._matches.inc(count)
+
+    def record_changes(self, new: int = 0, removed: int = 0, changed: int = 0) -> None:
+        """Record the number of changes detected."""
+        self._metrics.record_changes(new=new, removed=removed, changed=changed)
+        self._changes["new"].inc(new)
+        self._changes["removed"].inc(removed)
+        self._changes["changed"].inc(changed)
+
+    def record_error(self) -> None:
+        """Record an error."""
+        self._metrics.record_error()
+        self._errors.inc()
+
+    def record_fetch_failure(self) -> None:
+        """Record a match list fetch failure."""
+        self._metrics.record_fetch_failure()
+        self._fetch_failures.inc()
+
+    def record_orchestrator_trigger(self) -> None:
+        """Record an orchestrator trigger."""
+        self._metrics.record_orchestrator_trigger()
+        self._triggers.inc()
+
+    def record_orchestrator_failure(self) -> None:
+        """Record an orchestrator trigger failure."""
+        self._metrics.record_orchestrator_failure()
+        self._trigger_failures.inc()
+
+    def record_processing_time(self, seconds: float) -> None:
+        """Record the time taken to process the match list."""
+        self._metrics.record_processing_time(seconds)
+        self._processing_time.set(seconds)
+
+    def record_run(self) -> None:
+        """Record a run."""
+        self._metrics.record_run()
+        self._last_run.set_to_current_time()
+
+    def record_snapshot_read(self, num_bytes: int) -> None:
+        """Record the size of a loaded snapshot."""
+        self._metrics.record_snapshot_read(num_bytes)
+
+    def record_snapshot_write(self, num_bytes: int) -> None:
+        """Record the size of a saved snapshot."""
+        self._metrics.record_snapshot_write(num_bytes)
+
+    def record_fetch_staleness(self, age_seconds: Optional[float]) -> None:
+        """Record whether the fetched match list was fresh or a stale recorded response."""
+        self._metrics.record_fetch_staleness(age_seconds)
+        self._stale_data.set(0 if age_seconds is None else 1)
+
+    def record_quarantine(self, outcome: str) -> None:
+        """Record the outcome of a quarantined mass removal."""
+        self._metrics.record_quarantine(outcome)
+        self._metrics.tenant_quarantined_cycles_total.labels(
+            tenant=self.tenant, outcome=outcome
+        ).inc()
+
+    def time_stage(self, stage: str) -> "ApiRequestTimer":
+        """Time a stage of the detection cycle."""
+        return self._metrics.time_stage(stage)
+
+    def time_api_request(self) -> "ApiRequestTimer":
+        """Time an API request."""
+        return self._metrics.time_api_request()
+
+
 class ApiRequestTimer:
-    """Context manager for timing API requests."""
+    """Context manager for timing API requests and cycle stages."""
 
     histogram: Histogram
     start: float
@@ -180,7 +557,7 @@ class ApiRequestTimer:
 
     def __enter__(self) -> "ApiRequestTimer":
         """Start the timer."""
-        self.start = time.time()
+        self.start = time.perf_counter()
         return self
 
     def __exit__(self, exc_type: Optional[type], exc_val: Optional[Exception], exc_tb: Any) -> None:
@@ -192,11 +569,14 @@ class ApiRequestTimer:
             exc_val: Exception value
             exc_tb: Exception traceback
         """
-        self.histogram.observe(time.time() - self.start)
+        self.histogram.observe(time.perf_counter() - self.start)
 
 
-# Create a global metrics instance
-metrics = Metrics()
+# Create a global metrics instance (the server is started explicitly by the entry point)
+metrics = Metrics(
+    port=int(get_config().get("METRICS_SERVER_PORT", 8001)),
+    stage_buckets=parse_buckets(get_config().get("METRICS_STAGE_BUCKETS")),
+)
 
 
 # Health check endpoint handler
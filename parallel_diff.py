@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Process-parallel diff of large match lists.
+
+The diff in ``match_list_change_detector.iter_match_changes`` is pure Python,
+so on one process the GIL serialises it however many cores are available.
+``parallel_iter_match_changes`` shards both lists by the hash of each match ID
+and diffs the shards in forked worker processes:
+
+- The lists are not pickled to the workers. They are published in a module
+  global right before the pool is forked, so every worker reads the parent's
+  lists from memory shared copy-on-write, and only the shard number is sent.
+- Workers send back list positions and comparison flags rather than matches,
+  and the parent builds the change records from its own lists, so the
+  results are small.
+- Results are merged by list position, so changes are yielded in exactly the
+  order of the serial diff.
+
+Parallel diffs need the ``fork`` start method (Linux and other POSIX systems).
+Elsewhere, and when worker processes cannot be started, the serial diff is
+used. Only one parallel diff runs at a time; concurrent callers (e.g. tenants
+finishing their fetch together) wait for the pool rather than oversubscribing
+the cores.
+"""
+
+import gc
+import heapq
+import multiprocessing
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, cast
+
+from logging_config import get_logger
+
+logger = get_logger("parallel_diff")
+
+# Start method that lets workers share the parent's lists without copying them
+FORK_AVAILABLE = "fork" in multiprocessing.get_all_start_methods()
+
+# (first position, last position) of each match ID in a shard; a repeated ID
+# keeps its first position and its last match, like a dict built from the list
+ShardIndex = Dict[Any, Tuple[int, int]]
+
+# Per shard: new (position, index), removed (position, index) and changed
+# (position, current index, previous index, basic changes, referee changes)
+ShardResult = Tuple[
+    List[Tuple[int, int]], List[Tuple[int, int]], List[Tuple[int, int, int, bool, bool]]
+]
+
+# Lists and shard assignments read by forked workers, set only while a pool runs
+_shared: Optional[Tuple[Any, ...]] = None
+
+_pool_lock = threading.Lock()
+
+
+def shard_positions(matches: List[Dict[str, Any]], shards: int) -> List[List[int]]:
+    """
+    Assign list positions to shards by the hash of their match ID.
+
+    Uses the built-in hash, so IDs that are equal as dict keys share a shard.
+
+    Args:
+        matches: Match list
+        shards: Number of shards
+
+    Returns:
+        Ascending list positions of each shard
+
+    Raises:
+        KeyError: If a match has no matchid
+    """
+    positions: List[List[int]] = [[] for _ in range(shards)]
+    for position, match in enumerate(matches):
+        positions[hash(match["matchid"]) % shards].append(position)
+    return positions
+
+
+def _index_shard(matches: List[Dict[str, Any]], positions: List[int]) -> ShardIndex:
+    """Map each match ID in a shard to its first and last list position."""
+    index: ShardIndex = {}
+    for position in positions:
+        match_id = matches[position]["matchid"]
+        first = index.get(match_id)
+        index[match_id] = (first[0] if first else position, position)
+    return index
+
+
+def diff_shard(shard: int) -> ShardResult:
+    """
+    Diff one shard of the shared lists.
+
+    Runs in a worker process forked by parallel_iter_match_changes.
+
+    Args:
+        shard: Shard number
+
+    Returns:
+        Positions of the new, removed and changed matches of the shard
+    """
+    assert _shared is not None, "diff_shard called outside a parallel diff"  # nosec B101
+    previous, current, previous_shards, current_shards, compare = _shared
+    previous_index = _index_shard(previous, previous_shards[shard])
+    current_index = _index_shard(current, current_shards[shard])
+
+    new = [
+        (first, last)
+        for match_id, (first, last) in current_index.items()
+        if match_id not in previous_index
+    ]
+    removed = [
+        (first, last)
+        for match_id, (first, last) in previous_index.items()
+        if match_id not in current_index
+    ]
+    changed = []
+    for match_id, (first, last) in current_index.items():
+        previous_positions = previous_index.get(match_id)
+        if previous_positions is None:
+            continue
+        basic_changes, referee_changes = compare(previous[previous_positions[1]], current[last])
+        if basic_changes or referee_changes:
+            changed.append((first, last, previous_positions[1], basic_changes, referee_changes))
+    return new, removed, changed
+
+
+def _run_shards(
+    previous: List[Dict[str, Any]],
+    current: List[Dict[str, Any]],
+    workers: int,
+    compare: Callable[[Dict[str, Any], Dict[str, Any]], Tuple[bool, bool]],
+) -> List[ShardResult]:
+    """Fork a worker pool over the shared lists and diff every shard."""
+    global _shared
+
+    previous_shards = shard_positions(previous, workers)
+    current_shards = shard_positions(current, workers)
+    context = multiprocessing.get_context("fork")
+    with _pool_lock:
+        _shared = (previous, current, previous_shards, current_shards, compare)
+        # Keep the workers' garbage collector off the inherited objects, which
+        # would otherwise copy every page of the shared lists
+        gc.freeze()
+        try:
+            with context.Pool(workers) as pool:
+                return pool.map(diff_shard, range(workers))
+        finally:
+            gc.unfreeze()
+            _shared = None
+
+
+def parallel_iter_match_changes(
+    previous_matches: List[Dict[str, Any]],
+    current_matches: List[Dict[str, Any]],
+    workers: int,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield the differences between two match lists, diffing shards in worker processes.
+
+    Yields the same changes in the same order as iter_match_changes.
+
+    Args:
+        previous_matches: Previously saved match list
+        current_matches: Freshly fetched match list
+        workers: Number of worker processes and shards
+
+    Yields:
+        Tuples of (change_type, item) where change_type is "new", "removed" or
+        "changed" and item is the raw match or a match change record
+    """
+    from match_list_change_detector import (
+        build_change_record,
+        compare_matches,
+        iter_match_changes,
+    )
+
+    if workers < 2 or not FORK_AVAILABLE:
+        yield from iter_match_changes(previous_matches, current_matches)
+        return
+
+    try:
+        results = _run_shards(previous_matches, current_matches, workers, compare_matches)
+    except OSError as e:
+        logger.warning(f"Parallel diff unavailable, diffing serially: {e}")
+        yield from iter_match_changes(previous_matches, current_matches)
+        return
+
+    for _, last in heapq.merge(*(result[0] for result in results)):
+        yield "new", current_matches[last]
+    for _, last in heapq.merge(*(result[1] for result in results)):
+        yield "removed", previous_matches[last]
+    for _, last, previous_last, basic_changes, referee_changes in heapq.merge(
+        *(result[2] for result in results)
+    ):
+        current_match = current_matches[last]
+        yield "changed", cast(
+            Dict[str, Any],
+            build_change_record(
+                current_match["matchid"],
+                previous_matches[previous_last],
+                current_match,
+                basic_changes,
+                referee_changes,
+            ),
+        )
@@ -9,25 +9,55 @@ instead of the oneshot execution model.
 """
 
 import asyncio
+import functools
+import hmac
+import json
 import signal
+import sqlite3
 import sys
 import threading
 import time
 from datetime import datetime
 from types import FrameType
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Callable, Dict, NamedTuple, Optional
 
 import uvicorn
 from croniter import croniter  # type: ignore[import]
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 
 # Import existing modules
+from change_feed import ChangeBroadcaster, ChangeSubscription, encode_sse_event
+from change_history import ChangeHistoryStore
 from config import get_config
-from logging_config import get_logger
+from logging_config import get_logger, log_context, new_cycle_id
+from metrics import metrics
+from profiling import MAX_ARMED_CYCLES, MODE_CPROFILE, MODE_SAMPLE, profiler
+from readiness import ReadinessTracker
+from resilience import circuit_breaker_states
+from tenants import TenantPool, load_tenants
 
 logger = get_logger("persistent_service")
 
+SERVICE_NAME = "match-list-change-detector"
+
+
+class StatusSnapshot(NamedTuple):
+    """Pre-serialised /health and /status bodies, rebuilt only when service state changes.
+
+    The bodies are JSON objects left open so that the per-probe fields (uptime and
+    timestamp) can be appended without re-encoding the rest.
+    """
+
+    health_status_code: int
+    health_prefix: bytes
+    status_prefix: bytes
+
+
+def _open_json_object(payload: Dict[str, Any]) -> bytes:
+    """Serialise a dict as a JSON object without its closing brace."""
+    return json.dumps(payload, separators=(",", ":"))[:-1].encode()
+
 
 class PersistentMatchListChangeDetectorService:
     """Persistent service implementation for match list change detection."""
@@ -48,7 +78,41 @@ class PersistentMatchListChangeDetectorService:
         self.last_execution: Optional[datetime] = None
         self.next_execution: Optional[datetime] = None
         self.execution_count = 0
+        self.last_cycle_stale = False
         self.start_time = time.time()
+        self._status_snapshot: Optional[StatusSnapshot] = None
+
+        # Change history shared with the detector (read-only from the service)
+        change_history_file = self.config.get("CHANGE_HISTORY_FILE", "")
+        self.change_history: Optional[ChangeHistoryStore] = (
+            ChangeHistoryStore(
+                change_history_file,
+                max_change_sets=int(self.config.get("CHANGE_HISTORY_MAX_SETS", 1000)),
+                max_age_days=float(self.config.get("CHANGE_HISTORY_MAX_AGE_DAYS", 30)),
+            )
+            if change_history_file
+            else None
+        )
+
+        # Live change stream pushed to subscribers when a cycle detects changes
+        self.change_broadcaster = ChangeBroadcaster(
+            max_queue=int(self.config.get("CHANGE_STREAM_QUEUE_SIZE", 16)),
+            max_subscribers=int(self.config.get("CHANGE_STREAM_MAX_SUBSCRIBERS", 1000)),
+        )
+        self.change_stream_keepalive = float(self.config.get("CHANGE_STREAM_KEEPALIVE_SECONDS", 15))
+
+        # On-demand profiling, only exposed when a token is configured
+        self.profiler = profiler
+        self.profiling_token = str(self.config.get("PROFILING_TOKEN", "") or "")
+
+        # Readiness verdict from cycle freshness, failures and trigger backlog
+        self.readiness = self._create_readiness_tracker()
+
+        # Accounts watched from this process; None watches the configured account only
+        tenants_file = self.config.get("TENANTS_FILE", "")
+        self.tenants: Optional[TenantPool] = (
+            self._create_tenant_pool(tenants_file) if tenants_file else None
+        )
 
         # Initialize HTTP server
         self.app = self._create_fastapi_app()
@@ -62,11 +126,41 @@ class PersistentMatchListChangeDetectorService:
         # Validate cron schedule
         self._validate_cron_schedule()
 
+    def _create_readiness_tracker(self) -> ReadinessTracker:
+        """Create a readiness tracker with the configured thresholds."""
+        return ReadinessTracker(
+            staleness_factor=float(self.config.get("READINESS_STALENESS_FACTOR", 2.0)),
+            max_consecutive_failures=int(self.config.get("READINESS_MAX_CONSECUTIVE_FAILURES", 3)),
+            max_trigger_backlog=int(self.config.get("READINESS_MAX_TRIGGER_BACKLOG", 3)),
+        )
+
+    def _create_tenant_pool(self, tenants_file: str) -> TenantPool:
+        """Create the pool running the detection cycles of the accounts in a tenants file."""
+        configs = load_tenants(tenants_file, self.config)
+        logger.info(f"Loaded {len(configs)} tenants from {tenants_file}")
+        return TenantPool(
+            configs,
+            readiness_factory=self._create_readiness_tracker,
+            metrics_source=metrics,
+            max_concurrency=int(self.config.get("TENANT_MAX_CONCURRENCY", 4)),
+            rate_limit=int(self.config.get("API_RATE_LIMIT", 10)),
+            on_changes=self._publish_tenant_changes,
+        )
+
+    def _publish_tenant_changes(
+        self, tenant: str, changes: Dict[str, Any], seq: Optional[int]
+    ) -> None:
+        """Publish a tenant's change set to the live change stream, tagged with the tenant."""
+        self.change_broadcaster.publish({**changes, "tenant": tenant}, seq)
+
     def _validate_cron_schedule(self) -> None:
         """Validate the cron schedule format."""
         try:
             cron = croniter(self.cron_schedule, datetime.now())
             self.next_execution = cron.get_next(datetime)
+            following = cron.get_next(datetime)
+            self.readiness.set_expected_interval((following - self.next_execution).total_seconds())
+            self._refresh_status_snapshot()
             logger.info(
                 f"Cron schedule '{self.cron_schedule}' is valid. "
                 f"Next execution: {self.next_execution}"
@@ -76,7 +170,7 @@ class PersistentMatchListChangeDetectorService:
             raise ValueError(f"Invalid cron schedule: {e}")
 
     def _create_fastapi_app(self) -> FastAPI:
-        """Create FastAPI application with health and trigger endpoints."""
+        """Create FastAPI application with health, metrics and trigger endpoints."""
         app = FastAPI(
             title="Match List Change Detector",
             description="Persistent service for detecting changes in FOGIS match lists",
@@ -84,24 +178,32 @@ class PersistentMatchListChangeDetectorService:
         )
 
         @app.get("/health")  # type: ignore[misc]
-        async def health_check() -> JSONResponse:
+        async def health_check() -> Response:
             """Health check endpoint."""
-            status = "healthy" if self.running else "unhealthy"
-
-            health_data = {
-                "service_name": "match-list-change-detector",
-                "status": status,
-                "run_mode": self.run_mode,
-                "cron_schedule": self.cron_schedule,
-                "last_execution": self.last_execution.isoformat() if self.last_execution else None,
-                "next_execution": self.next_execution.isoformat() if self.next_execution else None,
-                "execution_count": self.execution_count,
-                "uptime_seconds": time.time() - self.start_time,
-                "timestamp": datetime.now().isoformat(),
-            }
+            return Response(
+                content=self._render_health(),
+                status_code=self.status_snapshot.health_status_code,
+                media_type="application/json",
+            )
 
-            status_code = 200 if status == "healthy" else 503
-            return JSONResponse(status_code=status_code, content=health_data)
+        @app.get("/ready")  # type: ignore[misc]
+        async def readiness_check() -> Response:
+            """Readiness endpoint reflecting detection freshness, failures and trigger backlog."""
+            if not self.running:
+                return Response(
+                    content=b'{"ready":false,"reasons":["service is shutting down"]}',
+                    status_code=503,
+                    media_type="application/json",
+                )
+            if self.tenants is not None:
+                verdict = self.tenants.readiness()
+            else:
+                verdict = self.readiness.check()
+            return Response(
+                content=verdict.body,
+                status_code=verdict.status_code,
+                media_type="application/json",
+            )
 
         @app.post("/trigger")  # type: ignore[misc]
         async def manual_trigger() -> Dict[str, str]:
@@ -109,6 +211,13 @@ class PersistentMatchListChangeDetectorService:
             if not self.running:
                 raise HTTPException(status_code=503, detail="Service is not running")
 
+            # In tenants mode /ready reads the tenants' trackers, so the backlog goes there
+            if self.tenants is not None:
+                trackers = [tenant.readiness for tenant in self.tenants.tenants.values()]
+            else:
+                trackers = [self.readiness]
+            for tracker in trackers:
+                tracker.trigger_queued()
             try:
                 logger.info("Manual trigger received, executing change detection...")
                 await self._execute_change_detection()
@@ -116,19 +225,197 @@ class PersistentMatchListChangeDetectorService:
             except Exception as e:
                 logger.error(f"Manual trigger failed: {e}")
                 raise HTTPException(status_code=500, detail=f"Execution failed: {str(e)}")
+            finally:
+                for tracker in trackers:
+                    tracker.trigger_done()
+
+        def get_tenant_pool() -> TenantPool:
+            """Reject tenant requests when the service watches a single account."""
+            if self.tenants is None:
+                raise HTTPException(status_code=404, detail="Multi-tenant mode is disabled")
+            return self.tenants
+
+        @app.get("/tenants")  # type: ignore[misc]
+        def list_tenants(pool: TenantPool = Depends(get_tenant_pool)) -> Dict[str, Any]:
+            """Schedule, last result and readiness of every tenant."""
+            return {"tenants": pool.status()}
+
+        @app.post("/tenants/{name}/trigger")  # type: ignore[misc]
+        async def trigger_tenant(
+            name: str, pool: TenantPool = Depends(get_tenant_pool)
+        ) -> Dict[str, str]:
+            """Run a detection cycle for one tenant immediately."""
+            try:
+                future = pool.trigger(name)
+            except KeyError:
+                raise HTTPException(status_code=404, detail=f"Unknown tenant: {name}")
+            if future is None:
+                raise HTTPException(status_code=409, detail=f"Tenant {name} is already running")
+
+            logger.info(f"Manual trigger received for tenant {name}")
+            if not await asyncio.wrap_future(future):
+                raise HTTPException(status_code=500, detail=f"Change detection failed for {name}")
+            return {"status": "success", "message": f"Change detection executed for {name}"}
+
+        @app.get("/tenants/{name}/changes")  # type: ignore[misc]
+        def list_tenant_changes(
+            name: str,
+            since: int = Query(0, ge=0, description="Sequence number of the last seen change set"),
+            limit: int = Query(100, ge=1, le=500, description="Maximum change sets to return"),
+            pool: TenantPool = Depends(get_tenant_pool),
+        ) -> Dict[str, Any]:
+            """Change feed of one tenant, returning the change sets recorded after a cursor."""
+            tenant = pool.tenants.get(name)
+            if tenant is None:
+                raise HTTPException(status_code=404, detail=f"Unknown tenant: {name}")
+
+            try:
+                return tenant.change_history.changes_since(since=since, limit=limit)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to read change history of tenant {name}: {e}")
+                raise HTTPException(status_code=500, detail="Failed to read change history")
 
         @app.get("/status")  # type: ignore[misc]
-        async def service_status() -> Dict[str, Any]:
+        async def service_status() -> Response:
             """Detailed service status endpoint."""
-            return {
-                "service_name": "match-list-change-detector",
+            return Response(content=self._render_status(), media_type="application/json")
+
+        @app.get("/metrics")  # type: ignore[misc]
+        async def prometheus_metrics() -> Response:
+            """Prometheus metrics endpoint, served from the same server as the API."""
+            body, content_type = metrics.render()
+            return Response(content=body, media_type=content_type)
+
+        @app.get("/changes")  # type: ignore[misc]
+        def list_changes(
+            since: int = Query(0, ge=0, description="Sequence number of the last seen change set"),
+            limit: int = Query(100, ge=1, le=500, description="Maximum change sets to return"),
+        ) -> Dict[str, Any]:
+            """Change feed endpoint returning the change sets recorded after a cursor."""
+            if self.change_history is None:
+                raise HTTPException(status_code=404, detail="Change history is disabled")
+
+            try:
+                return self.change_history.changes_since(since=since, limit=limit)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to read change history: {e}")
+                raise HTTPException(status_code=500, detail="Failed to read change history")
+
+        @app.get("/changes/stream")  # type: ignore[misc]
+        async def stream_changes(request: Request) -> StreamingResponse:
+            """Server-Sent Events endpoint pushing each detected change set."""
+            subscription = self.change_broadcaster.subscribe()
+            if subscription is None:
+                raise HTTPException(status_code=503, detail="Too many change stream subscribers")
+
+            return StreamingResponse(
+                self._stream_changes(request, subscription),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        def require_profiling_token(request: Request) -> None:
+            """Reject profiling requests without the configured token."""
+            if not self.profiling_token:
+                raise HTTPException(status_code=404, detail="Profiling is disabled")
+
+            supplied = request.headers.get("X-Profiling-Token", "")
+            authorization = request.headers.get("Authorization", "")
+            if authorization.lower().startswith("bearer "):
+                supplied = authorization[len("bearer ") :].strip()
+            if not hmac.compare_digest(supplied.encode(), self.profiling_token.encode()):
+                raise HTTPException(status_code=401, detail="Invalid profiling token")
+
+        profiling_auth = [Depends(require_profiling_token)]
+
+        @app.get("/debug/profile", dependencies=profiling_auth)  # type: ignore[misc]
+        def profiling_status() -> Dict[str, Any]:
+            """List the retained profile captures and the armed state."""
+            return self.profiler.status()
+
+        @app.post(  # type: ignore[misc]
+            "/debug/profile", status_code=202, dependencies=profiling_auth
+        )
+        def arm_profiling(
+            cycles: int = Query(1, ge=1, le=MAX_ARMED_CYCLES, description="Cycles to profile"),
+            mode: str = Query(MODE_CPROFILE, pattern=f"^({MODE_CPROFILE}|{MODE_SAMPLE})$"),
+            tracemalloc: bool = Query(False, description="Trace allocation sites"),
+        ) -> Dict[str, Any]:
+            """Profile the next detection cycles."""
+            self.profiler.arm(cycles=cycles, mode=mode, trace_memory=tracemalloc)
+            return self.profiler.status()
+
+        @app.delete("/debug/profile", dependencies=profiling_auth)  # type: ignore[misc]
+        def disarm_profiling() -> Dict[str, Any]:
+            """Cancel profiling of upcoming cycles."""
+            self.profiler.disarm()
+            return self.profiler.status()
+
+        @app.get("/debug/profile/{capture_id}", dependencies=profiling_auth)  # type: ignore[misc]
+        def download_profile(
+            capture_id: int,
+            format: str = Query("text", pattern="^(text|pstats|collapsed)$"),
+        ) -> Response:
+            """Download a profile capture as a text report, pstats file or collapsed stacks."""
+            capture = self.profiler.get_capture(capture_id)
+            if capture is None:
+                raise HTTPException(status_code=404, detail="Profile capture not found")
+
+            if format == "pstats":
+                if capture.stats is None:
+                    raise HTTPException(status_code=404, detail="Capture has no cProfile data")
+                return Response(
+                    content=capture.pstats_bytes(),
+                    media_type="application/octet-stream",
+                    headers={
+                        "Content-Disposition": f'attachment; filename="cycle-{capture_id}.prof"'
+                    },
+                )
+            if format == "collapsed":
+                return PlainTextResponse(capture.collapsed_stacks())
+            return PlainTextResponse(capture.text_report())
+
+        return app
+
+    @property
+    def status_snapshot(self) -> StatusSnapshot:
+        """The pre-serialised health and status bodies for the current state."""
+        snapshot = self._status_snapshot
+        if snapshot is None:
+            snapshot = self._refresh_status_snapshot()
+        return snapshot
+
+    def _refresh_status_snapshot(self) -> StatusSnapshot:
+        """Rebuild the cached health and status bodies after a state change.
+
+        Called on cycle start and end, schedule changes and shutdown, so probes
+        only append the uptime and timestamp to bytes encoded here.
+        """
+        last_execution = self.last_execution.isoformat() if self.last_execution else None
+        next_execution = self.next_execution.isoformat() if self.next_execution else None
+        status = "healthy" if self.running else "unhealthy"
+
+        health_prefix = _open_json_object(
+            {
+                "service_name": SERVICE_NAME,
+                "status": status,
+                "run_mode": self.run_mode,
+                "cron_schedule": self.cron_schedule,
+                "last_execution": last_execution,
+                "next_execution": next_execution,
+                "execution_count": self.execution_count,
+            }
+        )
+        status_prefix = _open_json_object(
+            {
+                "service_name": SERVICE_NAME,
                 "run_mode": self.run_mode,
                 "running": self.running,
                 "cron_schedule": self.cron_schedule,
-                "last_execution": self.last_execution.isoformat() if self.last_execution else None,
-                "next_execution": self.next_execution.isoformat() if self.next_execution else None,
+                "last_execution": last_execution,
+                "next_execution": next_execution,
                 "execution_count": self.execution_count,
-                "uptime_seconds": time.time() - self.start_time,
+                "tenant_count": len(self.tenants.tenants) if self.tenants is not None else 0,
                 "configuration": {
                     "health_server_port": self.health_server_port,
                     "health_server_host": self.health_server_host,
@@ -136,8 +423,59 @@ class PersistentMatchListChangeDetectorService:
                     "fogis_password_set": bool(self.config.get("FOGIS_PASSWORD")),
                 },
             }
+        )
 
-        return app
+        # Replaced in one assignment so probes never see a half-updated snapshot
+        snapshot = StatusSnapshot(
+            health_status_code=200 if self.running else 503,
+            health_prefix=health_prefix,
+            status_prefix=status_prefix,
+        )
+        self._status_snapshot = snapshot
+        return snapshot
+
+    def _render_health(self) -> bytes:
+        """Render the /health body from the cached snapshot."""
+        uptime = time.time() - self.start_time
+        timestamp = datetime.now().isoformat()
+        suffix = f',"uptime_seconds":{uptime!r},"timestamp":"{timestamp}"}}'
+        return self.status_snapshot.health_prefix + suffix.encode()
+
+    def _render_status(self) -> bytes:
+        """Render the /status body from the cached snapshot.
+
+        Circuit breaker states change between cycles, so they are rendered per request.
+        """
+        uptime = time.time() - self.start_time
+        breakers = json.dumps(circuit_breaker_states(), separators=(",", ":"))
+        return (
+            self.status_snapshot.status_prefix
+            + f',"circuit_breakers":{breakers},"uptime_seconds":{uptime!r}}}'.encode()
+        )
+
+    async def _stream_changes(
+        self, request: Request, subscription: ChangeSubscription
+    ) -> AsyncIterator[str]:
+        """Yield Server-Sent Events for a change stream subscriber until it disconnects."""
+        dropped = 0
+        try:
+            yield ": connected\n\n"
+            while self.running:
+                frame = await subscription.next_event(self.change_stream_keepalive)
+
+                # Tell slow clients they missed change sets so they can catch up via /changes
+                if subscription.dropped != dropped:
+                    yield encode_sse_event("overflow", {"dropped": subscription.dropped - dropped})
+                    dropped = subscription.dropped
+
+                if frame is not None:
+                    yield frame
+                elif await request.is_disconnected():
+                    break
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            self.change_broadcaster.unsubscribe(subscription)
 
     def _signal_handler(self, signum: int, frame: Optional[FrameType]) -> None:
         """Handle shutdown signals gracefully."""
@@ -150,42 +488,80 @@ class PersistentMatchListChangeDetectorService:
         """Shutdown the application gracefully."""
         logger.info("Shutting down match list change detector...")
         self.running = False
+        self._refresh_status_snapshot()
 
         if self._server:
             self._server.should_exit = True
 
+        if self.tenants is not None:
+            self.tenants.shutdown(wait=False)
+
         if self.server_thread and self.server_thread.is_alive():
             self.server_thread.join(timeout=5)
             logger.info("HTTP server stopped")
 
     async def _execute_change_detection(self) -> bool:
         """Execute the change detection logic."""
-        try:
-            self.last_execution = datetime.now()
-            self.execution_count += 1
+        cycle_id = new_cycle_id()
+        with log_context(cycle_id=cycle_id):
+            try:
+                self.last_execution = datetime.now()
+                self.execution_count += 1
+                self._refresh_status_snapshot()
+
+                logger.info(f"Starting change detection cycle #{self.execution_count}")
+
+                if self.tenants is not None:
+                    # Every tenant records its own readiness
+                    result = await asyncio.get_event_loop().run_in_executor(
+                        None, self.tenants.run_all
+                    )
+                else:
+                    # Import and run the main detection logic
+                    from match_list_change_detector import main as run_detection
+
+                    # Run the change detection in a thread pool to avoid blocking
+                    result = await asyncio.get_event_loop().run_in_executor(
+                        None, functools.partial(self._run_detection_cycle, run_detection, cycle_id)
+                    )
+                    # A cycle on a stale recorded response is not a fresh result
+                    self.readiness.record_cycle(bool(result) and not self.last_cycle_stale)
+
+                logger.info(
+                    f"Change detection cycle #{self.execution_count} completed successfully"
+                )
 
-            logger.info(f"Starting change detection cycle #{self.execution_count}")
+                # Update next execution time if running in service mode
+                if self.run_mode == "service":
+                    cron = croniter(self.cron_schedule, self.last_execution)
+                    self.next_execution = cron.get_next(datetime)
+                    self._refresh_status_snapshot()
+                    logger.info(f"Next scheduled execution: {self.next_execution}")
 
-            # Import and run the main detection logic
-            from match_list_change_detector import main as run_detection
+                return result
 
-            # Run the change detection in a thread pool to avoid blocking
-            result = await asyncio.get_event_loop().run_in_executor(None, run_detection)
+            except Exception as e:
+                self.readiness.record_cycle(False)
+                logger.error(f"Change detection failed: {e}")
+                logger.exception("Change detection stack trace:")
+                raise
 
-            logger.info(f"Change detection cycle #{self.execution_count} completed successfully")
+    def _run_detection_cycle(
+        self, run_detection: Callable[..., bool], cycle_id: Optional[str] = None
+    ) -> bool:
+        """Run one detection cycle on the worker thread, profiling it when armed.
 
-            # Update next execution time if running in service mode
-            if self.run_mode == "service":
-                cron = croniter(self.cron_schedule, self.last_execution)
-                self.next_execution = cron.get_next(datetime)
-                logger.info(f"Next scheduled execution: {self.next_execution}")
+        The cycle ID is set again here because context variables do not follow
+        work into the executor thread. Whether the cycle ran on a stale recorded
+        response is kept in last_cycle_stale.
+        """
+        self.last_cycle_stale = False
 
-            return result
+        def on_stale() -> None:
+            self.last_cycle_stale = True
 
-        except Exception as e:
-            logger.error(f"Change detection failed: {e}")
-            logger.exception("Change detection stack trace:")
-            raise
+        with log_context(cycle_id=cycle_id), self.profiler.profile_cycle(self.execution_count):
+            return run_detection(on_changes=self.change_broadcaster.publish, on_stale=on_stale)
 
     def _start_http_server(self) -> None:
         """Start the HTTP server in a separate thread."""
@@ -233,7 +609,11 @@ class PersistentMatchListChangeDetectorService:
                 now = datetime.now()
 
                 # Check if it's time to execute
-                if self.next_execution and now >= self.next_execution:
+                if self.tenants is not None:
+                    started = self.tenants.start_due(now)
+                    if started:
+                        logger.info(f"Scheduled execution time reached for {', '.join(started)}")
+                elif self.next_execution and now >= self.next_execution:
                     logger.info("Scheduled execution time reached, running change detection...")
                     asyncio.run(self._execute_change_detection())
 
@@ -273,7 +653,9 @@ def main() -> None:
     else:
         # Run original oneshot mode
         from match_list_change_detector import main as original_main
+        from match_list_change_detector import start_servers
 
+        start_servers()
         original_main()
 
 
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+On-demand profiling for the match list change detector.
+
+Captures cProfile or sampled call stacks for the next N detection cycles and,
+optionally, tracemalloc snapshots of the top allocation sites in the snapshot
+load and diff stages. Nothing is profiled until a capture is armed, and the
+hooks left in the detection cycle only check a flag while disarmed.
+"""
+
+import collections
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from types import FrameType
+from typing import Any, Counter, Deque, Dict, Iterator, List, Optional
+
+from config import get_config
+from logging_config import get_logger
+
+logger = get_logger("profiling")
+
+# Supported capture modes
+MODE_CPROFILE = "cprofile"
+MODE_SAMPLE = "sample"
+MODES = (MODE_CPROFILE, MODE_SAMPLE)
+
+# Stages whose allocations are traced when tracemalloc capture is requested
+ALLOCATION_STAGES = ("snapshot_load", "diff")
+
+# Upper bound on the number of cycles a single request may arm
+MAX_ARMED_CYCLES = 10
+
+# Deepest stack recorded by the sampling profiler
+MAX_SAMPLE_DEPTH = 128
+
+
+class ProfileCapture:
+    """Profile data captured for a single detection cycle."""
+
+    def __init__(self, capture_id: int, cycle: Optional[int], mode: str) -> None:
+        """
+        Initialize the capture.
+
+        Args:
+            capture_id: Unique identifier of the capture
+            cycle: Detection cycle number, if known
+            mode: Capture mode (cprofile or sample)
+        """
+        self.capture_id = capture_id
+        self.cycle = cycle
+        self.mode = mode
+        self.started_at = datetime.now()
+        self.duration_seconds = 0.0
+        self.stats: Optional[Dict[Any, Any]] = None
+        self.samples: Counter[str] = collections.Counter()
+        self.sample_count = 0
+        self.allocations: Dict[str, Dict[str, Any]] = {}
+
+    def pstats_bytes(self) -> bytes:
+        """Serialize cProfile stats in the format read by pstats and snakeviz."""
+        if self.stats is None:
+            return b""
+        return marshal.dumps(self.stats)
+
+    def collapsed_stacks(self) -> str:
+        """Render sampled stacks in the collapsed format used by flame graph tools."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def text_report(self, limit: int = 40) -> str:
+        """Render a human readable report of the capture."""
+        out = io.StringIO()
+        out.write(
+            f"Capture {self.capture_id} ({self.mode}) of cycle {self.cycle} "
+            f"started {self.started_at.isoformat()}, took {self.duration_seconds:.3f}s\n\n"
+        )
+        if self.stats is not None:
+            stats = pstats.Stats(_StatsSource(self.stats), stream=out)  # type: ignore[arg-type]
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        if self.sample_count:
+            out.write(f"{self.sample_count} samples, hottest stacks:\n")
+            for stack, count in self.samples.most_common(limit):
+                leaf = stack.rsplit(";", 1)[-1]
+                out.write(f"{count / self.sample_count:8.1%}  {leaf}\n")
+        for stage, allocations in self.allocations.items():
+            out.write(
+                f"\nTop allocation sites in {stage} " f"(peak {allocations['peak_bytes']} bytes):\n"
+            )
+            for site in allocations["top"]:
+                out.write(
+                    f"{site['size_bytes']:>12} bytes {site['count']:>8} blocks  {site['site']}\n"
+                )
+        return out.getvalue()
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Summarize the capture for the capture listing."""
+        return {
+            "id": self.capture_id,
+            "cycle": self.cycle,
+            "mode": self.mode,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": self.duration_seconds,
+            "samples": self.sample_count,
+            "allocations": self.allocations,
+        }
+
+
+class _StatsSource:
+    """Adapter letting pstats.Stats load already collected profile data."""
+
+    def __init__(self, stats: Dict[Any, Any]) -> None:
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        """Satisfy the pstats loader interface; the stats are already collected."""
+
+
+class _StackSampler(threading.Thread):
+    """Periodically sample the call stack of a single thread."""
+
+    def __init__(self, thread_id: int, interval: float, capture: ProfileCapture) -> None:
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.capture = capture
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        """Sample until stopped."""
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.capture.samples[_collapse_stack(frame)] += 1
+                self.capture.sample_count += 1
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler to exit."""
+        self._stop_event.set()
+        self.join()
+
+
+def _collapse_stack(frame: Optional[FrameType]) -> str:
+    """Render a stack as semicolon separated frames, outermost first."""
+    frames: List[str] = []
+    while frame is not None and len(frames) < MAX_SAMPLE_DEPTH:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class CycleProfiler:
+    """Profile the next N detection cycles on request."""
+
+    def __init__(
+        self,
+        max_captures: int = 5,
+        sample_interval: float = 0.005,
+        tracemalloc_top: int = 25,
+        tracemalloc_frames: int = 1,
+    ) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            max_captures: Number of most recent captures to keep
+            sample_interval: Seconds between stack samples in sample mode
+            tracemalloc_top: Number of allocation sites kept per traced stage
+            tracemalloc_frames: Number of frames stored per traced allocation
+        """
+        self.sample_interval = sample_interval
+        self.tracemalloc_top = tracemalloc_top
+        self.tracemalloc_frames = tracemalloc_frames
+        self.captures: Deque[ProfileCapture] = collections.deque(maxlen=max(1, max_captures))
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending_cycles = 0
+        self._pending_mode = MODE_CPROFILE
+        self._pending_tracemalloc = False
+        self._active: Optional[ProfileCapture] = None
+        self._trace_allocations = False
+
+    @property
+    def pending_cycles(self) -> int:
+        """Number of upcoming cycles that will be profiled."""
+        return self._pending_cycles
+
+    def arm(self, cycles: int = 1, mode: str = MODE_CPROFILE, trace_memory: bool = False) -> None:
+        """
+        Profile the next detection cycles.
+
+        Args:
+            cycles: Number of cycles to profile (at most MAX_ARMED_CYCLES)
+            mode: "cprofile" for deterministic profiling or "sample" for statistical
+                stack sampling with lower overhead
+            trace_memory: Also record the top allocation sites of the snapshot load
+                and diff stages with tracemalloc
+
+        Raises:
+            ValueError: If the mode or number of cycles is invalid
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        if not 1 <= cycles <= MAX_ARMED_CYCLES:
+            raise ValueError(f"cycles must be between 1 and {MAX_ARMED_CYCLES}")
+
+        with self._lock:
+            self._pending_cycles = cycles
+            self._pending_mode = mode
+            self._pending_tracemalloc = trace_memory
+        logger.info(f"Profiling armed for the next {cycles} cycle(s) in {mode} mode")
+
+    def disarm(self) -> None:
+        """Cancel profiling of upcoming cycles."""
+        with self._lock:
+            self._pending_cycles = 0
+
+    def get_capture(self, capture_id: int) -> Optional[ProfileCapture]:
+        """Get a retained capture by identifier."""
+        for capture in list(self.captures):
+            if capture.capture_id == capture_id:
+                return capture
+        return None
+
+    def status(self) -> Dict[str, Any]:
+        """Describe the armed state and the retained captures."""
+        return {
+            "pending_cycles": self._pending_cycles,
+            "mode": self._pending_mode,
+            "tracemalloc": self._pending_tracemalloc,
+            "captures": [capture.as_dict() for capture in list(self.captures)],
+        }
+
+    @contextmanager
+    def profile_cycle(self, cycle: Optional[int] = None) -> Iterator[Optional[ProfileCapture]]:
+        """
+        Profile the wrapped detection cycle if profiling has been armed.
+
+        Must be entered on the thread that runs the cycle.
+
+        Args:
+            cycle: Detection cycle number recorded with the capture
+
+        Yields:
+            The capture being recorded, or None when the cycle is not profiled
+        """
+        if not self._pending_cycles:
+            yield None
+            return
+
+        with self._lock:
+            if not self._pending_cycles or self._active is not None:
+                capture = None
+            else:
+                self._pending_cycles -= 1
+                capture = ProfileCapture(next(self._ids), cycle, self._pending_mode)
+                self._active = capture
+                self._trace_allocations = self._pending_tracemalloc
+        if capture is None:
+            yield None
+            return
+
+        profile: Optional[cProfile.Profile] = None
+        sampler: Optional[_StackSampler] = None
+        start = time.perf_counter()
+        try:
+            if capture.mode == MODE_CPROFILE:
+                profile = cProfile.Profile()
+                profile.enable()
+            else:
+                sampler = _StackSampler(threading.get_ident(), self.sample_interval, capture)
+                sampler.start()
+            yield capture
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.create_stats()
+                capture.stats = profile.stats
+            if sampler is not None:
+                sampler.stop()
+            capture.duration_seconds = time.perf_counter() - start
+            with self._lock:
+                self._active = None
+                self._trace_allocations = False
+                self.captures.append(capture)
+            logger.info(
+                f"Profile capture {capture.capture_id} recorded "
+                f"({capture.duration_seconds:.3f}s, {capture.mode})"
+            )
+
+    @contextmanager
+    def trace_allocations(self, stage: str) -> Iterator[None]:
+        """
+        Record the top allocation sites of a stage in the capture being recorded.
+
+        Does nothing unless the running cycle is profiled with tracemalloc enabled.
+
+        Args:
+            stage: Stage name, only stages in ALLOCATION_STAGES are traced
+        """
+        capture = self._active
+        if not self._trace_allocations or capture is None or stage not in ALLOCATION_STAGES:
+            yield
+            return
+
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(self.tracemalloc_frames)
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.take_snapshot()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if started_here:
+                tracemalloc.stop()
+            capture.allocations[stage] = {
+                "peak_bytes": peak,
+                "top": self._top_allocation_sites(snapshot, baseline),
+            }
+
+    def _top_allocation_sites(
+        self, snapshot: tracemalloc.Snapshot, baseline: tracemalloc.Snapshot
+    ) -> List[Dict[str, Any]]:
+        """Get the allocation sites that grew the most during a traced stage."""
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        differences = snapshot.filter_traces(ignore).compare_to(
+            baseline.filter_traces(ignore), "lineno"
+        )
+        return [
+            {
+                "site": str(difference.traceback[0]),
+                "size_bytes": difference.size_diff,
+                "count": difference.count_diff,
+            }
+            for difference in differences[: self.tracemalloc_top]
+            if difference.size_diff > 0
+        ]
+
+
+config = get_config()
+
+# Global profiler shared by the service and the detection cycle
+profiler = CycleProfiler(
+    max_captures=int(config.get("PROFILING_MAX_CAPTURES", 5)),
+    sample_interval=float(config.get("PROFILING_SAMPLE_INTERVAL", 0.005)),
+    tracemalloc_top=int(config.get("PROFILING_TRACEMALLOC_TOP", 25)),
+)
@@ -3,13 +3,19 @@
 Python 3.13+ compatibility module for the match list change detector.
 
 This module provides compatibility fixes for Python 3.13+ import issues
-that cause KeyError exceptions during module imports.
+that cause KeyError exceptions during module imports. Importing it has no
+side effects; call apply_compat_fixes() before importing affected modules.
 """
 
 import importlib
 import sys
 from typing import Any
 
+# First Python version affected by the import issues
+AFFECTED_PYTHON_VERSION = (3, 13)
+
+_fixes_applied = False
+
 
 def ensure_module_available(module_name: str) -> None:
     """
@@ -97,6 +103,20 @@ def fix_python_313_imports() -> None:
         pass
 
 
+def apply_compat_fixes() -> None:
+    """
+    Apply the import fixes once, and only on Python versions that need them.
+
+    On unaffected versions this returns immediately, so callers do not pay for
+    eagerly importing http.server, pickle, urllib.request and friends.
+    """
+    global _fixes_applied
+    if _fixes_applied or sys.version_info < AFFECTED_PYTHON_VERSION:
+        return
+    fix_python_313_imports()
+    _fixes_applied = True
+
+
 def safe_import(module_name: str, fallback: Any = None) -> Any:
     """
     Safely import a module with fallback handling.
@@ -109,12 +129,8 @@ def safe_import(module_name: str, fallback: Any = None) -> Any:
         The imported module or fallback value
     """
     try:
-        fix_python_313_imports()
+        apply_compat_fixes()
         return importlib.import_module(module_name)
     except (ImportError, KeyError) as e:
         print(f"Warning: Failed to import {module_name}: {e}")
         return fallback
-
-
-# Apply fixes immediately when this module is imported
-fix_python_313_imports()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Readiness tracking for the match list change detector service.
+
+The readiness verdict reflects whether the detection pipeline is actually
+producing fresh results: how long ago the last successful cycle finished
+compared with the cron interval, how many cycles in a row have failed, and
+how many manual triggers are waiting. The verdict is updated when those
+inputs change, so answering a readiness probe is a clock comparison and a
+cached response body.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Defaults for the readiness thresholds
+DEFAULT_STALENESS_FACTOR = 2.0
+DEFAULT_MAX_CONSECUTIVE_FAILURES = 3
+DEFAULT_MAX_TRIGGER_BACKLOG = 3
+
+
+class ReadinessVerdict(NamedTuple):
+    """Result of a readiness check."""
+
+    ready: bool
+    reasons: Tuple[str, ...]
+    body: bytes
+
+    @property
+    def status_code(self) -> int:
+        """HTTP status code for the verdict."""
+        return 200 if self.ready else 503
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    """Format a Unix timestamp for the readiness body."""
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+class ReadinessTracker:
+    """Track pipeline freshness and failures to decide readiness.
+
+    Cycle results, schedule changes and trigger counts are recorded as they
+    happen. Each recording recomputes the deadline after which the last
+    successful cycle is considered stale, so checks never scan any history.
+    Before the first successful cycle the deadline is measured from the time
+    the tracker was created, giving the first scheduled cycle time to run.
+    """
+
+    def __init__(
+        self,
+        expected_interval: Optional[float] = None,
+        staleness_factor: float = DEFAULT_STALENESS_FACTOR,
+        max_consecutive_failures: int = DEFAULT_MAX_CONSECUTIVE_FAILURES,
+        max_trigger_backlog: int = DEFAULT_MAX_TRIGGER_BACKLOG,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Initialize the readiness tracker.
+
+        Args:
+            expected_interval: Seconds between scheduled cycles, or None to
+                skip the freshness check until a schedule is set
+            staleness_factor: Number of expected intervals after the last
+                successful cycle before results count as stale
+            max_consecutive_failures: Consecutive failed cycles at which the
+                service stops being ready
+            max_trigger_backlog: Pending manual triggers above which the
+                service stops being ready
+            clock: Source of the current Unix time
+        """
+        self.staleness_factor = staleness_factor
+        self.max_consecutive_failures = max_consecutive_failures
+        self.max_trigger_backlog = max_trigger_backlog
+        self._clock = clock
+        self._lock = threading.Lock()
+
+        self.started_at = clock()
+        self.expected_interval = expected_interval
+        self.last_success: Optional[float] = None
+        self.last_failure: Optional[float] = None
+        self.consecutive_failures = 0
+        self.trigger_backlog = 0
+
+        # Derived state, recomputed on every recording
+        self._state: Tuple[Optional[float], Dict[bool, ReadinessVerdict]] = (None, {})
+        self._update()
+
+    def set_expected_interval(self, seconds: Optional[float]) -> None:
+        """Set the interval between scheduled cycles after a schedule change."""
+        with self._lock:
+            self.expected_interval = seconds
+            self._update()
+
+    def record_cycle(self, success: bool) -> None:
+        """Record the outcome of a detection cycle."""
+        now = self._clock()
+        with self._lock:
+            if success:
+                self.last_success = now
+                self.consecutive_failures = 0
+            else:
+                self.last_failure = now
+                self.consecutive_failures += 1
+            self._update()
+
+    def trigger_queued(self) -> None:
+        """Record a manual trigger waiting for or running its cycle."""
+        with self._lock:
+            self.trigger_backlog += 1
+            self._update()
+
+    def trigger_done(self) -> None:
+        """Record that a manual trigger has finished."""
+        with self._lock:
+            self.trigger_backlog = max(0, self.trigger_backlog - 1)
+            self._update()
+
+    def check(self) -> ReadinessVerdict:
+        """
+        Get the current readiness verdict.
+
+        Returns:
+            Verdict with the reasons for not being ready and the encoded body
+        """
+        stale_at, verdicts = self._state
+        stale = stale_at is not None and self._clock() >= stale_at
+        return verdicts[stale]
+
+    def status(self) -> Dict[str, Any]:
+        """Get the current readiness state as a dictionary."""
+        return dict(json.loads(self.check().body))
+
+    def _update(self) -> None:
+        """Recompute the staleness deadline and both possible verdicts (lock held)."""
+        if self.expected_interval is None:
+            stale_at = None
+        else:
+            fresh_since = self.last_success if self.last_success is not None else self.started_at
+            stale_at = fresh_since + self.expected_interval * self.staleness_factor
+
+        reasons: List[str] = []
+        if self.consecutive_failures >= self.max_consecutive_failures:
+            reasons.append(f"{self.consecutive_failures} consecutive failed cycles")
+        if self.trigger_backlog > self.max_trigger_backlog:
+            reasons.append(f"{self.trigger_backlog} manual triggers pending")
+
+        # Build the verdict for either side of the staleness deadline up front
+        verdicts = {}
+        for stale in (False, True):
+            verdict_reasons = list(reasons)
+            if stale and self.expected_interval is not None:
+                window = self.expected_interval * self.staleness_factor
+                verdict_reasons.append(f"no successful cycle in the last {window:.0f}s")
+            verdicts[stale] = self._build_verdict(verdict_reasons, stale_at)
+
+        # Replaced in one assignment so checks see a consistent deadline and verdicts
+        self._state = (stale_at, verdicts)
+
+    def _build_verdict(self, reasons: List[str], stale_at: Optional[float]) -> ReadinessVerdict:
+        """Build a verdict and its pre-serialised body."""
+        body = {
+            "ready": not reasons,
+            "reasons": reasons,
+            "last_success": _isoformat(self.last_success),
+            "last_failure": _isoformat(self.last_failure),
+            "stale_after": _isoformat(stale_at),
+            "consecutive_failures": self.consecutive_failures,
+            "trigger_backlog": self.trigger_backlog,
+        }
+        encoded = json.dumps(body, separators=(",", ":")).encode()
+        return ReadinessVerdict(ready=not reasons, reasons=tuple(reasons), body=encoded)
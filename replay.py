@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Offline replay of recorded match list fetches.
+
+Feeds a recorded sequence of match list payloads through the full detection
+cycle (snapshot load, fetch, diff, trigger and snapshot save) without the
+live API, as fast as possible. The orchestrator is never started: the
+trigger either does nothing or only writes the changes file it would hand
+over. Each cycle reports its stage timings and the change set it detected,
+so diff and trigger changes can be benchmarked and incidents reproduced
+offline.
+
+Payloads are read from:
+
+- a directory of JSON files, one payload per file, in file name order;
+- a response recorder directory (``RESPONSE_RECORDER_DIR``), one payload per
+  successful recorded fetch;
+- a JSON lines file, one payload per line;
+- a snapshot history database (``SNAPSHOT_HISTORY_FILE``), one payload per
+  recorded snapshot.
+
+A payload is what the API returns: a match list or an object with a
+``matches`` list. Usage::
+
+    python -m replay recorded/ [--previous previous_matches.json]
+        [--trigger noop|record] [--work-dir DIR] [--output results.json]
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from match_list_change_detector import ChangesSummary, MatchListChangeDetector, RateLimiter
+from response_recorder import ResponseRecorder
+
+# Leading bytes of an SQLite database file
+_SQLITE_HEADER = b"SQLite format 3\x00"
+
+TRIGGER_MODES = ("noop", "record")
+
+
+class ReplayCycle(NamedTuple):
+    """Outcome of one replayed detection cycle."""
+
+    cycle: int
+    source: str
+    succeeded: bool
+    wall_seconds: float
+    stage_seconds: Dict[str, float]
+    matches: int
+    changes: Optional[Dict[str, Any]]
+
+
+def load_payloads(path: str) -> Iterator[Tuple[str, Any]]:
+    """
+    Read recorded payloads in replay order.
+
+    Args:
+        path: Directory of JSON files, response recorder directory, JSON lines file or
+            snapshot history database
+
+    Yields:
+        Tuples of (source, payload) where source names the file, line or snapshot
+
+    Raises:
+        FileNotFoundError: If the path does not exist
+    """
+    source = Path(path)
+    if source.is_dir():
+        recorder = ResponseRecorder(str(source))
+        if recorder.entries():
+            yield from recorder.iter_payloads()
+            return
+        for file_path in sorted(source.glob("*.json")):
+            with open(file_path) as f:
+                yield file_path.name, json.load(f)
+        return
+
+    with open(source, "rb") as f:
+        is_database = f.read(len(_SQLITE_HEADER)) == _SQLITE_HEADER
+    if is_database:
+        from snapshot_history import SnapshotHistoryStore
+
+        history = SnapshotHistoryStore(str(source), max_snapshots=0, max_age_days=0)
+        for entry in history.snapshots():
+            snapshot = history.snapshot(entry["seq"])
+            if snapshot is not None:
+                yield f"snapshot #{snapshot.seq} ({entry['timestamp']})", snapshot.matches
+        return
+
+    with open(source) as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                yield f"{source.name}:{line_number}", json.loads(line)
+
+
+class ReplayApiClient:
+    """API client returning recorded payloads instead of calling the API."""
+
+    def __init__(self) -> None:
+        """Initialize the client without a payload."""
+        self.payload: Any = []
+
+    def login(self) -> bool:
+        """Pretend to log in."""
+        return True
+
+    def fetch_matches_list_json(self, filter_params: Optional[Dict[str, Any]] = None) -> Any:
+        """Return the payload of the cycle being replayed."""
+        return self.payload
+
+
+class ReplayDetector(MatchListChangeDetector):
+    """Detector whose orchestrator trigger never starts docker-compose."""
+
+    def __init__(self, *args: Any, trigger: str = "noop", **kwargs: Any) -> None:
+        """
+        Initialize the replay detector.
+
+        Args:
+            trigger: "noop" skips the trigger, "record" writes the changes file
+                handed to the orchestrator
+            *args: Positional arguments of MatchListChangeDetector
+            **kwargs: Keyword arguments of MatchListChangeDetector
+
+        Raises:
+            ValueError: If the trigger mode is unknown
+        """
+        if trigger not in TRIGGER_MODES:
+            raise ValueError(f"Unknown trigger mode {trigger!r}, use one of {TRIGGER_MODES}")
+        super().__init__(*args, **kwargs)
+        self.trigger = trigger
+
+    def confirm_mass_removal(
+        self, changes: Union[ChangesSummary, Dict[str, Any]]
+    ) -> Optional[Tuple[bool, Union[ChangesSummary, Dict[str, Any]], bool]]:
+        """Confirm a quarantined mass removal at once: a refetch would return the same payload."""
+        self.metrics.record_quarantine("confirmed")
+        return self.detect_cycle_changes()
+
+    def trigger_docker_compose(
+        self, changes: Union[ChangesSummary, Dict[str, Any]], write_changes: bool = True
+    ) -> bool:
+        """Stand in for the orchestrator trigger, writing the changes file if recording."""
+        if self.trigger == "record" and write_changes:
+            return self.write_changes_file(changes)
+        return True
+
+
+def replay(
+    payloads: Iterable[Tuple[str, Any]],
+    work_dir: str,
+    previous_matches_file: Optional[str] = None,
+    trigger: str = "noop",
+) -> List[ReplayCycle]:
+    """
+    Run one detection cycle per recorded payload.
+
+    Args:
+        payloads: Tuples of (source, payload) in replay order
+        work_dir: Directory for the snapshot, changes file and change history
+        previous_matches_file: Snapshot to start from instead of an empty history
+        trigger: "noop" or "record", see ReplayDetector
+
+    Returns:
+        Outcome of each cycle
+    """
+    work_path = Path(work_dir)
+    work_path.mkdir(parents=True, exist_ok=True)
+    snapshot_file = work_path / "previous_matches.json"
+    if previous_matches_file:
+        shutil.copyfile(previous_matches_file, snapshot_file)
+
+    api_client = ReplayApiClient()
+    detector = ReplayDetector(
+        "replay",
+        "replay",
+        trigger=trigger,
+        api_client=api_client,
+        rate_limiter=RateLimiter(max_requests=10**9),
+        previous_matches_file=str(snapshot_file),
+        changes_file=str(work_path / "match_changes.json"),
+        change_history_file=str(work_path / "change_history.db"),
+        snapshot_history_file="",
+    )
+
+    cycles = []
+    for cycle, (source, payload) in enumerate(payloads, start=1):
+        api_client.payload = payload
+        detected: List[Dict[str, Any]] = []
+        start = time.perf_counter()
+        succeeded = detector.run(on_changes=lambda changes, _seq: detected.append(changes))
+        cycles.append(
+            ReplayCycle(
+                cycle=cycle,
+                source=source,
+                succeeded=bool(succeeded),
+                wall_seconds=time.perf_counter() - start,
+                stage_seconds=dict(detector.stage_timings),
+                matches=len(detector.current_matches),
+                changes=detected[0] if detected else None,
+            )
+        )
+    return cycles
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Replay recorded payloads from the command line."""
+    parser = argparse.ArgumentParser(description="Replay recorded match list fetches offline")
+    parser.add_argument("payloads", help="directory of JSON files, JSON lines file or history")
+    parser.add_argument("--previous", help="previous matches file to start from")
+    parser.add_argument("--trigger", choices=TRIGGER_MODES, default="noop")
+    parser.add_argument("--work-dir", help="keep the snapshot and changes files here")
+    parser.add_argument("--output", help="write the cycles and change sets to this JSON file")
+    parser.add_argument("--log-level", default="WARNING", help="detector log level")
+    args = parser.parse_args(argv)
+
+    from logging_config import configure_logging
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="replay-")
+    configure_logging(
+        "match_list_change_detector",
+        log_level=args.log_level,
+        log_dir=work_dir,
+        console_output=False,
+    )
+    try:
+        start = time.perf_counter()
+        cycles = replay(load_payloads(args.payloads), work_dir, args.previous, args.trigger)
+        elapsed = time.perf_counter() - start
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    for entry in cycles:
+        changes = entry.changes or {}
+        print(
+            f"{entry.cycle:>5}  {entry.wall_seconds * 1000:9.1f} ms  "
+            f"{'ok    ' if entry.succeeded else 'failed'}  {entry.matches:>7} matches  "
+            f"+{changes.get('new_matches', 0)} -{changes.get('removed_matches', 0)} "
+            f"~{changes.get('changed_matches', 0)}  {entry.source}"
+        )
+    print(f"{len(cycles)} cycles in {elapsed:.2f} s")
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"cycles": [entry._asdict() for entry in cycles]}, indent=2) + "\n"
+        )
+    return 0 if all(entry.succeeded for entry in cycles) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker and retry policy for upstream API calls.
+
+A failing upstream otherwise costs every cycle its full request timeouts.
+The retry policy retries transient failures with full-jitter exponential
+backoff, and the circuit breaker stops calling an upstream that keeps
+failing:
+
+- closed: calls go through; consecutive failures are counted and the
+  circuit opens when they reach the failure threshold;
+- open: calls are rejected at once with CircuitOpenError until the reset
+  timeout has passed;
+- half-open: one trial call goes through; its success closes the circuit,
+  its failure opens it again for another reset timeout.
+
+Breakers are kept per name for the life of the process (get_circuit_breaker),
+so their state carries over from one detection cycle to the next.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from logging_config import get_logger
+
+logger = get_logger("resilience")
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Called with (breaker name, new state) when a breaker changes state
+StateListener = Callable[[str, str], None]
+
+# Called with the breaker name when a breaker rejects a call
+RejectListener = Callable[[str], None]
+
+# Called with (failed attempt number, error, delay before the next attempt)
+RetryListener = Callable[[int, BaseException, float], None]
+
+
+class CircuitOpenError(RuntimeError):
+    """A call rejected because its circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker, safe to share between threads."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        on_state_change: Optional[StateListener] = None,
+        on_reject: Optional[RejectListener] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Initialize a closed circuit breaker.
+
+        Args:
+            name: Name used in logs, metrics and /status
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+            on_state_change: Listener notified of state changes
+            on_reject: Listener notified of rejected calls
+            clock: Monotonic time source
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.on_state_change = on_state_change
+        self.on_reject = on_reject
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._opened_wall_time: Optional[float] = None
+        self._trial_in_flight = False
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        """Current state; an open circuit reports half-open once its timeout has passed."""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        """Current state, moving an expired open circuit to half-open (lock held)."""
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._set_state(HALF_OPEN)
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        """Change state and notify the listener (lock held)."""
+        if state == self._state:
+            return
+        self._state = state
+        if state == OPEN:
+            self._opened_at = self._clock()
+            self._opened_wall_time = time.time()
+        elif state == CLOSED:
+            self._opened_wall_time = None
+        self._trial_in_flight = False
+        logger.warning(f"Circuit breaker {self.name} is now {state}")
+        if self.on_state_change is not None:
+            self.on_state_change(self.name, state)
+
+    def before_call(self) -> None:
+        """
+        Admit a call or reject it.
+
+        Raises:
+            CircuitOpenError: If the circuit is open, or half-open with its
+                trial call still in flight
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.rejected_calls += 1
+            retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+        if self.on_reject is not None:
+            self.on_reject(self.name)
+        raise CircuitOpenError(
+            f"Circuit breaker {self.name} is {state}, skipping the call "
+            f"(next trial in {retry_in:.0f} seconds)"
+        )
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the circuit."""
+        with self._lock:
+            self._failures = 0
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit at the threshold or after a failed trial."""
+        with self._lock:
+            self._failures += 1
+            # A failed trial call opens the circuit for another reset timeout
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._set_state(OPEN)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Describe the breaker for /status.
+
+        Returns:
+            State, consecutive failures, rejected calls and when the circuit opened
+        """
+        with self._lock:
+            state = self._current_state()
+            opened_at = self._opened_wall_time
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "rejected_calls": self.rejected_calls,
+                "opened_at": (
+                    None if opened_at is None else datetime.fromtimestamp(opened_at).isoformat()
+                ),
+            }
+
+
+class RetryPolicy:
+    """Retries with full-jitter exponential backoff.
+
+    Attempt n (from 1) that fails with a retryable error is followed by a
+    delay drawn uniformly between 0 and min(max_delay, base_delay * 2**(n-1)).
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        on_retry: Optional[RetryListener] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Initialize the retry policy.
+
+        Args:
+            attempts: Maximum number of attempts, 1 for no retries
+            base_delay: Backoff ceiling of the first retry in seconds
+            max_delay: Maximum backoff in seconds
+            on_retry: Listener notified before each retry
+            sleep: Function waiting between attempts
+        """
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_retry = on_retry
+        self._sleep = sleep
+
+    def delay(self, attempt: int) -> float:
+        """Jittered delay after a failed attempt (numbered from 1)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)  # nosec B311 - jitter, not security
+
+    def call(
+        self,
+        func: Callable[[], T],
+        breaker: Optional[CircuitBreaker] = None,
+        is_retryable: Callable[[BaseException], bool] = lambda error: True,
+    ) -> T:
+        """
+        Call a function, retrying retryable errors.
+
+        Retryable errors count as failures of the breaker; other errors mean
+        the upstream answered and count as successes. Retries stop once the
+        breaker opens.
+
+        Args:
+            func: Function making the upstream call
+            breaker: Circuit breaker admitting each attempt
+            is_retryable: Whether an error is worth retrying
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            CircuitOpenError: If the breaker rejects an attempt
+            Exception: The error of the last attempt, or a non-retryable error
+        """
+        attempt = 1
+        while True:
+            if breaker is not None:
+                breaker.before_call()
+            try:
+                result = func()
+            except Exception as e:
+                retryable = is_retryable(e)
+                if breaker is not None:
+                    if retryable:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+                # Waiting for a retry the open circuit would reject is pointless
+                if (
+                    not retryable
+                    or attempt >= self.attempts
+                    or (breaker is not None and breaker.state == OPEN)
+                ):
+                    raise
+                delay = self.delay(attempt)
+                logger.warning(f"Attempt {attempt} failed: {e}; retrying in {delay:.2f} seconds")
+                if self.on_retry is not None:
+                    self.on_retry(attempt, e, delay)
+                self._sleep(delay)
+                attempt += 1
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return result
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, **settings: Any) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker of a name, creating it on first use.
+
+    Args:
+        name: Breaker name
+        **settings: CircuitBreaker arguments used when the breaker is created
+
+    Returns:
+        The breaker
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **settings)
+        return breaker
+
+
+def circuit_breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshots of the process-wide circuit breakers by name."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
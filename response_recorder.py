@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Recorder of raw match list API responses.
+
+Keeps the responses of the last fetches as gzip-compressed JSON files in a
+bounded directory, one file per fetch, named by a sequence number and the
+fetch outcome::
+
+    00000042-ok.json.gz
+    00000043-error.json.gz
+
+Each file holds the response together with its request metadata (time, source,
+filter parameters, duration). The oldest files are removed once the directory
+holds more than a maximum number of responses or bytes, except the newest
+successful response: the API client serves it, marked stale, when the upstream
+fails, so an outage is not mistaken for every match being removed.
+
+The recorded responses can be replayed offline (``python -m replay DIR``).
+"""
+
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger("response_recorder")
+
+# Sequence number and outcome of a recorded response file
+_FILE_PATTERN = re.compile(r"^(\d{8})-(ok|error)\.json\.gz$")
+
+# Faster than the default level 9 at a similar size for JSON responses
+_COMPRESS_LEVEL = 6
+
+
+def is_error_response(response: Any) -> bool:
+    """Whether an API client response reports a failed fetch."""
+    return isinstance(response, dict) and response.get("status") == "error"
+
+
+class RecordedResponse(NamedTuple):
+    """A recorded response file."""
+
+    seq: int
+    status: str
+    path: Path
+    size: int
+
+
+class ResponseRecorder:
+    """Bounded on-disk ring buffer of API responses.
+
+    Safe to share between threads; the last successful response is also kept
+    in memory once it has been recorded or read.
+    """
+
+    directory: Path
+
+    def __init__(
+        self, directory: str, max_entries: int = 48, max_bytes: int = 100 * 1024 * 1024
+    ) -> None:
+        """
+        Initialize the recorder.
+
+        Args:
+            directory: Directory holding the recorded responses
+            max_entries: Maximum number of responses kept, 0 for no limit
+            max_bytes: Maximum total size of the kept responses, 0 for no limit
+        """
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._last_good: Optional[Dict[str, Any]] = None
+
+    def entries(self) -> List[RecordedResponse]:
+        """
+        List the recorded responses.
+
+        Returns:
+            Recorded response files, oldest first
+        """
+        if not self.directory.is_dir():
+            return []
+        entries = []
+        for path in self.directory.iterdir():
+            match = _FILE_PATTERN.match(path.name)
+            if match is None:
+                continue
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                continue
+            entries.append(RecordedResponse(int(match.group(1)), match.group(2), path, size))
+        return sorted(entries)
+
+    def record(
+        self,
+        response: Any,
+        source: str = "",
+        params: Optional[Dict[str, Any]] = None,
+        elapsed_seconds: float = 0.0,
+    ) -> RecordedResponse:
+        """
+        Record a response and drop the oldest ones beyond the limits.
+
+        Args:
+            response: Response returned by the API client
+            source: Where the response came from, e.g. the request URL
+            params: Filter parameters of the request
+            elapsed_seconds: Duration of the request
+
+        Returns:
+            The recorded response file
+        """
+        status = "error" if is_error_response(response) else "ok"
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entries = self.entries()
+            seq = entries[-1].seq + 1 if entries else 1
+            entry = {
+                "seq": seq,
+                "recorded_at": time.time(),
+                "status": status,
+                "source": source,
+                "params": params or {},
+                "elapsed_seconds": round(elapsed_seconds, 6),
+                "response": response,
+            }
+            data = gzip.compress(json.dumps(entry).encode(), compresslevel=_COMPRESS_LEVEL)
+            path = self.directory / f"{seq:08d}-{status}.json.gz"
+            temp_path = path.with_name(path.name + ".tmp")
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+
+            recorded = RecordedResponse(seq, status, path, len(data))
+            entries.append(recorded)
+            if status == "ok":
+                self._last_good = entry
+            self._apply_limits(entries)
+        return recorded
+
+    def _apply_limits(self, entries: List[RecordedResponse]) -> None:
+        """Remove the oldest responses beyond the limits, keeping the newest good one."""
+        keep = next((entry for entry in reversed(entries) if entry.status == "ok"), None)
+        count = len(entries)
+        total = sum(entry.size for entry in entries)
+        for entry in entries:
+            over_count = self.max_entries > 0 and count > self.max_entries
+            over_size = self.max_bytes > 0 and total > self.max_bytes
+            if not (over_count or over_size):
+                break
+            if entry == keep:
+                continue
+            entry.path.unlink(missing_ok=True)
+            count -= 1
+            total -= entry.size
+
+    def read(self, entry: RecordedResponse) -> Dict[str, Any]:
+        """
+        Read a recorded response.
+
+        Args:
+            entry: Recorded response file
+
+        Returns:
+            The response under "response" with its request metadata
+        """
+        with open(entry.path, "rb") as f:
+            record: Dict[str, Any] = json.loads(gzip.decompress(f.read()))
+        return record
+
+    def last_good(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the newest successful response.
+
+        Returns:
+            The response under "response" with its request metadata, or None if
+            no successful response has been recorded
+        """
+        with self._lock:
+            if self._last_good is None:
+                for entry in reversed(self.entries()):
+                    if entry.status == "ok":
+                        self._last_good = self.read(entry)
+                        break
+            return self._last_good
+
+    def iter_payloads(self, include_errors: bool = False) -> Iterator[Tuple[str, Any]]:
+        """
+        Read the recorded responses in recording order, e.g. for a replay.
+
+        Args:
+            include_errors: Also yield the responses of failed fetches
+
+        Yields:
+            Tuples of (file name, response)
+        """
+        for entry in self.entries():
+            if include_errors or entry.status == "ok":
+                yield entry.path.name, self.read(entry)["response"]
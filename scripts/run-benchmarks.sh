@@ -0,0 +1,31 @@
+#!/bin/bash
+# Performance regression gate
+# Runs the diff benchmark and compares it against the committed baseline.
+#
+# Usage:
+#   ./scripts/run-benchmarks.sh                      # compare against the baseline
+#   ./scripts/run-benchmarks.sh --update             # record a new baseline
+#   ./scripts/run-benchmarks.sh --tolerance wall_seconds=0.3
+
+set -e  # Exit on error
+
+# Colors for output
+GREEN='\033[0;32m'
+RED='\033[0;31m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# Run from the repository root so the benchmarks package is importable
+cd "$(dirname "$0")/.."
+
+echo -e "${BLUE}=== Performance Regression Gate ===${NC}"
+echo -e "${BLUE}Baseline: benchmarks/baselines/diff.json${NC}"
+echo -e "${BLUE}===================================${NC}"
+
+if python3 -m benchmarks.compare "$@"; then
+    echo -e "${GREEN}✓ Benchmarks within tolerance${NC}"
+else
+    echo -e "${RED}✗ Performance regression detected${NC}"
+    echo -e "${RED}If the slowdown is intended, record a new baseline with --update${NC}"
+    exit 1
+fi
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Deduplicated snapshot history for the match list change detector.
+
+Keeps every saved match list for audits without storing a full copy per
+cycle. Each match version is stored once in a local SQLite database, keyed by
+the SHA-256 hash of its JSON record, and each snapshot is a manifest mapping
+its match IDs to version hashes. Identical manifests are stored once too, so
+a cycle without changes only adds a snapshot row.
+
+Every version records the first snapshot it appeared in and, once it has
+left the latest snapshot, the last one, so recording a snapshot only writes
+the versions that were added or dropped. The history is trimmed from its
+oldest end, so when the retention policy removes old snapshots, the versions
+whose last snapshot was removed are exactly the ones no remaining snapshot
+refers to. Reconstructing a snapshot reads its manifest and the versions
+alive at its sequence number with one indexed query::
+
+    python -m snapshot_history list --db snapshot_history.db
+    python -m snapshot_history export --db snapshot_history.db \
+        --at 2025-07-01T12:00 --output previous_matches.json
+"""
+
+import argparse
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from logging_config import get_logger
+
+logger = get_logger("snapshot_history")
+
+# Default retention limits: a month of hourly snapshots
+DEFAULT_MAX_SNAPSHOTS = 720
+DEFAULT_MAX_AGE_DAYS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    taken_at REAL NOT NULL,
+    match_count INTEGER NOT NULL,
+    manifest_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_taken_at ON snapshots (taken_at);
+CREATE TABLE IF NOT EXISTS manifests (
+    hash TEXT PRIMARY KEY,
+    body BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS match_versions (
+    hash TEXT PRIMARY KEY,
+    record TEXT NOT NULL,
+    first_seq INTEGER NOT NULL,
+    last_seq INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_match_versions_last_seq ON match_versions (last_seq);
+"""
+
+# Compact separators keep stored records small
+_SEPARATORS = (",", ":")
+
+
+class HistoricalSnapshot(NamedTuple):
+    """A reconstructed snapshot."""
+
+    seq: int
+    taken_at: float
+    matches: List[Dict[str, Any]]
+
+
+def _decode_manifest(body: bytes) -> Tuple[List[Any], List[str]]:
+    """Match IDs and version hashes of a stored manifest."""
+    match_ids, hashes = json.loads(zlib.decompress(body))
+    return match_ids, hashes
+
+
+class SnapshotHistoryStore:
+    """History of match list snapshots with content-addressed match versions.
+
+    Snapshots get monotonically increasing sequence numbers. A match ID maps
+    to one version per snapshot; when a list repeats an ID, the snapshot keeps
+    the last match at the position of the first, like the dicts the diff
+    builds.
+    """
+
+    db_path: Path
+    max_snapshots: int
+    max_age_seconds: float
+
+    def __init__(
+        self,
+        db_path: str,
+        max_snapshots: int = DEFAULT_MAX_SNAPSHOTS,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+    ) -> None:
+        """
+        Initialize the snapshot history store.
+
+        The database file is only created when the first snapshot is recorded.
+
+        Args:
+            db_path: Path to the SQLite database file
+            max_snapshots: Maximum number of snapshots to keep (0 disables the limit)
+            max_age_days: Maximum age of kept snapshots in days (0 disables the limit)
+        """
+        self.db_path = Path(db_path)
+        self.max_snapshots = max_snapshots
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection to the history database."""
+        connection = sqlite3.connect(str(self.db_path), timeout=10)
+        try:
+            if not self._initialized:
+                with self._lock:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.executescript(_SCHEMA)
+                    self._initialized = True
+            yield connection
+        finally:
+            connection.close()
+
+    def record(self, matches: List[Dict[str, Any]], taken_at: Optional[float] = None) -> int:
+        """
+        Record a snapshot, storing only match versions not already stored.
+
+        Args:
+            matches: Match list to record
+            taken_at: Timestamp of the snapshot (defaults to now)
+
+        Returns:
+            Sequence number assigned to the snapshot
+        """
+        taken_at = time.time() if taken_at is None else taken_at
+
+        current: Dict[Any, Dict[str, Any]] = {}
+        for match in matches:
+            current[match["matchid"]] = match
+        hashes: List[str] = []
+        records: Dict[str, str] = {}
+        for match in current.values():
+            record = json.dumps(match, separators=_SEPARATORS)
+            digest = hashlib.sha256(record.encode()).hexdigest()
+            hashes.append(digest)
+            records[digest] = record
+        manifest = json.dumps([list(current), hashes], separators=_SEPARATORS).encode()
+        manifest_hash = hashlib.sha256(manifest).hexdigest()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            with connection:
+                latest = connection.execute(
+                    "SELECT s.seq, s.manifest_hash, m.body FROM snapshots s "
+                    "JOIN manifests m ON m.hash = s.manifest_hash ORDER BY s.seq DESC LIMIT 1"
+                ).fetchone()
+                cursor = connection.execute(
+                    "INSERT INTO snapshots (taken_at, match_count, manifest_hash) VALUES (?, ?, ?)",
+                    (taken_at, len(current), manifest_hash),
+                )
+                seq = int(cursor.lastrowid or 0)
+                connection.execute(
+                    "INSERT OR IGNORE INTO manifests (hash, body) VALUES (?, ?)",
+                    (manifest_hash, zlib.compress(manifest)),
+                )
+
+                previous_hashes: Set[str] = set()
+                if latest is not None:
+                    previous_seq, previous_manifest_hash, previous_body = latest
+                    if previous_manifest_hash != manifest_hash:
+                        previous_hashes = set(_decode_manifest(previous_body)[1])
+                    else:
+                        previous_hashes = set(records)
+                    # Versions of the latest snapshot have no last snapshot yet
+                    connection.executemany(
+                        "UPDATE match_versions SET last_seq = ? WHERE hash = ?",
+                        ((previous_seq, digest) for digest in previous_hashes - records.keys()),
+                    )
+                new_hashes = records.keys() - previous_hashes
+                connection.executemany(
+                    "INSERT INTO match_versions (hash, record, first_seq, last_seq) "
+                    "VALUES (?, ?, ?, NULL) ON CONFLICT (hash) DO UPDATE SET last_seq = NULL",
+                    ((digest, records[digest], seq) for digest in new_hashes),
+                )
+                self._apply_retention(connection, seq, taken_at)
+
+        logger.info(
+            f"Recorded snapshot #{seq} of {len(current)} matches with "
+            f"{len(new_hashes)} new match versions"
+        )
+        return seq
+
+    def _apply_retention(self, connection: sqlite3.Connection, latest_seq: int, now: float) -> None:
+        """Remove snapshots outside the retention limits and the data only they used."""
+        conditions = []
+        params: List[Any] = []
+        if self.max_snapshots > 0:
+            conditions.append("seq <= ?")
+            params.append(latest_seq - self.max_snapshots)
+        if self.max_age_seconds > 0:
+            conditions.append("taken_at < ?")
+            params.append(now - self.max_age_seconds)
+        if not conditions:
+            return
+
+        row = connection.execute(
+            f"SELECT MAX(seq) FROM snapshots WHERE {' OR '.join(conditions)}",  # nosec B608
+            params,
+        ).fetchone()
+        if row is None or row[0] is None:
+            return
+
+        # Snapshots are recorded in order, so everything up to the newest expired
+        # sequence number can be dropped
+        cutoff = min(int(row[0]), latest_seq - 1)
+        connection.execute("DELETE FROM snapshots WHERE seq <= ?", (cutoff,))
+        connection.execute(
+            "DELETE FROM manifests WHERE hash NOT IN (SELECT manifest_hash FROM snapshots)"
+        )
+        connection.execute("DELETE FROM match_versions WHERE last_seq <= ?", (cutoff,))
+
+    def snapshots(self) -> List[Dict[str, Any]]:
+        """
+        List the recorded snapshots.
+
+        Returns:
+            Sequence number, timestamp and match count of each snapshot, oldest first
+        """
+        if not self.db_path.exists():
+            return []
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT seq, taken_at, match_count FROM snapshots ORDER BY seq"
+            ).fetchall()
+        return [
+            {
+                "seq": seq,
+                "timestamp": datetime.fromtimestamp(taken_at).isoformat(),
+                "match_count": match_count,
+            }
+            for seq, taken_at, match_count in rows
+        ]
+
+    def snapshot_at(self, timestamp: float) -> Optional[HistoricalSnapshot]:
+        """
+        Reconstruct the snapshot that was current at a point in time.
+
+        Args:
+            timestamp: Point in time
+
+        Returns:
+            The latest snapshot taken at or before the timestamp, or None if
+            there is none in the history
+        """
+        return self._reconstruct(
+            "SELECT seq, taken_at, manifest_hash FROM snapshots WHERE taken_at <= ? "
+            "ORDER BY taken_at DESC, seq DESC LIMIT 1",
+            timestamp,
+        )
+
+    def snapshot(self, seq: int) -> Optional[HistoricalSnapshot]:
+        """
+        Reconstruct a snapshot by sequence number.
+
+        Returns:
+            The snapshot, or None if it is not in the history
+        """
+        return self._reconstruct(
+            "SELECT seq, taken_at, manifest_hash FROM snapshots WHERE seq = ?", seq
+        )
+
+    def _reconstruct(self, query: str, param: Any) -> Optional[HistoricalSnapshot]:
+        """Reconstruct the snapshot selected by a query."""
+        if not self.db_path.exists():
+            return None
+
+        with self._connect() as connection:
+            row = connection.execute(query, (param,)).fetchone()
+            if row is None:
+                return None
+            seq, taken_at, manifest_hash = row
+            body = connection.execute(
+                "SELECT body FROM manifests WHERE hash = ?", (manifest_hash,)
+            ).fetchone()[0]
+            # Every version of the snapshot spans its sequence number; versions
+            # that left and came back span it too and are skipped below
+            records = dict(
+                connection.execute(
+                    "SELECT hash, record FROM match_versions "
+                    "WHERE (last_seq IS NULL OR last_seq >= ?) AND first_seq <= ?",
+                    (seq, seq),
+                )
+            )
+
+        _, hashes = _decode_manifest(body)
+        matches = json.loads("[" + ",".join(records[digest] for digest in hashes) + "]")
+        return HistoricalSnapshot(seq=seq, taken_at=taken_at, matches=matches)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """List or export recorded snapshots from the command line."""
+    parser = argparse.ArgumentParser(description="List or export recorded match list snapshots")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    listing = subcommands.add_parser("list", help="list the recorded snapshots")
+    listing.add_argument("--db", required=True, help="snapshot history database")
+    export = subcommands.add_parser("export", help="write a snapshot as a JSON file")
+    export.add_argument("--db", required=True, help="snapshot history database")
+    selector = export.add_mutually_exclusive_group(required=True)
+    selector.add_argument("--at", help="reconstruct the snapshot current at this ISO time")
+    selector.add_argument("--seq", type=int, help="reconstruct the snapshot with this number")
+    export.add_argument("--output", required=True, help="JSON file to write")
+    args = parser.parse_args(argv)
+
+    store = SnapshotHistoryStore(args.db)
+    if args.command == "list":
+        for entry in store.snapshots():
+            print(f"{entry['seq']:>8}  {entry['timestamp']}  {entry['match_count']} matches")
+        return 0
+
+    if args.at is not None:
+        snapshot = store.snapshot_at(datetime.fromisoformat(args.at).timestamp())
+    else:
+        snapshot = store.snapshot(args.seq)
+    if snapshot is None:
+        parser.error("No matching snapshot in the history")
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(snapshot.matches, f, indent=2)
+    print(f"Exported snapshot #{snapshot.seq} of {len(snapshot.matches)} matches to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
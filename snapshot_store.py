@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+SQLite snapshot store for the match list change detector.
+
+Keeps the previous match list in a SQLite database instead of a JSON file.
+Each match is one row keyed by its match ID, with the kickoff date, venue and
+referee IDs in indexed columns, so saving a snapshot only writes the matches
+that were added, changed or removed since the stored one, and the snapshot
+can be queried without loading it, e.g. for the matches at a venue that
+changed in the last week::
+
+    python -m snapshot_store query --db previous_matches.db \
+        --venue "Kongevi 1 Konstgräs" --updated-since 2025-07-07
+
+The JSON snapshot format remains available as an export, also of the
+snapshot files of the ``mmap`` backend::
+
+    python -m snapshot_store export --db previous_matches.db --output previous_matches.json
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    saved_at REAL NOT NULL,
+    match_count INTEGER NOT NULL,
+    match_order TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS matches (
+    match_id PRIMARY KEY,
+    speldatum TEXT,
+    venue TEXT,
+    record TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_matches_speldatum ON matches (speldatum);
+CREATE TABLE IF NOT EXISTS match_referees (
+    referee_id,
+    match_id NOT NULL,
+    PRIMARY KEY (referee_id, match_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_match_referees_match_id ON match_referees (match_id);
+"""
+
+# Compact separators keep stored records small
+_SEPARATORS = (",", ":")
+
+
+class SnapshotSaveStats(NamedTuple):
+    """Rows written by a snapshot save."""
+
+    inserted: int
+    updated: int
+    deleted: int
+    unchanged: int
+    bytes_written: int
+
+
+class SqliteSnapshotStore:
+    """Previous match list stored one row per match in SQLite.
+
+    A match ID identifies one row; when a list repeats an ID, the row keeps
+    the last match at the position of the first, like the dicts the diff
+    builds. The list order is kept separately, so reordering matches does
+    not rewrite their rows.
+    """
+
+    db_path: Path
+    bytes_read: int
+
+    def __init__(self, db_path: str) -> None:
+        """
+        Initialize the snapshot store.
+
+        The database file is only created when the first snapshot is saved.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = Path(db_path)
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+        # Matches of the snapshot last loaded or saved, to find the rows to write
+        self._stored: Optional[Dict[Any, Dict[str, Any]]] = None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection to the snapshot database."""
+        connection = sqlite3.connect(str(self.db_path), timeout=10)
+        try:
+            if not self._initialized:
+                with self._lock:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.executescript(_SCHEMA)
+                    self._initialized = True
+            yield connection
+        finally:
+            connection.close()
+
+    def exists(self) -> bool:
+        """Whether a snapshot has been saved."""
+        if not self.db_path.exists():
+            return False
+        with self._connect() as connection:
+            return connection.execute("SELECT 1 FROM snapshot WHERE id = 1").fetchone() is not None
+
+    def load(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Load the stored match list.
+
+        Returns:
+            Matches in their saved order, or None if no snapshot has been saved
+        """
+        self.bytes_read = 0
+        if not self.db_path.exists():
+            return None
+
+        with self._connect() as connection:
+            row = connection.execute("SELECT match_order FROM snapshot WHERE id = 1").fetchone()
+            if row is None:
+                return None
+            records = dict(connection.execute("SELECT match_id, record FROM matches"))
+
+        order = json.loads(row[0])
+        # One decode of the whole list is faster than decoding row by row
+        matches: List[Dict[str, Any]] = json.loads(
+            "[" + ",".join(records[match_id] for match_id in order) + "]"
+        )
+        self.bytes_read = len(row[0]) + sum(len(record) for record in records.values())
+        self._stored = {match["matchid"]: match for match in matches}
+        return matches
+
+    def save(
+        self, matches: List[Dict[str, Any]], saved_at: Optional[float] = None
+    ) -> SnapshotSaveStats:
+        """
+        Replace the stored match list, writing only the rows that changed.
+
+        All writes happen in one transaction, so readers see either the old or
+        the new snapshot.
+
+        Args:
+            matches: Current match list
+            saved_at: Timestamp of the snapshot (defaults to now)
+
+        Returns:
+            Number of inserted, updated, deleted and unchanged rows and bytes written
+        """
+        saved_at = time.time() if saved_at is None else saved_at
+        stored = self._stored
+        if stored is None:
+            # Compare against the stored rows even when nothing was loaded first
+            self.load()
+            stored = self._stored or {}
+
+        current: Dict[Any, Dict[str, Any]] = {}
+        for match in matches:
+            current[match["matchid"]] = match
+
+        upserts: List[Tuple[Any, Any, Any, str, float]] = []
+        referees: List[Tuple[Any, Any]] = []
+        updated = 0
+        for match_id, match in current.items():
+            previous = stored.get(match_id)
+            if previous == match:
+                continue
+            if previous is not None:
+                updated += 1
+            upserts.append(
+                (
+                    match_id,
+                    match.get("speldatum"),
+                    match.get("anlaggningnamn"),
+                    json.dumps(match, separators=_SEPARATORS),
+                    saved_at,
+                )
+            )
+            referees.extend(
+                (referee.get("domareid"), match_id)
+                for referee in match.get("domaruppdraglista", [])
+            )
+        deleted = [(match_id,) for match_id in stored if match_id not in current]
+        order = json.dumps(list(current), separators=_SEPARATORS)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            with connection:
+                connection.executemany(
+                    "INSERT INTO matches (match_id, speldatum, venue, record, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (match_id) DO UPDATE SET "
+                    "speldatum = excluded.speldatum, venue = excluded.venue, "
+                    "record = excluded.record, updated_at = excluded.updated_at",
+                    upserts,
+                )
+                connection.executemany(
+                    "DELETE FROM match_referees WHERE match_id = ?",
+                    ((row[0],) for row in upserts),
+                )
+                connection.executemany(
+                    "INSERT OR IGNORE INTO match_referees (referee_id, match_id) VALUES (?, ?)",
+                    referees,
+                )
+                connection.executemany("DELETE FROM matches WHERE match_id = ?", deleted)
+                connection.executemany("DELETE FROM match_referees WHERE match_id = ?", deleted)
+                connection.execute(
+                    "INSERT OR REPLACE INTO snapshot (id, saved_at, match_count, match_order) "
+                    "VALUES (1, ?, ?, ?)",
+                    (saved_at, len(current), order),
+                )
+
+        self._stored = current
+        stats = SnapshotSaveStats(
+            inserted=len(upserts) - updated,
+            updated=updated,
+            deleted=len(deleted),
+            unchanged=len(current) - len(upserts),
+            bytes_written=len(order) + sum(len(row[3]) for row in upserts),
+        )
+        return stats
+
+    def query(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        referee_id: Optional[Any] = None,
+        venue: Optional[str] = None,
+        updated_since: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find stored matches without loading the snapshot.
+
+        Args:
+            start_date: Earliest kickoff date (YYYY-MM-DD)
+            end_date: Latest kickoff date (YYYY-MM-DD)
+            referee_id: ID of a referee assigned to the match
+            venue: Venue name
+            updated_since: Only matches added or changed since this timestamp
+
+        Returns:
+            Matching matches ordered by kickoff date
+        """
+        if not self.db_path.exists():
+            return []
+
+        conditions = []
+        params: List[Any] = []
+        if start_date is not None:
+            conditions.append("speldatum >= ?")
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append("speldatum <= ?")
+            params.append(end_date)
+        if referee_id is not None:
+            conditions.append(
+                "match_id IN (SELECT match_id FROM match_referees WHERE referee_id = ?)"
+            )
+            params.append(referee_id)
+        if venue is not None:
+            conditions.append("venue = ?")
+            params.append(venue)
+        if updated_since is not None:
+            conditions.append("updated_at >= ?")
+            params.append(updated_since)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT record FROM matches{where} ORDER BY speldatum, match_id",  # nosec B608
+                params,
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def export_json(self, path: str) -> int:
+        """
+        Write the stored match list as a JSON snapshot file.
+
+        Args:
+            path: Output file, in the format of PREVIOUS_MATCHES_FILE
+
+        Returns:
+            Number of exported matches
+
+        Raises:
+            FileNotFoundError: If no snapshot has been saved
+        """
+        matches = self.load()
+        if matches is None:
+            raise FileNotFoundError(f"No snapshot saved in {self.db_path}")
+        output = Path(path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(matches, f, indent=2)
+        return len(matches)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Export or query a snapshot database from the command line."""
+    parser = argparse.ArgumentParser(description="Export or query a SQLite match snapshot")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export = subcommands.add_parser("export", help="write the snapshot as a JSON file")
+    export.add_argument("--db", required=True, help="snapshot database or mapped snapshot")
+    export.add_argument("--output", required=True, help="JSON file to write")
+    query = subcommands.add_parser("query", help="print stored matches as JSON lines")
+    query.add_argument("--db", required=True, help="snapshot database")
+    query.add_argument("--from", dest="start_date", help="earliest kickoff date (YYYY-MM-DD)")
+    query.add_argument("--to", dest="end_date", help="latest kickoff date (YYYY-MM-DD)")
+    query.add_argument("--referee", type=int, help="referee ID")
+    query.add_argument("--venue", help="venue name")
+    query.add_argument("--updated-since", help="added or changed since (ISO date or time)")
+    args = parser.parse_args(argv)
+
+    store = SqliteSnapshotStore(args.db)
+    if args.command == "export":
+        from mapped_snapshot import MAGIC, MappedSnapshotStore
+
+        try:
+            with open(args.db, "rb") as f:
+                mapped = f.read(len(MAGIC)) == MAGIC
+        except OSError:
+            mapped = False
+        try:
+            if mapped:
+                count = MappedSnapshotStore(args.db).export_json(args.output)
+            else:
+                count = store.export_json(args.output)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+        print(f"Exported {count} matches to {args.output}")
+        return 0
+
+    updated_since = None
+    if args.updated_since:
+        updated_since = datetime.fromisoformat(args.updated_since).timestamp()
+    for match in store.query(
+        args.start_date, args.end_date, args.referee, args.venue, updated_since
+    ):
+        print(json.dumps(match, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
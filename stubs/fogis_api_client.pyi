@@ -16,3 +16,9 @@ class MatchListFilter:
 class FogisApiClient:
     def __init__(self, username: str, password: str) -> None: ...
     def login(self) -> bool: ...
+
+class FogisLoginError(Exception): ...
+class FogisInvalidCredentialsError(FogisLoginError): ...
+class FogisAuthServiceUnavailableError(FogisLoginError): ...
+class FogisAPIRequestError(Exception): ...
+class FogisDataError(Exception): ...
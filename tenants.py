@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Multi-tenant change detection for the persistent service.
+
+Lets one service process watch several FOGIS accounts. Each tenant has its own
+credentials, snapshot namespace (a directory holding its previous matches,
+changes file and change history), match window and cron schedule. All tenants
+share the service's HTTP server, one scheduler, a bounded worker pool, one HTTP
+connection pool for the centralized API client service and one Prometheus
+registry with tenant-labelled series.
+
+Tenants are listed in a JSON file (TENANTS_FILE)::
+
+    [
+        {
+            "name": "north",
+            "username": "north@example.com",
+            "password_env": "FOGIS_PASSWORD_NORTH",
+            "cron_schedule": "*/30 * * * *",
+            "days_ahead": 90
+        }
+    ]
+
+Settings left out fall back to the service configuration.
+"""
+
+import functools
+import heapq
+import json
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import requests
+from croniter import croniter  # type: ignore[import]
+
+from change_history import ChangeHistoryStore
+from logging_config import get_logger, log_context, new_cycle_id
+from readiness import ReadinessTracker, ReadinessVerdict
+
+logger = get_logger("tenants")
+
+# Tenant names are used as directory names and metric labels
+TENANT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+# Keys accepted for a tenant in the tenants file
+TENANT_KEYS = frozenset(
+    {
+        "name",
+        "username",
+        "password",
+        "password_env",
+        "cron_schedule",
+        "days_back",
+        "days_ahead",
+        "data_dir",
+        "docker_compose_file",
+        "api_client_url",
+        "snapshot_history",
+        "response_recorder",
+    }
+)
+
+DEFAULT_DATA_DIR = "data/tenants"
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Callback invoked with (tenant name, changes, change_history_seq) for each change set
+TenantChangeListener = Callable[[str, Dict[str, Any], Optional[int]], None]
+
+
+class TenantConfig(NamedTuple):
+    """Settings of one tenant."""
+
+    name: str
+    username: str
+    password: str
+    cron_schedule: str
+    days_back: int
+    days_ahead: int
+    data_dir: str
+    docker_compose_file: str
+    api_client_url: Optional[str] = None
+    snapshot_history: bool = False
+    response_recorder: bool = False
+
+    def __repr__(self) -> str:
+        """Represent the tenant without its password."""
+        return f"TenantConfig(name={self.name!r}, username={self.username!r})"
+
+    @property
+    def previous_matches_file(self) -> str:
+        """Snapshot file of the tenant's previous match list."""
+        return os.path.join(self.data_dir, "previous_matches.json")
+
+    @property
+    def changes_file(self) -> str:
+        """Changes file handed to the tenant's orchestrator."""
+        return os.path.join(self.data_dir, "match_changes.json")
+
+    @property
+    def change_history_file(self) -> str:
+        """Change history database of the tenant."""
+        return os.path.join(self.data_dir, "change_history.db")
+
+    @property
+    def snapshot_history_file(self) -> str:
+        """Snapshot history database of the tenant, or empty if it keeps none."""
+        return os.path.join(self.data_dir, "snapshot_history.db") if self.snapshot_history else ""
+
+    @property
+    def response_recorder_dir(self) -> str:
+        """Directory of the tenant's recorded API responses, or empty if it records none."""
+        return os.path.join(self.data_dir, "responses") if self.response_recorder else ""
+
+
+def _parse_tenant(entry: Any, index: int, config: Any, data_root: str) -> TenantConfig:
+    """Validate one tenants file entry and fill in defaults from the service config."""
+    if not isinstance(entry, dict):
+        raise ValueError(f"Tenant #{index + 1} must be a JSON object")
+
+    name = str(entry.get("name", ""))
+    if not TENANT_NAME_PATTERN.match(name):
+        raise ValueError(
+            f"Tenant #{index + 1} has an invalid name {name!r}: use up to 64 letters, "
+            "digits, '.', '_' or '-'"
+        )
+    unknown = sorted(set(entry) - TENANT_KEYS)
+    if unknown:
+        raise ValueError(f"Tenant {name!r} has unknown settings: {', '.join(unknown)}")
+
+    username = str(entry.get("username", ""))
+    if "password_env" in entry:
+        password = os.environ.get(str(entry["password_env"]), "")
+    else:
+        password = str(entry.get("password", ""))
+    if not username or not password:
+        raise ValueError(f"Tenant {name!r} needs a username and a password or password_env")
+
+    cron_schedule = str(entry.get("cron_schedule", config.get("CRON_SCHEDULE", "0 * * * *")))
+    if not croniter.is_valid(cron_schedule):
+        raise ValueError(f"Tenant {name!r} has an invalid cron schedule {cron_schedule!r}")
+
+    return TenantConfig(
+        name=name,
+        username=username,
+        password=password,
+        cron_schedule=cron_schedule,
+        days_back=int(entry.get("days_back", config.get("DAYS_BACK", 7))),
+        days_ahead=int(entry.get("days_ahead", config.get("DAYS_AHEAD", 365))),
+        data_dir=str(entry.get("data_dir") or os.path.join(data_root, name)),
+        docker_compose_file=str(
+            entry.get("docker_compose_file", config.get("DOCKER_COMPOSE_FILE", ""))
+        ),
+        api_client_url=entry.get("api_client_url", config.get("FOGIS_API_CLIENT_URL")),
+        snapshot_history=bool(
+            entry.get("snapshot_history", bool(config.get("SNAPSHOT_HISTORY_FILE")))
+        ),
+        response_recorder=bool(
+            entry.get("response_recorder", bool(config.get("RESPONSE_RECORDER_DIR")))
+        ),
+    )
+
+
+def load_tenants(path: str, config: Any) -> List[TenantConfig]:
+    """
+    Load tenant settings from a JSON file.
+
+    Args:
+        path: Tenants file
+        config: Service configuration supplying defaults for omitted settings
+
+    Returns:
+        Tenant settings in file order
+
+    Raises:
+        ValueError: If the file cannot be read or a tenant is invalid
+    """
+    try:
+        with open(path, "r") as f:
+            entries = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Cannot read tenants file {path}: {e}")
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Tenants file {path} must contain a non-empty JSON list")
+
+    data_root = str(config.get("TENANT_DATA_DIR", DEFAULT_DATA_DIR))
+    tenants: List[TenantConfig] = []
+    names = set()
+    for index, entry in enumerate(entries):
+        tenant = _parse_tenant(entry, index, config, data_root)
+        if tenant.name in names:
+            raise ValueError(f"Tenant {tenant.name!r} is listed more than once")
+        names.add(tenant.name)
+        tenants.append(tenant)
+    return tenants
+
+
+def cron_interval(cron_schedule: str, now: Optional[datetime] = None) -> float:
+    """Seconds between the next two fire times of a cron schedule."""
+    cron = croniter(cron_schedule, now or datetime.now())
+    first = cron.get_next(datetime)
+    return float((cron.get_next(datetime) - first).total_seconds())
+
+
+class Tenant:
+    """Runtime state of one tenant.
+
+    The API client and rate limiter are kept across cycles, so a tenant reuses
+    its connections and its request budget like a single-account service does.
+    """
+
+    def __init__(
+        self,
+        config: TenantConfig,
+        readiness: ReadinessTracker,
+        metrics_recorder: Any = None,
+        session: Optional[requests.Session] = None,
+        rate_limit: int = 10,
+    ) -> None:
+        """
+        Initialize the tenant.
+
+        Args:
+            config: Tenant settings
+            readiness: Readiness tracker of the tenant
+            metrics_recorder: Metrics view recording the tenant's series
+            session: HTTP session shared with the other tenants
+            rate_limit: Maximum API requests per minute for the tenant
+        """
+        self.config = config
+        self.name = config.name
+        self.readiness = readiness
+        self.metrics_recorder = metrics_recorder
+        self.session = session
+        self.rate_limit = rate_limit
+
+        self.running = False
+        self.next_execution: Optional[datetime] = None
+        self.last_execution: Optional[datetime] = None
+        self.last_result: Optional[bool] = None
+        self.execution_count = 0
+
+        self._api_client: Any = None
+        self._rate_limiter: Any = None
+        self._change_history: Optional[ChangeHistoryStore] = None
+        readiness.set_expected_interval(cron_interval(config.cron_schedule))
+
+    @property
+    def change_history(self) -> ChangeHistoryStore:
+        """Change history store of the tenant, with the retention the detector writes with."""
+        if self._change_history is None:
+            # Imported on first use, like the single-account service does
+            from match_list_change_detector import (
+                CHANGE_HISTORY_MAX_AGE_DAYS,
+                CHANGE_HISTORY_MAX_SETS,
+            )
+
+            self._change_history = ChangeHistoryStore(
+                self.config.change_history_file,
+                max_change_sets=CHANGE_HISTORY_MAX_SETS,
+                max_age_days=CHANGE_HISTORY_MAX_AGE_DAYS,
+            )
+        return self._change_history
+
+    def schedule_next(self, after: datetime) -> datetime:
+        """Set and return the next scheduled execution after a point in time."""
+        self.next_execution = croniter(self.config.cron_schedule, after).get_next(datetime)
+        return self.next_execution
+
+    def run_cycle(self, on_changes: Optional[TenantChangeListener] = None) -> bool:
+        """
+        Run one detection cycle for the tenant on the calling thread.
+
+        Args:
+            on_changes: Listener notified with each detected change set
+
+        Returns:
+            True if the cycle succeeded
+        """
+        # Imported on first use, like the single-account service does
+        from match_list_change_detector import (
+            MatchListChangeDetector,
+            RateLimiter,
+            create_api_client,
+        )
+
+        config = self.config
+        self.last_execution = datetime.now()
+        self.execution_count += 1
+        stale = False
+
+        with log_context(cycle_id=new_cycle_id(), tenant=self.name):
+            try:
+                if self._api_client is None:
+                    self._api_client = create_api_client(
+                        config.username,
+                        config.password,
+                        config.api_client_url,
+                        session=self.session,
+                        recorder_dir=config.response_recorder_dir,
+                        breaker_name=f"api:{self.name}",
+                    )
+                    self._rate_limiter = RateLimiter(max_requests=self.rate_limit)
+
+                detector = MatchListChangeDetector(
+                    config.username,
+                    config.password,
+                    api_client=self._api_client,
+                    rate_limiter=self._rate_limiter,
+                    previous_matches_file=config.previous_matches_file,
+                    changes_file=config.changes_file,
+                    change_history_file=config.change_history_file,
+                    snapshot_history_file=config.snapshot_history_file,
+                    docker_compose_file=config.docker_compose_file,
+                    days_back=config.days_back,
+                    days_ahead=config.days_ahead,
+                    metrics_recorder=self.metrics_recorder,
+                )
+                listener = None if on_changes is None else functools.partial(on_changes, self.name)
+                result = bool(detector.run(on_changes=listener))
+                stale = detector.fetch_was_stale
+            except Exception as e:
+                logger.exception(f"Change detection failed for tenant {self.name}: {e}")
+                result = False
+
+        self.last_result = result
+        # A cycle on a stale recorded response is not a fresh result
+        self.readiness.record_cycle(result and not stale)
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        """Get the tenant's schedule, last result and readiness."""
+        verdict = self.readiness.check()
+        return {
+            "name": self.name,
+            "username": self.config.username,
+            "cron_schedule": self.config.cron_schedule,
+            "running": self.running,
+            "last_execution": self.last_execution.isoformat() if self.last_execution else None,
+            "next_execution": self.next_execution.isoformat() if self.next_execution else None,
+            "last_result": self.last_result,
+            "execution_count": self.execution_count,
+            "ready": verdict.ready,
+            "reasons": list(verdict.reasons),
+        }
+
+
+class TenantPool:
+    """Schedule and run the detection cycles of all tenants.
+
+    Next execution times are kept in a heap, so finding the due tenants costs
+    O(log n) per started cycle rather than a scan of every tenant. Cycles run on
+    a bounded thread pool; a tenant never runs two cycles at once.
+    """
+
+    def __init__(
+        self,
+        configs: List[TenantConfig],
+        readiness_factory: Callable[[], ReadinessTracker] = ReadinessTracker,
+        metrics_source: Any = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        rate_limit: int = 10,
+        on_changes: Optional[TenantChangeListener] = None,
+    ) -> None:
+        """
+        Initialize the tenant pool.
+
+        Args:
+            configs: Tenant settings
+            readiness_factory: Creates the readiness tracker of each tenant
+            metrics_source: Metrics offering for_tenant(name), or None to record
+                into the detector's default metrics
+            max_concurrency: Maximum number of cycles running at the same time
+            rate_limit: Maximum API requests per minute for each tenant
+            on_changes: Listener notified with each detected change set
+        """
+        self.on_changes = on_changes
+        self.max_concurrency = max(1, max_concurrency)
+
+        # One connection pool for all requests to the centralized API client service
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.tenants: Dict[str, Tenant] = {
+            config.name: Tenant(
+                config,
+                readiness=readiness_factory(),
+                metrics_recorder=(
+                    metrics_source.for_tenant(config.name) if metrics_source is not None else None
+                ),
+                session=self.session,
+                rate_limit=rate_limit,
+            )
+            for config in configs
+        }
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="tenant"
+        )
+        self._lock = threading.Lock()
+        self._schedule: List[Tuple[datetime, str]] = []
+
+        now = datetime.now()
+        for tenant in self.tenants.values():
+            self._schedule.append((tenant.schedule_next(now), tenant.name))
+        heapq.heapify(self._schedule)
+
+    @property
+    def next_execution(self) -> Optional[datetime]:
+        """Earliest scheduled execution of any tenant."""
+        with self._lock:
+            return self._schedule[0][0] if self._schedule else None
+
+    def start_due(self, now: Optional[datetime] = None) -> List[str]:
+        """
+        Start the cycles of all tenants whose scheduled time has come.
+
+        A tenant that is still busy (e.g. with a manual trigger) skips the slot.
+
+        Args:
+            now: Current time
+
+        Returns:
+            Names of the tenants whose cycles were started
+        """
+        now = now or datetime.now()
+        started: List[Tenant] = []
+        with self._lock:
+            while self._schedule and self._schedule[0][0] <= now:
+                _, name = heapq.heappop(self._schedule)
+                tenant = self.tenants[name]
+                if tenant.running:
+                    logger.warning(f"Tenant {name} is still running, skipping its scheduled cycle")
+                    heapq.heappush(self._schedule, (tenant.schedule_next(now), name))
+                    continue
+                tenant.running = True
+                started.append(tenant)
+
+        for tenant in started:
+            self._executor.submit(self._run, tenant, now)
+        return [tenant.name for tenant in started]
+
+    def trigger(self, name: str) -> Optional["Future[bool]"]:
+        """
+        Start a cycle for one tenant now.
+
+        The cycle counts towards the tenant's trigger backlog until it finishes.
+
+        Args:
+            name: Tenant name
+
+        Returns:
+            Future of the cycle result, or None if the tenant is already running
+
+        Raises:
+            KeyError: If there is no tenant with that name
+        """
+        tenant = self.tenants[name]
+        with self._lock:
+            if tenant.running:
+                return None
+            tenant.running = True
+        tenant.readiness.trigger_queued()
+        return self._executor.submit(self._run, tenant, triggered=True)
+
+    def run_all(self) -> bool:
+        """
+        Run a cycle for every tenant that is not already running and wait for them.
+
+        Returns:
+            True if every cycle that ran succeeded
+        """
+        futures = [self.trigger(name) for name in self.tenants]
+        results = [future.result() for future in futures if future is not None]
+        return all(results)
+
+    def readiness(self) -> ReadinessVerdict:
+        """Combine the readiness of all tenants; any tenant not ready makes the pool not ready."""
+        reasons: List[str] = []
+        for tenant in self.tenants.values():
+            verdict = tenant.readiness.check()
+            reasons.extend(f"{tenant.name}: {reason}" for reason in verdict.reasons)
+        body = {"ready": not reasons, "reasons": reasons, "tenants": len(self.tenants)}
+        encoded = json.dumps(body, separators=(",", ":")).encode()
+        return ReadinessVerdict(ready=not reasons, reasons=tuple(reasons), body=encoded)
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Get the status of every tenant."""
+        return [tenant.status() for tenant in self.tenants.values()]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop starting cycles, drop queued ones and close the shared connection pool."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self.session.close()
+
+    def _run(
+        self, tenant: Tenant, scheduled_at: Optional[datetime] = None, triggered: bool = False
+    ) -> bool:
+        """
+        Run a tenant's cycle on a worker thread and mark the tenant idle afterwards.
+
+        Args:
+            tenant: Tenant to run
+            scheduled_at: Scheduled time of the cycle; its next cycle is scheduled after it
+            triggered: Whether the cycle was triggered manually and is in the trigger backlog
+        """
+        try:
+            return tenant.run_cycle(self.on_changes)
+        finally:
+            if triggered:
+                tenant.readiness.trigger_done()
+            with self._lock:
+                tenant.running = False
+                if scheduled_at is not None:
+                    heapq.heappush(
+                        self._schedule, (tenant.schedule_next(scheduled_at), tenant.name)
+                    )
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Tests for the benchmark helpers."""
+
+import gzip
+import http.client
+import json
+import os
+import shutil
+import subprocess  # nosec B404
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.api_stub import StubApiServer, StubApiSettings
+from benchmarks.compare import (
+    IMPROVED,
+    MISSING,
+    NEW,
+    OK,
+    REGRESSION,
+    compare_results,
+    format_table,
+    has_regressions,
+    merge_best,
+    parse_tolerances,
+)
+from benchmarks.cycle import fake_orchestrator
+from benchmarks.diff import measure
+from benchmarks.generator import (
+    MUTATIONS,
+    ChangeRates,
+    generate_match_list,
+    mutate_match,
+    next_version,
+)
+from benchmarks.startup import parse_importtime
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 | _io
+import time:        40 |         40 |     json.scanner
+import time:       300 |        340 |   json
+import time:       900 |       1500 | config
+"""
+
+
+class TestStartupBenchmark(unittest.TestCase):
+    """Test cases for the startup benchmark."""
+
+    def test_parse_importtime(self):
+        """Test parsing nesting depth and cumulative time from -X importtime output."""
+        self.assertEqual(
+            parse_importtime(IMPORTTIME_OUTPUT),
+            [(0, "_io", 120), (2, "json.scanner", 40), (1, "json", 340), (0, "config", 1500)],
+        )
+
+
+class TestMatchListGenerator(unittest.TestCase):
+    """Test cases for the synthetic match list generator."""
+
+    def test_generation_is_deterministic(self):
+        """Test that the same seed produces the same list."""
+        self.assertEqual(generate_match_list(50, seed=3), generate_match_list(50, seed=3))
+        self.assertNotEqual(generate_match_list(50, seed=3), generate_match_list(50, seed=4))
+
+    def test_matches_have_tracked_fields(self):
+        """Test that generated matches carry the fields the detector compares."""
+        matches = generate_match_list(20)
+
+        self.assertEqual(len({match["matchid"] for match in matches}), 20)
+        for field in ("speldatum", "avsparkstid", "lag1lagid", "lag2lagid", "anlaggningnamn"):
+            self.assertIn(field, matches[0])
+        self.assertIn("domareid", matches[0]["domaruppdraglista"][0])
+
+    def test_next_version_counts(self):
+        """Test that the next version adds, removes and changes the requested shares."""
+        previous = generate_match_list(1000)
+
+        current, expected = next_version(previous, ChangeRates(new=0.05, removed=0.02, changed=0.1))
+
+        self.assertEqual(tuple(expected), (50, 20, 100))
+        self.assertEqual(len(current), 1000 - 20 + 50)
+        previous_ids = {match["matchid"] for match in previous}
+        current_ids = {match["matchid"] for match in current}
+        self.assertEqual(len(current_ids - previous_ids), 50)
+        self.assertEqual(len(previous_ids - current_ids), 20)
+
+    def test_every_mutation_changes_the_match(self):
+        """Test that each mutation produces a different match without touching the input."""
+        import random
+
+        match = generate_match_list(1)[0]
+        original = dict(match)
+        for mutation in MUTATIONS:
+            self.assertNotEqual(mutate_match(random.Random(0), match, mutation), match)
+        self.assertEqual(match, original)
+
+
+class TestDiffBenchmark(unittest.TestCase):
+    """Test cases for the diff benchmark helpers."""
+
+    def test_measure(self):
+        """Test that measure reports wall time, peak memory and allocated blocks."""
+        kept = []
+
+        result = measure(lambda: kept.append([0] * 10000), repeat=2)
+
+        self.assertEqual(len(kept), 3)
+        self.assertGreater(result["wall_seconds"], 0)
+        self.assertGreaterEqual(result["peak_bytes"], 10000 * 8)
+        self.assertIn("allocated_blocks", result)
+
+
+class TestApiStub(unittest.TestCase):
+    """Test cases for the stub of the centralized API client service."""
+
+    def get(self, stub, path, headers=None):
+        """Fetch a path from the stub."""
+        connection = http.client.HTTPConnection("127.0.0.1", stub.port, timeout=5)
+        try:
+            connection.request("GET", path, headers=headers or {})
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+
+    def test_matches_alternate_between_versions(self):
+        """Test that successive fetches return the two generated versions."""
+        settings = StubApiSettings(matches=50, rates=ChangeRates(new=0.1, removed=0, changed=0))
+        with StubApiServer(settings) as stub:
+            _, health = self.get(stub, "/health")
+            lengths = [len(json.loads(self.get(stub, "/matches")[1])) for _ in range(3)]
+
+        self.assertEqual(json.loads(health), {"status": "healthy"})
+        self.assertEqual(lengths, [50, 55, 50])
+        self.assertEqual(stub.stats["requests"], 3)
+
+    def test_compression_and_errors(self):
+        """Test gzip responses and injected failures."""
+        with StubApiServer(StubApiSettings(matches=10, compress=True)) as stub:
+            response, body = self.get(stub, "/matches", {"Accept-Encoding": "gzip"})
+            self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+            self.assertEqual(len(json.loads(gzip.decompress(body))), 10)
+
+        with StubApiServer(StubApiSettings(matches=10, error_rate=1.0)) as stub:
+            response, _ = self.get(stub, "/matches")
+            self.assertEqual(response.status, 503)
+            self.assertEqual(stub.stats["errors"], 1)
+
+    def test_fake_orchestrator_on_path(self):
+        """Test that the fake docker-compose is found on the PATH and runs."""
+        original_path = os.environ["PATH"]
+        with tempfile.TemporaryDirectory() as work_dir:
+            with fake_orchestrator(Path(work_dir)) as compose_file:
+                executable = shutil.which("docker-compose")
+                self.assertEqual(Path(executable).parent, Path(work_dir) / "bin")
+                result = subprocess.run(  # nosec B603
+                    [executable, "-f", str(compose_file), "up", "-d"],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                self.assertIn("up -d", result.stdout)
+        self.assertEqual(os.environ["PATH"], original_path)
+
+
+def diff_results(sizes):
+    """Build diff benchmark results from {size: {operation: {metric: value}}}."""
+    return {
+        "results": [
+            {"size": size, "operations": operations, "max_rss_kb": 100_000}
+            for size, operations in sizes.items()
+        ]
+    }
+
+
+class TestRegressionGate(unittest.TestCase):
+    """Test cases for the benchmark regression gate."""
+
+    def setUp(self):
+        """Set up a baseline."""
+        self.baseline = diff_results(
+            {
+                1000: {
+                    "detect_changes": {"wall_seconds": 0.1, "peak_bytes": 1_000_000},
+                    "save_current_matches": {"wall_seconds": 0.001},
+                }
+            }
+        )
+
+    def statuses(self, comparisons):
+        """Map metric names to statuses."""
+        return {comparison.name: comparison.status for comparison in comparisons}
+
+    def test_within_tolerance(self):
+        """Test that changes within the tolerance pass."""
+        comparisons = compare_results(self.baseline, json.loads(json.dumps(self.baseline)))
+
+        self.assertFalse(has_regressions(comparisons))
+        self.assertEqual(set(self.statuses(comparisons).values()), {OK})
+
+    def test_regressions_and_improvements(self):
+        """Test that increases beyond the tolerance and absolute floor fail."""
+        current = diff_results(
+            {
+                1000: {
+                    "detect_changes": {"wall_seconds": 0.2, "peak_bytes": 500_000},
+                    # Tripled, but by less than the absolute floor
+                    "save_current_matches": {"wall_seconds": 0.003},
+                },
+                10000: {"detect_changes": {"wall_seconds": 1.0}},
+            }
+        )
+
+        comparisons = compare_results(self.baseline, current)
+
+        self.assertTrue(has_regressions(comparisons))
+        statuses = self.statuses(comparisons)
+        self.assertEqual(statuses["1000/detect_changes/wall_seconds"], REGRESSION)
+        self.assertEqual(statuses["1000/detect_changes/peak_bytes"], IMPROVED)
+        self.assertEqual(statuses["1000/save_current_matches/wall_seconds"], OK)
+        self.assertEqual(statuses["10000/detect_changes/wall_seconds"], NEW)
+        self.assertIn("REGRESSION", format_table(comparisons))
+
+    def test_tolerance_overrides(self):
+        """Test tolerances from the baseline file and the command line."""
+        current = json.loads(json.dumps(self.baseline))
+        current["results"][0]["operations"]["detect_changes"]["wall_seconds"] = 0.2
+
+        self.baseline["tolerances"] = {"wall_seconds": 1.5}
+        self.assertFalse(has_regressions(compare_results(self.baseline, current)))
+        overrides = parse_tolerances(["wall_seconds=0.5"])
+        self.assertTrue(has_regressions(compare_results(self.baseline, current, overrides)))
+        with self.assertRaises(ValueError):
+            parse_tolerances(["latency=0.5"])
+
+    def test_missing_metric_fails(self):
+        """Test that a metric missing from the current results fails the gate."""
+        current = diff_results({1000: {"detect_changes": {"wall_seconds": 0.1}}})
+
+        comparisons = compare_results(self.baseline, current)
+
+        self.assertEqual(self.statuses(comparisons)["1000/detect_changes/peak_bytes"], MISSING)
+        self.assertTrue(has_regressions(comparisons))
+
+    def test_merge_best(self):
+        """Test that merging two runs keeps the lower value of each metric."""
+        second = diff_results(
+            {
+                1000: {
+                    "detect_changes": {"wall_seconds": 0.05, "peak_bytes": 2_000_000},
+                    "save_current_matches": {"wall_seconds": 0.001},
+                }
+            }
+        )
+
+        second["results"][0]["max_rss_kb"] = 90_000
+
+        merged = merge_best(self.baseline, second)
+
+        operations = merged["results"][0]["operations"]["detect_changes"]
+        self.assertEqual(operations, {"wall_seconds": 0.05, "peak_bytes": 1_000_000})
+        self.assertEqual(merged["results"][0]["max_rss_kb"], 90_000)
+        self.assertEqual(self.baseline["results"][0]["max_rss_kb"], 100_000)
+        self.assertEqual(
+            self.baseline["results"][0]["operations"]["detect_changes"]["wall_seconds"], 0.1
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Tests for the NDJSON change feed writer."""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from change_feed import NdjsonChangeWriter, write_ndjson_changes
+from tests.test_utils import create_sample_match_data
+
+
+def read_lines(path: Path):
+    """Read an NDJSON file into a list of dictionaries."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestNdjsonChangeWriter(unittest.TestCase):
+    """Test cases for NdjsonChangeWriter."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = Path(self.test_dir) / "match_changes.json"
+        self.sample_match = create_sample_match_data()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        import shutil
+
+        shutil.rmtree(self.test_dir)
+
+    def test_records_followed_by_summary(self):
+        """Test that each record is one line and the summary comes last."""
+        changed_record = {"match_id": 1, "match_nr": "1", "changes": {"basic": True}}
+        with NdjsonChangeWriter(self.path) as writer:
+            writer.write("new", self.sample_match)
+            writer.write("changed", changed_record)
+            writer.commit({"new_matches": 1, "removed_matches": 0, "changed_matches": 1})
+
+        lines = read_lines(self.path)
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0]["type"], "new")
+        self.assertEqual(lines[0]["match_id"], self.sample_match["matchid"])
+        self.assertEqual(lines[0]["match"], self.sample_match)
+        self.assertEqual(lines[1]["type"], "changed")
+        self.assertEqual(lines[1]["match_id"], 1)
+        self.assertEqual(lines[2]["type"], "summary")
+        self.assertEqual(lines[2]["new_matches"], 1)
+        self.assertEqual(lines[2]["changed_matches"], 1)
+        self.assertIn("generated_at", lines[2])
+
+    def test_uncommitted_feed_is_discarded(self):
+        """Test that an aborted feed never replaces the previous file."""
+        self.path.write_text("previous")
+
+        with NdjsonChangeWriter(self.path) as writer:
+            writer.write("removed", self.sample_match)
+
+        self.assertEqual(self.path.read_text(), "previous")
+        self.assertFalse(os.path.exists(f"{self.path}.tmp"))
+
+    def test_write_ndjson_changes_from_summary(self):
+        """Test converting an existing changes summary to NDJSON."""
+        changes = {
+            "new_matches": 1,
+            "removed_matches": 1,
+            "changed_matches": 0,
+            "new_match_details": [self.sample_match],
+            "removed_match_details": [dict(self.sample_match, matchid=2)],
+            "changed_match_details": [],
+        }
+
+        write_ndjson_changes(changes, self.path)
+
+        lines = read_lines(self.path)
+        self.assertEqual([line["type"] for line in lines], ["new", "removed", "summary"])
+        self.assertEqual(lines[1]["match_id"], 2)
+
+    def test_initial_fetch_summary_keeps_message(self):
+        """Test that the initial fetch message is carried in the summary line."""
+        write_ndjson_changes({"new_matches": 3, "message": "Initial match list fetch"}, self.path)
+
+        lines = read_lines(self.path)
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(lines[0]["message"], "Initial match list fetch")
+        self.assertEqual(lines[0]["new_matches"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
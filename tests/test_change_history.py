@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Tests for the change history store."""
+
+import os
+import tempfile
+import time
+import unittest
+
+from change_history import ChangeHistoryStore
+from tests.test_utils import create_sample_match_data
+
+
+def make_changes(match, new=True):
+    """Create a changes summary containing a single new or removed match."""
+    return {
+        "new_matches": 1 if new else 0,
+        "removed_matches": 0 if new else 1,
+        "changed_matches": 0,
+        "new_match_details": [match] if new else [],
+        "removed_match_details": [] if new else [match],
+        "changed_match_details": [],
+    }
+
+
+class TestChangeHistoryStore(unittest.TestCase):
+    """Test cases for ChangeHistoryStore."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "change_history.db")
+        self.sample_match = create_sample_match_data()
+
+    def tearDown(self):
+        """Clean up after each test."""
+        import shutil
+
+        shutil.rmtree(self.test_dir)
+
+    def test_empty_history_does_not_create_database(self):
+        """Test that reading an empty history leaves the disk untouched."""
+        store = ChangeHistoryStore(self.db_path)
+
+        result = store.changes_since(0)
+
+        self.assertEqual(result["changes"], [])
+        self.assertEqual(result["next_cursor"], 0)
+        self.assertFalse(os.path.exists(self.db_path))
+
+    def test_append_and_read_since_cursor(self):
+        """Test that consumers only receive change sets after their cursor."""
+        store = ChangeHistoryStore(self.db_path)
+        first = store.append(make_changes(self.sample_match))
+        second = store.append(make_changes(self.sample_match, new=False))
+
+        self.assertEqual(second, first + 1)
+
+        result = store.changes_since(first)
+        self.assertEqual(len(result["changes"]), 1)
+        change_set = result["changes"][0]
+        self.assertEqual(change_set["seq"], second)
+        self.assertEqual(change_set["removed_matches"], 1)
+        self.assertEqual(change_set["records"][0]["type"], "removed")
+        self.assertEqual(change_set["records"][0]["match_id"], str(self.sample_match["matchid"]))
+        self.assertEqual(change_set["records"][0]["record"], self.sample_match)
+        self.assertEqual(result["next_cursor"], second)
+        self.assertEqual(result["latest_seq"], second)
+
+        # Caught up consumers get an empty page and keep their cursor
+        result = store.changes_since(second)
+        self.assertEqual(result["changes"], [])
+        self.assertEqual(result["next_cursor"], second)
+
+    def test_limit_pages_through_history(self):
+        """Test paging through the history with a limit."""
+        store = ChangeHistoryStore(self.db_path)
+        for _ in range(5):
+            store.append(make_changes(self.sample_match))
+
+        page = store.changes_since(0, limit=2)
+        self.assertEqual([c["seq"] for c in page["changes"]], [1, 2])
+        page = store.changes_since(page["next_cursor"], limit=2)
+        self.assertEqual([c["seq"] for c in page["changes"]], [3, 4])
+
+    def test_retention_by_count(self):
+        """Test that old change sets are dropped and sequence numbers are not reused."""
+        store = ChangeHistoryStore(self.db_path, max_change_sets=2)
+        for _ in range(4):
+            store.append(make_changes(self.sample_match))
+
+        result = store.changes_since(0)
+        self.assertEqual([c["seq"] for c in result["changes"]], [3, 4])
+        self.assertEqual(result["oldest_seq"], 3)
+        self.assertTrue(result["reset_required"])
+
+        # A consumer that saw change set 2 has not missed anything
+        self.assertFalse(store.changes_since(2)["reset_required"])
+
+        self.assertEqual(store.append(make_changes(self.sample_match)), 5)
+
+    def test_retention_by_age_keeps_latest(self):
+        """Test that expired change sets are dropped but the latest one is kept."""
+        store = ChangeHistoryStore(self.db_path, max_change_sets=0, max_age_days=1)
+        old = time.time() - 3 * 24 * 60 * 60
+        store.append(make_changes(self.sample_match), created_at=old)
+        store.append(make_changes(self.sample_match), created_at=old + 1)
+        latest = store.append(make_changes(self.sample_match))
+
+        result = store.changes_since(0)
+        self.assertEqual([c["seq"] for c in result["changes"]], [latest])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Tests and load test for the live change stream broadcaster."""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+
+from change_feed import ChangeBroadcaster, encode_sse_event
+
+
+def run_async(coroutine):
+    """Run a coroutine on a private event loop, leaving the global loop untouched."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def decode_frame(frame):
+    """Decode the JSON payload of a Server-Sent Events frame."""
+    data_line = [line for line in frame.splitlines() if line.startswith("data: ")][0]
+    return json.loads(data_line[len("data: ") :])
+
+
+class TestChangeBroadcaster(unittest.TestCase):
+    """Test cases for ChangeBroadcaster."""
+
+    def test_encode_sse_event(self):
+        """Test Server-Sent Events frame encoding."""
+        frame = encode_sse_event("changes", {"new_matches": 1}, event_id=7)
+
+        self.assertEqual(frame, 'id: 7\nevent: changes\ndata: {"new_matches":1}\n\n')
+
+    def test_publish_reaches_subscriber(self):
+        """Test that a published change set is delivered to a subscriber."""
+
+        async def scenario():
+            broadcaster = ChangeBroadcaster()
+            subscription = broadcaster.subscribe()
+            delivered = broadcaster.publish({"new_matches": 2}, seq=3)
+            frame = await subscription.next_event(timeout=1)
+            return delivered, frame
+
+        delivered, frame = run_async(scenario())
+
+        self.assertEqual(delivered, 1)
+        self.assertTrue(frame.startswith("id: 3\n"))
+        payload = decode_frame(frame)
+        self.assertEqual(payload["seq"], 3)
+        self.assertEqual(payload["new_matches"], 2)
+
+    def test_slow_subscriber_drops_oldest(self):
+        """Test that a full subscriber queue drops the oldest change sets."""
+
+        async def scenario():
+            broadcaster = ChangeBroadcaster(max_queue=4)
+            subscription = broadcaster.subscribe()
+            for seq in range(1, 11):
+                broadcaster.publish({"changed_matches": seq}, seq=seq)
+            frames = []
+            while True:
+                frame = await subscription.next_event(timeout=0.01)
+                if frame is None:
+                    break
+                frames.append(frame)
+            return subscription.dropped, frames
+
+        dropped, frames = run_async(scenario())
+
+        self.assertEqual(dropped, 6)
+        self.assertEqual([decode_frame(f)["seq"] for f in frames], [7, 8, 9, 10])
+
+    def test_subscriber_limit(self):
+        """Test that subscribers beyond the limit are rejected."""
+
+        async def scenario():
+            broadcaster = ChangeBroadcaster(max_subscribers=2)
+            first = broadcaster.subscribe()
+            second = broadcaster.subscribe()
+            third = broadcaster.subscribe()
+            broadcaster.unsubscribe(first)
+            fourth = broadcaster.subscribe()
+            return second, third, fourth, broadcaster.subscriber_count
+
+        second, third, fourth, count = run_async(scenario())
+
+        self.assertIsNotNone(second)
+        self.assertIsNone(third)
+        self.assertIsNotNone(fourth)
+        self.assertEqual(count, 2)
+
+    def test_load_hundreds_of_subscribers(self):
+        """Load test: publish from a worker thread to hundreds of concurrent subscribers."""
+        subscriber_count = 500
+        change_sets = 20
+        publish_times = []
+
+        async def consume(subscription, received):
+            while len(received) < change_sets:
+                frame = await subscription.next_event(timeout=5)
+                if frame is None:
+                    return
+                received.append(decode_frame(frame)["seq"])
+
+        async def scenario():
+            broadcaster = ChangeBroadcaster(max_queue=change_sets)
+            subscriptions = [broadcaster.subscribe() for _ in range(subscriber_count)]
+            # One subscriber never reads; it must not slow anyone down
+            stalled = broadcaster.subscribe()
+            received = [[] for _ in subscriptions]
+            consumers = [
+                asyncio.create_task(consume(subscription, bucket))
+                for subscription, bucket in zip(subscriptions, received)
+            ]
+
+            def publisher():
+                for seq in range(1, change_sets + 1):
+                    start = time.perf_counter()
+                    broadcaster.publish({"changed_matches": 1}, seq=seq)
+                    publish_times.append(time.perf_counter() - start)
+
+            thread = threading.Thread(target=publisher)
+            thread.start()
+            await asyncio.wait_for(asyncio.gather(*consumers), timeout=30)
+            thread.join()
+            return received, stalled
+
+        received, stalled = run_async(scenario())
+
+        expected = list(range(1, change_sets + 1))
+        for bucket in received:
+            self.assertEqual(bucket, expected)
+        self.assertEqual(stalled.dropped, 0)
+        # Publishing only enqueues work on the event loop, so it stays cheap
+        self.assertLess(max(publish_times), 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -178,6 +178,68 @@ class TestMatchListChangeDetectorIsolated(unittest.TestCase):
         self.assertEqual(changes["changed_matches"], 1)
         self.assertEqual(len(changes["changed_match_details"]), 1)
 
+    @with_isolated_imports
+    def test_detect_and_stream_changes_ndjson(self):
+        """Test streaming detected changes to an NDJSON change feed."""
+        from match_list_change_detector import CHANGES_FILE, MatchListChangeDetector
+
+        detector = MatchListChangeDetector("test_user", "test_pass")
+        new_match = self.sample_match.copy()
+        new_match["matchid"] = 6169106
+        current_match = self.sample_match.copy()
+        current_match["avsparkstid"] = "15:00"
+        detector.previous_matches = [self.sample_match]
+        detector.current_matches = [current_match, new_match]
+
+        has_changes, changes, written = detector.detect_and_stream_changes()
+
+        self.assertTrue(has_changes)
+        self.assertTrue(written)
+        with open(CHANGES_FILE, "r") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([line["type"] for line in lines], ["new", "changed", "summary"])
+        self.assertEqual(lines[0]["match_id"], 6169106)
+        self.assertEqual(lines[1]["current"]["time"], "15:00")
+        self.assertEqual(lines[2]["new_matches"], changes["new_matches"])
+        self.assertEqual(lines[2]["changed_matches"], changes["changed_matches"])
+
+    @with_isolated_imports
+    def test_detect_and_stream_changes_without_changes(self):
+        """Test that no change feed is written when nothing changed."""
+        from match_list_change_detector import CHANGES_FILE, MatchListChangeDetector
+
+        detector = MatchListChangeDetector("test_user", "test_pass")
+        detector.previous_matches = [self.sample_match]
+        detector.current_matches = [self.sample_match]
+
+        has_changes, _, written = detector.detect_and_stream_changes()
+
+        self.assertFalse(has_changes)
+        self.assertFalse(written)
+        self.assertFalse(os.path.exists(CHANGES_FILE))
+
+    @with_isolated_imports
+    def test_run_records_stage_timings(self):
+        """Test that a detection cycle records the duration of each stage."""
+        from unittest.mock import MagicMock, patch
+
+        from match_list_change_detector import MatchListChangeDetector
+
+        detector = MatchListChangeDetector("test_user", "test_pass")
+
+        def fake_fetch():
+            detector.current_matches = [self.sample_match]
+            return True
+
+        with patch("match_list_change_detector.metrics", MagicMock()):
+            with patch.object(detector, "fetch_current_matches", side_effect=fake_fetch):
+                with patch.object(detector, "trigger_docker_compose", return_value=True):
+                    self.assertTrue(detector.run())
+
+        for stage in ("snapshot_load", "diff", "trigger", "snapshot_save"):
+            self.assertIn(stage, detector.stage_timings)
+            self.assertGreaterEqual(detector.stage_timings[stage], 0)
+
 
 if __name__ == "__main__":
     unittest.main()
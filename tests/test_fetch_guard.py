@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Tests for match list response validation and the mass-removal quarantine."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, call, patch
+
+import requests
+
+from benchmarks.generator import generate_match_list
+from fetch_guard import InvalidResponseError, extract_matches, is_mass_removal
+
+ERROR_RESPONSE = {"matches": [], "total": 0, "status": "error", "error": "timed out"}
+
+
+class ScriptedApiClient:
+    """API client returning a fixed sequence of responses."""
+
+    def __init__(self, responses):
+        """Initialize the client with the responses of successive fetches."""
+        self.responses = list(responses)
+
+    def login(self):
+        """Pretend to log in."""
+        return True
+
+    def fetch_matches_list_json(self, filter_params=None):
+        """Return the next scripted response."""
+        return self.responses.pop(0)
+
+
+class TestFetchGuard(unittest.TestCase):
+    """Test cases for the fetch guard functions."""
+
+    def test_extract_matches(self):
+        """Test that only error-free lists of matches with IDs are accepted."""
+        matches = [{"matchid": 1}, {"matchid": 2}]
+
+        self.assertEqual(extract_matches(matches), matches)
+        self.assertEqual(extract_matches({"matches": matches, "status": "stale"}), matches)
+        self.assertEqual(extract_matches({"matches": []}), [])
+        for response in (
+            ERROR_RESPONSE,
+            {"total": 0},
+            {"matches": {"matchid": 1}},
+            [{"matchid": 1}, {"id": 2}],
+            ["match"],
+            None,
+        ):
+            with self.subTest(response=response):
+                with self.assertRaises(InvalidResponseError):
+                    extract_matches(response)
+
+    def test_is_mass_removal(self):
+        """Test the removal threshold and the minimum list size."""
+        self.assertTrue(is_mass_removal(100, 51, 0.5))
+        self.assertFalse(is_mass_removal(100, 50, 0.5))
+        self.assertFalse(is_mass_removal(100, 100, 0))
+        self.assertFalse(is_mass_removal(5, 5, 0.5, min_matches=10))
+        self.assertFalse(is_mass_removal(0, 0, 0.5))
+
+
+class TestMassRemovalQuarantine(unittest.TestCase):
+    """Test cases for the detector quarantining mass removals."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.previous_file = os.path.join(self.test_dir, "previous_matches.json")
+        self.changes_file = os.path.join(self.test_dir, "match_changes.json")
+        self.previous = generate_match_list(20, seed=5)
+        self.partial = self.previous[:2]
+        with open(self.previous_file, "w") as f:
+            json.dump(self.previous, f)
+
+        import match_list_change_detector as detector_module
+
+        for name, value in (("QUARANTINE_RETRY_DELAY", 0.0), ("QUARANTINE_RETRIES", 2)):
+            patcher = patch.object(detector_module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.test_dir)
+
+    def run_cycle(self, *responses, api_client=None):
+        """Run a detection cycle on scripted responses, or an API client, with a stubbed trigger."""
+        from match_list_change_detector import MatchListChangeDetector, RateLimiter
+
+        self.metrics = MagicMock()
+        detector = MatchListChangeDetector(
+            "user",
+            "password",
+            api_client=api_client or ScriptedApiClient(responses),
+            rate_limiter=RateLimiter(max_requests=100),
+            previous_matches_file=self.previous_file,
+            changes_file=self.changes_file,
+            change_history_file="",
+            snapshot_history_file="",
+            metrics_recorder=self.metrics,
+        )
+        self.trigger = patch.object(detector, "trigger_docker_compose", return_value=True).start()
+        self.addCleanup(patch.stopall)
+        return detector.run()
+
+    def saved_matches(self):
+        """Read the saved snapshot."""
+        with open(self.previous_file) as f:
+            return json.load(f)
+
+    def test_error_response_is_a_fetch_failure(self):
+        """Test that an error response is not diffed as every match being removed."""
+        self.assertFalse(self.run_cycle(ERROR_RESPONSE))
+
+        self.trigger.assert_not_called()
+        self.metrics.record_fetch_failure.assert_called_once()
+        self.assertEqual(self.saved_matches(), self.previous)
+
+    def test_transient_partial_response_recovers(self):
+        """Test that a refetch within the limit replaces a partial response."""
+        self.assertTrue(self.run_cycle({"matches": self.partial}, {"matches": self.previous}))
+
+        self.trigger.assert_not_called()
+        self.metrics.record_quarantine.assert_called_once_with("recovered")
+        self.assertEqual(self.saved_matches(), self.previous)
+
+    def test_confirmed_removal_is_committed(self):
+        """Test that a removal returned again by the refetch is committed."""
+        self.assertTrue(self.run_cycle(self.partial, {"matches": self.partial}))
+
+        changes = self.trigger.call_args[0][0]
+        self.assertEqual(changes["removed_matches"], 18)
+        self.metrics.record_quarantine.assert_called_once_with("confirmed")
+        self.assertEqual(self.saved_matches(), self.partial)
+
+    def test_unconfirmed_removal_is_rejected(self):
+        """Test that the cycle is abandoned when no refetch confirms the removal."""
+        self.assertFalse(self.run_cycle(self.partial, self.previous[:5], self.previous[:8]))
+        self.assertEqual(self.metrics.record_quarantine.call_args_list, [call("rejected")])
+
+        self.assertFalse(self.run_cycle(self.partial, ERROR_RESPONSE))
+        self.trigger.assert_not_called()
+        self.assertEqual(self.saved_matches(), self.previous)
+
+    def test_stale_refetch_does_not_confirm_removal(self):
+        """Test that the recorder's copy of the quarantined fetch cannot confirm it."""
+        from centralized_api_client import CentralizedFogisApiClient
+        from response_recorder import ResponseRecorder
+
+        session = MagicMock()
+        session.get.return_value.json.return_value = self.partial
+        recorder = ResponseRecorder(os.path.join(self.test_dir, "responses"))
+        client = CentralizedFogisApiClient(
+            api_client_url="http://api", session=session, recorder=recorder
+        )
+
+        def fail_refetches(seconds):
+            session.get.side_effect = requests.ConnectionError("upstream down")
+
+        with patch("match_list_change_detector.time.sleep", side_effect=fail_refetches):
+            self.assertFalse(self.run_cycle(api_client=client))
+
+        self.assertEqual(self.metrics.record_quarantine.call_args_list, [call("rejected")])
+        self.trigger.assert_not_called()
+        self.assertEqual(self.saved_matches(), self.previous)
+
+    def test_quarantined_change_feed_is_not_committed(self):
+        """Test that a streamed change feed of a rejected removal never reaches the file."""
+        import match_list_change_detector as detector_module
+
+        with patch.object(detector_module, "CHANGES_OUTPUT_FORMAT", "ndjson"):
+            self.assertFalse(self.run_cycle(self.partial, ERROR_RESPONSE))
+            self.assertFalse(os.path.exists(self.changes_file))
+
+            self.assertTrue(self.run_cycle(self.partial, self.partial))
+        with open(self.changes_file) as f:
+            summary = json.loads(f.read().splitlines()[-1])
+        self.assertEqual(summary["removed_matches"], 18)
+
+
+if __name__ == "__main__":
+    unittest.main()
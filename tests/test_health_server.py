@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Tests for the oneshot health server."""
+
+import http.client
+import socket
+import time
+import unittest
+
+from health_server import SECURITY_HEADERS, HealthServer, build_response
+
+
+def probe(connection, path="/health"):
+    """Send a GET request on a connection and return the status and body."""
+    connection.request("GET", path)
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+class TestBuildResponse(unittest.TestCase):
+    """Test cases for the health server responses."""
+
+    def test_health_check(self):
+        """Test that health checks are answered with the security headers."""
+        status, headers, body = build_response("/health")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'{"status":"ok"}')
+        self.assertEqual(headers, SECURITY_HEADERS)
+
+    def test_metrics_served_from_same_server(self):
+        """Test that /metrics is served by the health server when a handler is given."""
+        handler = lambda: (b"up 1.0\n", "text/plain; version=0.0.4")  # noqa: E731
+
+        status, headers, body = build_response("/metrics?name=up", handler)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b"up 1.0\n")
+        self.assertEqual(dict(headers)["Content-Type"], "text/plain; version=0.0.4")
+        self.assertEqual(dict(headers)["X-Content-Type-Options"], "nosniff")
+
+    def test_metrics_not_served_without_handler(self):
+        """Test that /metrics falls back to the health check without a handler."""
+        _, _, body = build_response("/metrics")
+
+        self.assertEqual(body, b'{"status":"ok"}')
+
+
+class TestHealthServer(unittest.TestCase):
+    """Test cases for the threaded health server."""
+
+    def setUp(self):
+        """Start a health server on a free port."""
+        self.server = HealthServer(port=0, request_timeout=0.5, max_connections=16)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.sockets = []
+        self.addCleanup(lambda: [s.close() for s in self.sockets])
+
+    def connect(self):
+        """Open a keep-alive HTTP connection to the server."""
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        self.addCleanup(connection.close)
+        return connection
+
+    def stall(self, partial_request=b""):
+        """Open a raw connection that never completes its request."""
+        sock = socket.create_connection(("127.0.0.1", self.server.port))
+        if partial_request:
+            sock.sendall(partial_request)
+        self.sockets.append(sock)
+        return sock
+
+    def test_keep_alive(self):
+        """Test that several requests are served over one connection."""
+        connection = self.connect()
+
+        for _ in range(3):
+            self.assertEqual(probe(connection), (200, b'{"status":"ok"}'))
+        local_port = connection.sock.getsockname()[1]
+        self.assertEqual(probe(connection)[0], 200)
+        self.assertEqual(connection.sock.getsockname()[1], local_port)
+
+    def test_stalled_clients_do_not_block_probes(self):
+        """Test that probes are answered while other clients stall mid-request."""
+        for _ in range(8):
+            self.stall(b"GET /health HTTP/1.1\r\nHost: x\r\n")
+
+        start = time.perf_counter()
+        self.assertEqual(probe(self.connect())[0], 200)
+        self.assertLess(time.perf_counter() - start, 0.4)
+
+    def test_idle_connection_times_out(self):
+        """Test that a stalled connection is closed after the request timeout."""
+        sock = self.stall()
+        sock.settimeout(5)
+
+        start = time.perf_counter()
+        self.assertEqual(sock.recv(1), b"")
+        self.assertLess(time.perf_counter() - start, 3)
+
+    def test_connections_beyond_capacity_are_dropped(self):
+        """Test that connections over the limit are closed instead of queued on threads."""
+        for _ in range(16):
+            self.stall()
+        time.sleep(0.1)
+
+        overflow = self.stall()
+        overflow.settimeout(5)
+        self.assertEqual(overflow.recv(1), b"")
+
+    def test_busy_port_is_not_fatal(self):
+        """Test that a port already in use is logged instead of raised."""
+        busy = HealthServer(port=self.server.port)
+        with self.assertLogs("health_server", level="ERROR"):
+            busy.start()
+
+        self.assertIsNone(busy.server)
+        self.assertIsNone(busy.server_thread)
+        busy.stop()
+
+
+class TestHealthLatencyUnderLoad(unittest.TestCase):
+    """Load test: health latency stays flat under concurrent probing."""
+
+    def test_latency_flat_under_concurrent_probes(self):
+        """Test that p99 latency with stalled clients stays close to the idle baseline."""
+        from benchmarks.health_load import run
+
+        results = run(concurrency_levels=(1, 8), stalled_clients=(0, 16), duration=0.5)
+
+        for result in results["results"]:
+            self.assertEqual(result["errors"], 0)
+            self.assertGreater(result["requests"], 0)
+            # A single-threaded server would be stuck behind the stalled clients
+            self.assertLess(result["latency_ms"]["p99"], 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
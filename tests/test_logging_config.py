@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Tests for the logging configuration."""
+
+import json
+import logging
+import logging.handlers
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from logging_config import (
+    configure_logging,
+    current_cycle_id,
+    log_context,
+    shutdown_logging,
+    use_async_logging,
+)
+
+
+class TestQueueLogging(unittest.TestCase):
+    """Test cases for the queue-based logging mode."""
+
+    def setUp(self):
+        """Create a temporary log directory."""
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir, ignore_errors=True)
+        self.addCleanup(shutdown_logging)
+
+    def configure(self, name, async_logging):
+        """Configure a logger writing to the temporary log directory only."""
+        logger = configure_logging(
+            name,
+            log_level="INFO",
+            log_dir=self.log_dir,
+            log_file="test.log",
+            console_output=False,
+            async_logging=async_logging,
+        )
+        self.addCleanup(setattr, logger, "handlers", [])
+        return logger
+
+    def read_log(self):
+        """Read the log file."""
+        with open(os.path.join(self.log_dir, "test.log")) as f:
+            return f.read()
+
+    def test_sync_mode_writes_on_calling_thread(self):
+        """Test that the default mode attaches the file handler to the logger."""
+        logger = self.configure("test.logging.sync", async_logging=False)
+
+        self.assertIsInstance(logger.handlers[0], logging.handlers.RotatingFileHandler)
+        logger.info("written %s", "immediately")
+        self.assertIn("written immediately", self.read_log())
+
+    def test_async_mode_writes_on_background_thread(self):
+        """Test that queue mode hands records to a listener thread."""
+        logger = self.configure("test.logging.async", async_logging=True)
+        self.assertIsInstance(logger.handlers[0], logging.handlers.QueueHandler)
+
+        writer_threads = []
+        original_emit = logging.handlers.RotatingFileHandler.emit
+
+        def recording_emit(handler, record):
+            writer_threads.append(threading.current_thread())
+            original_emit(handler, record)
+
+        with patch.object(logging.handlers.RotatingFileHandler, "emit", recording_emit):
+            logger.info("queued %s", "record")
+            shutdown_logging()
+
+        self.assertIn("test.logging.async - INFO - queued record", self.read_log())
+        self.assertTrue(writer_threads)
+        self.assertNotIn(threading.current_thread(), writer_threads)
+
+    def test_loggers_share_queue_per_destination(self):
+        """Test that loggers writing to the same file share one queue and listener."""
+        first = self.configure("test.logging.first", async_logging=True)
+        second = self.configure("test.logging.second", async_logging=True)
+
+        self.assertIs(first.handlers[0], second.handlers[0])
+
+        first.info("from first")
+        second.info("from second")
+        shutdown_logging()
+        log = self.read_log()
+        self.assertIn("from first", log)
+        self.assertIn("from second", log)
+
+    def test_exception_traceback_written_once(self):
+        """Test that tracebacks survive the queue without being duplicated."""
+        logger = self.configure("test.logging.exception", async_logging=True)
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+        shutdown_logging()
+
+        self.assertEqual(self.read_log().count("ValueError: boom"), 1)
+
+    def test_async_logging_from_environment(self):
+        """Test that LOG_ASYNC selects the logging mode when not given explicitly."""
+        with patch.dict(os.environ, {"LOG_ASYNC": "true"}):
+            self.assertTrue(use_async_logging())
+            self.assertFalse(use_async_logging(False))
+        with patch.dict(os.environ, {"LOG_ASYNC": "false"}):
+            self.assertFalse(use_async_logging())
+
+
+class TestJsonLogging(unittest.TestCase):
+    """Test cases for the structured JSON log output."""
+
+    def setUp(self):
+        """Create a temporary log directory."""
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir, ignore_errors=True)
+        self.addCleanup(shutdown_logging)
+
+    def configure(self, name, async_logging=False):
+        """Configure a JSON logger writing to the temporary log directory only."""
+        logger = configure_logging(
+            name,
+            log_level="INFO",
+            log_dir=self.log_dir,
+            log_file="test.json.log",
+            console_output=False,
+            async_logging=async_logging,
+            json_output=True,
+        )
+        self.addCleanup(setattr, logger, "handlers", [])
+        return logger
+
+    def read_entries(self):
+        """Read the JSON log lines after the configuration message."""
+        shutdown_logging()
+        with open(os.path.join(self.log_dir, "test.json.log")) as f:
+            return [json.loads(line) for line in f][1:]
+
+    def test_structured_fields(self):
+        """Test that cycle, stage and extra fields are emitted as JSON fields."""
+        logger = self.configure("test.json.fields")
+
+        with log_context(cycle_id="abc123"):
+            with log_context(stage="diff"):
+                logger.info("Changes detected", extra={"new_matches": 2, "changed_matches": 1})
+            self.assertEqual(current_cycle_id(), "abc123")
+            logger.info("Done", extra={"duration_seconds": 0.5, "stage_timings": {"diff": 0.1}})
+        logger.warning("Outside a cycle")
+
+        first, second, third = self.read_entries()
+        self.assertEqual(first["message"], "Changes detected")
+        self.assertEqual(first["level"], "INFO")
+        self.assertEqual(first["logger"], "test.json.fields")
+        self.assertEqual(first["cycle_id"], "abc123")
+        self.assertEqual(first["stage"], "diff")
+        self.assertEqual((first["new_matches"], first["changed_matches"]), (2, 1))
+        self.assertNotIn("removed_matches", first)
+        self.assertNotIn("stage", second)
+        self.assertEqual(second["stage_timings"], {"diff": 0.1})
+        self.assertNotIn("cycle_id", third)
+        self.assertIsNone(current_cycle_id())
+
+    def test_context_survives_queue_mode(self):
+        """Test that records written by the listener thread keep the caller's context."""
+        logger = self.configure("test.json.async", async_logging=True)
+
+        with log_context(cycle_id="queued", stage="fetch", tenant="north"):
+            logger.info("Fetched %d matches", 3, extra={"matches": 3})
+
+        (entry,) = self.read_entries()
+        self.assertEqual(entry["message"], "Fetched 3 matches")
+        self.assertEqual(entry["cycle_id"], "queued")
+        self.assertEqual(entry["stage"], "fetch")
+        self.assertEqual(entry["tenant"], "north")
+        self.assertEqual(entry["matches"], 3)
+
+    def test_exception_field(self):
+        """Test that tracebacks are written in their own field."""
+        logger = self.configure("test.json.exception")
+
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+
+        (entry,) = self.read_entries()
+        self.assertEqual(entry["message"], "failed")
+        self.assertIn("ValueError: boom", entry["exception"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -111,6 +111,29 @@ class TestMainIsolated(unittest.TestCase):
             # Verify that the health server was initialized (it's a module-level variable)
             # This test ensures the health server mock is working correctly
 
+    @with_isolated_imports
+    def test_import_does_not_start_servers(self):
+        """Test that importing the detector has no server side effects."""
+        import match_list_change_detector
+
+        self.assertIsNone(match_list_change_detector.health_server)
+        self.assertFalse(match_list_change_detector.metrics.server_started)
+
+    @with_isolated_imports
+    def test_start_servers_once(self):
+        """Test that start_servers starts one server for health and metrics, once."""
+        import match_list_change_detector
+
+        match_list_change_detector.start_servers()
+        health_server = match_list_change_detector.health_server
+        match_list_change_detector.start_servers()
+
+        self.assertIs(match_list_change_detector.health_server, health_server)
+        self.assertTrue(health_server.running)
+        self.assertEqual(health_server.metrics_handler, match_list_change_detector.metrics.render)
+        # Metrics are served by the health server, not a second listener
+        self.assertFalse(match_list_change_detector.metrics.server_started)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Tests for the memory-mapped snapshot."""
+
+import copy
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from benchmarks.generator import ChangeRates, generate_match_list, next_version
+from mapped_snapshot import UNCOMPARABLE, MappedSnapshot, MappedSnapshotStore, fingerprint
+from snapshot_store import SnapshotSaveStats
+
+
+def iter_match_changes(previous, current):
+    """Run the serial diff of the detector module."""
+    from match_list_change_detector import iter_match_changes as serial_diff
+
+    return serial_diff(previous, current)
+
+
+class TestMappedSnapshot(unittest.TestCase):
+    """Test cases for MappedSnapshot and MappedSnapshotStore."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "previous_matches.snap")
+        self.previous = generate_match_list(300, seed=9)
+        self.current, self.expected = next_version(
+            self.previous, ChangeRates(new=0.05, removed=0.05, changed=0.1), seed=10
+        )
+
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.test_dir)
+
+    def save_and_load(self, matches):
+        """Save matches and map the snapshot."""
+        store = MappedSnapshotStore(self.path)
+        store.save(matches)
+        snapshot = store.load()
+        self.addCleanup(snapshot.close)
+        return snapshot
+
+    def test_round_trip(self):
+        """Test that a snapshot decodes back to the saved list."""
+        snapshot = self.save_and_load(self.previous)
+
+        self.assertEqual(len(snapshot), len(self.previous))
+        self.assertEqual(list(snapshot), self.previous)
+        self.assertEqual(snapshot[-1], self.previous[-1])
+        self.assertIsNone(snapshot.record("missing"))
+        self.assertIsNone(MappedSnapshotStore(os.path.join(self.test_dir, "none.snap")).load())
+
+    def test_same_changes_as_serial_diff(self):
+        """Test that the index diff yields the serial diff's changes in order."""
+        serial = list(iter_match_changes(self.previous, self.current))
+        counts = [sum(1 for kind, _ in serial if kind == name) for name in self.expected._fields]
+        self.assertEqual(tuple(counts), tuple(self.expected))
+
+        snapshot = self.save_and_load(self.previous)
+        self.assertEqual(list(snapshot.iter_match_changes(self.current)), serial)
+
+    def test_decodes_only_differing_matches(self):
+        """Test that unchanged matches are never decoded."""
+        snapshot = self.save_and_load(self.previous)
+
+        with patch("mapped_snapshot.json.loads", wraps=json.loads) as decode:
+            list(snapshot.iter_match_changes(self.current))
+
+        self.assertEqual(decode.call_count, self.expected.removed + self.expected.changed)
+
+    def test_equal_but_differently_typed_values(self):
+        """Test that values that only differ in type or are NaN compare like the serial diff."""
+        previous = copy.deepcopy(self.previous[:4])
+        previous[0]["speldatum"] = float("nan")
+        previous[1]["lag1lagid"] = 5
+        previous[2]["domaruppdraglista"].reverse()
+        current = copy.deepcopy(previous)
+        current[1]["lag1lagid"] = 5.0
+        current[2]["domaruppdraglista"].reverse()
+        current[3]["matchid"] = float(current[3]["matchid"])
+
+        self.assertEqual(fingerprint(current[0]), UNCOMPARABLE)
+        snapshot = self.save_and_load(previous)
+        self.assertEqual(
+            list(snapshot.iter_match_changes(current)),
+            list(iter_match_changes(list(snapshot), current)),
+        )
+
+    def test_names_containing_nan(self):
+        """Test that only NaN values, not strings spelling nan, make a match uncomparable."""
+        match = copy.deepcopy(self.previous[0])
+        match["anlaggningnamn"] = "Hernandez Arena"
+        self.assertNotEqual(fingerprint(match), UNCOMPARABLE)
+
+        match["domaruppdraglista"] = [{"domareid": float("nan")}]
+        self.assertEqual(fingerprint(match), UNCOMPARABLE)
+
+    def test_save_stats_and_replace(self):
+        """Test that saves count changed records and replace the file under open snapshots."""
+        store = MappedSnapshotStore(self.path)
+        first = store.save(self.previous)
+        self.assertEqual(first, SnapshotSaveStats(300, 0, 0, 0, os.path.getsize(self.path)))
+
+        snapshot = store.load()
+        self.addCleanup(snapshot.close)
+        stats = store.save(self.current)
+
+        self.assertEqual(
+            (stats.inserted, stats.deleted, stats.updated),
+            (self.expected.new, self.expected.removed, self.expected.changed),
+        )
+        self.assertEqual(list(snapshot), self.previous)
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+        output = os.path.join(self.test_dir, "previous_matches.json")
+        self.assertEqual(store.export_json(output), len(self.current))
+        with open(output) as f:
+            self.assertEqual(json.load(f), self.current)
+
+    def test_rejects_other_files(self):
+        """Test that files other than snapshots are not mapped."""
+        with open(self.path, "w") as f:
+            json.dump(self.previous, f)
+
+        with self.assertRaises(ValueError):
+            MappedSnapshotStore(self.path).load()
+
+    def test_detector_mmap_backend(self):
+        """Test that the detector diffs against a mapped snapshot."""
+        import match_list_change_detector as detector_module
+        from match_list_change_detector import MatchListChangeDetector
+
+        json_file = os.path.join(self.test_dir, "previous_matches.json")
+        with open(json_file, "w") as f:
+            json.dump(self.previous, f)
+        detector = MatchListChangeDetector("user", "password", previous_matches_file=json_file)
+        detector.previous_matches = self.previous
+        detector.current_matches = self.current
+        _, serial_changes = detector.detect_changes()
+
+        with patch.object(detector_module, "SNAPSHOT_BACKEND", "mmap"):
+            detector.current_matches = self.previous
+            self.assertTrue(detector.save_current_matches())
+            self.assertTrue(os.path.exists(self.path))
+
+            self.assertTrue(detector.load_previous_matches())
+            self.assertIsInstance(detector.previous_matches, MappedSnapshot)
+            self.addCleanup(detector.previous_matches.close)
+            detector.current_matches = self.current
+            self.assertEqual(detector.detect_changes()[1], serial_changes)
+
+    def test_detector_cycle_closes_snapshot(self):
+        """Test that a detection cycle unmaps the previous snapshot once it is done."""
+        import match_list_change_detector as detector_module
+        from match_list_change_detector import MatchListChangeDetector
+
+        MappedSnapshotStore(self.path).save(self.previous)
+        api_client = MagicMock()
+        api_client.fetch_matches_list_json.return_value = {"matches": self.current}
+        detector = MatchListChangeDetector(
+            "user",
+            "password",
+            api_client=api_client,
+            previous_matches_file=os.path.join(self.test_dir, "previous_matches.json"),
+            changes_file=os.path.join(self.test_dir, "changes.json"),
+            change_history_file="",
+            snapshot_history_file="",
+            metrics_recorder=MagicMock(),
+        )
+
+        loaded = []
+        load_previous_matches = detector.load_previous_matches
+
+        def load():
+            """Load the previous matches and keep the loaded snapshot."""
+            result = load_previous_matches()
+            loaded.append(detector.previous_matches)
+            return result
+
+        with (
+            patch.object(detector_module, "SNAPSHOT_BACKEND", "mmap"),
+            patch.object(detector, "load_previous_matches", side_effect=load),
+            patch.object(detector, "trigger_docker_compose", return_value=True) as trigger,
+        ):
+            self.assertTrue(detector.run())
+
+        trigger.assert_called_once()
+        self.assertIsInstance(loaded[0], MappedSnapshot)
+        self.assertTrue(loaded[0]._map.closed)
+        self.assertEqual(detector.previous_matches, [])
+        saved = MappedSnapshotStore(self.path).load()
+        self.addCleanup(saved.close)
+        self.assertEqual(list(saved), self.current)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -171,7 +171,7 @@ class TestMatchListChangeDetector(unittest.TestCase):
             self.assertEqual(len(self.detector.current_matches), 1)
             self.assertEqual(self.detector.current_matches[0]["matchid"], 6169105)
 
-    @patch("match_list_change_detector.MatchListFilter")
+    @patch("fogis_api_client.MatchListFilter")
     def test_fetch_current_matches_failure(self, mock_match_list_filter):
         """Test fetching current matches with a failure."""
         # Set up the mock to raise an exception
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Tests for the Prometheus metrics module."""
+
+import unittest
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+import metrics as metrics_module
+from metrics import DEFAULT_STAGE_BUCKETS, metrics, parse_buckets
+
+
+class TestStageMetrics(unittest.TestCase):
+    """Test cases for the per-stage metrics."""
+
+    def test_parse_buckets(self):
+        """Test parsing histogram buckets from configuration."""
+        self.assertEqual(parse_buckets("1, 0.5,2"), [0.5, 1.0, 2.0])
+        self.assertEqual(parse_buckets([0.2, 0.1]), [0.1, 0.2])
+        self.assertEqual(parse_buckets(""), list(DEFAULT_STAGE_BUCKETS))
+        self.assertEqual(parse_buckets("fast,slow"), list(DEFAULT_STAGE_BUCKETS))
+
+    def test_time_stage_observes_labelled_histogram(self):
+        """Test that stage timers record into the stage-labelled histogram."""
+        name = "match_list_change_detector_stage_duration_seconds_count"
+        before = REGISTRY.get_sample_value(name, {"stage": "diff"}) or 0
+
+        with metrics.time_stage("diff"):
+            pass
+
+        self.assertEqual(REGISTRY.get_sample_value(name, {"stage": "diff"}), before + 1)
+
+    def test_snapshot_io_counters(self):
+        """Test that snapshot bytes read and written are counted."""
+        read_name = "match_list_change_detector_snapshot_bytes_read_total"
+        written_name = "match_list_change_detector_snapshot_bytes_written_total"
+        read_before = REGISTRY.get_sample_value(read_name) or 0
+        written_before = REGISTRY.get_sample_value(written_name) or 0
+
+        metrics.record_snapshot_read(100)
+        metrics.record_snapshot_write(250)
+
+        self.assertEqual(REGISTRY.get_sample_value(read_name), read_before + 100)
+        self.assertEqual(REGISTRY.get_sample_value(written_name), written_before + 250)
+
+    def test_fetch_staleness(self):
+        """Test that stale fallback responses are counted and flagged until a fresh fetch."""
+        total_name = "match_list_change_detector_stale_responses_total"
+        total_before = REGISTRY.get_sample_value(total_name) or 0
+
+        metrics.record_fetch_staleness(120.0)
+        self.assertEqual(REGISTRY.get_sample_value(total_name), total_before + 1)
+        self.assertEqual(REGISTRY.get_sample_value("match_list_change_detector_stale_data"), 1)
+        self.assertEqual(
+            REGISTRY.get_sample_value("match_list_change_detector_stale_data_age_seconds"), 120
+        )
+
+        metrics.for_tenant("metrics-stale").record_fetch_staleness(None)
+        self.assertEqual(REGISTRY.get_sample_value(total_name), total_before + 1)
+        self.assertEqual(REGISTRY.get_sample_value("match_list_change_detector_stale_data"), 0)
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                "match_list_change_detector_tenant_stale_data", {"tenant": "metrics-stale"}
+            ),
+            0,
+        )
+
+
+class TestTenantMetrics(unittest.TestCase):
+    """Test cases for the per-tenant metrics view."""
+
+    def test_records_totals_and_tenant_series(self):
+        """Test that a tenant view updates the totals and its own labelled series."""
+        total_name = "match_list_change_detector_changes_total"
+        tenant_name = "match_list_change_detector_tenant_changes_total"
+        total_before = REGISTRY.get_sample_value(total_name, {"type": "new"}) or 0
+
+        north = metrics.for_tenant("metrics-north")
+        south = metrics.for_tenant("metrics-south")
+        north.record_changes(new=2, changed=1)
+        south.record_changes(new=3)
+        north.record_error()
+
+        self.assertEqual(REGISTRY.get_sample_value(total_name, {"type": "new"}), total_before + 5)
+        self.assertEqual(
+            REGISTRY.get_sample_value(tenant_name, {"tenant": "metrics-north", "type": "new"}), 2
+        )
+        self.assertEqual(
+            REGISTRY.get_sample_value(tenant_name, {"tenant": "metrics-south", "type": "new"}), 3
+        )
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                "match_list_change_detector_tenant_errors_total", {"tenant": "metrics-north"}
+            ),
+            1,
+        )
+        north.record_quarantine("rejected")
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                "match_list_change_detector_tenant_quarantined_cycles_total",
+                {"tenant": "metrics-north", "outcome": "rejected"},
+            ),
+            1,
+        )
+        with north.time_stage("diff"):
+            pass
+
+
+class TestMetricsServer(unittest.TestCase):
+    """Test cases for starting the metrics server."""
+
+    def test_import_does_not_start_server(self):
+        """Test that importing the metrics module has no server side effect."""
+        self.assertIsNone(metrics.server_thread)
+
+    def test_start_server_once(self):
+        """Test that the metrics server is only started once."""
+        self.addCleanup(setattr, metrics, "server_thread", None)
+
+        with patch.object(metrics_module, "start_http_server") as mock_start:
+            metrics.start_server(9123)
+            metrics.start_server(9124)
+            metrics.server_thread.join(timeout=5)
+
+        mock_start.assert_called_once_with(9123)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tests for the process-parallel diff."""
+
+import copy
+import unittest
+from unittest.mock import patch
+
+import parallel_diff
+from benchmarks.generator import ChangeRates, generate_match_list, next_version
+from parallel_diff import parallel_iter_match_changes, shard_positions
+
+
+def iter_match_changes(previous, current):
+    """Run the serial diff of the detector module."""
+    from match_list_change_detector import iter_match_changes as serial_diff
+
+    return serial_diff(previous, current)
+
+
+@unittest.skipUnless(parallel_diff.FORK_AVAILABLE, "parallel diffs need the fork start method")
+class TestParallelDiff(unittest.TestCase):
+    """Test cases for the sharded diff in worker processes."""
+
+    def setUp(self):
+        """Generate a list pair with every kind of change."""
+        self.previous = generate_match_list(300, seed=3)
+        self.current, self.expected = next_version(
+            self.previous, ChangeRates(new=0.05, removed=0.05, changed=0.1), seed=4
+        )
+
+    def test_same_changes_as_serial_diff(self):
+        """Test that every worker count yields the serial diff's changes in order."""
+        serial = list(iter_match_changes(self.previous, self.current))
+        counts = [sum(1 for kind, _ in serial if kind == name) for name in self.expected._fields]
+        self.assertEqual(tuple(counts), tuple(self.expected))
+
+        for workers in (2, 3, 5):
+            with self.subTest(workers=workers):
+                parallel = list(parallel_iter_match_changes(self.previous, self.current, workers))
+                self.assertEqual(parallel, serial)
+
+    def test_repeated_match_ids(self):
+        """Test that a repeated ID keeps its first position and last version, like a dict."""
+        current = copy.deepcopy(self.current)
+        duplicate = copy.deepcopy(current[10])
+        duplicate["avsparkstid"] = "23:59"
+        current.append(duplicate)
+        current.insert(0, copy.deepcopy(self.previous[-1]))
+
+        self.assertEqual(
+            list(parallel_iter_match_changes(self.previous, current, 4)),
+            list(iter_match_changes(self.previous, current)),
+        )
+
+    def test_shards_by_match_id(self):
+        """Test that equal IDs share a shard and every position is assigned once."""
+        matches = [{"matchid": 7}, {"matchid": 8}, {"matchid": 7.0}, {"matchid": "7"}]
+        shards = shard_positions(matches, 3)
+
+        self.assertEqual(sorted(sum(shards, [])), [0, 1, 2, 3])
+        self.assertTrue(any(shard[:2] == [0, 2] for shard in shards))
+        with self.assertRaises(KeyError):
+            shard_positions([{"id": 1}], 2)
+
+    def test_falls_back_to_serial_diff(self):
+        """Test that the serial diff is used when worker processes cannot be started."""
+        serial = list(iter_match_changes(self.previous, self.current))
+
+        with patch("parallel_diff.multiprocessing.get_context") as get_context:
+            get_context.return_value.Pool.side_effect = OSError("no processes")
+            self.assertEqual(
+                list(parallel_iter_match_changes(self.previous, self.current, 4)), serial
+            )
+
+        with patch.object(parallel_diff, "FORK_AVAILABLE", False):
+            with patch.object(parallel_diff, "_run_shards") as run_shards:
+                self.assertEqual(
+                    list(parallel_iter_match_changes(self.previous, self.current, 4)), serial
+                )
+                run_shards.assert_not_called()
+
+    def test_detector_uses_workers_for_large_lists(self):
+        """Test that detect_changes diffs in parallel from DIFF_PARALLEL_MIN_MATCHES."""
+        import match_list_change_detector as detector_module
+        from match_list_change_detector import MatchListChangeDetector
+
+        detector = MatchListChangeDetector("user", "password")
+        detector.previous_matches = self.previous
+        detector.current_matches = self.current
+        _, serial_changes = detector.detect_changes()
+
+        run_shards = patch.object(parallel_diff, "_run_shards", wraps=parallel_diff._run_shards)
+        with patch.object(detector_module, "DIFF_WORKERS", 2), run_shards as shards:
+            with patch.object(detector_module, "DIFF_PARALLEL_MIN_MATCHES", 1000):
+                self.assertEqual(detector.detect_changes()[1], serial_changes)
+                shards.assert_not_called()
+
+            with patch.object(detector_module, "DIFF_PARALLEL_MIN_MATCHES", 300):
+                self.assertEqual(detector.detect_changes()[1], serial_changes)
+                shards.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
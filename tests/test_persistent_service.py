@@ -76,6 +76,9 @@ class TestPersistentService(unittest.TestCase):
         self.assertIn("/health", routes)
         self.assertIn("/trigger", routes)
         self.assertIn("/status", routes)
+        self.assertIn("/changes", routes)
+        self.assertIn("/changes/stream", routes)
+        self.assertIn("/metrics", routes)
 
     def test_health_endpoint(self):
         """Test the health check endpoint."""
@@ -109,6 +112,286 @@ class TestPersistentService(unittest.TestCase):
         self.assertIn("configuration", data)
         self.assertEqual(data["configuration"]["fogis_username"], "test_user")
         self.assertTrue(data["configuration"]["fogis_password_set"])
+        self.assertIsInstance(data["circuit_breakers"], dict)
+
+    def test_status_snapshot_reused_between_probes(self):
+        """Test that probes are served from the cached snapshot until state changes."""
+        service = PersistentMatchListChangeDetectorService()
+        client = TestClient(service.app)
+        snapshot = service.status_snapshot
+
+        first = client.get("/health").json()
+        client.get("/status")
+        second = client.get("/health").json()
+
+        self.assertIs(service.status_snapshot, snapshot)
+        self.assertGreaterEqual(second["uptime_seconds"], first["uptime_seconds"])
+        self.assertEqual(first["execution_count"], second["execution_count"])
+
+    def test_status_snapshot_refreshed_on_state_change(self):
+        """Test that cycle start and shutdown are reflected in /health and /status."""
+        service = PersistentMatchListChangeDetectorService()
+        client = TestClient(service.app)
+        self.assertIsNone(client.get("/health").json()["last_execution"])
+
+        with patch.object(service, "_run_detection_cycle", return_value=True):
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(service._execute_change_detection())
+            finally:
+                loop.close()
+
+        health = client.get("/health").json()
+        self.assertEqual(health["execution_count"], 1)
+        self.assertEqual(health["last_execution"], service.last_execution.isoformat())
+        self.assertEqual(client.get("/status").json()["execution_count"], 1)
+
+        service.shutdown()
+        response = client.get("/health")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["status"], "unhealthy")
+        self.assertFalse(client.get("/status").json()["running"])
+
+    def test_ready_endpoint(self):
+        """Test that /ready follows cycle failures and shutdown."""
+        self.mock_config["READINESS_MAX_CONSECUTIVE_FAILURES"] = 2
+        service = PersistentMatchListChangeDetectorService()
+        client = TestClient(service.app)
+        self.assertEqual(service.readiness.expected_interval, 3600)
+
+        response = client.get("/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["ready"])
+
+        with patch.object(service, "_run_detection_cycle", return_value=False):
+            loop = asyncio.new_event_loop()
+            try:
+                for _ in range(2):
+                    loop.run_until_complete(service._execute_change_detection())
+            finally:
+                loop.close()
+
+        response = client.get("/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["reasons"], ["2 consecutive failed cycles"])
+
+        service.readiness.record_cycle(True)
+        self.assertEqual(client.get("/ready").status_code, 200)
+
+        service.shutdown()
+        response = client.get("/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["reasons"], ["service is shutting down"])
+
+    def test_stale_cycles_are_not_fresh(self):
+        """Test that cycles served from a stale recorded response do not keep /ready up."""
+        self.mock_config["READINESS_MAX_CONSECUTIVE_FAILURES"] = 2
+        service = PersistentMatchListChangeDetectorService()
+        client = TestClient(service.app)
+
+        def run_detection(on_changes=None, on_stale=None):
+            on_stale()
+            return True
+
+        with patch("match_list_change_detector.main", run_detection):
+            loop = asyncio.new_event_loop()
+            try:
+                for _ in range(2):
+                    self.assertTrue(loop.run_until_complete(service._execute_change_detection()))
+            finally:
+                loop.close()
+
+        self.assertTrue(service.last_cycle_stale)
+        response = client.get("/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["reasons"], ["2 consecutive failed cycles"])
+
+    def test_metrics_endpoint(self):
+        """Test that Prometheus metrics are served by the service's own server."""
+        service = PersistentMatchListChangeDetectorService()
+        client = TestClient(service.app)
+
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn("match_list_change_detector_up 1.0", response.text)
+
+    def test_changes_endpoint(self):
+        """Test the change feed endpoint returns change sets after the cursor."""
+        import shutil
+        import tempfile
+
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir)
+        self.mock_config["CHANGE_HISTORY_FILE"] = f"{test_dir}/change_history.db"
+        service = PersistentMatchListChangeDetectorService()
+        service.change_history.append({"new_matches": 1, "new_match_details": [{"matchid": 1}]})
+        service.change_history.append({"changed_matches": 0, "message": "second"})
+        client = TestClient(service.app)
+
+        response = client.get("/changes", params={"since": 1})
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()
+        self.assertEqual([c["seq"] for c in data["changes"]], [2])
+        self.assertEqual(data["next_cursor"], 2)
+        self.assertFalse(data["reset_required"])
+
+        response = client.get("/changes", params={"since": -1})
+        self.assertEqual(response.status_code, 422)
+
+    def test_changes_endpoint_disabled(self):
+        """Test the change feed endpoint when the change history is disabled."""
+        self.mock_config["CHANGE_HISTORY_FILE"] = ""
+        service = PersistentMatchListChangeDetectorService()
+        client = TestClient(service.app)
+
+        response = client.get("/changes")
+        self.assertEqual(response.status_code, 404)
+
+    def test_tenant_endpoints_disabled(self):
+        """Test that tenant endpoints are unavailable without a tenants file."""
+        service = PersistentMatchListChangeDetectorService()
+        client = TestClient(service.app)
+
+        self.assertIsNone(service.tenants)
+        self.assertEqual(client.get("/tenants").status_code, 404)
+        self.assertEqual(client.post("/tenants/north/trigger").status_code, 404)
+
+    def test_tenant_endpoints(self):
+        """Test listing, triggering and readiness of tenants from a tenants file."""
+        import json
+        import shutil
+        import tempfile
+
+        from tenants import Tenant
+
+        test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, test_dir)
+        tenants_file = f"{test_dir}/tenants.json"
+        with open(tenants_file, "w") as f:
+            json.dump(
+                [
+                    {"name": "north", "username": "n@example.com", "password": "x"},
+                    {"name": "south", "username": "s@example.com", "password": "y"},
+                ],
+                f,
+            )
+        self.mock_config["TENANTS_FILE"] = tenants_file
+        self.mock_config["TENANT_DATA_DIR"] = test_dir
+        self.mock_config["READINESS_MAX_CONSECUTIVE_FAILURES"] = 1
+        service = PersistentMatchListChangeDetectorService()
+        self.addCleanup(service.tenants.shutdown)
+        client = TestClient(service.app)
+
+        response = client.get("/tenants")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([t["name"] for t in response.json()["tenants"]], ["north", "south"])
+
+        def fake_cycle(tenant, on_changes=None):
+            result = tenant.name == "north"
+            tenant.readiness.record_cycle(result)
+            return result
+
+        with patch.object(Tenant, "run_cycle", autospec=True, side_effect=fake_cycle):
+            self.assertEqual(client.post("/tenants/north/trigger").status_code, 200)
+            self.assertEqual(client.post("/tenants/south/trigger").status_code, 500)
+            self.assertEqual(client.post("/tenants/west/trigger").status_code, 404)
+
+        response = client.get("/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["reasons"], ["south: 1 consecutive failed cycles"])
+
+        response = client.get("/tenants/north/changes")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["changes"], [])
+        self.assertEqual(client.get("/tenants/west/changes").status_code, 404)
+
+    def test_change_stream_pushes_published_change_sets(self):
+        """Test that the change stream yields change sets published by a cycle."""
+        self.mock_config["CHANGE_HISTORY_FILE"] = ""
+        self.mock_config["CHANGE_STREAM_KEEPALIVE_SECONDS"] = 0.05
+        service = PersistentMatchListChangeDetectorService()
+
+        request = Mock()
+
+        async def is_disconnected():
+            return False
+
+        request.is_disconnected = is_disconnected
+
+        async def scenario():
+            subscription = service.change_broadcaster.subscribe()
+            stream = service._stream_changes(request, subscription)
+            frames = [await stream.__anext__()]
+            frames.append(await stream.__anext__())  # keep-alive while idle
+            service.change_broadcaster.publish({"new_matches": 1}, seq=9)
+            frames.append(await stream.__anext__())
+            await stream.aclose()
+            return frames
+
+        # Use a private loop so the global event loop used by other tests is left untouched
+        loop = asyncio.new_event_loop()
+        try:
+            frames = loop.run_until_complete(scenario())
+        finally:
+            loop.close()
+
+        self.assertEqual(frames[0], ": connected\n\n")
+        self.assertEqual(frames[1], ": keep-alive\n\n")
+        self.assertTrue(frames[2].startswith("id: 9\nevent: changes\n"))
+        self.assertEqual(service.change_broadcaster.subscriber_count, 0)
+
+    def test_profiling_endpoints_disabled_without_token(self):
+        """Test that the profiling endpoints are hidden unless a token is configured."""
+        service = PersistentMatchListChangeDetectorService()
+        client = TestClient(service.app)
+
+        response = client.post("/debug/profile", headers={"X-Profiling-Token": ""})
+        self.assertEqual(response.status_code, 404)
+
+    def test_profiling_capture_download(self):
+        """Test arming a profile, running a cycle and downloading the capture."""
+        from profiling import CycleProfiler
+
+        self.mock_config["PROFILING_TOKEN"] = "secret"
+        service = PersistentMatchListChangeDetectorService()
+        service.profiler = CycleProfiler()
+        client = TestClient(service.app)
+        auth = {"Authorization": "Bearer secret"}
+
+        response = client.post("/debug/profile", headers={"Authorization": "Bearer wrong"})
+        self.assertEqual(response.status_code, 401)
+
+        response = client.post("/debug/profile", params={"mode": "perf"}, headers=auth)
+        self.assertEqual(response.status_code, 422)
+
+        response = client.post("/debug/profile", params={"cycles": 1}, headers=auth)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["pending_cycles"], 1)
+
+        def run_detection(on_changes=None, on_stale=None):
+            return sum(i * i for i in range(10000)) > 0
+
+        self.assertTrue(service._run_detection_cycle(run_detection))
+
+        response = client.get("/debug/profile", headers=auth)
+        captures = response.json()["captures"]
+        self.assertEqual(len(captures), 1)
+
+        capture_id = captures[0]["id"]
+        response = client.get(f"/debug/profile/{capture_id}", headers=auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("run_detection", response.text)
+
+        response = client.get(
+            f"/debug/profile/{capture_id}", params={"format": "pstats"}, headers=auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/octet-stream")
+
+        response = client.get("/debug/profile/999", headers=auth)
+        self.assertEqual(response.status_code, 404)
 
     @patch("persistent_service.asyncio.get_event_loop")
     def test_manual_trigger_endpoint(self, mock_get_loop):
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Tests for the on-demand cycle profiler."""
+
+import io
+import marshal
+import pstats
+import time
+import unittest
+
+from profiling import MODE_SAMPLE, CycleProfiler
+
+
+def busy_work(iterations=20000):
+    """Burn some CPU so profilers have something to record."""
+    return sum(i * i for i in range(iterations))
+
+
+class TestCycleProfiler(unittest.TestCase):
+    """Test cases for CycleProfiler."""
+
+    def test_disarmed_cycle_is_not_profiled(self):
+        """Test that cycles run untouched while profiling is not armed."""
+        profiler = CycleProfiler()
+
+        with profiler.profile_cycle(1) as capture:
+            with profiler.trace_allocations("diff"):
+                busy_work()
+
+        self.assertIsNone(capture)
+        self.assertEqual(len(profiler.captures), 0)
+
+    def test_cprofile_capture_of_armed_cycles(self):
+        """Test that exactly the armed number of cycles are captured."""
+        profiler = CycleProfiler()
+        profiler.arm(cycles=2)
+
+        for cycle in range(1, 4):
+            with profiler.profile_cycle(cycle):
+                busy_work()
+
+        self.assertEqual([c.cycle for c in profiler.captures], [1, 2])
+        self.assertEqual(profiler.pending_cycles, 0)
+
+        capture = profiler.get_capture(1)
+        stats = pstats.Stats(_Loaded(marshal.loads(capture.pstats_bytes())), stream=io.StringIO())
+        functions = {name for (_, _, name) in stats.stats}
+        self.assertIn("busy_work", functions)
+        self.assertIn("busy_work", capture.text_report())
+
+    def test_sample_capture(self):
+        """Test that the sampling profiler records collapsed stacks."""
+        profiler = CycleProfiler(sample_interval=0.001)
+        profiler.arm(mode=MODE_SAMPLE)
+
+        with profiler.profile_cycle(1) as capture:
+            deadline = time.perf_counter() + 0.2
+            while time.perf_counter() < deadline:
+                busy_work(1000)
+
+        self.assertGreater(capture.sample_count, 0)
+        self.assertIsNone(capture.stats)
+        self.assertIn("test_sample_capture", capture.collapsed_stacks())
+
+    def test_tracemalloc_top_allocation_sites(self):
+        """Test that traced stages report their allocation sites."""
+        profiler = CycleProfiler()
+        profiler.arm(trace_memory=True)
+
+        with profiler.profile_cycle(1) as capture:
+            with profiler.trace_allocations("diff"):
+                retained = [bytearray(1024) for _ in range(100)]
+            with profiler.trace_allocations("login"):
+                busy_work()
+
+        self.assertEqual(len(retained), 100)
+        self.assertEqual(list(capture.allocations), ["diff"])
+        diff = capture.allocations["diff"]
+        self.assertGreaterEqual(diff["peak_bytes"], 100 * 1024)
+        self.assertIn("test_profiling.py", diff["top"][0]["site"])
+
+    def test_captures_are_bounded(self):
+        """Test that only the most recent captures are retained."""
+        profiler = CycleProfiler(max_captures=2)
+        profiler.arm(cycles=3)
+
+        for cycle in range(3):
+            with profiler.profile_cycle(cycle):
+                pass
+
+        self.assertEqual([c["id"] for c in profiler.status()["captures"]], [2, 3])
+        self.assertIsNone(profiler.get_capture(1))
+
+    def test_invalid_arm_arguments(self):
+        """Test that invalid modes and cycle counts are rejected."""
+        profiler = CycleProfiler()
+
+        with self.assertRaises(ValueError):
+            profiler.arm(mode="perf")
+        with self.assertRaises(ValueError):
+            profiler.arm(cycles=0)
+
+
+class _Loaded:
+    """Minimal profile source for loading marshalled stats into pstats."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        """Stats are already collected."""
+
+
+if __name__ == "__main__":
+    unittest.main()
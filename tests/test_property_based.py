@@ -7,9 +7,12 @@ Uses hypothesis to generate test data and verify properties of the system.
 
 import unittest
 
-from hypothesis import given
+from hypothesis import given, settings
 from hypothesis import strategies as st
 
+from benchmarks.generator import ChangeRates, generate_match_list, next_version
+from tests.test_utils import with_isolated_imports
+
 
 class TestPropertyBasedExamples(unittest.TestCase):
     """Property-based test examples."""
@@ -60,5 +63,56 @@ class TestPropertyBasedExamples(unittest.TestCase):
         self.assertEqual(has_changed, old_value != new_value)
 
 
+class TestDetectChangesProperties(unittest.TestCase):
+    """Property-based tests of detect_changes on generated match lists."""
+
+    @with_isolated_imports
+    @settings(max_examples=30, deadline=None)
+    @given(
+        size=st.integers(min_value=1, max_value=200),
+        new=st.floats(min_value=0, max_value=0.5),
+        removed=st.floats(min_value=0, max_value=0.5),
+        changed=st.floats(min_value=0, max_value=0.5),
+        seed=st.integers(min_value=0, max_value=2**16),
+    )
+    def test_detect_changes_reports_generated_changes(self, size, new, removed, changed, seed):
+        """Test that detect_changes finds exactly the changes applied to a list."""
+        from match_list_change_detector import MatchListChangeDetector
+
+        previous = generate_match_list(size, seed=seed)
+        current, expected = next_version(previous, ChangeRates(new, removed, changed), seed)
+
+        detector = MatchListChangeDetector("test_user", "test_pass")
+        detector.previous_matches = previous
+        detector.current_matches = current
+        has_changes, changes = detector.detect_changes()
+
+        self.assertEqual(has_changes, any(expected))
+        self.assertEqual(changes["new_matches"], expected.new)
+        self.assertEqual(changes["removed_matches"], expected.removed)
+        self.assertEqual(changes["changed_matches"], expected.changed)
+        self.assertEqual(
+            {match["matchid"] for match in changes["removed_match_details"]},
+            {match["matchid"] for match in previous} - {match["matchid"] for match in current},
+        )
+
+    @with_isolated_imports
+    @settings(max_examples=20, deadline=None)
+    @given(size=st.integers(min_value=1, max_value=100), seed=st.integers(min_value=0))
+    def test_unchanged_list_has_no_changes(self, size, seed):
+        """Test that diffing a list against itself reports no changes."""
+        from match_list_change_detector import MatchListChangeDetector
+
+        matches = generate_match_list(size, seed=seed)
+        detector = MatchListChangeDetector("test_user", "test_pass")
+        detector.previous_matches = matches
+        detector.current_matches = [dict(match) for match in matches]
+
+        has_changes, changes = detector.detect_changes()
+
+        self.assertFalse(has_changes)
+        self.assertEqual(changes["changed_matches"], 0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Tests for the readiness tracker."""
+
+import json
+import unittest
+
+from readiness import ReadinessTracker
+
+
+class FakeClock:
+    """Manually advanced clock."""
+
+    def __init__(self, now=1_700_000_000.0):
+        """Start the clock at a fixed time."""
+        self.now = now
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+
+class TestReadinessTracker(unittest.TestCase):
+    """Test cases for ReadinessTracker."""
+
+    def setUp(self):
+        """Create a tracker expecting a cycle every 60 seconds."""
+        self.clock = FakeClock()
+        self.tracker = ReadinessTracker(
+            expected_interval=60,
+            staleness_factor=2.0,
+            max_consecutive_failures=3,
+            max_trigger_backlog=1,
+            clock=self.clock,
+        )
+
+    def test_ready_during_startup_grace(self):
+        """Test that the service is ready until the first cycle is overdue."""
+        self.assertTrue(self.tracker.check().ready)
+
+        self.clock.now += 119
+        self.assertTrue(self.tracker.check().ready)
+
+        self.clock.now += 1
+        verdict = self.tracker.check()
+        self.assertFalse(verdict.ready)
+        self.assertEqual(verdict.status_code, 503)
+        self.assertIn("no successful cycle in the last 120s", verdict.reasons)
+
+    def test_successful_cycle_moves_staleness_deadline(self):
+        """Test that freshness is measured from the last successful cycle."""
+        self.clock.now += 100
+        self.tracker.record_cycle(True)
+
+        self.clock.now += 100
+        self.assertTrue(self.tracker.check().ready)
+
+        self.clock.now += 20
+        self.assertFalse(self.tracker.check().ready)
+
+    def test_consecutive_failures(self):
+        """Test that repeated failures make the service unready until a success."""
+        for _ in range(2):
+            self.tracker.record_cycle(False)
+        self.assertTrue(self.tracker.check().ready)
+
+        self.tracker.record_cycle(False)
+        verdict = self.tracker.check()
+        self.assertFalse(verdict.ready)
+        self.assertEqual(verdict.reasons, ("3 consecutive failed cycles",))
+
+        self.tracker.record_cycle(True)
+        self.assertTrue(self.tracker.check().ready)
+
+    def test_trigger_backlog(self):
+        """Test that too many pending manual triggers make the service unready."""
+        self.tracker.trigger_queued()
+        self.assertTrue(self.tracker.check().ready)
+
+        self.tracker.trigger_queued()
+        self.assertFalse(self.tracker.check().ready)
+
+        self.tracker.trigger_done()
+        self.assertTrue(self.tracker.check().ready)
+
+    def test_no_freshness_check_without_schedule(self):
+        """Test that staleness is not judged until the expected interval is known."""
+        tracker = ReadinessTracker(clock=self.clock)
+        self.clock.now += 10**6
+
+        self.assertTrue(tracker.check().ready)
+
+        tracker.set_expected_interval(60)
+        self.assertFalse(tracker.check().ready)
+
+    def test_checks_reuse_precomputed_body(self):
+        """Test that checks between state changes return the same encoded body."""
+        first = self.tracker.check()
+        self.clock.now += 30
+
+        self.assertIs(self.tracker.check().body, first.body)
+        body = json.loads(first.body)
+        self.assertTrue(body["ready"])
+        self.assertEqual(body["consecutive_failures"], 0)
+        self.assertIsNone(body["last_success"])
+        self.assertEqual(self.tracker.status(), body)
+
+
+if __name__ == "__main__":
+    unittest.main()
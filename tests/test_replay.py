@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Tests for the offline replay mode."""
+
+import copy
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from benchmarks.generator import ChangeRates, generate_match_list, next_version
+from response_recorder import ResponseRecorder
+from snapshot_history import SnapshotHistoryStore
+
+
+class TestReplay(unittest.TestCase):
+    """Test cases for replaying recorded payloads."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.work_dir = os.path.join(self.test_dir, "work")
+        self.versions = [generate_match_list(50, seed=3)]
+        self.expected = []
+        for seed in range(1, 3):
+            current, expected = next_version(
+                self.versions[-1], ChangeRates(new=0.1, removed=0.1, changed=0.1), seed=seed
+            )
+            self.versions.append(current)
+            self.expected.append(expected)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.test_dir)
+
+    def write_directory(self):
+        """Write the versions as a directory of API payloads."""
+        payload_dir = os.path.join(self.test_dir, "payloads")
+        os.makedirs(payload_dir)
+        for index, matches in enumerate(self.versions):
+            with open(os.path.join(payload_dir, f"{index:03d}.json"), "w") as f:
+                json.dump({"matches": matches}, f)
+        return payload_dir
+
+    def test_load_payload_sources(self):
+        """Test that directories, recordings, JSON lines files and histories replay in order."""
+        from replay import load_payloads
+
+        payload_dir = self.write_directory()
+        jsonl_file = os.path.join(self.test_dir, "payloads.jsonl")
+        with open(jsonl_file, "w") as f:
+            for matches in self.versions:
+                f.write(json.dumps(matches) + "\n\n")
+        recorder = ResponseRecorder(os.path.join(self.test_dir, "responses"))
+        for matches in self.versions:
+            recorder.record({"matches": matches})
+        history_file = os.path.join(self.test_dir, "history.db")
+        history = SnapshotHistoryStore(history_file)
+        for index, matches in enumerate(self.versions):
+            history.record(matches, taken_at=1000.0 + index)
+
+        from_directory = list(load_payloads(payload_dir))
+        self.assertEqual([source for source, _ in from_directory][0], "000.json")
+        self.assertEqual([payload["matches"] for _, payload in from_directory], self.versions)
+        self.assertEqual([payload for _, payload in load_payloads(jsonl_file)], self.versions)
+        self.assertEqual([payload for _, payload in load_payloads(history_file)], self.versions)
+        self.assertEqual(
+            [payload["matches"] for _, payload in load_payloads(str(recorder.directory))],
+            self.versions,
+        )
+
+    def test_replay_reports_change_sets(self):
+        """Test that each cycle reports its timings and the changes it detected."""
+        from replay import replay
+
+        previous_file = os.path.join(self.test_dir, "previous_matches.json")
+        with open(previous_file, "w") as f:
+            json.dump(self.versions[0], f)
+        payloads = [(str(index), {"matches": m}) for index, m in enumerate(self.versions)]
+
+        cycles = replay(payloads, self.work_dir, previous_matches_file=previous_file)
+
+        self.assertEqual(len(cycles), 3)
+        self.assertTrue(all(cycle.succeeded for cycle in cycles))
+        self.assertIsNone(cycles[0].changes)
+        for cycle, expected in zip(cycles[1:], self.expected):
+            with self.subTest(cycle=cycle.cycle):
+                self.assertEqual(
+                    (
+                        cycle.changes["new_matches"],
+                        cycle.changes["removed_matches"],
+                        cycle.changes["changed_matches"],
+                    ),
+                    (expected.new, expected.removed, expected.changed),
+                )
+                self.assertIn("diff", cycle.stage_seconds)
+                self.assertIn("trigger", cycle.stage_seconds)
+        self.assertEqual(cycles[-1].matches, len(self.versions[-1]))
+        self.assertFalse(os.path.exists(os.path.join(self.work_dir, "match_changes.json")))
+
+    def test_record_trigger_writes_changes_file(self):
+        """Test that the record trigger writes the changes file instead of starting services."""
+        from replay import replay
+
+        with patch("subprocess.run") as run:
+            cycles = replay(
+                [("0", self.versions[0]), ("1", copy.deepcopy(self.versions[1]))],
+                self.work_dir,
+                trigger="record",
+            )
+
+        run.assert_not_called()
+        self.assertEqual(cycles[0].changes["new_matches"], len(self.versions[0]))
+        with open(os.path.join(self.work_dir, "match_changes.json")) as f:
+            self.assertEqual(json.load(f)["new_matches"], cycles[1].changes["new_matches"])
+
+    def test_mass_removal_confirmed_without_waiting(self):
+        """Test that a recorded mass removal is committed without refetch delays."""
+        from replay import replay
+
+        with patch("time.sleep") as sleep:
+            cycles = replay([("0", self.versions[0]), ("1", self.versions[0][:5])], self.work_dir)
+
+        sleep.assert_not_called()
+        self.assertEqual(cycles[1].changes["removed_matches"], len(self.versions[0]) - 5)
+        self.assertEqual(cycles[1].matches, 5)
+
+    def test_command_line(self):
+        """Test that the command line writes per-cycle results."""
+        from replay import main
+
+        output = os.path.join(self.test_dir, "results.json")
+        with patch("builtins.print"):
+            self.assertEqual(main([self.write_directory(), "--output", output]), 0)
+
+        with open(output) as f:
+            cycles = json.load(f)["cycles"]
+        self.assertEqual(
+            [cycle["source"] for cycle in cycles], ["000.json", "001.json", "002.json"]
+        )
+        self.assertEqual(cycles[0]["changes"]["new_matches"], len(self.versions[0]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Tests for the circuit breaker and retry policy around upstream API calls."""
+
+import unittest
+from unittest.mock import MagicMock, call, patch
+
+import requests
+
+from centralized_api_client import (
+    CentralizedFogisApiClient,
+    is_transient_direct_error,
+    is_transient_http_error,
+)
+from resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    circuit_breaker_states,
+    get_circuit_breaker,
+)
+
+
+class FakeClock:
+    """Monotonic clock advanced by hand."""
+
+    def __init__(self):
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+
+def http_error(status):
+    """Create an HTTPError carrying a response with a status code."""
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for CircuitBreaker."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.clock = FakeClock()
+        self.on_state_change = MagicMock()
+        self.on_reject = MagicMock()
+        self.breaker = CircuitBreaker(
+            "test",
+            failure_threshold=3,
+            reset_timeout=60.0,
+            on_state_change=self.on_state_change,
+            on_reject=self.on_reject,
+            clock=self.clock,
+        )
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the threshold of consecutive failures opens the circuit."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.on_state_change.assert_called_once_with("test", OPEN)
+
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.on_reject.assert_called_once_with("test")
+        self.assertEqual(self.breaker.snapshot()["rejected_calls"], 1)
+        self.assertIsNotNone(self.breaker.snapshot()["opened_at"])
+
+    def test_half_open_trial(self):
+        """Test that one trial call is admitted after the reset timeout."""
+        for _ in range(3):
+            self.breaker.record_failure()
+
+        self.clock.now = 60.0
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.before_call()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+
+        # A failed trial opens the circuit for another reset timeout
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.clock.now = 119.0
+        self.assertEqual(self.breaker.state, OPEN)
+
+        self.clock.now = 120.0
+        self.breaker.before_call()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(
+            self.on_state_change.call_args_list,
+            [
+                call("test", OPEN),
+                call("test", HALF_OPEN),
+                call("test", OPEN),
+                call("test", HALF_OPEN),
+                call("test", CLOSED),
+            ],
+        )
+        self.assertIsNone(self.breaker.snapshot()["opened_at"])
+
+    def test_registry(self):
+        """Test that breakers are shared per name and listed in their states."""
+        breaker = get_circuit_breaker("test-registry", failure_threshold=1)
+        self.assertIs(get_circuit_breaker("test-registry", failure_threshold=9), breaker)
+
+        breaker.record_failure()
+        state = circuit_breaker_states()["test-registry"]
+        self.assertEqual(state["state"], OPEN)
+        self.assertEqual(state["failure_threshold"], 1)
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test cases for RetryPolicy."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.sleep = MagicMock()
+        self.on_retry = MagicMock()
+        self.policy = RetryPolicy(
+            attempts=3, base_delay=1.0, max_delay=3.0, on_retry=self.on_retry, sleep=self.sleep
+        )
+
+    def test_delay_is_jittered_and_capped(self):
+        """Test that delays stay within the exponential, capped ceiling."""
+        for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 3.0), (10, 3.0)):
+            for _ in range(50):
+                self.assertTrue(0 <= self.policy.delay(attempt) <= ceiling)
+
+    def test_retries_until_success(self):
+        """Test that transient failures are retried and the result returned."""
+        func = MagicMock(side_effect=[ConnectionError("down"), ConnectionError("down"), "ok"])
+        breaker = CircuitBreaker("test", failure_threshold=3)
+
+        self.assertEqual(self.policy.call(func, breaker), "ok")
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(self.sleep.call_count, 2)
+        self.assertEqual([c[0][0] for c in self.on_retry.call_args_list], [1, 2])
+        self.assertEqual(breaker.snapshot()["consecutive_failures"], 0)
+
+    def test_gives_up_after_attempts(self):
+        """Test that the last error is raised once the attempts are used up."""
+        func = MagicMock(side_effect=ConnectionError("down"))
+        breaker = CircuitBreaker("test", failure_threshold=2)
+
+        with self.assertRaises(ConnectionError):
+            self.policy.call(func, breaker)
+        # Retries stop once the breaker opens after two failures
+        self.assertEqual(func.call_count, 2)
+        self.assertEqual(breaker.state, OPEN)
+
+        with self.assertRaises(CircuitOpenError):
+            self.policy.call(func, breaker)
+        self.assertEqual(func.call_count, 2)
+
+    def test_non_retryable_error(self):
+        """Test that non-retryable errors are raised at once and do not trip the breaker."""
+        func = MagicMock(side_effect=http_error(404))
+        breaker = CircuitBreaker("test", failure_threshold=1)
+
+        with self.assertRaises(requests.HTTPError):
+            self.policy.call(func, breaker, is_transient_http_error)
+        self.assertEqual(func.call_count, 1)
+        self.sleep.assert_not_called()
+        self.assertEqual(breaker.state, CLOSED)
+
+
+class TestResilientApiClient(unittest.TestCase):
+    """Test cases for the API client behind a circuit breaker."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.session = MagicMock()
+        self.session.get.side_effect = requests.ConnectionError("upstream down")
+        self.breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60.0)
+        self.client = CentralizedFogisApiClient(
+            api_client_url="http://api",
+            session=self.session,
+            breaker=self.breaker,
+            retry=RetryPolicy(attempts=2, sleep=MagicMock()),
+            fetch_timeout=5.0,
+        )
+
+    def test_transient_http_errors(self):
+        """Test which request errors are retried."""
+        self.assertTrue(is_transient_http_error(requests.ConnectionError()))
+        self.assertTrue(is_transient_http_error(requests.Timeout()))
+        self.assertTrue(is_transient_http_error(http_error(503)))
+        self.assertTrue(is_transient_http_error(http_error(429)))
+        self.assertFalse(is_transient_http_error(http_error(401)))
+        self.assertFalse(is_transient_http_error(ValueError()))
+
+    def test_open_circuit_skips_upstream(self):
+        """Test that a dead upstream is no longer called once the circuit opens."""
+        response = self.client.fetch_matches_list_json()
+        self.assertEqual(response["status"], "error")
+        self.assertEqual(self.session.get.call_count, 2)
+        self.assertEqual(self.session.get.call_args[1]["timeout"], 5.0)
+        self.assertEqual(self.breaker.state, OPEN)
+
+        response = self.client.fetch_matches_list_json()
+        self.assertEqual(response["status"], "error")
+        self.assertIn("Circuit breaker test is open", response["error"])
+        self.assertFalse(self.client.login())
+        self.assertEqual(self.session.get.call_count, 2)
+
+    def test_transient_direct_errors(self):
+        """Test which direct FOGIS API errors are retried."""
+        from fogis_api_client import (
+            FogisAPIRequestError,
+            FogisAuthServiceUnavailableError,
+            FogisDataError,
+            FogisInvalidCredentialsError,
+        )
+
+        def wrapped(error, cause):
+            """Raise an error while handling its cause, as the FOGIS client does."""
+            try:
+                try:
+                    raise cause
+                except Exception:
+                    raise error
+            except Exception as e:
+                return e
+
+        self.assertTrue(is_transient_direct_error(FogisAuthServiceUnavailableError("down")))
+        self.assertTrue(
+            is_transient_direct_error(
+                wrapped(FogisAPIRequestError("failed"), requests.Timeout("slow"))
+            )
+        )
+        self.assertFalse(
+            is_transient_direct_error(wrapped(FogisAPIRequestError("failed"), http_error(400)))
+        )
+        self.assertFalse(is_transient_direct_error(FogisInvalidCredentialsError("bad password")))
+        self.assertFalse(is_transient_direct_error(FogisDataError("malformed")))
+
+    def test_direct_client_fails_fast_on_bad_credentials(self):
+        """Test that permanent direct API errors are not retried and leave the breaker closed."""
+        from fogis_api_client import FogisAuthServiceUnavailableError, FogisInvalidCredentialsError
+
+        client = CentralizedFogisApiClient(
+            breaker=CircuitBreaker("test", failure_threshold=2),
+            retry=RetryPolicy(attempts=3, sleep=MagicMock()),
+        )
+        client._direct_client = MagicMock()
+        client._direct_client.login.side_effect = FogisInvalidCredentialsError("bad password")
+
+        self.assertFalse(client.login())
+        self.assertEqual(client._direct_client.login.call_count, 1)
+        self.assertEqual(client.breaker.state, CLOSED)
+
+        client._direct_client.fetch_matches_list_json.side_effect = [
+            FogisAuthServiceUnavailableError("down"),
+            {"matches": []},
+        ]
+        self.assertEqual(client.fetch_matches_list_json(), {"matches": []})
+        self.assertEqual(client._direct_client.fetch_matches_list_json.call_count, 2)
+
+    def test_detector_client_uses_shared_breaker(self):
+        """Test that detector clients share the configured breaker of their name."""
+        import match_list_change_detector as detector_module
+
+        with patch.object(detector_module, "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 4):
+            client = detector_module.create_api_client(
+                "user", "password", "http://api", breaker_name="test-detector"
+            )
+            other = detector_module.create_api_client(
+                "user", "password", "http://api", breaker_name="test-detector"
+            )
+        self.assertIs(client.breaker, other.breaker)
+        self.assertEqual(client.breaker.failure_threshold, 4)
+
+        with patch.object(detector_module, "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 0):
+            client = detector_module.create_api_client("user", "password", "http://api")
+        self.assertIsNone(client.breaker)
+
+
+if __name__ == "__main__":
+    unittest.main()
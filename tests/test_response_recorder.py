@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Tests for the API response recorder and its stale fallback."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+from centralized_api_client import CentralizedFogisApiClient
+from response_recorder import ResponseRecorder
+from tests.test_utils import create_sample_match_data
+
+ERROR_RESPONSE = {"matches": [], "total": 0, "status": "error", "error": "timed out"}
+
+
+class TestResponseRecorder(unittest.TestCase):
+    """Test cases for ResponseRecorder."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        match = create_sample_match_data()
+        self.matches = [match, {**match, "matchid": match["matchid"] + 1}]
+
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.test_dir)
+
+    def test_records_responses_with_metadata(self):
+        """Test that responses are stored compressed with their request metadata."""
+        recorder = ResponseRecorder(self.test_dir)
+        entry = recorder.record(
+            {"matches": self.matches}, "http://api/matches", {"datumFran": "2025-07-01"}, 0.25
+        )
+
+        self.assertEqual(entry.path.name, "00000001-ok.json.gz")
+        self.assertEqual(os.path.getsize(entry.path), entry.size)
+        record = recorder.read(entry)
+        self.assertEqual(record["response"], {"matches": self.matches})
+        self.assertEqual(record["source"], "http://api/matches")
+        self.assertEqual(record["params"], {"datumFran": "2025-07-01"})
+        self.assertEqual(record["elapsed_seconds"], 0.25)
+        self.assertEqual(recorder.record(ERROR_RESPONSE).status, "error")
+
+        reopened = ResponseRecorder(self.test_dir)
+        self.assertEqual(reopened.last_good()["response"], {"matches": self.matches})
+        self.assertEqual(
+            list(reopened.iter_payloads()), [("00000001-ok.json.gz", {"matches": self.matches})]
+        )
+        self.assertEqual(len(list(reopened.iter_payloads(include_errors=True))), 2)
+
+    def test_ring_buffer_keeps_last_good_response(self):
+        """Test that the oldest responses are dropped except the newest successful one."""
+        recorder = ResponseRecorder(self.test_dir, max_entries=3)
+        recorder.record(self.matches[:1])
+        recorder.record(self.matches)
+        for _ in range(4):
+            recorder.record(ERROR_RESPONSE)
+
+        entries = recorder.entries()
+        self.assertEqual([entry.seq for entry in entries], [2, 5, 6])
+        self.assertEqual(ResponseRecorder(self.test_dir).last_good()["response"], self.matches)
+
+        recorder.record(self.matches[:1])
+        self.assertEqual([entry.seq for entry in recorder.entries()], [5, 6, 7])
+
+    def test_size_limit(self):
+        """Test that the total size of the kept responses is bounded."""
+        recorder = ResponseRecorder(self.test_dir, max_entries=0, max_bytes=1)
+        for _ in range(3):
+            recorder.record(self.matches)
+
+        self.assertEqual([entry.seq for entry in recorder.entries()], [3])
+
+
+class TestStaleFallback(unittest.TestCase):
+    """Test cases for the API client serving recorded responses."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        match = create_sample_match_data()
+        self.matches = [match, {**match, "matchid": match["matchid"] + 1}]
+        self.session = MagicMock()
+        self.session.get.return_value.json.return_value = self.matches
+
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.test_dir)
+
+    def client(self, recorder=None):
+        """Create a centralized service client using the mocked session."""
+        return CentralizedFogisApiClient(
+            api_client_url="http://api", session=self.session, recorder=recorder
+        )
+
+    def test_serves_last_good_response_when_fetch_fails(self):
+        """Test that a failed fetch returns the last recorded match list marked stale."""
+        recorder = ResponseRecorder(self.test_dir)
+        client = self.client(recorder)
+        fresh = client.fetch_matches_list_json({"datumFran": "2025-07-01"})
+        self.assertEqual(fresh["status"], "success")
+
+        self.session.get.side_effect = requests.ConnectionError("upstream down")
+        stale = client.fetch_matches_list_json({"datumFran": "2025-07-01"})
+
+        self.assertTrue(stale["stale"])
+        self.assertEqual(stale["status"], "stale")
+        self.assertEqual(stale["matches"], self.matches)
+        self.assertIn("upstream down", stale["error"])
+        self.assertLessEqual(stale["recorded_at"], time.time())
+        self.assertEqual([entry.status for entry in recorder.entries()], ["ok", "error"])
+        record = recorder.read(recorder.entries()[0])
+        self.assertEqual(record["source"], "http://api/matches")
+
+    def test_error_without_recorded_response(self):
+        """Test that failures are returned unchanged without a good response to serve."""
+        self.session.get.side_effect = requests.ConnectionError("upstream down")
+
+        self.assertEqual(self.client().fetch_matches_list_json()["status"], "error")
+        recorder = ResponseRecorder(self.test_dir)
+        self.assertEqual(self.client(recorder).fetch_matches_list_json()["status"], "error")
+
+    def test_detector_flags_stale_match_list(self):
+        """Test that the detector keeps the stale match list and records its staleness."""
+        from match_list_change_detector import MatchListChangeDetector, RateLimiter
+
+        recorder = ResponseRecorder(self.test_dir)
+        client = self.client(recorder)
+        metrics_recorder = MagicMock()
+        detector = MatchListChangeDetector(
+            "user",
+            "password",
+            api_client=client,
+            rate_limiter=RateLimiter(max_requests=100),
+            metrics_recorder=metrics_recorder,
+        )
+
+        self.assertTrue(detector.fetch_current_matches())
+        self.assertFalse(detector.fetch_was_stale)
+        metrics_recorder.record_fetch_staleness.assert_called_with(None)
+
+        self.session.get.side_effect = requests.ConnectionError("upstream down")
+        self.assertTrue(detector.fetch_current_matches())
+        self.assertTrue(detector.fetch_was_stale)
+        self.assertEqual(detector.current_matches, self.matches)
+        (age,), _ = metrics_recorder.record_fetch_staleness.call_args
+        self.assertGreaterEqual(age, 0)
+
+    def test_stale_cycle_is_not_recorded_as_a_snapshot(self):
+        """Test that a cycle on a stale response adds nothing to the snapshot history."""
+        from match_list_change_detector import MatchListChangeDetector, RateLimiter
+        from snapshot_history import SnapshotHistoryStore
+
+        history_file = os.path.join(self.test_dir, "snapshot_history.db")
+        client = self.client(ResponseRecorder(os.path.join(self.test_dir, "responses")))
+
+        def run_cycle():
+            detector = MatchListChangeDetector(
+                "user",
+                "password",
+                api_client=client,
+                rate_limiter=RateLimiter(max_requests=100),
+                previous_matches_file=os.path.join(self.test_dir, "previous_matches.json"),
+                changes_file=os.path.join(self.test_dir, "match_changes.json"),
+                change_history_file="",
+                snapshot_history_file=history_file,
+                metrics_recorder=MagicMock(),
+            )
+            detector.trigger_docker_compose = MagicMock(return_value=True)
+            self.assertTrue(detector.run())
+            return detector
+
+        self.assertFalse(run_cycle().fetch_was_stale)
+        self.session.get.side_effect = requests.ConnectionError("upstream down")
+        self.assertTrue(run_cycle().fetch_was_stale)
+
+        self.assertEqual(len(SnapshotHistoryStore(history_file).snapshots()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -171,12 +171,12 @@ class TestSecurityEnhancements(unittest.TestCase):
             self.assertIn(header, header_dict)
 
     @patch("health_server.ssl.SSLContext")
-    @patch("health_server.make_server")
-    def test_health_server_https_config(self, mock_make_server, mock_ssl_context):
+    @patch("health_server._HealthHTTPServer")
+    def test_health_server_https_config(self, mock_server_class, mock_ssl_context):
         """Test that the health server configures HTTPS correctly."""
         # Set up the mocks
         mock_server = MagicMock()
-        mock_make_server.return_value = mock_server
+        mock_server_class.return_value = mock_server
         mock_context = MagicMock()
         mock_ssl_context.return_value = mock_context
 
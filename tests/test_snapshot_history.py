@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Tests for the snapshot history store."""
+
+import copy
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from benchmarks.generator import ChangeRates, generate_match_list, next_version
+from snapshot_history import SnapshotHistoryStore, main
+
+
+class TestSnapshotHistoryStore(unittest.TestCase):
+    """Test cases for SnapshotHistoryStore."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "snapshot_history.db")
+        self.matches = generate_match_list(100, seed=11)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.test_dir)
+
+    def count(self, table):
+        """Count the rows of a history table."""
+        connection = sqlite3.connect(self.db_path)
+        try:
+            return connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        finally:
+            connection.close()
+
+    def record_versions(self, store, versions=4, start=1000.0):
+        """Record successive versions of the match list an hour apart."""
+        snapshots = [self.matches]
+        for seed in range(1, versions):
+            current, _ = next_version(
+                snapshots[-1], ChangeRates(new=0.05, removed=0.05, changed=0.1), seed=seed
+            )
+            snapshots.append(current)
+        for index, matches in enumerate(snapshots):
+            store.record(matches, taken_at=start + index * 3600)
+        return snapshots
+
+    def test_empty_history_does_not_create_database(self):
+        """Test that reading an empty history leaves the disk untouched."""
+        store = SnapshotHistoryStore(self.db_path)
+
+        self.assertEqual(store.snapshots(), [])
+        self.assertIsNone(store.snapshot_at(2000.0))
+        self.assertFalse(os.path.exists(self.db_path))
+
+    def test_stores_each_version_once(self):
+        """Test that unchanged matches and unchanged lists are not stored again."""
+        store = SnapshotHistoryStore(self.db_path)
+        first = store.record(self.matches, taken_at=1000.0)
+        second = store.record(copy.deepcopy(self.matches), taken_at=2000.0)
+
+        self.assertEqual(second, first + 1)
+        self.assertEqual(self.count("match_versions"), 100)
+        self.assertEqual(self.count("manifests"), 1)
+
+        changed = copy.deepcopy(self.matches)
+        changed[3]["avsparkstid"] = "23:59"
+        store.record(changed, taken_at=3000.0)
+        self.assertEqual(self.count("match_versions"), 101)
+        self.assertEqual(self.count("manifests"), 2)
+        self.assertEqual([entry["seq"] for entry in store.snapshots()], [1, 2, 3])
+
+    def test_reconstruct_at_time(self):
+        """Test that every snapshot is reconstructed as it was recorded."""
+        store = SnapshotHistoryStore(self.db_path)
+        snapshots = self.record_versions(store)
+
+        for index, matches in enumerate(snapshots):
+            with self.subTest(snapshot=index):
+                snapshot = store.snapshot_at(1000.0 + index * 3600 + 1800)
+                self.assertEqual(snapshot.seq, index + 1)
+                self.assertEqual(snapshot.matches, matches)
+                self.assertEqual(store.snapshot(index + 1).matches, matches)
+        self.assertIsNone(store.snapshot_at(999.0))
+
+    def test_reverted_match_versions(self):
+        """Test that a version that disappears and comes back is reconstructed everywhere."""
+        store = SnapshotHistoryStore(self.db_path, max_snapshots=2)
+        changed = copy.deepcopy(self.matches)
+        changed[0]["avsparkstid"] = "23:59"
+        removed = self.matches[1:]
+
+        for taken_at, matches in enumerate([self.matches, changed, removed, self.matches]):
+            store.record(matches, taken_at=float(taken_at))
+
+        self.assertEqual(store.snapshot_at(2.0).matches, removed)
+        self.assertEqual(store.snapshot_at(3.0).matches, self.matches)
+        self.assertIsNone(store.snapshot(2))
+        # The changed version was only used by the removed snapshots
+        self.assertEqual(self.count("match_versions"), 100)
+
+    def test_retention_collects_unreferenced_versions(self):
+        """Test that versions are removed together with the last snapshot using them."""
+        store = SnapshotHistoryStore(self.db_path, max_snapshots=2)
+        snapshots = self.record_versions(store, versions=5)
+
+        self.assertEqual([entry["seq"] for entry in store.snapshots()], [4, 5])
+        self.assertEqual(self.count("manifests"), 2)
+        kept_versions = {json.dumps(m, sort_keys=True) for m in snapshots[3] + snapshots[4]}
+        self.assertEqual(self.count("match_versions"), len(kept_versions))
+        self.assertEqual(store.snapshot_at(1e9).matches, snapshots[4])
+
+        aged = SnapshotHistoryStore(self.db_path, max_snapshots=0, max_age_days=1)
+        aged.record(snapshots[4], taken_at=1000.0 + 5 * 3600 + 86400)
+        self.assertEqual([entry["seq"] for entry in aged.snapshots()], [6])
+        self.assertEqual(self.count("match_versions"), len(snapshots[4]))
+
+    def test_export_command(self):
+        """Test that the command line exports a snapshot by sequence number."""
+        store = SnapshotHistoryStore(self.db_path)
+        snapshots = self.record_versions(store, versions=2, start=0.0)
+        output = os.path.join(self.test_dir, "export.json")
+
+        with patch("builtins.print"):
+            self.assertEqual(
+                main(["export", "--db", self.db_path, "--seq", "1", "--output", output]), 0
+            )
+        with open(output) as f:
+            self.assertEqual(json.load(f), snapshots[0])
+
+    def test_detector_records_snapshot_history(self):
+        """Test that the detector records saved match lists when the history is enabled."""
+        from match_list_change_detector import MatchListChangeDetector
+
+        detector = MatchListChangeDetector("user", "password", snapshot_history_file=self.db_path)
+        detector.current_matches = self.matches
+
+        self.assertEqual(detector.record_snapshot_history(), 1)
+        self.assertEqual(SnapshotHistoryStore(self.db_path).snapshot(1).matches, self.matches)
+
+        detector.snapshot_history_file = ""
+        self.assertIsNone(detector.record_snapshot_history())
+
+
+if __name__ == "__main__":
+    unittest.main()
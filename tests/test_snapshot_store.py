@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Tests for the SQLite snapshot store."""
+
+import copy
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from benchmarks.generator import ChangeRates, generate_match_list, next_version
+from snapshot_store import SnapshotSaveStats, SqliteSnapshotStore
+
+
+class TestSqliteSnapshotStore(unittest.TestCase):
+    """Test cases for SqliteSnapshotStore."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "previous_matches.db")
+        self.matches = generate_match_list(200, seed=7)
+
+    def tearDown(self):
+        """Clean up after each test."""
+        shutil.rmtree(self.test_dir)
+
+    def test_load_without_snapshot(self):
+        """Test that loading before the first save neither fails nor creates the database."""
+        store = SqliteSnapshotStore(self.db_path)
+
+        self.assertIsNone(store.load())
+        self.assertFalse(store.exists())
+        self.assertEqual(store.query(), [])
+        self.assertFalse(os.path.exists(self.db_path))
+
+    def test_round_trip_keeps_order(self):
+        """Test that a saved list loads back unchanged and in order."""
+        SqliteSnapshotStore(self.db_path).save(self.matches)
+
+        store = SqliteSnapshotStore(self.db_path)
+        self.assertTrue(store.exists())
+        self.assertEqual(store.load(), self.matches)
+        self.assertGreater(store.bytes_read, 0)
+
+        reordered = self.matches[::-1]
+        stats = store.save(reordered)
+        self.assertEqual(stats.unchanged, len(reordered))
+        self.assertEqual(SqliteSnapshotStore(self.db_path).load(), reordered)
+
+    def test_save_writes_only_changed_rows(self):
+        """Test that a save upserts new and changed matches and deletes removed ones."""
+        store = SqliteSnapshotStore(self.db_path)
+        first = store.save(self.matches)
+        self.assertEqual(first, SnapshotSaveStats(200, 0, 0, 0, first.bytes_written))
+
+        current, expected = next_version(
+            self.matches, ChangeRates(new=0.05, removed=0.05, changed=0.1), seed=8
+        )
+        # A fresh store compares with the rows on disk, not with a loaded list
+        stats = SqliteSnapshotStore(self.db_path).save(current)
+
+        self.assertEqual(
+            (stats.inserted, stats.deleted, stats.updated),
+            (expected.new, expected.removed, expected.changed),
+        )
+        self.assertEqual(stats.unchanged, len(current) - expected.new - expected.changed)
+        self.assertLess(stats.bytes_written, first.bytes_written)
+        self.assertEqual(store.load(), current)
+
+    def test_repeated_match_ids_keep_one_row(self):
+        """Test that a repeated ID keeps its first position and last version, like a dict."""
+        matches = copy.deepcopy(self.matches[:3])
+        duplicate = copy.deepcopy(matches[0])
+        duplicate["avsparkstid"] = "23:59"
+        matches.append(duplicate)
+
+        store = SqliteSnapshotStore(self.db_path)
+        store.save(matches)
+
+        self.assertEqual(store.load(), [duplicate] + matches[1:3])
+
+    def test_query_by_date_referee_venue_and_update_time(self):
+        """Test that stored matches can be found through the indexed columns."""
+        store = SqliteSnapshotStore(self.db_path)
+        store.save(self.matches, saved_at=100.0)
+        changed = copy.deepcopy(self.matches)
+        changed[5]["avsparkstid"] = "23:59"
+        store.save(changed, saved_at=200.0)
+
+        dates = sorted(match["speldatum"] for match in self.matches)
+        in_range = store.query(start_date=dates[50], end_date=dates[100])
+        self.assertEqual(
+            sorted(match["matchid"] for match in in_range),
+            sorted(m["matchid"] for m in self.matches if dates[50] <= m["speldatum"] <= dates[100]),
+        )
+
+        referee_id = self.matches[0]["domaruppdraglista"][0]["domareid"]
+        self.assertIn(
+            self.matches[0]["matchid"],
+            [match["matchid"] for match in store.query(referee_id=referee_id)],
+        )
+        for match in store.query(referee_id=referee_id):
+            self.assertIn(referee_id, [r["domareid"] for r in match["domaruppdraglista"]])
+
+        venue = changed[5]["anlaggningnamn"]
+        self.assertEqual(store.query(venue=venue, updated_since=150.0), [changed[5]])
+
+    def test_export_json(self):
+        """Test that the snapshot exports in the previous matches file format."""
+        store = SqliteSnapshotStore(self.db_path)
+        output = os.path.join(self.test_dir, "export", "previous_matches.json")
+        with self.assertRaises(FileNotFoundError):
+            store.export_json(output)
+
+        store.save(self.matches)
+        self.assertEqual(store.export_json(output), len(self.matches))
+        with open(output) as f:
+            self.assertEqual(json.load(f), self.matches)
+
+    def test_detector_sqlite_backend(self):
+        """Test that the detector migrates a JSON snapshot and then saves to SQLite."""
+        import match_list_change_detector as detector_module
+        from match_list_change_detector import MatchListChangeDetector
+
+        json_file = os.path.join(self.test_dir, "previous_matches.json")
+        with open(json_file, "w") as f:
+            json.dump(self.matches, f)
+        detector = MatchListChangeDetector("user", "password", previous_matches_file=json_file)
+
+        with patch.object(detector_module, "SNAPSHOT_BACKEND", "sqlite"):
+            self.assertTrue(detector.load_previous_matches())
+            self.assertEqual(detector.previous_matches, self.matches)
+
+            detector.current_matches = self.matches[:150]
+            self.assertTrue(detector.save_current_matches())
+            self.assertEqual(SqliteSnapshotStore(self.db_path).load(), self.matches[:150])
+            # Without the JSON export the file keeps the migrated snapshot
+            with open(json_file) as f:
+                self.assertEqual(json.load(f), self.matches)
+
+            detector.current_matches = self.matches[:100]
+            with patch.object(detector_module, "SNAPSHOT_JSON_EXPORT", True):
+                self.assertTrue(detector.save_current_matches())
+            with open(json_file) as f:
+                self.assertEqual(json.load(f), self.matches[:100])
+
+            detector.previous_matches = []
+            self.assertTrue(detector.load_previous_matches())
+            self.assertEqual(detector.previous_matches, self.matches[:100])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Tests for multi-tenant change detection."""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from prometheus_client import REGISTRY
+
+from benchmarks.api_stub import StubApiServer, StubApiSettings
+from benchmarks.generator import ChangeRates
+from metrics import metrics
+from tenants import Tenant, TenantPool, load_tenants
+
+
+class TestLoadTenants(unittest.TestCase):
+    """Test cases for loading the tenants file."""
+
+    def setUp(self):
+        """Create a temporary directory for tenants files."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.config = {
+            "CRON_SCHEDULE": "0 * * * *",
+            "DAYS_BACK": 7,
+            "DAYS_AHEAD": 365,
+            "DOCKER_COMPOSE_FILE": "orchestrator.yml",
+            "TENANT_DATA_DIR": os.path.join(self.temp_dir, "tenants"),
+        }
+
+    def write(self, entries):
+        """Write a tenants file and return its path."""
+        path = os.path.join(self.temp_dir, "tenants.json")
+        with open(path, "w") as f:
+            json.dump(entries, f)
+        return path
+
+    def test_defaults_and_overrides(self):
+        """Test that omitted settings come from the service configuration."""
+        path = self.write(
+            [
+                {"name": "north", "username": "n@example.com", "password": "secret"},
+                {
+                    "name": "south",
+                    "username": "s@example.com",
+                    "password_env": "TEST_TENANT_PASSWORD",
+                    "cron_schedule": "*/15 * * * *",
+                    "days_ahead": 30,
+                    "snapshot_history": True,
+                    "response_recorder": True,
+                },
+            ]
+        )
+
+        with patch.dict(os.environ, {"TEST_TENANT_PASSWORD": "from-env"}):
+            north, south = load_tenants(path, self.config)
+
+        self.assertEqual(north.cron_schedule, "0 * * * *")
+        self.assertEqual(north.days_ahead, 365)
+        self.assertEqual(north.docker_compose_file, "orchestrator.yml")
+        self.assertEqual(
+            north.previous_matches_file,
+            os.path.join(self.temp_dir, "tenants", "north", "previous_matches.json"),
+        )
+        self.assertEqual(south.password, "from-env")
+        self.assertEqual(south.cron_schedule, "*/15 * * * *")
+        self.assertEqual(south.days_ahead, 30)
+        self.assertEqual(north.snapshot_history_file, "")
+        self.assertEqual(
+            south.snapshot_history_file,
+            os.path.join(self.temp_dir, "tenants", "south", "snapshot_history.db"),
+        )
+        self.assertEqual(north.response_recorder_dir, "")
+        self.assertEqual(
+            south.response_recorder_dir,
+            os.path.join(self.temp_dir, "tenants", "south", "responses"),
+        )
+        self.assertNotIn("secret", repr(north))
+
+    def test_invalid_tenants(self):
+        """Test that invalid tenants files are rejected with a reason."""
+        valid = {"name": "north", "username": "n@example.com", "password": "secret"}
+        cases = {
+            "non-empty JSON list": [],
+            "invalid name": [dict(valid, name="../north")],
+            "more than once": [valid, valid],
+            "unknown settings": [dict(valid, pasword="typo")],
+            "needs a username": [dict(valid, password="")],
+            "invalid cron": [dict(valid, cron_schedule="every hour")],
+        }
+        for message, entries in cases.items():
+            with self.subTest(message=message):
+                with self.assertRaisesRegex(ValueError, message):
+                    load_tenants(self.write(entries), self.config)
+
+        with self.assertRaisesRegex(ValueError, "Cannot read"):
+            load_tenants(os.path.join(self.temp_dir, "missing.json"), self.config)
+
+
+class TestTenantPool(unittest.TestCase):
+    """Test cases for scheduling and running tenant cycles."""
+
+    def setUp(self):
+        """Create tenant settings in a temporary directory."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        path = os.path.join(self.temp_dir, "tenants.json")
+        with open(path, "w") as f:
+            json.dump(
+                [
+                    {"name": f"pool-{name}", "username": f"{name}@example.com", "password": "x"}
+                    for name in ("north", "south", "east")
+                ],
+                f,
+            )
+        self.configs = load_tenants(path, {"TENANT_DATA_DIR": self.temp_dir, "DAYS_BACK": 7})
+
+    def create_pool(self, **kwargs):
+        """Create a pool that is shut down after the test."""
+        pool = TenantPool(self.configs, **kwargs)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def test_start_due_runs_each_tenant_once(self):
+        """Test that due tenants are started and rescheduled after their cycle."""
+        ran = []
+        release = threading.Event()
+
+        def fake_cycle(tenant, on_changes=None):
+            ran.append(tenant.name)
+            release.wait(5)
+            return True
+
+        pool = self.create_pool(max_concurrency=2)
+        with patch.object(Tenant, "run_cycle", autospec=True, side_effect=fake_cycle):
+            self.assertEqual(pool.start_due(datetime.now()), [])
+
+            later = datetime.now() + timedelta(hours=1)
+            started = pool.start_due(later)
+            self.assertEqual(sorted(started), ["pool-east", "pool-north", "pool-south"])
+            self.assertIsNone(pool.trigger("pool-north"))
+            self.assertEqual(pool.start_due(later), [])
+
+            release.set()
+            deadline = time.monotonic() + 5
+            while len(ran) < 3 or any(tenant.running for tenant in pool.tenants.values()):
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+
+        self.assertEqual(sorted(ran), sorted(started))
+        self.assertGreater(pool.next_execution, later)
+        self.assertTrue(all(not tenant.running for tenant in pool.tenants.values()))
+
+    def test_trigger_backlog_counts_towards_tenant_readiness(self):
+        """Test that a triggered cycle is part of its tenant's trigger backlog until it ends."""
+        release = threading.Event()
+        pool = self.create_pool()
+        tenant = pool.tenants["pool-north"]
+        tenant.readiness.max_trigger_backlog = 0
+
+        def fake_cycle(tenant, on_changes=None):
+            release.wait(5)
+            return True
+
+        with patch.object(Tenant, "run_cycle", autospec=True, side_effect=fake_cycle):
+            future = pool.trigger("pool-north")
+            self.assertEqual(tenant.readiness.trigger_backlog, 1)
+            self.assertFalse(pool.readiness().ready)
+
+            release.set()
+            self.assertTrue(future.result(5))
+
+        self.assertEqual(tenant.readiness.trigger_backlog, 0)
+        self.assertEqual(pool.readiness().reasons, ())
+
+    def test_change_history_uses_configured_retention(self):
+        """Test that the tenant change feed reads with the retention the detector writes with."""
+        import match_list_change_detector as detector_module
+
+        pool = self.create_pool()
+        with (
+            patch.object(detector_module, "CHANGE_HISTORY_MAX_SETS", 7),
+            patch.object(detector_module, "CHANGE_HISTORY_MAX_AGE_DAYS", 2),
+        ):
+            store = pool.tenants["pool-north"].change_history
+
+        self.assertEqual(store.max_change_sets, 7)
+        self.assertEqual(store.max_age_seconds, 2 * 24 * 60 * 60)
+
+    def test_run_all_and_readiness(self):
+        """Test that failing tenants are reported by the combined readiness."""
+        pool = self.create_pool()
+        for tenant in pool.tenants.values():
+            tenant.readiness.max_consecutive_failures = 1
+
+        def fake_cycle(tenant, on_changes=None):
+            result = tenant.name != "pool-south"
+            tenant.readiness.record_cycle(result)
+            return result
+
+        with patch.object(Tenant, "run_cycle", autospec=True, side_effect=fake_cycle):
+            self.assertFalse(pool.run_all())
+
+        verdict = pool.readiness()
+        self.assertFalse(verdict.ready)
+        self.assertEqual(verdict.reasons, ("pool-south: 1 consecutive failed cycles",))
+        self.assertEqual(json.loads(verdict.body)["tenants"], 3)
+        with self.assertRaises(KeyError):
+            pool.trigger("pool-west")
+
+    def test_cycles_use_tenant_namespaces(self):
+        """Test that real cycles against a stub API write to each tenant's own files."""
+        changes = []
+        settings = StubApiSettings(matches=20, rates=ChangeRates(new=0.1, removed=0.1, changed=0.2))
+        with StubApiServer(settings) as stub:
+            configs = [config._replace(api_client_url=stub.url) for config in self.configs]
+            # One worker runs the tenants in order, so each round alternates the stub's versions
+            pool = TenantPool(
+                configs,
+                metrics_source=metrics,
+                max_concurrency=1,
+                on_changes=lambda name, change_set, seq: changes.append((name, seq)),
+            )
+            self.addCleanup(pool.shutdown)
+
+            self.assertTrue(pool.run_all())
+            self.assertTrue(pool.run_all())
+
+        for config in configs:
+            with open(config.previous_matches_file) as f:
+                self.assertIn(len(json.load(f)), (20, settings.matches + 2 - 2))
+            self.assertEqual(
+                REGISTRY.get_sample_value(
+                    "match_list_change_detector_tenant_matches_total", {"tenant": config.name}
+                ),
+                40,
+            )
+            history = pool.tenants[config.name].change_history.changes_since()
+            self.assertEqual(history["latest_seq"], 2)
+            self.assertEqual(changes.count((config.name, 2)), 1)
+
+        statuses = {status["name"]: status for status in pool.status()}
+        self.assertEqual(statuses["pool-north"]["execution_count"], 2)
+        self.assertTrue(statuses["pool-north"]["last_result"])
+
+    def test_stale_cycles_are_not_fresh(self):
+        """Test that a cycle on a stale recorded response does not count as a fresh success."""
+        import match_list_change_detector as detector_module
+
+        config = self.configs[0]._replace(response_recorder=True)
+        pool = TenantPool([config], metrics_source=metrics, max_concurrency=1)
+        self.addCleanup(pool.shutdown)
+        tenant = pool.tenants[config.name]
+
+        with patch.object(detector_module, "API_RETRY_ATTEMPTS", 1):
+            with StubApiServer(StubApiSettings(matches=20)) as stub:
+                tenant.config = config._replace(api_client_url=stub.url)
+                self.assertTrue(tenant.run_cycle())
+            self.assertEqual(tenant.readiness.consecutive_failures, 0)
+
+            # Nothing listens on port 1, so the recorder answers with its last good response
+            tenant._api_client.api_client_url = "http://127.0.0.1:1"
+            self.assertTrue(tenant.run_cycle())
+
+        self.assertTrue(tenant.last_result)
+        self.assertEqual(tenant.readiness.consecutive_failures, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -43,12 +43,18 @@ class MockHealthServer:
         use_https: bool = False,
         cert_file: Optional[str] = None,
         key_file: Optional[str] = None,
+        metrics_handler: Optional[Any] = None,
+        request_timeout: float = 5.0,
+        max_connections: int = 64,
     ):
         self.host = host
         self.port = port
         self.use_https = use_https
         self.cert_file = cert_file
         self.key_file = key_file
+        self.metrics_handler = metrics_handler
+        self.request_timeout = request_timeout
+        self.max_connections = max_connections
         self.running = False
 
     def start(self):
@@ -63,13 +69,76 @@ class MockHealthServer:
 class MockMetrics:
     """Mock implementation of metrics for testing."""
 
-    def time_api_request(self, operation: str):
+    def __init__(self):
+        self.server_started = False
+
+    def start_server(self, port: Optional[int] = None):
+        """Mock start_server method."""
+        self.server_started = True
+
+    def render(self):
+        """Mock render method."""
+        return b"", "text/plain"
+
+    def time_api_request(self, operation: str = "fetch_matches"):
         """Mock time_api_request context manager."""
         mock_cm = MagicMock()
         mock_cm.__enter__ = MagicMock(return_value=mock_cm)
         mock_cm.__exit__ = MagicMock(return_value=None)
         return mock_cm
 
+    def time_stage(self, stage: str):
+        """Mock time_stage context manager."""
+        mock_cm = MagicMock()
+        mock_cm.__enter__ = MagicMock(return_value=mock_cm)
+        mock_cm.__exit__ = MagicMock(return_value=None)
+        return mock_cm
+
+    def record_snapshot_read(self, num_bytes: int):
+        """Mock record_snapshot_read method."""
+
+    def record_snapshot_write(self, num_bytes: int):
+        """Mock record_snapshot_write method."""
+
+    def record_run(self):
+        """Mock record_run method."""
+
+    def record_matches(self, count: int):
+        """Mock record_matches method."""
+
+    def record_changes(self, new: int = 0, removed: int = 0, changed: int = 0):
+        """Mock record_changes method."""
+
+    def record_orchestrator_trigger(self):
+        """Mock record_orchestrator_trigger method."""
+
+    def record_orchestrator_failure(self):
+        """Mock record_orchestrator_failure method."""
+
+    def record_processing_time(self, seconds: float):
+        """Mock record_processing_time method."""
+
+    def record_fetch_failure(self):
+        """Mock record_fetch_failure method."""
+
+    def record_error(self):
+        """Mock record_error method."""
+
+    def record_fetch_staleness(self, age_seconds: Optional[float]):
+        """Mock record_fetch_staleness method."""
+
+    def record_quarantine(self, outcome: str):
+        """Mock record_quarantine method."""
+
+    def record_circuit_state(self, breaker: str, state: str):
+        """Mock record_circuit_state method."""
+
+    def record_circuit_rejection(self, breaker: str):
+        """Mock record_circuit_rejection method."""
+
+    def record_api_retry(self, breaker: str):
+        """Mock record_api_retry method."""
+
 
 def setup_module_mocks():
     """Set up module-level mocks to avoid import issues."""